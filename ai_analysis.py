@@ -1,37 +1,155 @@
-import json
-from collections import Counter
-
+import math
 import os
+import threading
+
+from src.aggregates import SectorAggregator
+from src.data_store import FILE_CONTENT, file_store
+
+
 class CorporateAnalysis:
-    def __init__(self, json_path=None):
+    def __init__(self, json_path=None, corporate_data_path=None):
         if json_path is None:
             json_path = os.path.join(os.path.dirname(__file__), 'data/corporate_structure.json')
-        with open(json_path, 'r') as f:
-            self.data = json.load(f)
+        if corporate_data_path is None:
+            corporate_data_path = os.path.join(
+                os.path.dirname(json_path), 'corporate_data.json'
+            )
+        # Parsed on first use and shared with the other analytics classes.
+        self.store = file_store(json_path)
+        self.financials_store = (
+            file_store(corporate_data_path)
+            if os.path.exists(corporate_data_path)
+            else None
+        )
+        self._columns = None
+        self._columns_version = None
+        self._analytics = None
+        self._analytics_version = None
+        self._aggregates = SectorAggregator()
+        self._aggregates_version = None
+        # Guards every cached view; reentrant because the analytics read columns.
+        self._lock = threading.RLock()
+
+    @property
+    def data(self):
+        return self.store.snapshot().get(FILE_CONTENT)
+
+    def _snapshots(self):
+        structure = self.store.snapshot()
+        financials = self.financials_store.snapshot() if self.financials_store else None
+        version = (structure.version, financials.version if financials else None)
+        return structure, financials, version
+
+    @property
+    def aggregates(self):
+        """
+        Per-sector counts and totals (src.aggregates), updated in place with only
+        the rows that changed when either file changes.
+        """
+        with self._lock:
+            structure, financials, version = self._snapshots()
+            if version != self._aggregates_version:
+                self._aggregates.sync(
+                    structure.get(FILE_CONTENT),
+                    financials.get(FILE_CONTENT) if financials else None,
+                )
+                self._aggregates_version = version
+            return self._aggregates
+
+    @property
+    def columns(self):
+        """
+        The universe as NumPy columns (src.columnar), rebuilt when either file changes.
+        """
+        with self._lock:
+            structure, financials, version = self._snapshots()
+            if version != self._columns_version:
+                from src.columnar import CompanyColumns
+
+                self._columns = CompanyColumns(
+                    structure.get(FILE_CONTENT),
+                    financials.get(FILE_CONTENT) if financials else None,
+                )
+                self._columns_version = version
+            return self._columns
 
     def sector_summary(self):
         """
         Returns a summary of sectors with the count of companies in each sector.
         """
-        sector_counts = {sector: len(companies) for sector, companies in self.data.items()}
-        return sector_counts
+        return self.aggregates.counts()
 
-    def top_sectors(self, top_n=5):
+    def top_sectors(self, top_n=5, by='companies'):
         """
-        Returns the top N sectors by number of companies.
+        Returns the top N sectors by number of companies, or by the total
+        ('market_cap', 'revenue') or mean ('market_cap_mean', 'revenue_mean')
+        of a financial field.
         """
-        sector_counts = self.sector_summary()
-        sorted_sectors = sorted(sector_counts.items(), key=lambda x: x[1], reverse=True)
-        return sorted_sectors[:top_n]
+        return self.aggregates.top(top_n, by)
+
+    def sector_stats(self, sector=None):
+        """
+        Returns the company count and the known count, total and mean market cap
+        and revenue of one sector, or of every sector keyed by name.
+        """
+        return self.aggregates.stats(sector)
+
+    def sector_analytics(self):
+        """
+        Returns per-sector and overall market cap and revenue statistics, revenue
+        shares, price-to-sales ratios and Herfindahl indexes (src.analytics).
+        """
+        with self._lock:
+            columns = self.columns
+            if self._analytics_version != self._columns_version:
+                from src.analytics import SectorAnalytics
+
+                self._analytics = SectorAnalytics(columns).as_dict()
+                self._analytics_version = self._columns_version
+            return self._analytics
+
+    def filter_companies(self, min_market_cap=None, max_market_cap=None, sectors=None):
+        """
+        Returns the companies whose market cap is within the bounds, in file order.
+        Companies without a known market cap are excluded when a bound is given.
+        """
+        columns = self.columns
+        mask = columns.select(
+            sectors=sectors,
+            min_market_cap=min_market_cap,
+            max_market_cap=max_market_cap,
+        ) & columns.classified()
+        return [self._company(columns, row) for row in mask.nonzero()[0]]
+
+    def top_companies(self, top_n=10, by='market_cap', sector=None):
+        """
+        Returns the top N companies by market cap or revenue, largest first.
+        """
+        columns = self.columns
+        if sector is not None:
+            mask = columns.in_sectors([sector])
+        else:
+            mask = columns.classified()
+        return [self._company(columns, row) for row in columns.top_n(by, top_n, mask)]
+
+    @staticmethod
+    def _company(columns, row):
+        market_cap = columns.market_cap[row]
+        revenue = columns.revenue[row]
+        return {
+            'ticker': columns.tickers[row],
+            'name': columns.names[row],
+            'sector': columns.sectors[columns.sector_codes[row]],
+            'market_cap': None if math.isnan(market_cap) else float(market_cap),
+            'revenue': None if math.isnan(revenue) else float(revenue),
+        }
 
     def company_distribution(self):
         """
         Returns the distribution of companies across all sectors.
         """
-        distribution = {}
-        for sector, companies in self.data.items():
-            distribution[sector] = [company.get('name', 'Unknown') for company in companies]
-        return distribution
+        aggregates = self.aggregates
+        return {sector: aggregates.names(sector) for sector in aggregates.sectors}
 
 if __name__ == "__main__":
     analysis = CorporateAnalysis()
@@ -1,17 +1,33 @@
-import json
-import re
-
 import json
 import re
 import os
 
+from src.data_store import FILE_CONTENT, file_store
+from src.indexes import TickerIndex
+
+TICKER_INDEX = "ticker_index"
+
+
+def build_ticker_index(snapshot):
+    return TickerIndex(snapshot.get(FILE_CONTENT))
+
+
 class CorporateStructureAI:
     def __init__(self, json_path=None):
         if json_path is None:
             json_path = os.path.join(os.path.dirname(__file__), 'data/corporate_structure.json')
         self.json_path = json_path
-        with open(json_path, 'r') as f:
-            self.data = json.load(f)
+        # The file is parsed on first use and shared by every instance.
+        self.store = file_store(json_path)
+        self.store.register_derived(TICKER_INDEX, build_ticker_index)
+
+    @property
+    def data(self):
+        return self.store.snapshot().get(FILE_CONTENT)
+
+    @property
+    def ticker_index(self):
+        return self.store.snapshot().derived(TICKER_INDEX)
 
     def get_sectors(self):
         """
@@ -29,12 +45,16 @@ class CorporateStructureAI:
         """
         Return company details by ticker (case-insensitive).
         """
-        ticker = ticker.lower()
-        for sector, companies in self.data.items():
-            for company in companies:
-                if company.get('ticker', '').lower() == ticker:
-                    return company
-        return "Company not found."
+        entry = self.ticker_index.get(ticker)
+        if entry is None:
+            return "Company not found."
+        return entry[1]
+
+    def search_tickers(self, prefix, limit=10):
+        """
+        Return companies whose ticker starts with the given prefix (case-insensitive).
+        """
+        return [company for _, company in self.ticker_index.prefix(prefix, limit)]
 
     def query(self, query_str):
         """
@@ -61,18 +81,20 @@ class CorporateStructureAI:
         Update the revenue for a company identified by ticker.
         Saves the updated data back to the JSON file.
         """
-        updated = False
-        for sector, companies in self.data.items():
-            for company in companies:
-                if company.get('ticker', '').lower() == ticker.lower():
-                    company['revenue'] = new_revenue
-                    updated = True
-                    break
-            if updated:
-                break
+        entry = self.ticker_index.get(ticker)
+        updated = entry is not None
         if updated:
+            # Snapshots are shared and never mutated: write a changed copy
+            # and publish it as the next snapshot.
+            sector, company = entry
+            data = dict(self.data)
+            data[sector] = [
+                dict(item, revenue=new_revenue) if item is company else item
+                for item in data[sector]
+            ]
             with open(self.json_path, 'w') as f:
-                json.dump(self.data, f, indent=4)
+                json.dump(data, f, indent=4)
+            self.store.refresh(wait=True)
         return updated
 
 if __name__ == "__main__":
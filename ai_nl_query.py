@@ -3,7 +3,14 @@ from ai_component import CorporateStructureAI
 
 class NaturalLanguageQuery:
     def __init__(self):
-        self.ai = CorporateStructureAI()
+        self._ai = None
+
+    @property
+    def ai(self):
+        # Created on the first query that needs data, not at construction.
+        if self._ai is None:
+            self._ai = CorporateStructureAI()
+        return self._ai
 
     def parse_query(self, query):
         """
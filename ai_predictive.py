@@ -1,23 +1,77 @@
-import json
-import numpy as np
-from sklearn.linear_model import LinearRegression
-
-import json
 import os
 
+from src.data_store import FILE_CONTENT, file_store
+
+# numpy and scikit-learn are imported on first use; they take longer to
+# import than the whole API server.
+
+
 class CorporatePredictiveModel:
-    def __init__(self, json_path=None):
+    def __init__(self, json_path=None, history_path=None):
         if json_path is None:
             json_path = os.path.join(os.path.dirname(__file__), 'data/corporate_structure.json')
-        with open(json_path, 'r') as f:
-            self.data = json.load(f)
-        self.model = LinearRegression()
+        if history_path is None:
+            history_path = os.path.join(
+                os.path.dirname(json_path), 'financial_history.json'
+            )
+        self.store = file_store(json_path)
+        # Per-ticker revenue and market cap series (format in src.forecasting),
+        # written by record_financial_history.py; it may appear after start-up.
+        self.history_path = history_path
+        self._history_store = None
+        self._model = None
+        self._forecaster = None
+        self._forecaster_version = None
+
+    @property
+    def data(self):
+        return self.store.snapshot().get(FILE_CONTENT)
+
+    @property
+    def history_store(self):
+        if self._history_store is None and os.path.exists(self.history_path):
+            self._history_store = file_store(self.history_path)
+        return self._history_store
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sklearn.linear_model import LinearRegression
+
+            self._model = LinearRegression()
+        return self._model
+
+    @property
+    def forecaster(self):
+        """
+        Trend models for every ticker of the history file, refitted when it changes.
+        """
+        snapshot = self.history_store.snapshot() if self.history_store else None
+        version = snapshot.version if snapshot else None
+        if self._forecaster is None or version != self._forecaster_version:
+            from src.forecasting import TrendForecaster
+
+            history = snapshot.get(FILE_CONTENT) if snapshot else None
+            self._forecaster = TrendForecaster(history)
+            self._forecaster_version = version
+        return self._forecaster
+
+    def predict_many(self, tickers, horizons=1):
+        """
+        Forecast revenue and market cap for many tickers from their own history.
+        horizons is a number of periods after each ticker's last known value, or a
+        list of them. Returns {ticker: {'revenue': [...], 'market_cap': [...]}}
+        with one value per horizon, or None for tickers without history.
+        """
+        return self.forecaster.predict_many(tickers, horizons)
 
     def prepare_data(self):
         """
         Prepare dummy time series data for predictive modeling.
         This is a placeholder for real financial time series data.
         """
+        import numpy as np
+
         # Example: Generate synthetic data for demonstration
         X = np.array([[i] for i in range(10)])  # Time steps
         y = np.array([i * 2 + 1 for i in range(10)])  # Dummy target variable
@@ -31,6 +85,8 @@ class CorporatePredictiveModel:
         """
         Predict the value at a given time step.
         """
+        import numpy as np
+
         return self.model.predict(np.array([[time_step]]))[0]
 
 if __name__ == "__main__":
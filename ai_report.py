@@ -1,42 +1,265 @@
-import json
+import contextlib
 import csv
+import json
+import math
+import os
+
 from ai_analysis import CorporateAnalysis
+from src import json_provider
+
+COMPANY_FIELDS = ('ticker', 'name', 'sector', 'market_cap', 'revenue')
+DEFAULT_CHUNK_SIZE = 10000
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+
+def _number(value):
+    return None if value is None or math.isnan(value) else value
+
+
+def _format_number(value, spec=',.0f'):
+    return 'n/a' if value is None else format(value, spec)
+
+
+class TextReportWriter:
+    def __init__(self, filename):
+        self.file = open(filename, 'w', buffering=WRITE_BUFFER_BYTES)
+        self.sector = None
+
+    def begin(self, report):
+        f = self.file
+        f.write("Corporate Structure Report\n")
+        f.write("=========================\n\n")
+        f.write("Sector Summary:\n")
+        for sector, count in report['sector_summary'].items():
+            f.write(f"- {sector}: {count} companies\n")
+        f.write("\nTop Sectors:\n")
+        for sector, count in report['top_sectors']:
+            f.write(f"- {sector}: {count} companies\n")
+        f.write("\nSector Analytics:\n")
+        analytics = report['sector_analytics']
+        rows = [*analytics['sectors'].items(), ('Overall', analytics['overall'])]
+        for sector, stats in rows:
+            share = stats['revenue_share']
+            market_cap = stats['market_cap']
+            # The total of no known values is 0; report it as unknown like the median.
+            total = market_cap['total'] if market_cap['known'] else None
+            f.write(
+                f"- {sector}: market cap total {_format_number(total)}, "
+                f"median {_format_number(market_cap['median'])}; "
+                f"revenue share {_format_number(share, '.1%')}; "
+                f"P/S {_format_number(stats['price_to_sales']['aggregate'], '.2f')}; "
+                f"HHI {_format_number(stats['market_cap']['herfindahl'], '.4f')}\n"
+            )
+
+    def write_companies(self, companies):
+        lines = []
+        for company in companies:
+            if company['sector'] != self.sector:
+                if self.sector is None:
+                    lines.append("\nCompanies:\n")
+                self.sector = company['sector']
+                lines.append(f"{self.sector}:\n")
+            lines.append(
+                f"- {company['ticker']} {company['name']}: market cap "
+                f"{_format_number(company['market_cap'])}, revenue "
+                f"{_format_number(company['revenue'])}\n"
+            )
+        self.file.write(''.join(lines))
+
+    def close(self):
+        self.file.close()
+
+
+class CsvReportWriter:
+    """
+    Writes the sector table, a blank row, then the company table.
+    """
+
+    def __init__(self, filename):
+        self.file = open(filename, 'w', newline='', buffering=WRITE_BUFFER_BYTES)
+        self.writer = csv.writer(self.file)
+        self.started = False
+
+    def begin(self, report):
+        self.writer.writerow(['Sector', 'Number of Companies'])
+        self.writer.writerows(report['sector_summary'].items())
+
+    def write_companies(self, companies):
+        if not self.started:
+            self.writer.writerows(
+                [[], ['Ticker', 'Name', 'Sector', 'Market Cap', 'Revenue']]
+            )
+            self.started = True
+        self.writer.writerows(
+            [company[field] for field in COMPANY_FIELDS] for company in companies
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class JsonReportWriter:
+    """
+    Writes one JSON object whose "companies" list is streamed one chunk per line.
+    """
+
+    def __init__(self, filename):
+        self.file = open(filename, 'wb', buffering=WRITE_BUFFER_BYTES)
+        self.separator = b'\n'
+
+    def begin(self, report):
+        head = json_provider.dumps_bytes(report, indent=2)
+        # Reopen the object to append the company list.
+        self.file.write(head[:-2] + b',\n  "companies": [')
+
+    def write_companies(self, companies):
+        if companies:
+            self.file.write(self.separator + json_provider.dumps_bytes(companies)[1:-1])
+            self.separator = b',\n'
+
+    def close(self):
+        self.file.write(b'\n  ]\n}\n' if self.separator != b'\n' else b']\n}\n')
+        self.file.close()
+
+
+class ParquetReportWriter:
+    """
+    Writes the company table, one row group per chunk, with the summary as JSON
+    in the file's key-value metadata. Needs pyarrow.
+    """
+
+    def __init__(self, filename):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as exc:
+            raise ImportError("Parquet reports need the pyarrow package") from exc
+        self.pyarrow = pyarrow
+        self.filename = filename
+        self.writer = None
+        self.schema = pyarrow.schema(
+            [
+                ('ticker', pyarrow.string()),
+                ('name', pyarrow.string()),
+                ('sector', pyarrow.string()),
+                ('market_cap', pyarrow.float64()),
+                ('revenue', pyarrow.float64()),
+            ]
+        )
+
+    def begin(self, report):
+        self.schema = self.schema.with_metadata({'report': json.dumps(report)})
+        self.writer = self.pyarrow.parquet.ParquetWriter(self.filename, self.schema)
+
+    def write_companies(self, companies):
+        if companies:
+            self.writer.write_table(
+                self.pyarrow.Table.from_pylist(companies, schema=self.schema)
+            )
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {
+    'text': TextReportWriter,
+    'csv': CsvReportWriter,
+    'json': JsonReportWriter,
+    'parquet': ParquetReportWriter,
+}
+
 
-import os
 class ReportGenerator:
-    def __init__(self, json_path=None):
+    def __init__(self, json_path=None, corporate_data_path=None):
         if json_path is None:
-            json_path = os.path.join(os.path.dirname(__file__), 'data/corporate_structure.json')
-        self.analysis = CorporateAnalysis(json_path)
+            json_path = os.path.join(
+                os.path.dirname(__file__), 'data/corporate_structure.json'
+            )
+        self.analysis = CorporateAnalysis(json_path, corporate_data_path)
+
+    def build_summary(self):
+        """
+        Returns the sector-level part of the report, computed once per run.
+        """
+        return {
+            'sector_summary': self.analysis.sector_summary(),
+            'top_sectors': self.analysis.top_sectors(),
+            'sector_analytics': self.analysis.sector_analytics(),
+        }
+
+    def iter_company_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Yields lists of at most chunk_size company rows, in structure order.
+        """
+        columns = self.analysis.columns
+        for start in range(0, columns.structure_rows, chunk_size):
+            stop = min(start + chunk_size, columns.structure_rows)
+            codes = columns.sector_codes[start:stop].tolist()
+            sectors = [columns.sectors[code] for code in codes]
+            yield [
+                {
+                    'ticker': ticker,
+                    'name': name,
+                    'sector': sector,
+                    'market_cap': _number(market_cap),
+                    'revenue': _number(revenue),
+                }
+                for ticker, name, sector, market_cap, revenue in zip(
+                    columns.tickers[start:stop],
+                    columns.names[start:stop],
+                    sectors,
+                    columns.market_cap[start:stop].tolist(),
+                    columns.revenue[start:stop].tolist(),
+                )
+            ]
+
+    def generate(self, outputs, include_companies=True, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Writes one report per entry of outputs (format -> filename) in a single
+        pass: the summary is computed once and each chunk of company rows is
+        handed to every writer before the next chunk is built, so memory stays
+        bounded by chunk_size whatever the size of the universe.
+
+        No file is opened until the summary is built, and if writing or closing
+        fails the files opened so far are removed rather than left truncated.
+        """
+        unknown = set(outputs) - set(WRITERS)
+        if unknown:
+            raise ValueError(f"Unknown report formats: {', '.join(sorted(unknown))}")
+        summary = self.build_summary()
+        writers = []
+        try:
+            for report_format, filename in outputs.items():
+                writers.append((WRITERS[report_format](filename), filename))
+            for writer, _ in writers:
+                writer.begin(summary)
+            if include_companies:
+                for companies in self.iter_company_chunks(chunk_size):
+                    for writer, _ in writers:
+                        writer.write_companies(companies)
+            for writer, _ in writers:
+                writer.close()
+        except BaseException:
+            for writer, filename in writers:
+                with contextlib.suppress(Exception):
+                    writer.close()
+                if os.path.exists(filename):
+                    os.remove(filename)
+            raise
 
     def generate_text_report(self, filename='report.txt'):
-        sector_summary = self.analysis.sector_summary()
-        top_sectors = self.analysis.top_sectors()
-        with open(filename, 'w') as f:
-            f.write("Corporate Structure Report\n")
-            f.write("=========================\n\n")
-            f.write("Sector Summary:\n")
-            for sector, count in sector_summary.items():
-                f.write(f"- {sector}: {count} companies\n")
-            f.write("\nTop Sectors:\n")
-            for sector, count in top_sectors:
-                f.write(f"- {sector}: {count} companies\n")
+        self.generate({'text': filename})
 
     def generate_csv_report(self, filename='report.csv'):
-        sector_summary = self.analysis.sector_summary()
-        with open(filename, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Sector', 'Number of Companies'])
-            for sector, count in sector_summary.items():
-                writer.writerow([sector, count])
+        self.generate({'csv': filename})
 
     def generate_json_report(self, filename='report.json'):
-        sector_summary = self.analysis.sector_summary()
-        with open(filename, 'w') as f:
-            json.dump(sector_summary, f, indent=4)
+        self.generate({'json': filename})
+
+    def generate_parquet_report(self, filename='report.parquet'):
+        self.generate({'parquet': filename})
 
 if __name__ == "__main__":
     report = ReportGenerator()
-    report.generate_text_report()
-    report.generate_csv_report()
-    report.generate_json_report()
+    report.generate({'text': 'report.txt', 'csv': 'report.csv', 'json': 'report.json'})
@@ -0,0 +1,4 @@
+"""Benchmarks for Equity Shield Advocates.
+
+Run a module with ``python -m benchmarks.<name>`` from the repository root.
+"""
@@ -0,0 +1,534 @@
+"""Benchmark every API route in-process at several synthetic data scales.
+
+Requests go through the Flask test client, or through a local waitress
+server with ``--server waitress``. Rate limits are lifted and the response
+cache is cleared before every request, so each timing covers the full
+handler. Each route is measured in ``--rounds`` rounds and the best
+round is reported. Results can be saved as a baseline and later compared
+against it; a route whose p95 or throughput regresses past ``--tolerance``
+(and by more than ``--min-delta-ms``) makes the run exit with status 1.
+
+Every run also times a fixed CPU-bound calibration workload, which is
+saved with the baseline. Comparisons scale the baseline by the ratio of
+the two calibrations, so what is compared is each route's cost relative
+to the host's speed, and a baseline recorded on one machine applies to
+another.
+
+Usage::
+
+    python -m benchmarks.bench_api [--sizes 10 1000 100000 1000000]
+        [--duration 1.0] [--server client|waitress]
+        [--baseline FILE] [--save-baseline]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import http.client
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Tuple,
+)
+from unittest.mock import patch
+
+from benchmarks.synthetic import DEFAULT_SEED, SECTORS, generate_universe, make_ticker
+
+API_KEY = "benchmark-api-key"
+DEFAULT_SIZES = [10, 1_000, 100_000, 1_000_000]
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+DEFAULT_TOLERANCE = 0.5
+DEFAULT_MIN_DELTA_MS = 1.0
+DEFAULT_ROUNDS = 3
+CALIBRATION_ROUNDS = 5
+CALIBRATION_RECORDS = 20_000
+MIN_REQUESTS = 5
+MAX_REQUESTS = 2_000
+
+
+class Call(NamedTuple):
+    """One request: method, path with query string and optional JSON body."""
+
+    method: str
+    path: str
+    body: Optional[Dict[str, Any]] = None
+
+
+Scenario = Callable[[random.Random, int], Call]
+
+
+def _ticker(rng: random.Random, size: int) -> str:
+    return make_ticker(rng.randrange(size))
+
+
+def _page(rng: random.Random, size: int, per_page: int = 50) -> int:
+    return rng.randint(1, max(1, size // (per_page * 4)))
+
+
+# Scenario name -> request factory. Names are stable baseline keys.
+SCENARIOS: Dict[str, Scenario] = {
+    "health": lambda rng, size: Call("GET", "/health"),
+    "metrics": lambda rng, size: Call("GET", "/metrics"),
+    "cache-stats": lambda rng, size: Call("GET", "/api/v1/cache/stats"),
+    "corporate-data": lambda rng, size: Call("GET", "/api/v1/corporate-data"),
+    "corporate-structure": lambda rng, size: Call("GET", "/api/v1/corporate-structure"),
+    "companies-by-sector": lambda rng, size: Call(
+        "GET",
+        f"/api/companies/{rng.choice(SECTORS[:3])}?page={_page(rng, size)}&per_page=50",
+    ),
+    "companies-cursor": lambda rng, size: Call(
+        "GET", f"/api/companies/{SECTORS[0]}?cursor=&per_page=50&include_total=false"
+    ),
+    "company-by-ticker": lambda rng, size: Call(
+        "GET", f"/api/company/{_ticker(rng, size)}"
+    ),
+    "companies-batch": lambda rng, size: Call(
+        "POST",
+        "/api/v1/companies:batch",
+        {"tickers": [_ticker(rng, size) for _ in range(100)] + ["MISSING"]},
+    ),
+    "tickers-prefix": lambda rng, size: Call(
+        "GET", f"/api/v1/tickers?prefix={_ticker(rng, size)[:2]}&limit=20"
+    ),
+    "real-assets-page": lambda rng, size: Call(
+        "GET", f"/api/v1/real-assets?page={_page(rng, size)}&per_page=50"
+    ),
+    "real-assets-sorted": lambda rng, size: Call(
+        "GET",
+        f"/api/v1/real-assets?sort_by={rng.choice(['market_cap', 'revenue'])}"
+        f"&sort_order=desc&page={_page(rng, size)}&per_page=50",
+    ),
+    "real-assets-filtered": lambda rng, size: Call(
+        "GET",
+        "/api/v1/real-assets?min_market_cap=1e10&max_market_cap=1e11"
+        "&sort_by=market_cap&per_page=50",
+    ),
+    "real-assets-cursor": lambda rng, size: Call(
+        "GET", "/api/v1/real-assets?cursor=&sort_by=revenue&per_page=50"
+    ),
+    "analytics-sectors": lambda rng, size: Call("GET", "/api/v1/analytics/sectors"),
+    "analytics-sector": lambda rng, size: Call(
+        "GET", f"/api/v1/analytics/sectors/{rng.choice(SECTORS[:3])}"
+    ),
+    "export-companies": lambda rng, size: Call(
+        "GET", f"/api/v1/export/companies.ndjson?sector={SECTORS[0]}"
+    ),
+    "export-real-assets": lambda rng, size: Call(
+        "GET",
+        "/api/v1/export/real-assets.ndjson?min_market_cap=1e11&sort_by=market_cap",
+    ),
+    "banking-info": lambda rng, size: Call("GET", "/api/banking-info"),
+    "bank-account": lambda rng, size: Call("GET", "/api/banks/jpmorgan-chase/account"),
+    "validate-routing": lambda rng, size: Call(
+        "POST", "/api/banks/validate-routing", {"routing_number": "021000021"}
+    ),
+    "bank-transfer": lambda rng, size: Call(
+        "POST",
+        "/api/banks/transfer",
+        {
+            "from_bank": "citi-private-bank",
+            "to_bank": "jpmorgan-chase",
+            "amount": rng.randint(1, 10_000),
+            "currency": "USD",
+        },
+    ),
+}
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of ``samples`` (which must be sorted)."""
+    index = max(0, min(len(samples) - 1, int(round(fraction * len(samples))) - 1))
+    return samples[index]
+
+
+class Driver(Protocol):
+    def send(self, call: Call) -> Tuple[int, int]:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+class ClientDriver:
+    """Send requests through the Flask test client."""
+
+    def __init__(self, app: Any) -> None:
+        self.client = app.test_client()
+
+    def send(self, call: Call) -> Tuple[int, int]:
+        response = self.client.open(
+            call.path,
+            method=call.method,
+            json=call.body,
+            headers={"X-API-KEY": API_KEY},
+        )
+        return response.status_code, len(response.get_data())
+
+    def close(self) -> None:
+        pass
+
+
+class WaitressDriver:
+    """Send requests over keep-alive HTTP to a waitress server in a thread."""
+
+    def __init__(self, app: Any, threads: int = 4) -> None:
+        from waitress.server import create_server
+
+        self.socket_map: Dict[int, Any] = {}
+        self.server = create_server(
+            app, map=self.socket_map, host="127.0.0.1", port=0, threads=threads
+        )
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+        self.connection = http.client.HTTPConnection(
+            "127.0.0.1", self.server.effective_port, timeout=120
+        )
+
+    def _serve(self) -> None:
+        while not self.stopping.is_set():
+            self.server.asyncore.loop(timeout=0.1, map=self.socket_map, count=1)
+
+    def send(self, call: Call) -> Tuple[int, int]:
+        headers = {"X-API-KEY": API_KEY}
+        body = None
+        if call.body is not None:
+            body = json.dumps(call.body)
+            headers["Content-Type"] = "application/json"
+        self.connection.request(call.method, call.path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        return response.status, len(response.read())
+
+    def close(self) -> None:
+        self.connection.close()
+        self.stopping.set()
+        self.thread.join()
+        self.server.task_dispatcher.shutdown()
+        for channel in list(self.socket_map.values()):
+            channel.close()
+
+
+@contextmanager
+def published_files(store: Any, **contents: Any) -> Iterator[None]:
+    """Serve ``contents`` from temporary files through ``store``'s reload path."""
+    from src import json_provider
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {}
+        for name, content in contents.items():
+            paths[name] = os.path.join(directory, f"{name}.json")
+            with open(paths[name], "wb") as file_handle:
+                file_handle.write(json_provider.dumps_bytes(content))
+        try:
+            with patch.dict(store.paths, paths):
+                store.refresh(wait=True)
+                yield
+        finally:
+            store.refresh(wait=True)
+
+
+@contextmanager
+def benchmark_app(size: int, seed: int) -> Iterator[Any]:
+    """Serve a synthetic universe of ``size`` companies with limits lifted."""
+    from src import api_server
+    from src.rate_limit import MemoryBucketStore, Tier, TokenBucketLimiter
+
+    structure, corporate_data = generate_universe(size, seed)
+    unlimited = TokenBucketLimiter(
+        MemoryBucketStore(),
+        {"bench": Tier("bench", capacity=1e12, refill_rate=1e12)},
+        default_tier="bench",
+    )
+    with ExitStack() as stack:
+        stack.enter_context(patch.dict(os.environ, {"API_KEY": API_KEY}))
+        stack.enter_context(patch.object(api_server, "token_buckets", unlimited))
+        stack.enter_context(patch.object(api_server.limiter, "enabled", False))
+        stack.enter_context(
+            published_files(
+                api_server.data_store,
+                corporate_structure=structure,
+                corporate_data=corporate_data,
+            )
+        )
+        yield api_server
+
+
+def measure_round(
+    driver: Any,
+    clear_cache: Callable[[], None],
+    scenario: Scenario,
+    rng: random.Random,
+    size: int,
+    duration: float,
+) -> Dict[str, Any]:
+    """Send requests for about ``duration`` seconds and summarise them."""
+    gc.collect()  # don't bill this round for earlier garbage
+    timings: List[float] = []
+    errors = 0
+    response_bytes = 0
+    started = time.perf_counter()
+    while len(timings) < MAX_REQUESTS and (
+        len(timings) < MIN_REQUESTS or time.perf_counter() - started < duration
+    ):
+        call = scenario(rng, size)
+        clear_cache()
+        request_started = time.perf_counter()
+        status, length = driver.send(call)
+        timings.append(time.perf_counter() - request_started)
+        errors += status >= 400
+        response_bytes += length
+
+    timings.sort()
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "throughput": len(timings) / sum(timings),
+        "mean_bytes": response_bytes // len(timings),
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "p99_ms": percentile(timings, 0.99) * 1000,
+    }
+
+
+def run_scenario(
+    driver: Any,
+    clear_cache: Callable[[], None],
+    scenario: Scenario,
+    size: int,
+    duration: float,
+    seed: int,
+    rounds: int = DEFAULT_ROUNDS,
+) -> Dict[str, Any]:
+    """Time one scenario for about ``duration`` seconds split into ``rounds``.
+
+    Like ``timeit``, the best round is reported: interference from the rest
+    of the machine only ever slows a round down, so the fastest one is the
+    most repeatable estimate.
+    """
+    rng = random.Random(seed)
+    driver.send(scenario(rng, size))  # warm up lazy indexes and connections
+    measured = [
+        measure_round(driver, clear_cache, scenario, rng, size, duration / rounds)
+        for _ in range(rounds)
+    ]
+    best = min(measured, key=lambda row: row["p95_ms"])
+    return {
+        **best,
+        "requests": sum(row["requests"] for row in measured),
+        "errors": sum(row["errors"] for row in measured),
+        "throughput": max(row["throughput"] for row in measured),
+    }
+
+
+def run(
+    sizes: List[int],
+    duration: float,
+    server: str,
+    scenarios: List[str],
+    rounds: int = DEFAULT_ROUNDS,
+    seed: int = DEFAULT_SEED,
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Benchmark every scenario at every size; results[size][scenario]."""
+    results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for size in sizes:
+        setup_started = time.perf_counter()
+        with benchmark_app(size, seed) as api_server:
+            setup_seconds = time.perf_counter() - setup_started
+            print(f"# {size} companies ready in {setup_seconds:.1f}s", file=sys.stderr)
+            driver: Driver
+            if server == "waitress":
+                driver = WaitressDriver(api_server.app)
+            else:
+                driver = ClientDriver(api_server.app)
+            try:
+                results[str(size)] = {
+                    name: run_scenario(
+                        driver,
+                        api_server.cache.clear,
+                        SCENARIOS[name],
+                        size,
+                        duration,
+                        seed,
+                        rounds,
+                    )
+                    for name in scenarios
+                }
+            finally:
+                driver.close()
+    return results
+
+
+def calibrate(rounds: int = CALIBRATION_ROUNDS) -> float:
+    """Milliseconds this host takes for a fixed workload (best of ``rounds``).
+
+    Sorting and JSON round-tripping a seeded list of records exercises the
+    same interpreter paths as the handlers, without touching the code under
+    test, so the ratio of two hosts' calibrations tracks their speed ratio.
+    """
+    rng = random.Random(DEFAULT_SEED)
+    records = [
+        {"ticker": make_ticker(i), "value": rng.random()}
+        for i in range(CALIBRATION_RECORDS)
+    ]
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        json.loads(json.dumps(sorted(records, key=lambda record: record["value"])))
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def compare(
+    results: Dict[str, Dict[str, Dict[str, Any]]],
+    baseline: Dict[str, Dict[str, Dict[str, Any]]],
+    tolerance: float,
+    min_delta_ms: float = DEFAULT_MIN_DELTA_MS,
+    scale: float = 1.0,
+) -> List[str]:
+    """Return a description of every regression beyond ``tolerance``.
+
+    ``scale`` is this run's calibration over the baseline's: baseline
+    latencies are multiplied by it (and throughputs divided) before
+    comparing. A slowdown also has to exceed ``min_delta_ms`` in absolute
+    terms, so scheduler noise on sub-millisecond routes does not fail the
+    run.
+    """
+    regressions = []
+    for size, routes in results.items():
+        for name, current in routes.items():
+            reference = baseline.get(size, {}).get(name)
+            if reference is None:
+                continue
+            expected_p95 = reference["p95_ms"] * scale
+            if (
+                current["p95_ms"] > expected_p95 * (1 + tolerance)
+                and current["p95_ms"] - expected_p95 > min_delta_ms
+            ):
+                regressions.append(
+                    f"{name} @ {size}: p95 {current['p95_ms']:.2f}ms "
+                    f"vs {expected_p95:.2f}ms expected from the baseline"
+                )
+            expected_throughput = reference["throughput"] / scale
+            mean_delta_ms = 1000 / current["throughput"] - 1000 / expected_throughput
+            if (
+                current["throughput"] < expected_throughput / (1 + tolerance)
+                and mean_delta_ms > min_delta_ms
+            ):
+                regressions.append(
+                    f"{name} @ {size}: {current['throughput']:.0f} req/s "
+                    f"vs {expected_throughput:.0f} req/s expected from the baseline"
+                )
+            if current["errors"] > reference["errors"]:
+                regressions.append(
+                    f"{name} @ {size}: {current['errors']} errors "
+                    f"vs baseline {reference['errors']}"
+                )
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, Dict[str, Any]]]) -> None:
+    """Print throughput and latency percentiles per size and route."""
+    header = (
+        f"{'route':<22}{'companies':>10}{'reqs':>6}{'err':>5}{'req/s':>9}"
+        f"{'KB':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for size, routes in results.items():
+        for name, row in routes.items():
+            print(
+                f"{name:<22}{size:>10}{row['requests']:>6}{row['errors']:>5}"
+                f"{row['throughput']:>9.0f}{row['mean_bytes'] / 1024:>9.1f}"
+                f"{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--duration", type=float, default=1.0, help="seconds per route and size"
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=DEFAULT_ROUNDS,
+        help="rounds per route and size; the best round is reported",
+    )
+    parser.add_argument("--server", choices=["client", "waitress"], default="client")
+    parser.add_argument(
+        "--routes", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument(
+        "--baseline", help="defaults to benchmarks/baselines/api-<server>.json"
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="write these results to --baseline instead of comparing",
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=DEFAULT_MIN_DELTA_MS,
+        help="ignore slowdowns smaller than this many milliseconds",
+    )
+    args = parser.parse_args()
+    if args.baseline is None:
+        args.baseline = os.path.join(BASELINE_DIR, f"api-{args.server}.json")
+
+    calibration_ms = calibrate()
+    results = run(args.sizes, args.duration, args.server, args.routes, args.rounds)
+    print_table(results)
+    print(f"\nCalibration workload: {calibration_ms:.1f}ms")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as file_handle:
+            json.dump(
+                {"calibration_ms": calibration_ms, "results": results},
+                file_handle,
+                indent=2,
+                sort_keys=True,
+            )
+            file_handle.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline first")
+        return
+    with open(args.baseline, encoding="utf-8") as file_handle:
+        baseline = json.load(file_handle)
+    scale = calibration_ms / baseline["calibration_ms"]
+    print(f"This host is {scale:.2f}x the baseline host's calibration time")
+    regressions = compare(
+        results, baseline["results"], args.tolerance, args.min_delta_ms, scale
+    )
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""Compare the waitress and asyncio servers under many open connections.
+
+Each server is started as ``production_server.py`` would run it (waitress
+with ``WAITRESS_THREADS`` threads and a 1000-connection limit, or
+``SERVER_MODE=asyncio``), with rate limits lifted. The benchmark then:
+
+1. opens ``--idle`` keep-alive connections, sends one request on each and
+   leaves them open, like browsers or pooled clients between requests;
+2. while those are held, runs ``--clients`` busy keep-alive clients
+   against ``--path`` for ``--duration`` seconds and records throughput
+   and latency;
+3. sends a second request on every idle connection to count how many the
+   server kept.
+
+Usage::
+
+    python -m benchmarks.bench_concurrency [--servers waitress asyncio]
+        [--idle 2000] [--clients 16] [--duration 10] [--path /health]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_KEY = "benchmark-api-key"
+SERVERS = ("waitress", "asyncio")
+CONNECT_BATCH = 200
+REPLY_TIMEOUT = 10.0
+
+
+def raise_fd_limit() -> int:
+    """Raise the open-file soft limit to the hard limit; return it."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode: str, port: int, threads: int, log_dir: str) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update(
+        API_KEY=API_KEY,
+        HOST="127.0.0.1",
+        PORT=str(port),
+        SERVER_MODE=mode,
+        WORKERS="1",
+        WAITRESS_THREADS=str(threads),
+        RATELIMIT_ENABLED="false",
+        RATE_LIMIT_TIERS="loadtest=1000000/second",
+        RATE_LIMIT_DEFAULT_TIER="loadtest",
+        LOG_FILE=os.path.join(log_dir, f"{mode}.log"),
+        LOG_LEVEL="WARNING",
+    )
+    return subprocess.Popen(
+        [sys.executable, "production_server.py"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+class Connection:
+    """A minimal keep-alive HTTP/1.1 client connection."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, port: int) -> "Connection":
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        return cls(reader, writer)
+
+    async def request(self, path: str) -> int:
+        """Send a GET and read the whole response; return the status."""
+        self.writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: localhost\r\n"
+            f"X-API-KEY: {API_KEY}\r\n\r\n".encode("ascii")
+        )
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ")[1])
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if "content-length" in headers:
+            await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        return status
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+async def open_idle(port: int, count: int) -> Tuple[List[Connection], int]:
+    """Open ``count`` connections with one request each; return the answered
+    ones and the number that failed or got no reply in time."""
+    held: List[Connection] = []
+    failed = 0
+
+    async def one() -> Optional[Connection]:
+        try:
+            connection = await asyncio.wait_for(Connection.open(port), REPLY_TIMEOUT)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        try:
+            await asyncio.wait_for(connection.request("/health"), REPLY_TIMEOUT)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            connection.close()
+            return None
+        return connection
+
+    for start in range(0, count, CONNECT_BATCH):
+        batch = min(CONNECT_BATCH, count - start)
+        for connection in await asyncio.gather(*(one() for _ in range(batch))):
+            if connection is None:
+                failed += 1
+            else:
+                held.append(connection)
+    return held, failed
+
+
+async def still_open(connections: List[Connection]) -> int:
+    """How many of ``connections`` still answer a request."""
+
+    async def check(connection: Connection) -> bool:
+        try:
+            await asyncio.wait_for(connection.request("/health"), REPLY_TIMEOUT)
+            return True
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            return False
+
+    results = []
+    for start in range(0, len(connections), CONNECT_BATCH):
+        batch = connections[start : start + CONNECT_BATCH]
+        results.extend(await asyncio.gather(*(check(c) for c in batch)))
+    return sum(results)
+
+
+async def load(port: int, path: str, clients: int, duration: float) -> Dict[str, float]:
+    """Run ``clients`` busy connections for ``duration`` seconds."""
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client() -> None:
+        nonlocal errors
+        connection = None
+        while time.perf_counter() < deadline:
+            try:
+                if connection is None:
+                    connection = await Connection.open(port)
+                sent = time.perf_counter()
+                status = await asyncio.wait_for(connection.request(path), REPLY_TIMEOUT)
+                latencies.append(time.perf_counter() - sent)
+                if status >= 400:
+                    errors += 1
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                errors += 1
+                if connection is not None:
+                    connection.close()
+                connection = None
+        if connection is not None:
+            connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def pct(fraction: float) -> float:
+        if not latencies:
+            return float("nan")
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": pct(0.5),
+        "p99_ms": pct(0.99),
+    }
+
+
+async def measure(port: int, args: argparse.Namespace) -> Dict[str, float]:
+    idle, refused = await open_idle(port, args.idle)
+    try:
+        result = await load(port, args.path, args.clients, args.duration)
+        result["held"] = len(idle)
+        result["refused"] = refused
+        result["kept"] = await still_open(idle)
+    finally:
+        for connection in idle:
+            connection.close()
+    return result
+
+
+def wait_until_listening(port: int, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", nargs="+", choices=SERVERS, default=SERVERS)
+    parser.add_argument("--idle", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--threads", type=int, default=4, help="WAITRESS_THREADS")
+    args = parser.parse_args()
+
+    limit = raise_fd_limit()
+    if args.idle + args.clients + 100 > limit:
+        sys.exit(f"--idle {args.idle} needs more file descriptors than {limit}")
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="bench-concurrency-") as log_dir:
+        for mode in args.servers:
+            port = free_port()
+            process = start_server(mode, port, args.threads, log_dir)
+            try:
+                wait_until_listening(port, process, timeout=60)
+                rows.append((mode, asyncio.run(measure(port, args))))
+            finally:
+                stop_server(process)
+
+    print(
+        f"{args.idle} idle connections, {args.clients} busy clients on "
+        f"{args.path} for {args.duration:.0f}s"
+    )
+    header = (
+        f"{'server':<10}{'held':>7}{'refused':>9}{'kept':>7}{'req/s':>9}"
+        f"{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for mode, row in rows:
+        print(
+            f"{mode:<10}{row['held']:>7}{row['refused']:>9}{row['kept']:>7}"
+            f"{row['rps']:>9.0f}{row['p50_ms']:>9.2f}{row['p99_ms']:>9.2f}"
+            f"{row['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
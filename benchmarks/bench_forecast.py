@@ -0,0 +1,125 @@
+"""Compare batched trend forecasting with one scikit-learn fit per series.
+
+For each size, a synthetic quarterly history (``generate_history``) is
+forecast two ways, for revenue and market cap at every ``--horizons``:
+
+* ``loop``: one ``LinearRegression`` fitted and queried per ticker and
+  field, on that series' known values, as ``ai_predictive`` used to do
+  for its single model;
+* ``batched``: ``TrendForecaster``, which stacks every series into one
+  matrix and solves all least-squares lines at once, then
+  ``predict_many`` for every ticker. The time includes building the
+  matrices from the parsed history.
+
+Both must agree to within ``--tolerance`` (relative); the run exits with
+status 1 otherwise.
+
+Usage::
+
+    python -m benchmarks.bench_forecast [--sizes 100 1000 10000]
+        [--periods 20] [--horizons 1 4 8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+
+from benchmarks.synthetic import generate_history
+from src.forecasting import FIELDS, TrendForecaster
+
+Forecasts = Dict[str, Optional[Dict[str, List[Optional[float]]]]]
+
+
+def loop_forecasts(history: Dict[str, Any], horizons: List[int]) -> Forecasts:
+    """Fit one LinearRegression per ticker and field."""
+    results: Forecasts = {}
+    for ticker, series in history["tickers"].items():
+        result: Dict[str, List[Optional[float]]] = {}
+        for field in FIELDS:
+            points = [
+                (period, value)
+                for period, value in enumerate(series.get(field) or [])
+                if value is not None
+            ]
+            if not points:
+                result[field] = [None] * len(horizons)
+                continue
+            periods = np.array([[period] for period, _ in points], dtype=np.float64)
+            values = np.array([value for _, value in points], dtype=np.float64)
+            model = LinearRegression().fit(periods, values)
+            last = points[-1][0]
+            at = np.array([[last + horizon] for horizon in horizons], dtype=np.float64)
+            result[field] = model.predict(at).tolist()
+        results[ticker] = result
+    return results
+
+
+def batched_forecasts(history: Dict[str, Any], horizons: List[int]) -> Forecasts:
+    return TrendForecaster(history).predict_many(history["tickers"], horizons)
+
+
+def max_relative_difference(first: Forecasts, second: Forecasts) -> float:
+    worst = 0.0
+    for ticker, expected in first.items():
+        actual = second[ticker]
+        if expected is None or actual is None:
+            if expected is not actual:
+                return float("inf")
+            continue
+        for field in FIELDS:
+            for want, got in zip(expected[field], actual[field]):
+                if want is None or got is None:
+                    if want is not got:
+                        return float("inf")
+                    continue
+                worst = max(worst, abs(want - got) / max(abs(want), 1.0))
+    return worst
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--periods", type=int, default=20)
+    parser.add_argument("--horizons", nargs="+", type=int, default=[1, 4, 8])
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    header = (
+        f"{'tickers':>8}{'models':>9}{'loop s':>10}{'batched s':>11}"
+        f"{'speedup':>9}{'max rel diff':>14}"
+    )
+    print(f"{args.periods} periods, horizons {args.horizons}")
+    print(header)
+    print("-" * len(header))
+    failed = False
+    for size in args.sizes:
+        history = generate_history(size, args.periods)
+        expected, loop_seconds = timed(loop_forecasts, history, args.horizons)
+        actual, batched_seconds = timed(batched_forecasts, history, args.horizons)
+        difference = max_relative_difference(expected, actual)
+        failed = failed or difference > args.tolerance
+        print(
+            f"{size:>8}{size * len(FIELDS):>9}{loop_seconds:>10.3f}"
+            f"{batched_seconds:>11.4f}{loop_seconds / batched_seconds:>8.0f}x"
+            f"{difference:>14.1e}"
+        )
+
+    if failed:
+        print(f"FAIL forecasts differ by more than {args.tolerance:g}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compare JSON encode/decode time of the API payloads across backends.
+
+Usage::
+
+    python -m benchmarks.bench_json [--sizes 1000 10000 100000] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.synthetic import generate_universe
+from src import json_provider
+from src.indexes import AssetIndex
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    """Return the fastest of ``repeat`` runs of ``func`` in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def build_payloads(count: int) -> Dict[str, Any]:
+    """Build the corporate-structure and real-assets response payloads."""
+    structure, corporate_data = generate_universe(count)
+    assets = AssetIndex(corporate_data).records
+    return {
+        "corporate-structure": {"status": "success", "data": structure},
+        "real-assets": {"status": "success", "data": assets, "total": len(assets)},
+    }
+
+
+def run(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    """Benchmark every payload, size and available backend."""
+    backends = [json_provider.BACKEND_STDLIB]
+    if json_provider.orjson is not None:
+        backends.append(json_provider.BACKEND_ORJSON)
+
+    rows = []
+    for count in sizes:
+        for payload_name, payload in build_payloads(count).items():
+            for backend in backends:
+                encoded = json_provider.dumps_bytes(
+                    payload, sort_keys=True, backend=backend
+                )
+                rows.append(
+                    {
+                        "payload": payload_name,
+                        "companies": count,
+                        "backend": backend,
+                        "bytes": len(encoded),
+                        "encode_ms": best_of(
+                            repeat,
+                            lambda: json_provider.dumps_bytes(
+                                payload, sort_keys=True, backend=backend
+                            ),
+                        ),
+                        "decode_ms": best_of(
+                            repeat,
+                            lambda: json_provider.loads(encoded, backend=backend),
+                        ),
+                    }
+                )
+    return rows
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    """Print results with the speedup of each backend over the stdlib."""
+    header = (
+        f"{'payload':<20}{'companies':>10}{'backend':>9}{'MB':>8}"
+        f"{'encode ms':>11}{'decode ms':>11}{'speedup':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    baseline: Dict[Any, Dict[str, Any]] = {}
+    for row in rows:
+        key = (row["payload"], row["companies"])
+        baseline.setdefault(key, row)
+        reference = baseline[key]
+        speedup = (reference["encode_ms"] + reference["decode_ms"]) / (
+            row["encode_ms"] + row["decode_ms"]
+        )
+        print(
+            f"{row['payload']:<20}{row['companies']:>10}{row['backend']:>9}"
+            f"{row['bytes'] / 1e6:>8.2f}"
+            f"{row['encode_ms']:>11.2f}{row['decode_ms']:>11.2f}"
+            f"{speedup:>8.1f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print_table(run(args.sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
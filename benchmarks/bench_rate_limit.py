@@ -0,0 +1,101 @@
+"""Measure the per-request cost of the token-bucket rate limiter.
+
+Each store is timed from one process and from several processes hitting the
+same buckets concurrently, which is how gunicorn workers use it. The memory
+store is per process, so it only appears in the single-process rows.
+
+Usage::
+
+    python -m benchmarks.bench_rate_limit [--hits 20000] [--workers 1 4] [--keys 100]
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from src.rate_limit import (
+    BACKEND_MEMORY,
+    BACKEND_SQLITE,
+    Tier,
+    TokenBucketLimiter,
+    create_store,
+)
+
+# Large enough that no hit is ever denied, so every hit does the same work.
+UNLIMITED = {"bench": Tier("bench", capacity=1e12, refill_rate=1e12)}
+
+
+def make_limiter(backend: str, path: str) -> TokenBucketLimiter:
+    return TokenBucketLimiter(
+        create_store(backend, path=path), UNLIMITED, default_tier="bench"
+    )
+
+
+def hammer(backend: str, path: str, hits: int, keys: int) -> float:
+    """Perform ``hits`` hits spread over ``keys`` API keys; return seconds."""
+    limiter = make_limiter(backend, path)
+    api_keys = [f"key-{number}" for number in range(keys)]
+    start = time.perf_counter()
+    for number in range(hits):
+        limiter.hit(api_keys[number % keys])
+    return time.perf_counter() - start
+
+
+def run(hits: int, workers: List[int], keys: int) -> List[Dict[str, Any]]:
+    """Time every store at every worker count."""
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "buckets.sqlite3")
+        for backend in (BACKEND_MEMORY, BACKEND_SQLITE):
+            for count in workers:
+                if backend == BACKEND_MEMORY and count > 1:
+                    continue
+                make_limiter(backend, path)  # create the schema up front
+                per_worker = hits // count
+                start = time.perf_counter()
+                with multiprocessing.Pool(count) as pool:
+                    pool.starmap(hammer, [(backend, path, per_worker, keys)] * count)
+                elapsed = time.perf_counter() - start
+                total = per_worker * count
+                rows.append(
+                    {
+                        "backend": backend,
+                        "workers": count,
+                        "hits": total,
+                        "hits_per_s": total / elapsed,
+                        "us_per_hit": elapsed / total * 1e6 * count,
+                    }
+                )
+    return rows
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    header = (
+        f"{'backend':<10}{'workers':>8}{'hits':>10}"
+        f"{'hits/s':>12}{'us/hit/worker':>15}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['backend']:<10}{row['workers']:>8}{row['hits']:>10}"
+            f"{row['hits_per_s']:>12.0f}{row['us_per_hit']:>15.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hits", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--keys", type=int, default=100)
+    args = parser.parse_args()
+    print_table(run(args.hits, args.workers, args.keys))
+
+
+if __name__ == "__main__":
+    main()
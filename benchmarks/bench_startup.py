@@ -0,0 +1,244 @@
+"""Check cold-start time of the server entry points against a budget.
+
+For each target module (``wsgi`` and ``production_server`` by default),
+fresh interpreters are started ``--runs`` times and the medians reported:
+
+* ``import``: the module's cumulative import time from ``-X importtime``;
+* ``first request``: from launching the interpreter until the response to
+  a first ``--path`` request (through the Flask test client) is complete.
+  This includes interpreter start-up, every import and the first data load.
+* ``first analytics request``: the following ``--analytics-path`` request,
+  which imports NumPy and builds the lazy columnar and analytics views.
+
+The slowest imports (by self time) are listed so regressions can be traced
+to a module. The run exits with status 1 when a median exceeds its budget
+or when a module in ``FORBIDDEN`` (the analytics stack, which must stay
+lazily imported) is loaded at start-up or by the first request. Budgets are
+machine-specific.
+
+Usage::
+
+    python -m benchmarks.bench_startup [--targets wsgi production_server]
+        [--runs 5] [--import-budget-ms 500] [--request-budget-ms 800]
+        [--analytics-budget-ms 500]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, NamedTuple, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_KEY = "benchmark-api-key"
+DEFAULT_TARGETS = ["wsgi", "production_server"]
+DEFAULT_PATH = "/api/v1/corporate-structure"
+DEFAULT_ANALYTICS_PATH = "/api/v1/analytics/sectors"
+DEFAULT_IMPORT_BUDGET_MS = 500.0
+DEFAULT_REQUEST_BUDGET_MS = 800.0
+DEFAULT_ANALYTICS_BUDGET_MS = 500.0
+# Top-level packages that must not be imported when the server starts.
+FORBIDDEN = (
+    "numpy",
+    "pandas",
+    "sklearn",
+    "scipy",
+    "ai_analysis",
+    "ai_component",
+    "ai_nl_query",
+    "ai_predictive",
+    "ai_report",
+)
+
+FIRST_REQUEST = """
+import importlib, json, sys, time
+client = importlib.import_module(sys.argv[1]).app.test_client()
+headers = {"X-API-KEY": sys.argv[3]}
+forbidden = sys.argv[5].split(",")
+response = client.get(sys.argv[2], headers=headers)
+response.get_data()
+done = time.time()
+loaded = sorted(name for name in sys.modules if name.split(".", 1)[0] in forbidden)
+analytics = client.get(sys.argv[4], headers=headers)
+analytics.get_data()
+print(json.dumps({
+    "done": done,
+    "status": response.status_code,
+    "loaded": loaded,
+    "analytics_done": time.time(),
+    "analytics_status": analytics.status_code,
+}))
+"""
+
+
+class ImportTime(NamedTuple):
+    self_us: int
+    cumulative_us: int
+
+
+class FirstRequests(NamedTuple):
+    seconds: float
+    analytics_seconds: float
+    forbidden: List[str]
+
+
+def child_env(log_dir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        API_KEY=API_KEY,
+        LOG_FILE=os.path.join(log_dir, "startup.log"),
+        LOG_LEVEL="WARNING",
+    )
+    return env
+
+
+def parse_importtime(stderr: str) -> Dict[str, ImportTime]:
+    """Map module name to its self and cumulative import time."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        head, cumulative_us, name = line.split("|")
+        self_us = head.rsplit(":", 1)[1]
+        modules[name.strip()] = ImportTime(int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure_imports(target: str, env: Dict[str, str]) -> Dict[str, ImportTime]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def measure_first_request(
+    target: str, path: str, analytics_path: str, env: Dict[str, str]
+) -> FirstRequests:
+    """Time a fresh interpreter's first response, then its first analytics one.
+
+    Also returns the ``FORBIDDEN`` modules loaded by the first request.
+    """
+    started = time.time()
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            FIRST_REQUEST,
+            target,
+            path,
+            API_KEY,
+            analytics_path,
+            ",".join(FORBIDDEN),
+        ],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    if report["status"] != 200:
+        raise RuntimeError(f"{target}: GET {path} returned {report['status']}")
+    if report["analytics_status"] != 200:
+        raise RuntimeError(
+            f"{target}: GET {analytics_path} returned {report['analytics_status']}"
+        )
+    return FirstRequests(
+        report["done"] - started,
+        report["analytics_done"] - report["done"],
+        report["loaded"],
+    )
+
+
+def forbidden_imports(modules: Dict[str, ImportTime]) -> List[str]:
+    return sorted(name for name in modules if name.split(".", 1)[0] in FORBIDDEN)
+
+
+def slowest(runs: List[Dict[str, ImportTime]], count: int) -> List[Tuple[str, float]]:
+    """Modules with the highest median self time, in milliseconds."""
+    names = set().union(*runs)
+    medians = {
+        name: statistics.median(run[name].self_us for run in runs if name in run) / 1000
+        for name in names
+    }
+    return sorted(medians.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", nargs="+", default=DEFAULT_TARGETS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default=DEFAULT_PATH)
+    parser.add_argument("--analytics-path", default=DEFAULT_ANALYTICS_PATH)
+    parser.add_argument(
+        "--import-budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS
+    )
+    parser.add_argument(
+        "--request-budget-ms", type=float, default=DEFAULT_REQUEST_BUDGET_MS
+    )
+    parser.add_argument(
+        "--analytics-budget-ms", type=float, default=DEFAULT_ANALYTICS_BUDGET_MS
+    )
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as log_dir:
+        env = child_env(log_dir)
+        for target in args.targets:
+            runs = [measure_imports(target, env) for _ in range(args.runs)]
+            import_ms = (
+                statistics.median(run[target].cumulative_us for run in runs) / 1000
+            )
+            requests = [
+                measure_first_request(target, args.path, args.analytics_path, env)
+                for _ in range(args.runs)
+            ]
+            request_ms = statistics.median(run.seconds for run in requests) * 1000
+            analytics_ms = (
+                statistics.median(run.analytics_seconds for run in requests) * 1000
+            )
+            print(
+                f"{target}: import {import_ms:.0f} ms "
+                f"(budget {args.import_budget_ms:.0f}), first request "
+                f"{request_ms:.0f} ms (budget {args.request_budget_ms:.0f}), "
+                f"first analytics request {analytics_ms:.0f} ms "
+                f"(budget {args.analytics_budget_ms:.0f})"
+            )
+            for name, self_ms in slowest(runs, args.top):
+                print(f"  {self_ms:8.1f} ms  {name}")
+
+            if import_ms > args.import_budget_ms:
+                failures.append(f"{target}: import over budget")
+            if request_ms > args.request_budget_ms:
+                failures.append(f"{target}: first request over budget")
+            if analytics_ms > args.analytics_budget_ms:
+                failures.append(f"{target}: first analytics request over budget")
+            forbidden = forbidden_imports(runs[0])
+            if forbidden:
+                failures.append(f"{target} imports {', '.join(forbidden)}")
+            if requests[0].forbidden:
+                failures.append(
+                    f"{target}: first request imports "
+                    f"{', '.join(requests[0].forbidden)}"
+                )
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Replay a captured access log (``ACCESS_LOG_FILE``) against a server.
+
+Requests are sent at their original inter-arrival times, compressed by
+``--speed`` (2 replays twice as fast; 0 sends as fast as the workers
+allow), from ``--concurrency`` keep-alive connections. Two latencies are
+reported per route:
+
+* ``service``: from sending the request to reading the whole response.
+* ``schedule``: from when the original timing says the request was due.
+  This includes any time spent waiting for a free connection, so an
+  overloaded server cannot hide its queueing (coordinated omission).
+
+``--output`` saves the summary as JSON and ``--compare`` prints it next to
+an earlier summary, to compare two builds on the same traffic.
+
+Usage::
+
+    python -m benchmarks.replay access.jsonl --host http://127.0.0.1:5001
+        [--speed 1] [--concurrency 8] [--api-key KEY] [--limit N]
+        [--output new.json] [--compare old.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+_STOP = None
+
+
+class Result(NamedTuple):
+    route: str
+    status: int
+    service: float
+    schedule: float
+
+
+def read_log(path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Load access records ordered by start time."""
+    records = []
+    with open(path, encoding="utf-8") as file_handle:
+        for line in file_handle:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    records.sort(key=lambda record: record["ts"])
+    return records[:limit] if limit else records
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of ``samples`` (which must be sorted)."""
+    index = max(0, min(len(samples) - 1, int(round(fraction * len(samples))) - 1))
+    return samples[index]
+
+
+def distribution(samples: List[float]) -> Dict[str, float]:
+    """Percentiles and maximum of ``samples`` in milliseconds."""
+    samples = sorted(samples)
+    summary = {
+        f"p{round(fraction * 100)}_ms": percentile(samples, fraction) * 1000
+        for fraction in PERCENTILES
+    }
+    summary["max_ms"] = samples[-1] * 1000
+    return summary
+
+
+class Replayer:
+    """Send records on schedule from a pool of keep-alive connections."""
+
+    def __init__(self, host: str, concurrency: int, api_key: str) -> None:
+        url = urllib.parse.urlsplit(host)
+        self.connection_class = (
+            http.client.HTTPSConnection
+            if url.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.netloc = url.netloc
+        self.concurrency = concurrency
+        self.headers = {"X-API-KEY": api_key} if api_key else {}
+        self.pending: "queue.Queue[Any]" = queue.Queue()
+        self.results: List[Result] = []
+        self.errors: Counter = Counter()
+        self.lock = threading.Lock()
+
+    def run(self, records: List[Dict[str, Any]], speed: float) -> float:
+        """Replay ``records``; return the wall-clock duration."""
+        workers = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(self.concurrency)
+        ]
+        for worker in workers:
+            worker.start()
+        started = time.perf_counter()
+        for record, due in schedule(records, speed, started):
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.pending.put((record, due))
+        for _ in workers:
+            self.pending.put(_STOP)
+        for worker in workers:
+            worker.join()
+        return time.perf_counter() - started
+
+    def _work(self) -> None:
+        connection = self.connection_class(self.netloc, timeout=120)
+        while True:
+            item = self.pending.get()
+            if item is _STOP:
+                connection.close()
+                return
+            record, due = item
+            headers = dict(self.headers)
+            body = record.get("body")
+            if body is not None:
+                body = body.encode("utf-8")
+                headers["Content-Type"] = "application/json"
+            sent = time.perf_counter()
+            try:
+                connection.request(
+                    record["method"], record["path"], body=body, headers=headers
+                )
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException) as exc:
+                connection.close()
+                connection = self.connection_class(self.netloc, timeout=120)
+                with self.lock:
+                    self.errors[type(exc).__name__] += 1
+                continue
+            finished = time.perf_counter()
+            result = Result(
+                record.get("route", record["path"]),
+                status,
+                finished - sent,
+                finished - due,
+            )
+            with self.lock:
+                self.results.append(result)
+
+
+def schedule(
+    records: List[Dict[str, Any]], speed: float, started: float
+) -> Iterator[Any]:
+    """Yield each record with the perf_counter time it is due."""
+    first = records[0]["ts"] if records else 0.0
+    for record in records:
+        offset = (record["ts"] - first) / speed if speed > 0 else 0.0
+        yield record, started + offset
+
+
+def summarize(
+    records: List[Dict[str, Any]],
+    results: List[Result],
+    errors: Counter,
+    elapsed: float,
+) -> Dict[str, Any]:
+    """Overall and per-route latency distributions of a replay."""
+    by_route: Dict[str, List[Result]] = {}
+    for result in results:
+        by_route.setdefault(result.route, []).append(result)
+
+    def describe(rows: List[Result]) -> Dict[str, Any]:
+        return {
+            "requests": len(rows),
+            "statuses": dict(Counter(str(row.status) for row in rows)),
+            "service": distribution([row.service for row in rows]),
+            "schedule": distribution([row.schedule for row in rows]),
+        }
+
+    span = records[-1]["ts"] - records[0]["ts"] if records else 0.0
+    return {
+        "requests": len(records),
+        "completed": len(results),
+        "transport_errors": dict(errors),
+        "elapsed_s": elapsed,
+        "captured_span_s": span,
+        "throughput": len(results) / elapsed if elapsed else 0.0,
+        "overall": describe(results) if results else None,
+        "routes": {route: describe(rows) for route, rows in sorted(by_route.items())},
+    }
+
+
+def print_summary(summary: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    """Print one row per route; with a baseline, add the p95/p99 change."""
+    print(
+        f"{summary['completed']}/{summary['requests']} requests in "
+        f"{summary['elapsed_s']:.1f}s (captured over "
+        f"{summary['captured_span_s']:.1f}s), {summary['throughput']:.0f} req/s"
+    )
+    if summary["transport_errors"]:
+        print(f"transport errors: {summary['transport_errors']}")
+    header = (
+        f"{'route':<40}{'reqs':>7}{'non-2xx':>8}{'p50':>9}{'p95':>9}{'p99':>9}"
+        f"{'sched p99':>11}"
+    )
+    if baseline:
+        header += f"{'Δp95':>9}{'Δp99':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = dict(summary["routes"])
+    if summary["overall"]:
+        rows["(all)"] = summary["overall"]
+    for route, row in rows.items():
+        service = row["service"]
+        non_2xx = sum(
+            count for status, count in row["statuses"].items() if status[0] != "2"
+        )
+        line = (
+            f"{route[:39]:<40}{row['requests']:>7}{non_2xx:>8}"
+            f"{service['p50_ms']:>9.2f}{service['p95_ms']:>9.2f}"
+            f"{service['p99_ms']:>9.2f}{row['schedule']['p99_ms']:>11.2f}"
+        )
+        if baseline:
+            before = (
+                baseline.get("overall")
+                if route == "(all)"
+                else baseline["routes"].get(route)
+            )
+            if before:
+                line += "".join(
+                    f"{change(before['service'][key], service[key]):>9}"
+                    for key in ("p95_ms", "p99_ms")
+                )
+        print(line)
+    print("latencies in ms; sched = including time queued behind busy connections")
+
+
+def change(before: float, after: float) -> str:
+    """Relative change as a signed percentage."""
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before:+.0%}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log", help="JSONL access log written via ACCESS_LOG_FILE")
+    parser.add_argument("--host", default="http://127.0.0.1:5001")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="time compression: 2 replays twice as fast, 0 as fast as possible",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--api-key", default=os.getenv("API_KEY", ""))
+    parser.add_argument("--limit", type=int, help="replay only the first N records")
+    parser.add_argument("--output", help="write the summary to this JSON file")
+    parser.add_argument("--compare", help="summary JSON from an earlier replay")
+    args = parser.parse_args()
+
+    records = read_log(args.log, args.limit)
+    if not records:
+        sys.exit(f"No records in {args.log}")
+    replayer = Replayer(args.host, args.concurrency, args.api_key)
+    elapsed = replayer.run(records, args.speed)
+    summary = summarize(records, replayer.results, replayer.errors, elapsed)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file_handle:
+            baseline = json.load(file_handle)
+    print_summary(summary, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file_handle:
+            json.dump(summary, file_handle, indent=2)
+            file_handle.write("\n")
+
+
+if __name__ == "__main__":
+    main()
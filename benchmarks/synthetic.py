@@ -0,0 +1,129 @@
+"""Seeded synthetic company universes shaped like the data/*.json files."""
+
+from __future__ import annotations
+
+import os
+import random
+from typing import Any, Dict, List, Tuple
+
+from src import json_provider
+
+DEFAULT_SEED = 20240501
+
+SECTORS = [
+    "Technology",
+    "Financial",
+    "Real Estate",
+    "Healthcare",
+    "Energy",
+    "Consumer",
+    "Industrials",
+    "Utilities",
+    "Materials",
+    "Telecommunications",
+]
+
+NARRATIVE_FIELDS = {
+    "Executive Summary": "Equity Shield Advocates is a leading financial services...",
+    "Fund Overview": "Our funds focus on sustainable long-term growth...",
+    "Investment Strategy": "We employ a balanced approach combining value...",
+    "Team Structure": "Our team consists of experienced professionals...",
+    "Risk Assessment": "We maintain a conservative risk profile...",
+    "AUM": "$5.2B",
+}
+
+Structure = Dict[str, List[Dict[str, Any]]]
+CorporateData = Dict[str, Any]
+
+
+def make_ticker(index: int) -> str:
+    """Return a unique, deterministic ticker of at least three letters."""
+    letters = []
+    value = index + 26 * 26
+    while value:
+        value, remainder = divmod(value, 26)
+        letters.append(chr(ord("A") + remainder))
+    return "".join(reversed(letters))
+
+
+def generate_universe(
+    count: int, seed: int = DEFAULT_SEED
+) -> Tuple[Structure, CorporateData]:
+    """Generate ``count`` companies as (corporate_structure, corporate_data).
+
+    Sector sizes are skewed and market caps/revenues log-normal, so sorts,
+    filters and aggregates behave like a real universe. The same ``count``
+    and ``seed`` always produce identical data.
+    """
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(SECTORS))]
+    structure: Structure = {sector: [] for sector in SECTORS}
+    corporate_data: CorporateData = dict(NARRATIVE_FIELDS)
+
+    for index in range(count):
+        ticker = make_ticker(index)
+        sector = rng.choices(SECTORS, weights)[0]
+        structure[sector].append(
+            {
+                "ticker": ticker,
+                "name": f"{ticker.title()} Holdings Inc.",
+                "description": f"Synthetic {sector.lower()} company #{index}",
+                "market_position": "Synthetic benchmark entity",
+            }
+        )
+        market_cap = round(rng.lognormvariate(23, 1.6))
+        corporate_data[ticker] = {
+            "market_cap": market_cap,
+            "revenue": round(market_cap * rng.uniform(0.05, 0.6)),
+            "last_updated": "2025-05-20T22:00:00Z",
+        }
+
+    return {
+        sector: companies for sector, companies in structure.items() if companies
+    }, corporate_data
+
+
+def generate_history(
+    count: int, periods: int = 20, seed: int = DEFAULT_SEED
+) -> Dict[str, Any]:
+    """Generate quarterly revenue/market-cap histories for ``count`` tickers.
+
+    The result has the ``src.forecasting`` history-file shape. Each series
+    follows a noisy linear trend; about 2% of values are null and about 5%
+    of the series start late or stop early.
+    """
+    rng = random.Random(seed)
+    labels = [f"{2000 + quarter // 4}-Q{quarter % 4 + 1}" for quarter in range(periods)]
+    tickers: Dict[str, Any] = {}
+    for index in range(count):
+        market_cap = rng.lognormvariate(23, 1.6)
+        growth = market_cap * rng.gauss(0.01, 0.03)
+        margin = rng.uniform(0.05, 0.6)
+        length = periods if rng.random() > 0.05 else rng.randint(1, periods)
+        series: Dict[str, List[Any]] = {"revenue": [], "market_cap": []}
+        for period in range(length):
+            value = market_cap + growth * period
+            for field, scale in (("market_cap", 1.0), ("revenue", margin)):
+                noisy = value * scale * rng.gauss(1.0, 0.05)
+                series[field].append(None if rng.random() < 0.02 else round(noisy))
+        tickers[make_ticker(index)] = series
+    return {"periods": labels, "tickers": tickers}
+
+
+def write_universe(
+    count: int, directory: str, seed: int = DEFAULT_SEED
+) -> Dict[str, str]:
+    """Write a synthetic universe as corporate_structure.json/corporate_data.json."""
+    structure, corporate_data = generate_universe(count, seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        "corporate_structure": os.path.join(directory, "corporate_structure.json"),
+        "corporate_data": os.path.join(directory, "corporate_data.json"),
+    }
+    for name, content in (
+        ("corporate_structure", structure),
+        ("corporate_data", corporate_data),
+    ):
+        with open(paths[name], "wb") as file_handle:
+            file_handle.write(json_provider.dumps_bytes(content))
+    return paths
@@ -47,7 +47,7 @@ def parse_markdown(md_text):
 
 
 def save_json(data, filename='corporate_data.json'):
-    with open(filename, 'w') as f:
+    with open(filename, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=4)
     print(f"Saved JSON data to {filename}")
 
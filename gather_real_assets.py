@@ -51,7 +51,7 @@ def gather_data():
 
 
 def save_to_json(data, filename="real_assets_under_management.json"):
-    with open(filename, "w") as f:
+    with open(filename, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=4)
     print(f"Data saved to {filename}")
 
@@ -93,7 +93,7 @@ def create_corporate_structure(data):
 
 
 def save_corporate_structure(structure, filename="corporate_structure.json"):
-    with open(filename, "w") as f:
+    with open(filename, "w", encoding="utf-8") as f:
         json.dump(structure, f, indent=4)
     print(f"Corporate structure saved to {filename}")
 
@@ -1,28 +1,454 @@
-from locust import HttpUser, task, between
+"""Authenticated load-test workload for the Equity Shield API.
+
+Each simulated user draws tickers, sectors, pages and sort orders from the
+data the target actually serves (read once per process from
+``/api/v1/corporate-structure`` when the test starts), so requests hit real
+records instead of 404s. Task weights, think time, the API key and the SLOs
+are all options; run ``locust -f locustfile.py --help`` to see them.
+
+When the run ends, the aggregated p95, p99 and error rate are checked
+against the SLOs and locust exits with status 1 if any is breached.
+
+``python locustfile.py`` runs the whole thing headless against a local
+waitress server with limits lifted; see ``main`` for its options.
+"""
+
+import argparse
+import logging
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from locust import HttpUser, between, events
+from locust.runners import WorkerRunner
+
+logger = logging.getLogger(__name__)
+
+BANKS = ("citi-private-bank", "jpmorgan-chase")
+ROUTING_NUMBERS = ("021000021", "026009593", "011000138", "123456789")
+ASSET_SORT_FIELDS = ("symbol", "market_cap", "revenue")
+PAGE_SIZES = (10, 25, 50, 100)
+MAX_CURSOR_PAGES = 5
+
+# Task name -> relative weight; override with --task-weights name=weight,...
+DEFAULT_TASK_WEIGHTS: Dict[str, int] = {
+    "company_by_ticker": 10,
+    "companies_by_sector": 6,
+    "real_assets_page": 6,
+    "ticker_search": 4,
+    "companies_batch": 2,
+    "companies_cursor_walk": 2,
+    "real_assets_cursor_walk": 2,
+    "corporate_structure": 1,
+    "corporate_data": 1,
+    "health": 1,
+    "banking_info": 1,
+    "bank_account": 1,
+    "validate_routing": 1,
+    "bank_transfer": 1,
+    "export_companies": 0,
+    "export_real_assets": 0,
+}
+
+
+class Universe:
+    """Tickers, sectors and page counts served by the target."""
+
+    def __init__(self, sectors: Dict[str, List[str]], real_assets_total: int) -> None:
+        self.sectors = sectors
+        self.sector_names = sorted(name for name, tickers in sectors.items() if tickers)
+        self.tickers = sorted(
+            ticker for tickers in sectors.values() for ticker in tickers
+        )
+        self.real_assets_total = real_assets_total
+
+    @classmethod
+    def fetch(cls, host: str, api_key: str) -> "Universe":
+        """Read the universe from a running server."""
+        headers = {"X-API-KEY": api_key}
+        structure = requests.get(
+            f"{host}/api/v1/corporate-structure", headers=headers, timeout=60
+        )
+        structure.raise_for_status()
+        assets = requests.get(
+            f"{host}/api/v1/real-assets?per_page=1", headers=headers, timeout=60
+        )
+        assets.raise_for_status()
+        # Both responses use the API envelope; the structure is under "data".
+        sectors = {
+            name: [company["ticker"] for company in companies if company.get("ticker")]
+            for name, companies in structure.json()["data"].items()
+        }
+        return cls(sectors, int(assets.json().get("total", 0)))
+
+
+UNIVERSE: Optional[Universe] = None
+
+
+def parse_weights(spec: str) -> Dict[str, int]:
+    """Apply ``name=weight,...`` overrides to the default task weights."""
+    weights = dict(DEFAULT_TASK_WEIGHTS)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, weight = item.partition("=")
+        if name not in weights:
+            raise ValueError(f"Unknown task {name!r}; choose from {sorted(weights)}")
+        weights[name] = int(weight)
+    return weights
+
+
+def random_page(rng: random.Random, total: int, per_page: int) -> int:
+    """A page number within the result set, skewed towards the first pages."""
+    pages = max(1, -(-total // per_page))
+    return min(pages, int(rng.paretovariate(1.2)))
+
 
 class EquityShieldUser(HttpUser):
-    wait_time = between(1, 3)
-
-    @task(2)
-    def get_corporate_structure(self):
-        self.client.get("/api/corporate-structure")
-
-    @task(2)
-    def get_real_assets(self):
-        self.client.get("/api/real-assets")
-
-    @task(1)
-    def get_companies_by_sector(self):
-        # Example sector, adjust as needed
-        sector = "Technology"
-        self.client.get(f"/api/companies/{sector}")
-
-    @task(1)
-    def get_company_by_ticker(self):
-        # Example ticker, adjust as needed
-        ticker = "AAPL"
-        self.client.get(f"/api/company/{ticker}")
-
-    @task(1)
-    def get_banking_info(self):
-        self.client.get("/api/banking-info")
+    """An API client browsing companies, assets and bank endpoints."""
+
+    wait_time = between(0.5, 2.0)
+
+    def on_start(self) -> None:
+        self.rng = random.Random()
+        self.client.headers["X-API-KEY"] = self.environment.parsed_options.api_key
+
+    @property
+    def universe(self) -> Universe:
+        assert UNIVERSE is not None, "universe is loaded when the test starts"
+        return UNIVERSE
+
+    def get(self, path: str, name: str, **params: Any) -> Any:
+        """GET ``path``; ``name`` groups the randomized URLs in the stats."""
+        return self.client.get(path, params=params, name=name)
+
+    def company_by_ticker(self) -> None:
+        ticker = self.rng.choice(self.universe.tickers)
+        self.get(f"/api/company/{ticker}", "/api/company/[ticker]")
+
+    def companies_by_sector(self) -> None:
+        sector = self.rng.choice(self.universe.sector_names)
+        per_page = self.rng.choice(PAGE_SIZES)
+        total = len(self.universe.sectors[sector])
+        self.get(
+            f"/api/companies/{sector}",
+            "/api/companies/[sector]?page",
+            page=random_page(self.rng, total, per_page),
+            per_page=per_page,
+        )
+
+    def companies_cursor_walk(self) -> None:
+        sector = self.rng.choice(self.universe.sector_names)
+        self.walk_cursor(
+            f"/api/companies/{sector}",
+            "/api/companies/[sector]?cursor",
+            {"per_page": self.rng.choice(PAGE_SIZES), "include_total": "false"},
+        )
+
+    def real_assets_page(self) -> None:
+        per_page = self.rng.choice(PAGE_SIZES)
+        params: Dict[str, Any] = {
+            "page": random_page(self.rng, self.universe.real_assets_total, per_page),
+            "per_page": per_page,
+            "sort_by": self.rng.choice(ASSET_SORT_FIELDS),
+            "sort_order": self.rng.choice(("asc", "desc")),
+        }
+        if self.rng.random() < 0.3:
+            params["min_market_cap"] = 10 ** self.rng.randint(8, 11)
+        if self.rng.random() < 0.2:
+            params["max_market_cap"] = 10 ** self.rng.randint(11, 13)
+        self.get("/api/v1/real-assets", "/api/v1/real-assets?page", **params)
+
+    def real_assets_cursor_walk(self) -> None:
+        self.walk_cursor(
+            "/api/v1/real-assets",
+            "/api/v1/real-assets?cursor",
+            {
+                "per_page": self.rng.choice(PAGE_SIZES),
+                "sort_by": self.rng.choice(ASSET_SORT_FIELDS),
+                "sort_order": self.rng.choice(("asc", "desc")),
+            },
+        )
+
+    def walk_cursor(self, path: str, name: str, params: Dict[str, Any]) -> None:
+        """Follow ``next_cursor`` for a few pages, like a scrolling client."""
+        cursor = ""
+        for _ in range(self.rng.randint(1, MAX_CURSOR_PAGES)):
+            with self.client.get(
+                path,
+                params={**params, "cursor": cursor},
+                name=name,
+                catch_response=True,
+            ) as response:
+                if response.status_code != 200:
+                    response.failure(f"HTTP {response.status_code}")
+                    return
+                cursor = response.json().get("next_cursor")
+            if not cursor:
+                return
+
+    def ticker_search(self) -> None:
+        ticker = self.rng.choice(self.universe.tickers)
+        self.get(
+            "/api/v1/tickers",
+            "/api/v1/tickers?prefix",
+            prefix=ticker[: self.rng.randint(1, 2)],
+            limit=self.rng.choice((5, 10, 20)),
+        )
+
+    def companies_batch(self) -> None:
+        tickers = self.rng.sample(
+            self.universe.tickers,
+            min(len(self.universe.tickers), self.rng.randint(5, 50)),
+        )
+        if self.rng.random() < 0.1:
+            tickers.append("ZZZZ-MISSING")
+        self.client.post("/api/v1/companies:batch", json={"tickers": tickers})
+
+    def corporate_structure(self) -> None:
+        self.get("/api/v1/corporate-structure", "/api/v1/corporate-structure")
+
+    def corporate_data(self) -> None:
+        self.get("/api/v1/corporate-data", "/api/v1/corporate-data")
+
+    def health(self) -> None:
+        self.get("/health", "/health")
+
+    def banking_info(self) -> None:
+        self.get("/api/banking-info", "/api/banking-info")
+
+    def bank_account(self) -> None:
+        bank = self.rng.choice(BANKS)
+        self.get(f"/api/banks/{bank}/account", "/api/banks/[bank]/account")
+
+    def validate_routing(self) -> None:
+        self.client.post(
+            "/api/banks/validate-routing",
+            json={"routing_number": self.rng.choice(ROUTING_NUMBERS)},
+        )
+
+    def bank_transfer(self) -> None:
+        from_bank, to_bank = self.rng.sample(BANKS, 2)
+        self.client.post(
+            "/api/banks/transfer",
+            json={
+                "from_bank": from_bank,
+                "to_bank": to_bank,
+                "amount": round(self.rng.uniform(100, 250_000), 2),
+                "currency": "USD",
+            },
+        )
+
+    def export_companies(self) -> None:
+        sector = self.rng.choice(self.universe.sector_names)
+        self.get(
+            "/api/v1/export/companies.ndjson",
+            "/api/v1/export/companies.ndjson",
+            sector=sector,
+        )
+
+    def export_real_assets(self) -> None:
+        self.get(
+            "/api/v1/export/real-assets.ndjson",
+            "/api/v1/export/real-assets.ndjson",
+            sort_by=self.rng.choice(ASSET_SORT_FIELDS),
+        )
+
+
+def weighted_tasks(weights: Dict[str, int]) -> List[Callable[..., None]]:
+    """Locust's task list: each task repeated by its weight."""
+    tasks = []
+    for name, weight in weights.items():
+        tasks.extend([getattr(EquityShieldUser, name)] * max(0, weight))
+    if not tasks:
+        raise ValueError("Every task weight is zero")
+    return tasks
+
+
+@events.init_command_line_parser.add_listener
+def add_options(parser: Any) -> None:
+    parser.add_argument(
+        "--api-key",
+        env_var="LOCUST_API_KEY",
+        default=os.getenv("API_KEY", ""),
+        help="X-API-KEY sent with every request (default: $API_KEY)",
+    )
+    parser.add_argument(
+        "--task-weights",
+        env_var="LOCUST_TASK_WEIGHTS",
+        default="",
+        help="override task weights, e.g. 'export_companies=1,bank_transfer=0'",
+    )
+    parser.add_argument(
+        "--think-time",
+        env_var="LOCUST_THINK_TIME",
+        default="0.5,2.0",
+        help="min,max seconds each user waits between tasks",
+    )
+    parser.add_argument(
+        "--slo-p95-ms", env_var="LOCUST_SLO_P95_MS", type=float, default=250.0
+    )
+    parser.add_argument(
+        "--slo-p99-ms", env_var="LOCUST_SLO_P99_MS", type=float, default=1000.0
+    )
+    parser.add_argument(
+        "--slo-error-rate",
+        env_var="LOCUST_SLO_ERROR_RATE",
+        type=float,
+        default=0.01,
+        help="maximum share of failed requests",
+    )
+
+
+@events.init.add_listener
+def configure_workload(environment: Any, **kwargs: Any) -> None:
+    options = environment.parsed_options
+    if options is None:
+        return
+    EquityShieldUser.tasks = weighted_tasks(parse_weights(options.task_weights))
+    low, high = (float(value) for value in options.think_time.split(","))
+    EquityShieldUser.wait_time = between(low, high)
+
+
+@events.test_start.add_listener
+def load_universe(environment: Any, **kwargs: Any) -> None:
+    global UNIVERSE
+
+    if environment.parsed_options and not environment.parsed_options.api_key:
+        logger.warning("No --api-key or API_KEY set; every request will be a 401")
+    host = environment.host or EquityShieldUser.host
+    UNIVERSE = Universe.fetch(host, environment.parsed_options.api_key)
+    logger.info(
+        "Workload uses %d tickers in %d sectors and %d real assets",
+        len(UNIVERSE.tickers),
+        len(UNIVERSE.sector_names),
+        UNIVERSE.real_assets_total,
+    )
+
+
+def slo_breaches(environment: Any) -> List[str]:
+    """Describe every SLO the finished run missed."""
+    options = environment.parsed_options
+    total = environment.stats.total
+    if total.num_requests == 0:
+        return ["no requests were made"]
+    breaches = []
+    p95 = total.get_response_time_percentile(0.95)
+    p99 = total.get_response_time_percentile(0.99)
+    if p95 > options.slo_p95_ms:
+        breaches.append(f"p95 {p95:.0f}ms > {options.slo_p95_ms:.0f}ms")
+    if p99 > options.slo_p99_ms:
+        breaches.append(f"p99 {p99:.0f}ms > {options.slo_p99_ms:.0f}ms")
+    if total.fail_ratio > options.slo_error_rate:
+        breaches.append(
+            f"error rate {total.fail_ratio:.2%} > {options.slo_error_rate:.2%}"
+        )
+    return breaches
+
+
+@events.quitting.add_listener
+def check_slos(environment: Any, **kwargs: Any) -> None:
+    if (
+        isinstance(environment.runner, WorkerRunner)
+        or environment.parsed_options is None
+    ):
+        return
+    breaches = slo_breaches(environment)
+    if breaches:
+        for breach in breaches:
+            logger.error("SLO breached: %s", breach)
+        environment.process_exit_code = 1
+    else:
+        logger.info("All SLOs met")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_healthy(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=5):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def main() -> int:
+    """Serve the API with waitress locally and run this workload headless.
+
+    Unknown options are passed on to locust, e.g. ``--slo-p95-ms 100`` or
+    ``--csv results``. Rate limits are lifted on the local server so the
+    run measures capacity rather than quota.
+    """
+    parser = argparse.ArgumentParser(description=(main.__doc__ or "").split("\n")[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--spawn-rate", type=float, default=5)
+    parser.add_argument("--run-time", default="60s")
+    parser.add_argument("--threads", type=int, default=8, help="waitress threads")
+    parser.add_argument("--port", type=int, default=0, help="default: a free port")
+    args, locust_args = parser.parse_known_args()
+
+    port = args.port or free_port()
+    host = f"http://127.0.0.1:{port}"
+    env = dict(os.environ)
+    env.setdefault("API_KEY", secrets.token_urlsafe(24))
+    env.update(
+        RATELIMIT_ENABLED="false",
+        RATE_LIMIT_TIERS="loadtest=1000000/second",
+        RATE_LIMIT_DEFAULT_TIER="loadtest",
+        LOG_MODE=env.get("LOG_MODE", "production"),
+        LOG_LEVEL=env.get("LOG_LEVEL", "WARNING"),
+    )
+    root = os.path.dirname(os.path.abspath(__file__))
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "waitress",
+            f"--listen=127.0.0.1:{port}",
+            f"--threads={args.threads}",
+            "wsgi:app",
+        ],
+        cwd=root,
+        env=env,
+    )
+    try:
+        wait_until_healthy(host, timeout=60)
+        command = [
+            sys.executable,
+            "-m",
+            "locust",
+            "-f",
+            os.path.abspath(__file__),
+            "--headless",
+            "--only-summary",
+            "--users",
+            str(args.users),
+            "--spawn-rate",
+            str(args.spawn_rate),
+            "--run-time",
+            args.run_time,
+            "--host",
+            host,
+            *locust_args,
+        ]
+        return subprocess.call(command, cwd=root, env=env)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
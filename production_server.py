@@ -1,45 +1,29 @@
 import os
+import tempfile
+
+# Settings are read from the environment as the src modules are imported, so
+# a project .env file, if there is one, is loaded first. Deployed containers
+# set real environment variables and skip the import.
+if os.path.exists(
+    env_file := os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+):
+    from dotenv import load_dotenv
+    load_dotenv(env_file)
+
 from waitress import serve
-from src.api_server import app
+from src.api_server import app, data_store
+from src import async_server
+from src.metrics import REGISTRY as metrics
+from src.prefork import PreforkServer, default_worker_count
 from werkzeug.middleware.proxy_fix import ProxyFix
-import logging.config
-from logging.handlers import RotatingFileHandler
+import logging
 from flask_cors import CORS
+from src.logging_config import MODE_PRODUCTION, configure_logging
 
-# Configure logging
-log_file_path = os.getenv('LOG_FILE', '/var/log/equity-shield/api.log')
-log_dir = os.path.dirname(log_file_path)
-
-if log_dir and not os.path.exists(log_dir):
-    os.makedirs(log_dir)
-
-logging.config.dictConfig({
-    'version': 1,
-    'disable_existing_loggers': False,
-    'formatters': {
-        'json': {
-            'format': '{"timestamp":"%(asctime)s","level":"%(levelname)s","message":"%(message)s"}',
-            'datefmt': '%Y-%m-%dT%H:%M:%S%z'
-        }
-    },
-    'handlers': {
-        'file': {
-            'class': 'logging.handlers.RotatingFileHandler',
-            'filename': log_file_path,
-            'maxBytes': int(os.getenv('LOG_MAX_SIZE', 104857600)),  # 100MB
-            'backupCount': int(os.getenv('LOG_BACKUP_COUNT', 10)),
-            'formatter': 'json'
-        },
-        'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'json'
-        }
-    },
-    'root': {
-        'handlers': ['file', 'console'],
-        'level': os.getenv('LOG_LEVEL', 'INFO')
-    }
-})
+# Configure logging: JSON records, formatted and written (and rotated) on a
+# background thread; LOG_FILE defaults to the production log path.
+os.environ.setdefault('LOG_FILE', '/var/log/equity-shield/api.log')
+configure_logging(os.getenv('LOG_MODE', MODE_PRODUCTION))
 
 logger = logging.getLogger(__name__)
 
@@ -56,28 +40,82 @@ CORS(app, resources={
 # Trust proxy headers
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
+
+def run_prefork(host, port, threads, workers, server_options):
+    """Serve from a master and ``workers`` forked processes (see src.prefork)."""
+    if not metrics.directory:
+        # Workers must share their totals for /metrics to cover all of them.
+        metrics.directory = tempfile.mkdtemp(prefix='equity-shield-metrics-')
+    metrics.remove_files()
+    PreforkServer(
+        app,
+        host=host,
+        port=port,
+        workers=workers,
+        threads=threads,
+        data_store=data_store,
+        # Fold each exited worker's totals into one file, so restarts do not
+        # leave a file per dead worker behind.
+        on_exit=metrics.retire,
+        reload_interval=data_store.check_interval,
+        graceful_timeout=float(os.getenv('GRACEFUL_TIMEOUT', '30')),
+        reuse_port=os.getenv('REUSE_PORT', 'false').lower() == 'true',
+        server_options=server_options,
+    ).run()
+
+
+def run_asyncio(host, port):
+    """Serve from one asyncio event loop (see src.async_server)."""
+    # Load the data before accepting, then poll the files from a background
+    # thread rather than on the request path.
+    data_store.snapshot().build_derived()
+    data_store.start_watcher()
+    async_server.serve(
+        app,
+        host=host,
+        port=port,
+        threads=int(os.getenv('ASYNC_APP_THREADS', str(async_server.DEFAULT_THREADS))),
+        keepalive_timeout=float(os.getenv(
+            'KEEPALIVE_TIMEOUT', str(async_server.DEFAULT_KEEPALIVE_TIMEOUT)
+        )),
+        graceful_timeout=float(os.getenv('GRACEFUL_TIMEOUT', '30')),
+        url_scheme='https',
+    )
+
+
 if __name__ == '__main__':
     try:
         # Get configuration from environment
         host = os.getenv('HOST', '0.0.0.0')
         port = int(os.getenv('PORT', '5001'))
         threads = int(os.getenv('WAITRESS_THREADS', '4'))
-        
-        logger.info(f"Starting production server on {host}:{port} with {threads} threads")
-        
-        # Start Waitress server
-        serve(
-            app,
-            host=host,
-            port=port,
-            threads=threads,
+        workers_setting = os.getenv('WORKERS', '1')
+        workers = (
+            default_worker_count()
+            if workers_setting == 'auto'
+            else int(workers_setting)
+        )
+        server_options = dict(
             url_scheme='https',
             channel_timeout=30,
             cleanup_interval=30,
             connection_limit=1000,
             max_request_header_size=262144,  # 256KB
-            url_prefix=''
+            url_prefix='',
         )
+
+        if os.getenv('SERVER_MODE', 'waitress') == 'asyncio':
+            logger.info(f"Starting asyncio server on {host}:{port}")
+            run_asyncio(host, port)
+        elif workers > 1:
+            run_prefork(host, port, threads, workers, server_options)
+        else:
+            logger.info(
+                f"Starting production server on {host}:{port} with {threads} threads"
+            )
+
+            # Start Waitress server
+            serve(app, host=host, port=port, threads=threads, **server_options)
     except Exception as e:
         logger.error(f"Server failed to start: {str(e)}", exc_info=True)
         raise
@@ -0,0 +1,56 @@
+import argparse
+import json
+import os
+
+from src import json_provider
+from src.forecasting import record_period
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def record(period, data_path, history_path):
+    with open(data_path, encoding='utf-8') as f:
+        corporate_data = json.load(f)
+    history = None
+    if os.path.exists(history_path):
+        with open(history_path, encoding='utf-8') as f:
+            history = json.load(f)
+    history = record_period(history, period, corporate_data)
+    # Replace the file in one step: the API server may be reading it.
+    tmp_path = f"{history_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json_provider.dumps(history, indent=2))
+    os.replace(tmp_path, history_path)
+    return history
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=(
+            "Append the financials of corporate_data.json to "
+            "financial_history.json as one period."
+        )
+    )
+    parser.add_argument(
+        'period',
+        help=(
+            "period label that sorts after the recorded ones, e.g. 2025-Q2; "
+            "recording the latest period again replaces it"
+        ),
+    )
+    parser.add_argument(
+        '--data', default=os.path.join(DATA_DIR, 'corporate_data.json')
+    )
+    parser.add_argument(
+        '--history', default=os.path.join(DATA_DIR, 'financial_history.json')
+    )
+    args = parser.parse_args(argv)
+    history = record(args.period, args.data, args.history)
+    print(
+        f"Recorded {args.period} for {len(history['tickers'])} tickers "
+        f"in {args.history}"
+    )
+
+
+if __name__ == "__main__":
+    main()
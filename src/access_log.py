@@ -0,0 +1,216 @@
+"""Compact JSONL access records, written off the request thread.
+
+The request thread only puts a small dict on a bounded queue. A daemon
+writer thread encodes the records and appends them in batches, one
+``write`` per batch on an ``O_APPEND`` descriptor, so processes sharing one
+file interleave whole batches rather than partial lines. When the writer
+falls behind and the queue is full, records are dropped and counted
+instead of blocking requests.
+
+Each line holds ``ts`` (request start, Unix seconds), ``method``, ``path``
+(with query string), ``route``, ``status``, ``ms`` (handling time),
+``bytes`` (response length, null when streamed) and, for requests with a
+small JSON body on a route listed in ``body_routes``, ``body``.
+``benchmarks/replay.py`` re-issues these logs.
+
+Bodies are off by default and ``"*"`` in ``body_routes`` stands for every
+route but the ``SENSITIVE_ROUTES`` (which must be named to be recorded).
+The values of ``redact_fields`` are replaced by ``REDACTED`` in recorded
+bodies, at any depth, and in query strings.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import urllib.parse
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+
+from src import json_provider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_PENDING = 10000
+DEFAULT_MAX_BODY = 4096
+BATCH_SIZE = 1000
+REDACTED = "[redacted]"
+# Bank routes, whose bodies identify accounts and transfers.
+SENSITIVE_ROUTES = frozenset(
+    {
+        "/api/banking-info",
+        "/api/banks/<bank_name>/account",
+        "/api/banks/validate-routing",
+        "/api/banks/transfer",
+    }
+)
+SENSITIVE_FIELDS = frozenset(
+    {
+        "account_number",
+        "routing_number",
+        "from_bank",
+        "to_bank",
+        "amount",
+        "ein_number",
+        "api_key",
+        "password",
+        "token",
+    }
+)
+
+_STOP = object()
+
+
+class AccessLog:
+    """Append access records to ``path`` from a background thread."""
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        max_body: int = DEFAULT_MAX_BODY,
+        body_routes: Iterable[str] = (),
+        redact_fields: Iterable[str] = SENSITIVE_FIELDS,
+    ) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_body = max_body
+        self.body_routes = frozenset(body_routes)
+        self.redact_fields = frozenset(field.lower() for field in redact_fields)
+        self.dropped = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(max_pending)
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_pid: Optional[int] = None
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Queue one record; never blocks."""
+        if self._writer_pid != os.getpid():
+            self._start_writer()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def records_body(self, route: str) -> bool:
+        """Whether requests to ``route`` have their bodies recorded."""
+        if route in self.body_routes:
+            return True
+        return "*" in self.body_routes and route not in SENSITIVE_ROUTES
+
+    def redact_body(self, body: str) -> Optional[str]:
+        """``body`` with sensitive fields redacted; None if it is not JSON."""
+        try:
+            value = json_provider.loads(body)
+        except ValueError:
+            return None
+        return json_provider.dumps(self._redact(value))
+
+    def redact_path(self, path: str) -> str:
+        """``path`` with the values of sensitive query parameters redacted."""
+        base, separator, query = path.partition("?")
+        pairs = urllib.parse.parse_qsl(query, keep_blank_values=True)
+        if not any(name.lower() in self.redact_fields for name, _ in pairs):
+            return path
+        redacted = [
+            (name, REDACTED if name.lower() in self.redact_fields else value)
+            for name, value in pairs
+        ]
+        return f"{base}{separator}{urllib.parse.urlencode(redacted)}"
+
+    def _redact(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            return {
+                key: (
+                    REDACTED
+                    if str(key).lower() in self.redact_fields
+                    else self._redact(item)
+                )
+                for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [self._redact(item) for item in value]
+        return value
+
+    def close(self) -> None:
+        """Write everything queued so far and stop the writer."""
+        writer = self._writer
+        if writer is None or self._writer_pid != os.getpid():
+            return
+        self._queue.put(_STOP)
+        writer.join()
+        self._writer = None
+        self._writer_pid = None
+
+    def _start_writer(self) -> None:
+        with self._lock:
+            if self._writer_pid == os.getpid():
+                return
+            # A forked child inherits the parent's queue but not its thread.
+            self._queue = queue.Queue(self._queue.maxsize)
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._writer = threading.Thread(
+                target=self._run, name="access-log-writer", daemon=True
+            )
+            self._writer_pid = os.getpid()
+            self._writer.start()
+
+    def _run(self) -> None:
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            stopping = False
+            while not stopping:
+                batch: List[Dict[str, Any]] = []
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                while item is not _STOP:
+                    batch.append(item)
+                    if len(batch) >= BATCH_SIZE:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                stopping = item is _STOP
+                if batch:
+                    self._write(fd, batch)
+        finally:
+            os.close(fd)
+
+    def _write(self, fd: int, batch: List[Dict[str, Any]]) -> None:
+        data = b"".join(
+            json_provider.dumps_bytes(entry, default=str) + b"\n" for entry in batch
+        )
+        try:
+            os.write(fd, data)
+        except OSError:
+            logger.exception("Failed to write %d access records", len(batch))
+
+
+def from_env() -> Optional[AccessLog]:
+    """The access log configured by ``ACCESS_LOG_FILE``, or None if unset."""
+    path = os.getenv("ACCESS_LOG_FILE")
+    if not path:
+        return None
+    access_log = AccessLog(
+        path,
+        max_pending=int(os.getenv("ACCESS_LOG_MAX_PENDING", str(DEFAULT_MAX_PENDING))),
+        max_body=int(os.getenv("ACCESS_LOG_MAX_BODY", str(DEFAULT_MAX_BODY))),
+        body_routes=_split(os.getenv("ACCESS_LOG_BODY_ROUTES", "")),
+        redact_fields=SENSITIVE_FIELDS
+        | _split(os.getenv("ACCESS_LOG_REDACT_FIELDS", "")),
+    )
+    atexit.register(access_log.close)
+    return access_log
+
+
+def _split(value: str) -> FrozenSet[str]:
+    return frozenset(part.strip() for part in value.split(",") if part.strip())
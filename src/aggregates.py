@@ -0,0 +1,293 @@
+"""Incrementally maintained per-sector aggregates.
+
+``SectorAggregator`` keeps, for every sector of ``corporate_structure.json``,
+the number of companies and the count, sum and mean of their known market
+cap and revenue (joined from ``corporate_data.json`` by ticker). Adding,
+removing or updating a company adjusts the running totals of the sectors it
+belongs to, so reads never walk the universe.
+
+``sync`` brings the aggregates in line with a new pair of parsed files by
+diffing them against the previous ones: sectors whose company list is
+unchanged are skipped, and only tickers whose membership or financials
+changed touch the totals. Sums are kept by adding and subtracting floats, so
+after many updates they can differ from a fresh sum in the last few bits.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.indexes import normalize_ticker
+
+FIELDS = ("market_cap", "revenue")
+# Values of FIELDS for one ticker; None where unknown.
+Financials = Tuple[Optional[float], ...]
+UNKNOWN: Financials = (None,) * len(FIELDS)
+
+
+def to_number(value: Any) -> Optional[float]:
+    """A numeric field as float; None for missing or non-numeric values."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number  # NaN is unknown
+
+
+def ticker_key(company: Dict[str, Any]) -> str:
+    return normalize_ticker(str(company.get("ticker") or ""))
+
+
+class SectorTotals:
+    """Running totals for one sector."""
+
+    __slots__ = ("companies", "known", "total")
+
+    def __init__(self) -> None:
+        self.companies = 0
+        self.known = dict.fromkeys(FIELDS, 0)
+        self.total = dict.fromkeys(FIELDS, 0.0)
+
+    def mean(self, field: str) -> Optional[float]:
+        """Mean of the known values of ``field``, or None if there are none."""
+        known = self.known[field]
+        return self.total[field] / known if known else None
+
+    def apply(self, financials: Financials, times: int) -> None:
+        """Add (``times`` > 0) or remove (< 0) companies with ``financials``."""
+        for field, value in zip(FIELDS, financials):
+            if value is not None:
+                self.known[field] += times
+                self.total[field] += times * value
+
+    def as_dict(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"companies": self.companies}
+        for field in FIELDS:
+            stats[field] = {
+                "known": self.known[field],
+                "total": self.total[field],
+                "mean": self.mean(field),
+            }
+        return stats
+
+
+class SectorAggregator:
+    """Per-sector company counts and financial totals (see the module docstring).
+
+    Companies are identified by case-insensitive ticker. A ticker listed more
+    than once counts once per entry, in each sector that lists it.
+    """
+
+    def __init__(self) -> None:
+        self._totals: Dict[str, SectorTotals] = {}
+        # sector -> ticker -> entries; ticker -> sector -> entries
+        self._members: Dict[str, Counter] = {}
+        self._holders: Dict[str, Counter] = {}
+        self._financials: Dict[str, Financials] = {}
+        # ticker -> symbols of the corporate data that normalize to it
+        self._symbols: Dict[str, set] = {}
+        # Last synced inputs, to diff the next ones against.
+        self._structure: Dict[str, List[Dict[str, Any]]] = {}
+        self._source_financials: Optional[Dict[str, Any]] = None
+        self._names: Dict[str, List[str]] = {}
+
+    # -- updates ----------------------------------------------------------
+
+    def add_sector(self, sector: str) -> None:
+        if sector not in self._totals:
+            self._totals[sector] = SectorTotals()
+            self._members[sector] = Counter()
+
+    def remove_sector(self, sector: str) -> None:
+        for ticker, entries in list(self._members.get(sector, Counter()).items()):
+            self._remove(sector, ticker, entries)
+        self._totals.pop(sector, None)
+        self._members.pop(sector, None)
+        self._structure.pop(sector, None)
+        self._names.pop(sector, None)
+
+    def add_company(self, sector: str, ticker: str) -> None:
+        self.add_sector(sector)
+        self._add(sector, normalize_ticker(ticker), 1)
+        self._names.pop(sector, None)
+
+    def remove_company(self, sector: str, ticker: str) -> bool:
+        """Remove one entry of ``ticker`` from ``sector``; False if absent."""
+        key = normalize_ticker(ticker)
+        if not self._members.get(sector, Counter()).get(key):
+            return False
+        self._remove(sector, key, 1)
+        self._names.pop(sector, None)
+        return True
+
+    def set_financials(self, ticker: str, **values: Any) -> None:
+        """Set a ticker's financials; fields not given become unknown."""
+        key = normalize_ticker(ticker)
+        self._set_financials(key, tuple(to_number(values.get(f)) for f in FIELDS))
+
+    def remove_financials(self, ticker: str) -> None:
+        self._set_financials(normalize_ticker(ticker), UNKNOWN)
+
+    def _add(self, sector: str, key: str, entries: int) -> None:
+        self._members[sector][key] += entries
+        self._holders.setdefault(key, Counter())[sector] += entries
+        totals = self._totals[sector]
+        totals.companies += entries
+        totals.apply(self._financials.get(key, UNKNOWN), entries)
+
+    def _remove(self, sector: str, key: str, entries: int) -> None:
+        members = self._members[sector]
+        members[key] -= entries
+        if members[key] <= 0:
+            del members[key]
+        holders = self._holders[key]
+        holders[sector] -= entries
+        if holders[sector] <= 0:
+            del holders[sector]
+            if not holders:
+                del self._holders[key]
+        totals = self._totals[sector]
+        totals.companies -= entries
+        totals.apply(self._financials.get(key, UNKNOWN), -entries)
+
+    def _set_financials(self, key: str, financials: Financials) -> None:
+        previous = self._financials.get(key, UNKNOWN)
+        if financials == previous:
+            return
+        for sector, entries in self._holders.get(key, {}).items():
+            totals = self._totals[sector]
+            totals.apply(previous, -entries)
+            totals.apply(financials, entries)
+        if financials == UNKNOWN:
+            self._financials.pop(key, None)
+        else:
+            self._financials[key] = financials
+
+    # -- sync -------------------------------------------------------------
+
+    def sync(
+        self,
+        structure: Optional[Dict[str, List[Dict[str, Any]]]],
+        corporate_data: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Apply the differences between the last synced files and these."""
+        structure = structure or {}
+        if corporate_data is not self._source_financials:
+            self._sync_financials(corporate_data or {})
+            self._source_financials = corporate_data
+        for sector in [name for name in self._totals if name not in structure]:
+            self.remove_sector(sector)
+        for sector, companies in structure.items():
+            previous = self._structure.get(sector)
+            if sector in self._totals and (
+                previous is companies or previous == companies
+            ):
+                self._structure[sector] = companies
+                continue
+            self.add_sector(sector)
+            current = Counter(map(ticker_key, companies))
+            members = self._members[sector]
+            for key in current.keys() | members.keys():
+                delta = current[key] - members[key]
+                if delta > 0:
+                    self._add(sector, key, delta)
+                elif delta < 0:
+                    self._remove(sector, key, -delta)
+            self._structure[sector] = companies
+            self._names.pop(sector, None)
+        if list(self._totals) != list(structure):
+            self._totals = {sector: self._totals[sector] for sector in structure}
+
+    def _sync_financials(self, corporate_data: Dict[str, Any]) -> None:
+        previous = self._source_financials or {}
+        changed = [
+            symbol
+            for symbol, info in corporate_data.items()
+            if symbol not in previous or previous[symbol] != info
+        ]
+        changed.extend(previous.keys() - corporate_data.keys())
+        dirty = set()
+        for symbol in changed:
+            key = normalize_ticker(symbol)
+            symbols = self._symbols.setdefault(key, set())
+            if isinstance(corporate_data.get(symbol), dict):
+                symbols.add(symbol)
+            else:
+                symbols.discard(symbol)
+            dirty.add(key)
+        order: Optional[Dict[str, int]] = None
+        for key in dirty:
+            symbols = self._symbols[key]
+            if not symbols:
+                del self._symbols[key]
+                self._set_financials(key, UNKNOWN)
+                continue
+            if len(symbols) == 1:
+                (symbol,) = symbols
+            else:
+                # The first symbol for a ticker supplies its financials.
+                if order is None:
+                    order = {name: index for index, name in enumerate(corporate_data)}
+                symbol = min(symbols, key=order.__getitem__)
+            info = corporate_data[symbol]
+            self._set_financials(key, tuple(to_number(info.get(f)) for f in FIELDS))
+
+    # -- reads ------------------------------------------------------------
+
+    @property
+    def sectors(self) -> List[str]:
+        return list(self._totals)
+
+    def __contains__(self, sector: object) -> bool:
+        return sector in self._totals
+
+    def totals(self, sector: str) -> Optional[SectorTotals]:
+        """The live totals of ``sector`` (do not modify), or None."""
+        return self._totals.get(sector)
+
+    def counts(self) -> Dict[str, int]:
+        """Companies per sector, in structure order."""
+        return {sector: totals.companies for sector, totals in self._totals.items()}
+
+    def stats(self, sector: Optional[str] = None) -> Dict[str, Any]:
+        """Totals as plain dicts, for one sector or for all of them."""
+        if sector is not None:
+            totals = self._totals.get(sector)
+            return totals.as_dict() if totals is not None else {}
+        return {name: totals.as_dict() for name, totals in self._totals.items()}
+
+    def top(self, n: int, by: str = "companies") -> List[Tuple[str, Any]]:
+        """The ``n`` largest sectors by company count or a field's total/mean.
+
+        ``by`` is ``"companies"``, a field (its total) or ``"<field>_mean"``.
+        Ties keep structure order; sectors without a known mean are skipped.
+        """
+        return heapq.nlargest(n, self._ranked(by), key=lambda item: item[1])
+
+    def _ranked(self, by: str) -> Iterable[Tuple[str, Any]]:
+        items = self._totals.items()
+        if by == "companies":
+            return ((sector, totals.companies) for sector, totals in items)
+        if by in FIELDS:
+            return ((sector, totals.total[by]) for sector, totals in items)
+        field = by[: -len("_mean")] if by.endswith("_mean") else None
+        if field not in FIELDS:
+            raise ValueError(f"Unknown ranking {by!r}")
+        means = ((sector, totals.mean(field)) for sector, totals in items)
+        return ((sector, mean) for sector, mean in means if mean is not None)
+
+    def names(self, sector: str) -> List[str]:
+        """Company names of a synced sector in file order (do not modify).
+
+        Lists are built on first read and kept until the sector changes.
+        """
+        names = self._names.get(sector)
+        if names is None:
+            companies = self._structure.get(sector, [])
+            names = [company.get("name", "Unknown") for company in companies]
+            self._names[sector] = names
+        return names
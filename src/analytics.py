@@ -0,0 +1,166 @@
+"""Vectorized sector analytics over the columnar company universe.
+
+``SectorAnalytics`` computes, for every sector and for the whole classified
+universe (companies that belong to a sector), from a ``CompanyColumns``:
+
+* for market cap and revenue: the count of known values, total, mean, min,
+  max, median and the ``PERCENTILES``, and the Herfindahl index (the sum of
+  squared shares of the total, from 1/n for equal companies to 1.0 for a
+  monopoly);
+* ``revenue_share``: the sector's share of total revenue;
+* ``price_to_sales``: the aggregate ratio (total market cap over total
+  revenue) and the median per-company ratio, over companies with a known
+  market cap and a positive revenue.
+
+Every statistic is computed for all groups at once: sorting by value and
+then stably by sector puts each sector's values in a sorted run, percentiles
+interpolate linearly inside the runs (as ``np.percentile`` does) and totals
+use ``np.bincount``. Statistics without data are None. The result is
+computed once per data version and holds JSON-ready dicts.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.columnar import CompanyColumns
+
+FIELDS = ("market_cap", "revenue")
+PERCENTILES = (10, 25, 75, 90)
+
+
+def _number(value: Any) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def group_percentiles(
+    values: np.ndarray, groups: np.ndarray, size: int, percentiles: Sequence[float]
+) -> np.ndarray:
+    """Percentiles of ``values`` within each group, shape ``(size, len(q))``.
+
+    ``values`` must not contain NaN; groups without values get NaN.
+    """
+    order = np.argsort(values)
+    # A stable sort on the narrowest group dtype is a radix sort.
+    narrow = groups[order].astype(np.min_scalar_type(max(size - 1, 0)))
+    values = values[order[np.argsort(narrow, kind="stable")]]
+    counts = np.bincount(groups, minlength=size)
+    starts = np.cumsum(counts) - counts
+    result = np.full((size, len(percentiles)), np.nan)
+    present = counts > 0
+    if not present.any():
+        return result
+    fractions = np.asarray(percentiles, dtype=np.float64) / 100
+    positions = starts[present, None] + (counts[present, None] - 1) * fractions[None, :]
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, (starts + counts - 1)[present, None])
+    weight = positions - lower
+    result[present] = values[lower] + (values[upper] - values[lower]) * weight
+    return result
+
+
+def group_statistics(
+    values: np.ndarray, groups: np.ndarray, size: int
+) -> Dict[str, np.ndarray]:
+    """Count, total, mean, min, max, percentiles and Herfindahl per group.
+
+    ``values`` must not contain NaN.
+    """
+    known = np.bincount(groups, minlength=size)
+    total = np.bincount(groups, weights=values, minlength=size)
+    squares = np.bincount(groups, weights=values * values, minlength=size)
+    quantiles = group_percentiles(values, groups, size, (0, 50, 100) + PERCENTILES)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(known > 0, total / np.maximum(known, 1), np.nan)
+        herfindahl = np.where(total > 0, squares / (total * total), np.nan)
+    statistics = {
+        "known": known,
+        "total": total,
+        "mean": mean,
+        "min": quantiles[:, 0],
+        "median": quantiles[:, 1],
+        "max": quantiles[:, 2],
+    }
+    for index, percentile in enumerate(PERCENTILES, start=3):
+        statistics[f"p{percentile}"] = quantiles[:, index]
+    statistics["herfindahl"] = herfindahl
+    return statistics
+
+
+class SectorAnalytics:
+    """Per-sector and overall statistics (see the module docstring).
+
+    ``sectors`` maps each sector, in structure order, to its statistics and
+    ``overall`` holds the same statistics for every classified company.
+    """
+
+    def __init__(self, columns: CompanyColumns) -> None:
+        self.sector_names: List[str] = list(columns.sectors)
+        classified = columns.classified()
+        sector_groups = columns.sector_codes[classified].astype(np.intp)
+        size = len(self.sector_names)
+        # Every classified row appears twice: in its sector's group and in
+        # an extra last group for the whole universe.
+        groups = np.concatenate([sector_groups, np.full(len(sector_groups), size)])
+        size += 1
+        companies = np.bincount(groups, minlength=size)
+
+        statistics: Dict[str, Dict[str, np.ndarray]] = {}
+        values = {}
+        for field in FIELDS:
+            column = columns.columns[field][classified]
+            values[field] = np.concatenate([column, column])
+            known = ~np.isnan(values[field])
+            statistics[field] = group_statistics(
+                values[field][known], groups[known], size
+            )
+
+        revenue = statistics["revenue"]["total"]
+        revenue_share = revenue / revenue[-1] if revenue[-1] > 0 else None
+
+        valued = ~np.isnan(values["market_cap"]) & (values["revenue"] > 0)
+        market_cap, sales = values["market_cap"][valued], values["revenue"][valued]
+        valued_groups = groups[valued]
+        valued_companies = np.bincount(valued_groups, minlength=size)
+        valued_market_cap = np.bincount(
+            valued_groups, weights=market_cap, minlength=size
+        )
+        valued_sales = np.bincount(valued_groups, weights=sales, minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            aggregate = np.where(
+                valued_sales > 0, valued_market_cap / valued_sales, np.nan
+            )
+        median_ratio = group_percentiles(
+            market_cap / sales, valued_groups, size, (50,)
+        )[:, 0]
+
+        results = []
+        for group in range(size):
+            result: Dict[str, Any] = {"companies": int(companies[group])}
+            for field in FIELDS:
+                result[field] = {
+                    name: _number(array[group])
+                    for name, array in statistics[field].items()
+                }
+                result[field]["known"] = int(statistics[field]["known"][group])
+            result["revenue_share"] = (
+                None if revenue_share is None else _number(revenue_share[group])
+            )
+            result["price_to_sales"] = {
+                "companies": int(valued_companies[group]),
+                "aggregate": _number(aggregate[group]),
+                "median": _number(median_ratio[group]),
+            }
+            results.append(result)
+
+        self.overall: Dict[str, Any] = results.pop()
+        self.sectors: Dict[str, Dict[str, Any]] = dict(zip(self.sector_names, results))
+
+    def sector(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.sectors.get(name)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"overall": self.overall, "sectors": self.sectors}
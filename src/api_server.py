@@ -3,14 +3,16 @@
 from __future__ import annotations
 
 import datetime
+import hmac
 import json
 import logging
+import math
 import os
+import time
 from functools import wraps
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
-from flask import Flask, jsonify, request
-from flask_caching import Cache
+from flask import Flask, Response, g, jsonify, make_response, request
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -20,15 +22,60 @@ from src.bank_communication import (
     initiate_transfer,
     validate_routing_number,
 )
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler()],
+from src.data_store import DataSnapshot, DataStore
+from src import access_log as access_logging, json_provider, profiling
+from src.logging_config import configure_logging
+from src.memory_inspection import GROUPINGS, MemoryTracker, UnknownSnapshotError
+from src.metrics import REGISTRY as metrics
+from src.indexes import (
+    AssetIndex,
+    RecordSelection,
+    SectorIndex,
+    TickerIndex,
+    normalize_ticker,
+)
+from src.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from src.rate_limit import (
+    DEFAULT_TIER,
+    DEFAULT_TIERS_SPEC,
+    TokenBucketLimiter,
+    bucket_id,
+    configured_workers,
+    create_store,
+    parse_key_tiers,
+    parse_tiers,
 )
+from src.response_cache import CACHE_STATUS_HEADER, ResponseCache, create_backend
+from src.responses import PreparedResponse, ndjson_response
+
 logger = logging.getLogger(__name__)
 
+REQUEST_SECONDS = "http_request_duration_seconds"
+REQUESTS_TOTAL = "http_requests_total"
+STAGE_SECONDS = "api_stage_duration_seconds"
+CACHE_REQUESTS_TOTAL = "response_cache_requests_total"
+RATE_LIMIT_REJECTIONS_TOTAL = "rate_limit_rejections_total"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+metrics.histogram(REQUEST_SECONDS, "Request latency by route, until the body starts.")
+metrics.counter(REQUESTS_TOTAL, "Requests by route, method and status.")
+metrics.histogram(
+    STAGE_SECONDS, "Time spent in auth, rate_limit, data_load and serialize."
+)
+metrics.counter(CACHE_REQUESTS_TOTAL, "Response cache lookups by route and result.")
+metrics.counter(RATE_LIMIT_REJECTIONS_TOTAL, "Requests rejected with 429.")
+
+
+class InstrumentedJSONProvider(json_provider.FastJSONProvider):
+    """JSON provider that reports the time spent serializing responses."""
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        with metrics.timer(STAGE_SECONDS, stage="serialize"):
+            return super().response(*args, **kwargs)
+
+
 app = Flask(__name__)
+app.json = InstrumentedJSONProvider(app)
 
 CORS(
     app,
@@ -41,20 +88,40 @@ CORS(
     },
 )
 
+
+def rate_limit_key() -> str:
+    """Identify callers by verified API key, falling back to their address.
+
+    Clients share one address behind the proxy, but an unverified key is
+    not trusted: inventing keys must not buy fresh per-route limits.
+    """
+    api_key = request.headers.get("X-API-KEY")
+    expected_key = os.getenv("API_KEY")
+    if api_key and expected_key and hmac.compare_digest(
+        api_key.encode(), expected_key.encode()
+    ):
+        return f"key:{bucket_id(api_key)}"
+    return get_remote_address()
+
+
 limiter = Limiter(
     app=app,
-    key_func=get_remote_address,
+    key_func=rate_limit_key,
     default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://",
+    storage_uri=os.getenv("RATELIMIT_STORAGE_URI", "memory://"),
+    enabled=os.getenv("RATELIMIT_ENABLED", "true").lower() != "false",
 )
 
-cache = Cache(
-    app,
-    config={
-        "CACHE_TYPE": "simple",
-        "CACHE_DEFAULT_TIMEOUT": 300,
-        "CACHE_KEY_PREFIX": "api_",
-    },
+# Host-wide quota per API key, checked before any cached or computed response.
+token_buckets = TokenBucketLimiter(
+    create_store(
+        os.getenv("RATE_LIMIT_BACKEND"),
+        path=os.getenv("RATE_LIMIT_PATH"),
+        workers=configured_workers(),
+    ),
+    parse_tiers(os.getenv("RATE_LIMIT_TIERS") or DEFAULT_TIERS_SPEC),
+    parse_key_tiers(os.getenv("API_KEY_TIERS", "")),
+    default_tier=os.getenv("RATE_LIMIT_DEFAULT_TIER") or DEFAULT_TIER,
 )
 
 DATA_FILE_PATH = os.path.join(
@@ -70,14 +137,27 @@ CORPORATE_STRUCTURE_PATH = os.path.join(
     "corporate_structure.json",
 )
 
+DATA_RELOAD_INTERVAL = float(os.getenv("DATA_RELOAD_INTERVAL", "1.0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "profiles"
+)
+
 HTTP_400 = 400
 HTTP_401 = 401
+HTTP_403 = 403
 HTTP_404 = 404
+HTTP_409 = 409
+HTTP_429 = 429
 HTTP_500 = 500
 
 ERROR_INTERNAL_SERVER = "Internal server error"
 ERROR_FAILED_LOAD_STRUCTURE = "Failed to load corporate structure"
 ERROR_INVALID_PAGINATION = "Invalid pagination parameters"
+ERROR_INVALID_CURSOR = "Invalid cursor"
+
+MAX_TICKER_SUGGESTIONS = 100
+MAX_BATCH_TICKERS = 5000
+BATCH_TICKERS_PER_HIT = 500
 
 
 def json_error(
@@ -99,15 +179,158 @@ def json_error(
 def load_json_file(file_path: str) -> Optional[Dict[str, Any]]:
     """Load and parse a JSON file."""
     try:
-        with open(file_path, "r", encoding="utf-8") as file_handle:
-            return json.load(file_handle)
+        with metrics.timer(STAGE_SECONDS, stage="data_load"):
+            return json_provider.load_file(file_path)
     except (OSError, json.JSONDecodeError) as exc:
         logger.error("Failed to load JSON file %s: %s", file_path, exc)
         return None
 
 
-def paginate_results(data: List[Any], page: int = 1, per_page: int = 10) -> Dict[str, Any]:
-    """Paginate a list of results."""
+data_store = DataStore(
+    {
+        "corporate_data": DATA_FILE_PATH,
+        "corporate_structure": CORPORATE_STRUCTURE_PATH,
+    },
+    loader=load_json_file,
+    check_interval=DATA_RELOAD_INTERVAL,
+)
+# Keys include the data version, so a reload invalidates every worker's
+# entries at once; superseded entries age out through the LRU bound.
+cache = ResponseCache(
+    create_backend(
+        os.getenv("RESPONSE_CACHE_BACKEND"),
+        path=os.getenv("RESPONSE_CACHE_PATH"),
+        max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000")),
+    ),
+    version=lambda: data_store.version,
+    default_timeout=300,
+)
+
+
+def build_ticker_index(snapshot: DataSnapshot) -> TickerIndex:
+    """Build the ticker index for a data snapshot."""
+    return TickerIndex(snapshot.get("corporate_structure"))
+
+
+def build_sector_index(snapshot: DataSnapshot) -> SectorIndex:
+    """Build the per-sector ticker orders for a data snapshot."""
+    return SectorIndex(snapshot.get("corporate_structure"))
+
+
+def build_company_columns(snapshot: DataSnapshot) -> Any:
+    """Build the columnar company universe (NumPy arrays) for a data snapshot."""
+    from src.columnar import CompanyColumns  # keeps NumPy out of start-up
+
+    return CompanyColumns(
+        snapshot.get("corporate_structure"), snapshot.get("corporate_data")
+    )
+
+
+def build_asset_index(snapshot: DataSnapshot) -> AssetIndex:
+    """Build the sorted real-asset indexes for a data snapshot.
+
+    Sorted without the columnar store, which is lazy: building it here would
+    import NumPy on every data load.
+    """
+    return AssetIndex(snapshot.get("corporate_data"))
+
+
+def build_sector_analytics(snapshot: DataSnapshot) -> Any:
+    """Compute the per-sector and overall analytics for a data snapshot."""
+    from src.analytics import SectorAnalytics  # keeps NumPy out of start-up
+
+    return SectorAnalytics(snapshot.derived("company_columns"))
+
+
+def build_sector_analytics_response(
+    snapshot: DataSnapshot,
+) -> Optional[PreparedResponse]:
+    """Serialize the analytics of every sector once per data snapshot."""
+    if snapshot.get("corporate_structure") is None:
+        return None
+    analytics = snapshot.derived("sector_analytics")
+    payload = {
+        "status": "success",
+        "data_version": snapshot.version,
+        **analytics.as_dict(),
+    }
+    return PreparedResponse.from_payload(payload, app.json.dumps)
+
+
+def build_corporate_summary(live_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the corporate summary served by /api/v1/corporate-data."""
+    return {
+        "name": "Equity Shield Advocates",
+        "type": "Corporation",
+        "status": "Active",
+        "executive_summary": live_data.get("Executive Summary", ""),
+        "fund_overview": live_data.get("Fund Overview", ""),
+        "investment_strategy": live_data.get("Investment Strategy", ""),
+        "team_structure": live_data.get("Team Structure", ""),
+        "risk_assessment": live_data.get("Risk Assessment", ""),
+        "aum": live_data.get("AUM", ""),
+    }
+
+
+def build_corporate_data_response(snapshot: DataSnapshot) -> Optional[PreparedResponse]:
+    """Serialize the corporate summary once per data snapshot."""
+    live_data = snapshot.get("corporate_data")
+    if live_data is None:
+        return None
+    payload = {"status": "success", "data": build_corporate_summary(live_data)}
+    return PreparedResponse.from_payload(payload, app.json.dumps)
+
+
+def build_corporate_structure_response(
+    snapshot: DataSnapshot,
+) -> Optional[PreparedResponse]:
+    """Serialize the corporate structure once per data snapshot."""
+    structure_data = snapshot.get("corporate_structure")
+    if structure_data is None:
+        return None
+    payload = {"status": "success", "data": structure_data}
+    return PreparedResponse.from_payload(payload, app.json.dumps)
+
+
+data_store.register_derived("ticker_index", build_ticker_index)
+data_store.register_derived("sector_index", build_sector_index)
+data_store.register_derived("asset_index", build_asset_index)
+# Only the analytics routes need NumPy; they build these on first use.
+data_store.register_derived("company_columns", build_company_columns, lazy=True)
+data_store.register_derived("sector_analytics", build_sector_analytics, lazy=True)
+data_store.register_derived(
+    "sector_analytics_response", build_sector_analytics_response, lazy=True
+)
+data_store.register_derived("corporate_data_response", build_corporate_data_response)
+data_store.register_derived(
+    "corporate_structure_response", build_corporate_structure_response
+)
+
+
+def paginate_results(
+    data: Sequence[Any],
+    page: int = 1,
+    per_page: int = 10,
+    cursor: Optional[str] = None,
+    query: Optional[Dict[str, Any]] = None,
+    version: str = "",
+    include_total: bool = True,
+) -> Dict[str, Any]:
+    """Paginate a sequence of results.
+
+    Passing ``cursor`` (an empty string for the first page) switches to
+    keyset mode, which requires ``data`` to be a RecordSelection: pages are
+    located by seeking the sort key stored in the cursor, so every page costs
+    the same and iteration stays stable when the data refreshes in between.
+    """
+    if cursor is not None:
+        if not isinstance(data, RecordSelection):
+            raise TypeError("Cursor pagination requires a RecordSelection")
+        return paginate_cursor(
+            data, cursor, per_page, query or {}, version, include_total
+        )
+
     start = (page - 1) * per_page
     end = start + per_page
     total = len(data)
@@ -122,6 +345,47 @@ def paginate_results(data: List[Any], page: int = 1, per_page: int = 10) -> Dict
     }
 
 
+def paginate_cursor(
+    selection: RecordSelection,
+    cursor: str,
+    per_page: int,
+    query: Dict[str, Any],
+    version: str,
+    include_total: bool = True,
+) -> Dict[str, Any]:
+    """Return the keyset page that follows ``cursor``."""
+    key = decode_cursor(cursor, query)[1] if cursor else None
+    try:
+        records = selection.page_after(key, per_page + 1)
+    except TypeError as exc:
+        raise InvalidCursorError("Cursor does not match the sort field") from exc
+
+    has_more = len(records) > per_page
+    records = records[:per_page]
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor(version, query, selection.key_of(records[-1]))
+
+    result: Dict[str, Any] = {
+        "data": records,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "data_version": version,
+    }
+    if include_total:
+        total = len(selection)
+        result["total"] = total
+        result["total_pages"] = (total + per_page - 1) // per_page
+    return result
+
+
+def parse_bool(value: Optional[str], default: bool) -> bool:
+    """Parse a boolean query parameter."""
+    if value is None:
+        return default
+    return value.strip().lower() not in {"0", "false", "no", "off"}
+
+
 def parse_positive_int(value: Optional[str], default: int, field_name: str) -> int:
     """Parse a positive integer query parameter."""
     if value is None:
@@ -157,6 +421,7 @@ def require_api_key(view_function):
         if request.path == "/health":
             return view_function(*args, **kwargs)
 
+        auth_started = time.perf_counter()
         api_key = request.headers.get("X-API-KEY")
         expected_key = os.getenv("API_KEY")
 
@@ -169,7 +434,9 @@ def require_api_key(view_function):
             )
 
         if not api_key:
-            logger.warning("No API key provided in request from %s", get_remote_address())
+            logger.warning(
+                "No API key provided in request from %s", get_remote_address()
+            )
             return json_error(
                 HTTP_401,
                 "API key is required",
@@ -180,12 +447,371 @@ def require_api_key(view_function):
             logger.warning("Invalid API key provided for request path %s", request.path)
             return json_error(HTTP_401, "Invalid API key", "Invalid API key")
 
-        logger.info("API key validation successful for %s", request.path)
+        logger.debug("API key validation successful for %s", request.path)
+        metrics.observe(STAGE_SECONDS, time.perf_counter() - auth_started, stage="auth")
+
+        with metrics.timer(STAGE_SECONDS, stage="rate_limit"):
+            decision = token_buckets.hit(api_key, request_token_cost())
+        if not decision.allowed:
+            metrics.inc(
+                RATE_LIMIT_REJECTIONS_TOTAL, limiter="token_bucket", tier=decision.tier
+            )
+            logger.warning(
+                "Rate limit exceeded for %s tier on %s", decision.tier, request.path
+            )
+            response, status = json_error(
+                HTTP_429,
+                "Rate limit exceeded",
+                f"Request quota for the {decision.tier} tier exceeded",
+                retry_after=math.ceil(decision.retry_after),
+            )
+            response.headers["Retry-After"] = str(math.ceil(decision.retry_after))
+        else:
+            response = make_response(view_function(*args, **kwargs))
+            status = response.status_code
+
+        response.headers["X-RateLimit-Limit"] = str(decision.limit)
+        response.headers["X-RateLimit-Remaining"] = str(decision.remaining)
+        return response, status
+
+    return decorated_function
+
+
+def request_route() -> str:
+    """Route template of the current request, for bounded metric labels."""
+    return request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+
+
+def is_admin_request() -> bool:
+    """Whether the request carries the configured admin key."""
+    expected_key = os.getenv("ADMIN_API_KEY")
+    provided_key = request.headers.get("X-ADMIN-KEY")
+    if not expected_key or not provided_key:
+        return False
+    return hmac.compare_digest(provided_key.encode(), expected_key.encode())
+
+
+def require_admin_key(view_function):
+    """Restrict an endpoint to holders of ADMIN_API_KEY."""
+
+    @wraps(view_function)
+    def decorated_function(*args, **kwargs):
+        if not os.getenv("ADMIN_API_KEY"):
+            return json_error(HTTP_404, "Not found", "Admin API is disabled")
+        if not is_admin_request():
+            logger.warning("Rejected admin request for %s", request.path)
+            return json_error(HTTP_403, "Forbidden", "Valid X-ADMIN-KEY required")
         return view_function(*args, **kwargs)
 
     return decorated_function
 
 
+sampling_profiler = profiling.SamplingProfiler()
+memory_tracker = MemoryTracker()
+access_log = access_logging.from_env()
+
+
+@app.before_request
+def start_requested_profile():
+    """Profile this request when an admin sends ``X-Profile: text|store``."""
+    mode = request.headers.get("X-Profile")
+    if not mode or not is_admin_request():
+        return None
+    profile = profiling.start_request_profile()
+    if profile is None:
+        return json_error(
+            HTTP_409, "Profiler busy", "Another request is being profiled"
+        )
+    g.request_profile = (profile, mode.lower())
+    return None
+
+
+@app.after_request
+def finish_requested_profile(response):
+    """Return or store the profile of a profiled request."""
+    requested = g.pop("request_profile", None)
+    if requested is None:
+        return response
+    profile, mode = requested
+    profiling.stop_request_profile(profile)
+
+    if mode == "store":
+        path = profiling.dump_profile(profile, PROFILE_DIR, request.endpoint or "")
+        response.headers["X-Profile-File"] = os.path.basename(path)
+        return response
+
+    try:
+        limit = parse_positive_int(request.headers.get("X-Profile-Limit"), 50, "limit")
+    except ValueError:
+        limit = 50
+    report = profiling.format_profile(
+        profile, sort=request.headers.get("X-Profile-Sort", "cumulative"), limit=limit
+    )
+    profiled = Response(report, mimetype="text/plain")
+    profiled.headers["X-Profiled-Status"] = str(response.status_code)
+    return profiled
+
+
+@app.teardown_request
+def release_requested_profile(exc):
+    """Free the profiler if the request ended before after_request ran."""
+    requested = g.pop("request_profile", None)
+    if requested is not None:
+        profiling.stop_request_profile(requested[0])
+
+
+@app.before_request
+def start_request_timer():
+    """Remember when the request started."""
+    metrics.start_flusher()
+    g.request_started = time.perf_counter()
+    g.memory_started = memory_tracker.request_started()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Count the request, observe its latency and write its access record."""
+    started = g.pop("request_started", None)
+    if started is not None:
+        route = request_route()
+        elapsed = time.perf_counter() - started
+        memory_tracker.request_finished(route, g.pop("memory_started", None))
+        metrics.observe(REQUEST_SECONDS, elapsed, route=route, method=request.method)
+        metrics.inc(
+            REQUESTS_TOTAL,
+            route=route,
+            method=request.method,
+            status=response.status_code,
+        )
+        cache_result = response.headers.get(CACHE_STATUS_HEADER)
+        if cache_result:
+            metrics.inc(CACHE_REQUESTS_TOTAL, route=route, result=cache_result.lower())
+        if access_log is not None:
+            write_access_record(access_log, route, response, elapsed)
+    return response
+
+
+def write_access_record(log, route: str, response, elapsed: float) -> None:
+    """Queue a replayable record of the current request."""
+    entry = {
+        "ts": round(time.time() - elapsed, 6),
+        "method": request.method,
+        "path": log.redact_path(
+            request.full_path if request.query_string else request.path
+        ),
+        "route": route,
+        "status": response.status_code,
+        "ms": round(elapsed * 1000, 3),
+        "bytes": response.content_length,
+    }
+    if 0 < (request.content_length or 0) <= log.max_body and log.records_body(route):
+        body = log.redact_body(request.get_data(as_text=True))
+        if body is not None:
+            entry["body"] = body
+    log.record(entry)
+
+
+def cache_hit_ratios(counters) -> Dict[Any, float]:
+    """Hit ratio per route from the aggregated cache lookup counters."""
+    totals: Dict[str, List[float]] = {}
+    for (name, labels), value in counters.items():
+        if name != CACHE_REQUESTS_TOTAL:
+            continue
+        label_map = dict(labels)
+        hits_and_total = totals.setdefault(label_map["route"], [0.0, 0.0])
+        if label_map["result"] == "hit":
+            hits_and_total[0] += value
+        hits_and_total[1] += value
+    return {
+        (("route", route),): hits / total
+        for route, (hits, total) in totals.items()
+        if total
+    }
+
+
+metrics.gauge(
+    "response_cache_hit_ratio",
+    "Share of cache lookups served from cache.",
+    cache_hit_ratios,
+)
+metrics.gauge(
+    "data_snapshot_age_seconds",
+    "Seconds since the served data snapshot was loaded.",
+    lambda counters: data_store.snapshot().age,
+)
+
+
+@app.route("/metrics", methods=["GET"])
+@limiter.exempt
+def get_metrics():
+    """Prometheus metrics for every worker sharing METRICS_DIR."""
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.route("/api/v1/admin/profiler/sampling", methods=["POST"])
+@require_admin_key
+@limiter.exempt
+def start_sampling_profiler():
+    """Start sampling every thread's stack for a time window."""
+    data = request.get_json(silent=True) or {}
+    try:
+        interval = float(data.get("interval", profiling.DEFAULT_SAMPLE_INTERVAL))
+        duration = float(data.get("duration", profiling.DEFAULT_SAMPLE_DURATION))
+    except (TypeError, ValueError):
+        interval = duration = -1.0
+    if not 0.001 <= interval <= 1.0 or duration <= 0:
+        return json_error(
+            HTTP_400,
+            "Invalid sampling parameters",
+            "interval must be between 0.001 and 1 second and duration positive",
+        )
+    if not sampling_profiler.start(interval=interval, duration=duration):
+        return json_error(HTTP_409, "Profiler busy", "A sampling window is running")
+    return jsonify({"status": "success", "data": sampling_profiler.summary()}), 202
+
+
+@app.route("/api/v1/admin/profiler/sampling", methods=["DELETE"])
+@require_admin_key
+@limiter.exempt
+def stop_sampling_profiler():
+    """Stop the sampling window early."""
+    return jsonify({"status": "success", "data": sampling_profiler.stop()})
+
+
+@app.route("/api/v1/admin/profiler/sampling", methods=["GET"])
+@require_admin_key
+@limiter.exempt
+def get_sampling_profile():
+    """Return the sampled stacks as collapsed text or a JSON summary."""
+    if request.args.get("format") == "collapsed":
+        return Response(sampling_profiler.collapsed(), mimetype="text/plain")
+    try:
+        limit = parse_positive_int(request.args.get("limit"), 20, "limit")
+    except ValueError:
+        return json_error(HTTP_400, "Invalid limit", "limit must be a positive integer")
+    return jsonify(
+        {
+            "status": "success",
+            "data": {
+                **sampling_profiler.summary(),
+                "top_functions": sampling_profiler.top_functions(limit),
+            },
+        }
+    )
+
+
+def parse_memory_query() -> Dict[str, Any]:
+    """Parse group_by, limit and include for the snapshot endpoints."""
+    group_by = request.args.get("group_by", "lineno")
+    if group_by not in GROUPINGS:
+        raise ValueError("group_by")
+    include = [
+        pattern.strip()
+        for pattern in request.args.get("include", "").split(",")
+        if pattern.strip()
+    ]
+    return {
+        "group_by": group_by,
+        "limit": parse_positive_int(request.args.get("limit"), 20, "limit"),
+        "include": include,
+    }
+
+
+def memory_query_error(field_name: str):
+    """400 response for an invalid snapshot query parameter."""
+    return json_error(
+        HTTP_400,
+        f"Invalid {field_name}",
+        f"group_by must be one of {', '.join(GROUPINGS)} and limit positive",
+    )
+
+
+@app.route("/api/v1/admin/memory", methods=["GET"])
+@require_admin_key
+@limiter.exempt
+def get_memory_status():
+    """Report traced and resident memory."""
+    return jsonify({"status": "success", "data": memory_tracker.status()})
+
+
+@app.route("/api/v1/admin/memory/tracing", methods=["POST"])
+@require_admin_key
+@limiter.exempt
+def start_memory_tracing():
+    """Start tracemalloc, optionally keeping several frames per allocation."""
+    data = request.get_json(silent=True) or {}
+    frames = data.get("frames", 1)
+    if not isinstance(frames, int) or isinstance(frames, bool) or frames < 1:
+        return json_error(
+            HTTP_400, "Invalid frames", "frames must be a positive integer"
+        )
+    memory_tracker.start(frames)
+    return jsonify({"status": "success", "data": memory_tracker.status()})
+
+
+@app.route("/api/v1/admin/memory/tracing", methods=["DELETE"])
+@require_admin_key
+@limiter.exempt
+def stop_memory_tracing():
+    """Stop tracemalloc and release its memory."""
+    memory_tracker.stop()
+    return jsonify({"status": "success", "data": memory_tracker.status()})
+
+
+@app.route("/api/v1/admin/memory/snapshots", methods=["POST"])
+@require_admin_key
+@limiter.exempt
+def take_memory_snapshot():
+    """Take a tracemalloc snapshot for later inspection or diffing."""
+    if not memory_tracker.tracing:
+        return json_error(HTTP_409, "Not tracing", "Start tracing before snapshots")
+    snapshot_id = memory_tracker.take_snapshot()
+    return jsonify({"status": "success", "data": {"id": snapshot_id}}), 201
+
+
+@app.route("/api/v1/admin/memory/snapshots/<int:snapshot_id>", methods=["GET"])
+@require_admin_key
+@limiter.exempt
+def get_memory_snapshot(snapshot_id: int):
+    """Largest live allocations in a snapshot."""
+    try:
+        query = parse_memory_query()
+    except ValueError as exc:
+        return memory_query_error(str(exc))
+    try:
+        top = memory_tracker.top(snapshot_id, **query)
+    except UnknownSnapshotError:
+        return json_error(HTTP_404, "Snapshot not found", f"No snapshot {snapshot_id}")
+    return jsonify({"status": "success", "data": top})
+
+
+@app.route(
+    "/api/v1/admin/memory/snapshots/<int:first_id>/diff/<int:second_id>",
+    methods=["GET"],
+)
+@require_admin_key
+@limiter.exempt
+def diff_memory_snapshots(first_id: int, second_id: int):
+    """Allocation growth between two snapshots, grouped by file or line."""
+    try:
+        query = parse_memory_query()
+    except ValueError as exc:
+        return memory_query_error(str(exc))
+    try:
+        diff = memory_tracker.diff(first_id, second_id, **query)
+    except UnknownSnapshotError as exc:
+        return json_error(HTTP_404, "Snapshot not found", f"No snapshot {exc.args[0]}")
+    return jsonify({"status": "success", "data": diff})
+
+
+@app.route("/api/v1/admin/memory/routes", methods=["GET"])
+@require_admin_key
+@limiter.exempt
+def get_memory_by_route():
+    """Bytes allocated per request for each route while tracing."""
+    return jsonify({"status": "success", "data": memory_tracker.routes()})
+
+
 @app.route("/health", methods=["GET"])
 @cache.cached(timeout=60)
 @limiter.exempt
@@ -204,34 +830,30 @@ def health_check():
         return json_error(HTTP_500, ERROR_INTERNAL_SERVER, str(exc))
 
 
+@app.route("/api/v1/cache/stats", methods=["GET"])
+@require_api_key
+@limiter.limit("30/minute")
+def get_cache_stats():
+    """Get response cache hit, miss and eviction counters per endpoint."""
+    return jsonify({"status": "success", "data": cache.stats()})
+
+
 @app.route("/api/v1/corporate-data", methods=["GET"])
 @require_api_key
-@cache.cached(timeout=300)
 @limiter.limit("30/minute")
 def get_corporate_data():
     """Get corporate data."""
     try:
-        live_data = load_json_file(DATA_FILE_PATH)
-        if live_data is None:
+        snapshot = data_store.snapshot()
+        if snapshot.get("corporate_data") is None:
             return json_error(
                 HTTP_500,
                 "Failed to load live data",
                 "Failed to load live data",
             )
 
-        corporate_summary = {
-            "name": "Equity Shield Advocates",
-            "type": "Corporation",
-            "status": "Active",
-            "executive_summary": live_data.get("Executive Summary", ""),
-            "fund_overview": live_data.get("Fund Overview", ""),
-            "investment_strategy": live_data.get("Investment Strategy", ""),
-            "team_structure": live_data.get("Team Structure", ""),
-            "risk_assessment": live_data.get("Risk Assessment", ""),
-            "aum": live_data.get("AUM", ""),
-        }
-        return jsonify({"status": "success", "data": corporate_summary})
-    except (OSError, json.JSONDecodeError) as exc:  # pragma: no cover - defensive fallback
+        return snapshot.derived("corporate_data_response").to_response(request)
+    except (OSError, json.JSONDecodeError) as exc:  # pragma: no cover - defensive
         logger.exception("Error in get_corporate_data")
         return json_error(HTTP_500, ERROR_INTERNAL_SERVER, str(exc))
 
@@ -239,24 +861,20 @@ def get_corporate_data():
 @app.route("/api/v1/corporate-structure", methods=["GET"])
 @app.route("/api/corporate-structure", methods=["GET"])
 @require_api_key
-@cache.cached(timeout=300)
 @limiter.limit("30/minute")
 def get_corporate_structure():
     """Get corporate structure."""
     try:
-        structure_data = load_json_file(CORPORATE_STRUCTURE_PATH)
-        if structure_data is None:
+        snapshot = data_store.snapshot()
+        if snapshot.get("corporate_structure") is None:
             return json_error(
                 HTTP_500,
                 ERROR_FAILED_LOAD_STRUCTURE,
                 ERROR_FAILED_LOAD_STRUCTURE,
             )
 
-        if not structure_data:
-            return jsonify({"status": "success", "data": {}})
-
-        return jsonify({"status": "success", "data": structure_data})
-    except (OSError, json.JSONDecodeError) as exc:  # pragma: no cover - defensive fallback
+        return snapshot.derived("corporate_structure_response").to_response(request)
+    except (OSError, json.JSONDecodeError) as exc:  # pragma: no cover - defensive
         logger.exception("Error in get_corporate_structure")
         return json_error(HTTP_500, ERROR_INTERNAL_SERVER, str(exc))
 
@@ -264,7 +882,7 @@ def get_corporate_structure():
 @app.route("/api/companies/", defaults={"sector": None}, methods=["GET"])
 @app.route("/api/companies/<sector>", methods=["GET"])
 @require_api_key
-@cache.memoize(300)
+@cache.cached(timeout=300)
 @limiter.limit("30/minute")
 def get_companies_by_sector(sector: Optional[str]):
     """Get companies by sector."""
@@ -276,7 +894,8 @@ def get_companies_by_sector(sector: Optional[str]):
         )
 
     try:
-        structure_data = load_json_file(CORPORATE_STRUCTURE_PATH)
+        snapshot = data_store.snapshot()
+        structure_data = snapshot.get("corporate_structure")
         if structure_data is None:
             return json_error(
                 HTTP_500,
@@ -294,12 +913,25 @@ def get_companies_by_sector(sector: Optional[str]):
 
         page = parse_positive_int(request.args.get("page"), 1, "page")
         per_page = parse_positive_int(request.args.get("per_page"), 10, "per_page")
-        paginated_data = paginate_results(sector_data, page, per_page)
+        cursor = request.args.get("cursor")
+        if cursor is not None:
+            sector_data = snapshot.derived("sector_index").select(sector)
+        paginated_data = paginate_results(
+            sector_data,
+            page,
+            per_page,
+            cursor=cursor,
+            query={"sector": sector},
+            version=snapshot.version,
+            include_total=parse_bool(request.args.get("include_total"), True),
+        )
 
         return jsonify({"status": "success", "sector": sector, **paginated_data})
-    except (OSError, json.JSONDecodeError) as exc:  # pragma: no cover - defensive fallback
+    except (OSError, json.JSONDecodeError) as exc:  # pragma: no cover - defensive
         logger.exception("Error in get_companies_by_sector")
         return json_error(HTTP_500, ERROR_INTERNAL_SERVER, str(exc))
+    except InvalidCursorError as exc:
+        return json_error(HTTP_400, ERROR_INVALID_CURSOR, str(exc))
     except ValueError:
         return json_error(
             HTTP_400,
@@ -311,7 +943,7 @@ def get_companies_by_sector(sector: Optional[str]):
 @app.route("/api/company/", defaults={"ticker": None}, methods=["GET"])
 @app.route("/api/company/<ticker>", methods=["GET"])
 @require_api_key
-@cache.memoize(300)
+@cache.cached(timeout=300)
 @limiter.limit("30/minute")
 def get_company_by_ticker(ticker: Optional[str]):
     """Get company by ticker symbol."""
@@ -323,35 +955,140 @@ def get_company_by_ticker(ticker: Optional[str]):
         )
 
     try:
-        structure_data = load_json_file(CORPORATE_STRUCTURE_PATH)
-        if structure_data is None:
+        snapshot = data_store.snapshot()
+        if snapshot.get("corporate_structure") is None:
             return json_error(
                 HTTP_500,
                 ERROR_FAILED_LOAD_STRUCTURE,
                 ERROR_FAILED_LOAD_STRUCTURE,
             )
 
-        for sector, companies in structure_data.items():
-            for company in companies:
-                if company.get("ticker", "").lower() == ticker.lower():
-                    return jsonify(
-                        {
-                            "status": "success",
-                            "sector": sector,
-                            "data": company,
-                        }
-                    )
+        entry = snapshot.derived("ticker_index").get(ticker)
+        if entry is not None:
+            sector, company = entry
+            return jsonify({"status": "success", "sector": sector, "data": company})
 
         return json_error(
             HTTP_404,
             f"Company with ticker '{ticker}' not found",
             f"Company with ticker '{ticker}' not found",
         )
-    except (OSError, json.JSONDecodeError) as exc:  # pragma: no cover - defensive fallback
+    except (OSError, json.JSONDecodeError) as exc:  # pragma: no cover - defensive
         logger.exception("Error in get_company_by_ticker")
         return json_error(HTTP_500, ERROR_INTERNAL_SERVER, str(exc))
 
 
+def batch_request_tickers() -> Optional[List[Any]]:
+    """Return the ``tickers`` list from a batch request body, if well formed."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("tickers"), list):
+        return None
+    return data["tickers"]
+
+
+def batch_rate_limit_cost() -> int:
+    """Charge one rate-limit hit per started block of BATCH_TICKERS_PER_HIT."""
+    tickers = batch_request_tickers() or []
+    return max(1, -(-len(tickers) // BATCH_TICKERS_PER_HIT))
+
+
+def request_token_cost() -> int:
+    """Tokens charged to the caller's bucket; batch lookups are weighted."""
+    if request.endpoint == "get_companies_batch":
+        return batch_rate_limit_cost()
+    return 1
+
+
+@app.route("/api/v1/companies:batch", methods=["POST"])
+@require_api_key
+@limiter.limit("30/minute", cost=batch_rate_limit_cost)
+def get_companies_batch():
+    """Resolve many tickers in one request."""
+    tickers = batch_request_tickers()
+    if tickers is None or not all(isinstance(ticker, str) for ticker in tickers):
+        return json_error(
+            HTTP_400,
+            "tickers is required",
+            "Request body must be a JSON object with a 'tickers' list of strings",
+        )
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return json_error(
+            HTTP_400,
+            "Too many tickers",
+            f"At most {MAX_BATCH_TICKERS} tickers can be resolved per request",
+        )
+
+    snapshot = data_store.snapshot()
+    if snapshot.get("corporate_structure") is None:
+        return json_error(
+            HTTP_500,
+            ERROR_FAILED_LOAD_STRUCTURE,
+            ERROR_FAILED_LOAD_STRUCTURE,
+        )
+
+    ticker_index = snapshot.derived("ticker_index")
+    found: List[Dict[str, Any]] = []
+    missing: List[str] = []
+    seen = set()
+    for ticker in tickers:
+        normalized = normalize_ticker(ticker)
+        if normalized in seen:
+            continue
+        seen.add(normalized)
+
+        entry = ticker_index.get(ticker)
+        if entry is None:
+            missing.append(ticker)
+            continue
+        sector, company = entry
+        found.append({"ticker": ticker, "sector": sector, "data": company})
+
+    return jsonify(
+        {
+            "status": "success",
+            "requested": len(seen),
+            "data": found,
+            "missing": missing,
+            "data_version": snapshot.version,
+        }
+    )
+
+
+@app.route("/api/v1/tickers", methods=["GET"])
+@require_api_key
+@limiter.limit("120/minute")
+def search_tickers():
+    """Autocomplete tickers by prefix."""
+    try:
+        limit = min(
+            parse_positive_int(request.args.get("limit"), 10, "limit"),
+            MAX_TICKER_SUGGESTIONS,
+        )
+    except ValueError:
+        return json_error(
+            HTTP_400,
+            "Invalid limit parameter",
+            "limit must be a valid positive integer",
+        )
+
+    prefix = request.args.get("prefix", "")
+    matches = data_store.snapshot().derived("ticker_index").prefix(prefix, limit)
+    return jsonify(
+        {
+            "status": "success",
+            "prefix": prefix,
+            "data": [
+                {
+                    "ticker": company.get("ticker"),
+                    "name": company.get("name"),
+                    "sector": sector,
+                }
+                for sector, company in matches
+            ],
+        }
+    )
+
+
 @app.route("/api/v1/real-assets", methods=["GET"])
 @app.route("/api/real-assets", methods=["GET"])
 @require_api_key
@@ -378,8 +1115,8 @@ def get_real_assets():
             "max_market_cap",
         )
 
-        live_data = load_json_file(DATA_FILE_PATH)
-        if live_data is None:
+        snapshot = data_store.snapshot()
+        if snapshot.get("corporate_data") is None:
             return jsonify(
                 {
                     "status": "success",
@@ -389,47 +1126,37 @@ def get_real_assets():
                     "total": 0,
                     "total_pages": 0,
                     "last_updated": datetime.datetime.now().isoformat(),
-}
-            )
-
-        assets: List[Dict[str, Any]] = []
-        asset_keys = ["MSFT", "GOOG", "JPM", "BAC", "C", "PLD", "AMT", "SPG"]
-
-        for key in asset_keys:
-            asset_info = live_data.get(key)
-            if not isinstance(asset_info, dict):
-                continue
-
-            market_cap = asset_info.get("market_cap")
-            if min_market_cap is not None and (
-                market_cap is None or market_cap < min_market_cap
-            ):
-                continue
-            if max_market_cap is not None and (
-                market_cap is None or market_cap > max_market_cap
-            ):
-                continue
-
-            assets.append(
-                {
-                    "symbol": key,
-                    "market_cap": market_cap,
-                    "revenue": asset_info.get("revenue"),
-                    "last_updated": asset_info.get("last_updated"),
                 }
             )
 
         sort_by = request.args.get("sort_by", "symbol")
         sort_order = request.args.get("sort_order", "asc")
+        cursor = request.args.get("cursor")
+        if cursor is not None and sort_by not in AssetIndex.SORT_FIELDS:
+            # Keyset pages need a sort key; fall back to the default order.
+            sort_by = "symbol"
+        descending = sort_order.lower() == "desc"
+        assets = snapshot.derived("asset_index").select(
+            sort_by=sort_by,
+            descending=descending,
+            min_market_cap=min_market_cap,
+            max_market_cap=max_market_cap,
+        )
 
-        if sort_by in {"symbol", "market_cap", "revenue"}:
-            reverse = sort_order.lower() == "desc"
-            assets.sort(
-                key=lambda item: (item.get(sort_by) is None, item.get(sort_by)),
-                reverse=reverse,
-            )
-
-        paginated_data = paginate_results(assets, page, per_page)
+        paginated_data = paginate_results(
+            assets,
+            page,
+            per_page,
+            cursor=cursor,
+            query={
+                "sort_by": sort_by,
+                "descending": descending,
+                "min_market_cap": min_market_cap,
+                "max_market_cap": max_market_cap,
+            },
+            version=snapshot.version,
+            include_total=parse_bool(request.args.get("include_total"), True),
+        )
 
         return jsonify(
             {
@@ -438,9 +1165,11 @@ def get_real_assets():
                 "last_updated": datetime.datetime.now().isoformat(),
             }
         )
-    except (OSError, json.JSONDecodeError) as exc:  # pragma: no cover - defensive fallback
+    except (OSError, json.JSONDecodeError) as exc:  # pragma: no cover - defensive
         logger.exception("Error in get_real_assets")
         return json_error(HTTP_500, ERROR_INTERNAL_SERVER, str(exc))
+    except InvalidCursorError as exc:
+        return json_error(HTTP_400, ERROR_INVALID_CURSOR, str(exc))
     except ValueError:
         return json_error(
             HTTP_400,
@@ -449,6 +1178,137 @@ def get_real_assets():
         )
 
 
+@app.route("/api/v1/analytics/sectors", methods=["GET"])
+@require_api_key
+@limiter.limit("30/minute")
+def get_sector_analytics():
+    """Get market cap, revenue, valuation and concentration metrics per sector."""
+    snapshot = data_store.snapshot()
+    if snapshot.get("corporate_structure") is None:
+        return json_error(
+            HTTP_500,
+            ERROR_FAILED_LOAD_STRUCTURE,
+            ERROR_FAILED_LOAD_STRUCTURE,
+        )
+
+    return snapshot.derived("sector_analytics_response").to_response(request)
+
+
+@app.route("/api/v1/analytics/sectors/<sector>", methods=["GET"])
+@require_api_key
+@limiter.limit("30/minute")
+def get_sector_analytics_for_sector(sector: str):
+    """Get the analytics of one sector."""
+    snapshot = data_store.snapshot()
+    if snapshot.get("corporate_structure") is None:
+        return json_error(
+            HTTP_500,
+            ERROR_FAILED_LOAD_STRUCTURE,
+            ERROR_FAILED_LOAD_STRUCTURE,
+        )
+
+    analytics = snapshot.derived("sector_analytics").sector(sector)
+    if analytics is None:
+        return json_error(
+            HTTP_404,
+            f"Sector '{sector}' not found",
+            f"Sector '{sector}' not found",
+        )
+
+    return jsonify(
+        {
+            "status": "success",
+            "sector": sector,
+            "data_version": snapshot.version,
+            "data": analytics,
+        }
+    )
+
+
+@app.route("/api/v1/analytics/overview", methods=["GET"])
+@require_api_key
+@limiter.limit("30/minute")
+def get_analytics_overview():
+    """Get the analytics of the whole company universe."""
+    snapshot = data_store.snapshot()
+    if snapshot.get("corporate_structure") is None:
+        return json_error(
+            HTTP_500,
+            ERROR_FAILED_LOAD_STRUCTURE,
+            ERROR_FAILED_LOAD_STRUCTURE,
+        )
+
+    return jsonify(
+        {
+            "status": "success",
+            "data_version": snapshot.version,
+            "data": snapshot.derived("sector_analytics").overall,
+        }
+    )
+
+
+@app.route("/api/v1/export/companies.ndjson", methods=["GET"])
+@require_api_key
+@limiter.limit("10/minute")
+def export_companies():
+    """Stream every company, optionally for one sector, as NDJSON."""
+    snapshot = data_store.snapshot()
+    structure_data = snapshot.get("corporate_structure")
+    if structure_data is None:
+        return json_error(
+            HTTP_500,
+            ERROR_FAILED_LOAD_STRUCTURE,
+            ERROR_FAILED_LOAD_STRUCTURE,
+        )
+
+    sector = request.args.get("sector")
+    if sector is not None and sector not in structure_data:
+        return json_error(
+            HTTP_404,
+            f"Sector '{sector}' not found",
+            f"Sector '{sector}' not found",
+        )
+
+    sectors = [sector] if sector is not None else list(structure_data)
+    records = (
+        {"sector": name, **company}
+        for name in sectors
+        for company in structure_data[name]
+    )
+    return ndjson_response(records, snapshot.version)
+
+
+@app.route("/api/v1/export/real-assets.ndjson", methods=["GET"])
+@require_api_key
+@limiter.limit("10/minute")
+def export_real_assets():
+    """Stream every real asset, filtered and sorted like /api/v1/real-assets."""
+    try:
+        min_market_cap = parse_optional_float(
+            request.args.get("min_market_cap"),
+            "min_market_cap",
+        )
+        max_market_cap = parse_optional_float(
+            request.args.get("max_market_cap"),
+            "max_market_cap",
+        )
+    except ValueError:
+        return json_error(
+            HTTP_400,
+            "Invalid filter parameters",
+            "min_market_cap and max_market_cap must be valid numbers",
+        )
+
+    snapshot = data_store.snapshot()
+    assets = snapshot.derived("asset_index").select(
+        sort_by=request.args.get("sort_by", "symbol"),
+        descending=request.args.get("sort_order", "asc").lower() == "desc",
+        min_market_cap=min_market_cap,
+        max_market_cap=max_market_cap,
+    )
+    return ndjson_response(assets, snapshot.version)
+
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors."""
@@ -464,6 +1324,7 @@ def not_found(error):
 @app.errorhandler(429)
 def ratelimit_handler(error):
     """Handle rate limit exceeded errors."""
+    metrics.inc(RATE_LIMIT_REJECTIONS_TOTAL, limiter="route", tier="")
     return jsonify(
         {
             "status": "error",
@@ -500,7 +1361,7 @@ def handle_exception(error):
 
 @app.route("/api/banking-info", methods=["GET"])
 @require_api_key
-@cache.cached(timeout=300)
+@cache.cached(timeout=300, shared=False)
 @limiter.limit("30/minute")
 def get_banking_info():
     """Get banking information."""
@@ -515,7 +1376,7 @@ def get_banking_info():
 
 @app.route("/api/banks/<bank_name>/account", methods=["GET"])
 @require_api_key
-@cache.cached(timeout=300)
+@cache.cached(timeout=300, shared=False)
 @limiter.limit("30/minute")
 def get_bank_account(bank_name):
     """Get bank account information."""
@@ -573,5 +1434,6 @@ def transfer():
 
 
 if __name__ == "__main__":
+    configure_logging()
     logger.info("Starting API server on port 5001...")
     app.run(host=os.getenv("API_HOST", "127.0.0.1"), port=5001)
@@ -0,0 +1,498 @@
+"""asyncio HTTP/1.1 front end for the WSGI app.
+
+Connections are coroutines on one event loop, so an idle keep-alive
+connection costs a socket and a few kilobytes rather than a thread, and
+tens of thousands can be held open at once (up to the process's file
+descriptor limit). Only a request being handled occupies one of the
+``threads`` executor threads: the Flask app, with its auth, rate limits
+and cache, runs there unchanged. Streamed bodies are pulled from the app
+one chunk at a time and written with back-pressure, so a slow client never
+holds a thread while its socket drains.
+
+The parser covers what the API needs: ``Content-Length`` and chunked
+request bodies, ``Expect: 100-continue``, keep-alive with an idle timeout,
+and chunked responses when the app sets no length. It is meant to sit
+behind the load balancer, like waitress. Body framing is strict: a request
+with repeated or conflicting ``Content-Length``/``Transfer-Encoding``
+headers, a length that is not plain digits or a chunk not followed by CRLF
+is answered with 400 and the connection closed, so the server never reads
+a body differently from a proxy in front of it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import io
+import logging
+import re
+import signal
+import sys
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THREADS = 32
+DEFAULT_KEEPALIVE_TIMEOUT = 300.0
+DEFAULT_HEADER_TIMEOUT = 30.0
+DEFAULT_GRACEFUL_TIMEOUT = 30.0
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+SERVER_NAME = "equity-shield"
+_DIGITS = re.compile(r"[0-9]+")
+_HEX_DIGITS = re.compile(rb"[0-9A-Fa-f]+")
+
+_BODY_DONE = object()
+_STATUS_TEXT = {
+    400: "Bad Request",
+    408: "Request Timeout",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    501: "Not Implemented",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    """A request the server answers itself, without calling the app."""
+
+    def __init__(self, status: int) -> None:
+        super().__init__(status)
+        self.status = status
+
+
+class _Request:
+    __slots__ = ("method", "target", "version", "headers", "body")
+
+    def __init__(
+        self,
+        method: str,
+        target: str,
+        version: str,
+        headers: List[Tuple[str, str]],
+    ) -> None:
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers
+        self.body = b""
+
+    def header(self, name: str) -> Optional[str]:
+        for key, value in self.headers:
+            if key == name:
+                return value
+        return None
+
+    def header_values(self, name: str) -> List[str]:
+        return [value for key, value in self.headers if key == name]
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = (self.header("connection") or "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+class _AppResult:
+    """Status, headers and body of one WSGI call, produced on a worker thread."""
+
+    __slots__ = ("status", "headers", "body", "iterator", "close")
+
+    def __init__(self) -> None:
+        self.status = "500 Internal Server Error"
+        self.headers: List[Tuple[str, str]] = []
+        self.body: List[bytes] = []
+        self.iterator: Optional[Any] = None
+        self.close: Optional[Callable[[], None]] = None
+
+
+_date_cache: Tuple[int, bytes] = (0, b"")
+
+
+def _http_date() -> bytes:
+    global _date_cache
+
+    now = int(time.time())
+    if _date_cache[0] != now:
+        _date_cache = (now, email.utils.formatdate(now, usegmt=True).encode("ascii"))
+    return _date_cache[1]
+
+
+def parse_head(head: bytes) -> _Request:
+    """Parse a request line and headers (without the final blank line)."""
+    try:
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, version = lines[0].split(" ")
+    except (UnicodeDecodeError, ValueError):
+        raise HTTPError(400) from None
+    if not version.startswith("HTTP/1."):
+        raise HTTPError(400)
+    headers = []
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, separator, value = line.partition(":")
+        if not separator or not name or name != name.strip():
+            raise HTTPError(400)
+        headers.append((name.lower(), value.strip()))
+    return _Request(method, target, version, headers)
+
+
+def build_environ(
+    request: _Request,
+    server: Tuple[str, int],
+    peer: Optional[Tuple[Any, ...]],
+    url_scheme: str,
+) -> Dict[str, Any]:
+    """The PEP 3333 environ for ``request``."""
+    path, _, query = request.target.partition("?")
+    if path.startswith(("http://", "https://")):
+        path = urllib.parse.urlsplit(path).path or "/"
+    environ: Dict[str, Any] = {
+        "REQUEST_METHOD": request.method,
+        "SCRIPT_NAME": "",
+        "PATH_INFO": urllib.parse.unquote_to_bytes(path).decode("latin-1"),
+        "QUERY_STRING": query,
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": request.version,
+        "REMOTE_ADDR": str(peer[0]) if peer else "",
+        "REMOTE_PORT": str(peer[1]) if peer else "",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": url_scheme,
+        "wsgi.input": io.BytesIO(request.body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in request.headers:
+        if name == "content-type":
+            environ["CONTENT_TYPE"] = value
+        elif name in ("content-length", "transfer-encoding"):
+            continue  # framing comes from the body that was actually read
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    if request.header("content-length") or request.header("transfer-encoding"):
+        environ["CONTENT_LENGTH"] = str(len(request.body))
+    return environ
+
+
+def call_app(
+    app: Callable[..., Iterable[bytes]], environ: Dict[str, Any]
+) -> _AppResult:
+    """Run the app; buffer its body unless it is a generator to stream."""
+    result = _AppResult()
+
+    def start_response(status, headers, exc_info=None):
+        if exc_info is not None and result.body:
+            raise exc_info[1].with_traceback(exc_info[2])
+        result.status = status
+        result.headers = headers
+        return result.body.append
+
+    iterable = app(environ, start_response)
+    if isinstance(iterable, (list, tuple)):
+        result.body.extend(iterable)
+    else:
+        result.iterator = iter(iterable)
+        result.close = getattr(iterable, "close", None)
+        # Start the iterator here so start_response has been called.
+        first = next_chunk(result.iterator)
+        if first is not _BODY_DONE:
+            result.body.append(first)
+        else:
+            result.iterator = None
+    return result
+
+
+def next_chunk(iterator: Any) -> Any:
+    return next(iterator, _BODY_DONE)
+
+
+class AsyncWSGIServer:
+    """Serve a WSGI ``app`` from an asyncio event loop."""
+
+    def __init__(
+        self,
+        app: Callable[..., Iterable[bytes]],
+        host: str = "0.0.0.0",
+        port: int = 5001,
+        threads: int = DEFAULT_THREADS,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+        header_timeout: float = DEFAULT_HEADER_TIMEOUT,
+        graceful_timeout: float = DEFAULT_GRACEFUL_TIMEOUT,
+        url_scheme: str = "http",
+        backlog: int = 2048,
+    ) -> None:
+        self.app = app
+        self.host = host
+        self.port = port
+        self.keepalive_timeout = keepalive_timeout
+        self.header_timeout = header_timeout
+        self.graceful_timeout = graceful_timeout
+        self.url_scheme = url_scheme
+        self.backlog = backlog
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="async-app")
+        self.server: Optional[asyncio.AbstractServer] = None
+        self._idle: Set[asyncio.StreamWriter] = set()
+        self._connections: Set["asyncio.Task[None]"] = set()
+        self._stopping = asyncio.Event()
+
+    @property
+    def connections(self) -> int:
+        """Open client connections."""
+        return len(self._connections)
+
+    async def start(self) -> None:
+        """Bind and start accepting; ``port`` is updated if it was 0."""
+        self._stopping = asyncio.Event()
+        self.server = await asyncio.start_server(
+            self._serve_connection,
+            self.host,
+            self.port,
+            limit=MAX_HEADER_BYTES,
+            backlog=self.backlog,
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """Serve until SIGTERM or SIGINT, then drain in-flight requests."""
+        await self.start()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, self._stopping.set)
+            except (NotImplementedError, RuntimeError):  # pragma: no cover
+                pass
+        logger.info("Serving on %s:%s (asyncio)", self.host, self.port)
+        await self._stopping.wait()
+        await self.shutdown()
+
+    def stop(self) -> None:
+        """Ask ``serve_forever`` to shut down (call from the loop's thread)."""
+        self._stopping.set()
+
+    async def shutdown(self) -> None:
+        """Stop accepting, close idle connections and wait for the rest."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for writer in list(self._idle):
+            writer.close()
+        if self._connections:
+            _, pending = await asyncio.wait(
+                set(self._connections), timeout=self.graceful_timeout
+            )
+            for task in pending:
+                task.cancel()
+        self.executor.shutdown(wait=False)
+        logger.info("Server stopped")
+
+    async def _serve_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        assert task is not None, "start_server runs each handler in a task"
+        self._connections.add(task)
+        try:
+            await self._serve_requests(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception:
+            logger.exception("Connection handler failed")
+        finally:
+            self._idle.discard(writer)
+            self._connections.discard(task)
+            writer.close()
+
+    async def _serve_requests(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        server_address = writer.get_extra_info("sockname")[:2]
+        peer = writer.get_extra_info("peername")
+        while not self._stopping.is_set():
+            self._idle.add(writer)
+            try:
+                head = await asyncio.wait_for(
+                    reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout
+                )
+            except asyncio.TimeoutError:
+                return
+            except asyncio.IncompleteReadError:
+                return  # client closed the connection between requests
+            except asyncio.LimitOverrunError:
+                await self._send_error(writer, 431)
+                return
+            finally:
+                self._idle.discard(writer)
+
+            try:
+                request = parse_head(head[:-4])
+                await asyncio.wait_for(
+                    self._read_body(request, reader, writer), self.header_timeout
+                )
+            except HTTPError as exc:
+                await self._send_error(writer, exc.status)
+                return
+            except asyncio.TimeoutError:
+                await self._send_error(writer, 408)
+                return
+
+            environ = build_environ(request, server_address, peer, self.url_scheme)
+            keep_alive = await self._respond(request, environ, writer)
+            if not keep_alive:
+                return
+
+    async def _read_body(
+        self,
+        request: _Request,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        encodings = request.header_values("transfer-encoding")
+        lengths = request.header_values("content-length")
+        if len(encodings) > 1 or len(lengths) > 1 or (encodings and lengths):
+            # RFC 9112 section 6.1: a proxy in front may frame such a request
+            # differently, so it is rejected and the connection closed.
+            raise HTTPError(400)
+        if not encodings and not lengths:
+            return
+        if lengths and not _DIGITS.fullmatch(lengths[0]):
+            raise HTTPError(400)
+        if (request.header("expect") or "").lower() == "100-continue":
+            writer.write(f"{request.version} 100 Continue\r\n\r\n".encode("ascii"))
+            await writer.drain()
+        if encodings:
+            if encodings[0].lower() != "chunked":
+                raise HTTPError(501)
+            request.body = await self._read_chunked(reader)
+        else:
+            length = int(lengths[0])
+            if length > MAX_BODY_BYTES:
+                raise HTTPError(413)
+            request.body = await reader.readexactly(length)
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        body = bytearray()
+        while True:
+            size_line = await reader.readuntil(b"\r\n")
+            size_text = size_line[:-2].split(b";", 1)[0]
+            if not _HEX_DIGITS.fullmatch(size_text):
+                raise HTTPError(400)
+            size = int(size_text, 16)
+            if size == 0:
+                # Skip trailers up to the blank line.
+                while await reader.readuntil(b"\r\n") != b"\r\n":
+                    pass
+                return bytes(body)
+            if len(body) + size > MAX_BODY_BYTES:
+                raise HTTPError(413)
+            body += await reader.readexactly(size)
+            if await reader.readexactly(2) != b"\r\n":
+                raise HTTPError(400)
+
+    async def _respond(
+        self,
+        request: _Request,
+        environ: Dict[str, Any],
+        writer: asyncio.StreamWriter,
+    ) -> bool:
+        """Run the app and write its response; return whether to keep alive."""
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(
+                self.executor, call_app, self.app, environ
+            )
+        except Exception:
+            logger.exception("Unhandled error in %s %s", request.method, request.target)
+            await self._send_error(writer, 500)
+            return False
+
+        keep_alive = request.keep_alive and not self._stopping.is_set()
+        header_names = {name.lower() for name, _ in result.headers}
+        streamed = result.iterator is not None
+        chunked = (
+            streamed
+            and "content-length" not in header_names
+            and request.version == "HTTP/1.1"
+        )
+        if streamed and not chunked and "content-length" not in header_names:
+            keep_alive = False  # body ends when the connection closes
+
+        lines = [f"{request.version} {result.status}\r\n".encode("latin-1")]
+        for name, value in result.headers:
+            lines.append(f"{name}: {value}\r\n".encode("latin-1"))
+        if not streamed and "content-length" not in header_names:
+            length = sum(len(chunk) for chunk in result.body)
+            lines.append(b"Content-Length: %d\r\n" % length)
+        if chunked:
+            lines.append(b"Transfer-Encoding: chunked\r\n")
+        if "date" not in header_names:
+            lines.append(b"Date: " + _http_date() + b"\r\n")
+        if "server" not in header_names:
+            lines.append(f"Server: {SERVER_NAME}\r\n".encode("ascii"))
+        lines.append(
+            b"Connection: keep-alive\r\n\r\n"
+            if keep_alive
+            else b"Connection: close\r\n\r\n"
+        )
+        head_only = request.method == "HEAD"
+
+        try:
+            writer.write(b"".join(lines))
+            if not head_only:
+                for chunk in result.body:
+                    self._write_chunk(writer, chunk, chunked)
+            await writer.drain()
+            if streamed and not head_only:
+                while True:
+                    chunk = await loop.run_in_executor(
+                        self.executor, next_chunk, result.iterator
+                    )
+                    if chunk is _BODY_DONE:
+                        break
+                    self._write_chunk(writer, chunk, chunked)
+                    await writer.drain()
+                if chunked:
+                    writer.write(b"0\r\n\r\n")
+                    await writer.drain()
+        finally:
+            if result.close is not None:
+                await loop.run_in_executor(self.executor, result.close)
+        return keep_alive
+
+    @staticmethod
+    def _write_chunk(writer: asyncio.StreamWriter, chunk: bytes, chunked: bool) -> None:
+        if not chunk:
+            return
+        if chunked:
+            writer.write(b"%x\r\n" % len(chunk) + chunk + b"\r\n")
+        else:
+            writer.write(chunk)
+
+    @staticmethod
+    async def _send_error(writer: asyncio.StreamWriter, status: int) -> None:
+        reason = _STATUS_TEXT.get(status, "Error")
+        body = f"{status} {reason}\n".encode("ascii")
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: text/plain\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii")
+            + body
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+def serve(app: Callable[..., Iterable[bytes]], **options: Any) -> None:
+    """Run an :class:`AsyncWSGIServer` until SIGTERM or SIGINT."""
+    asyncio.run(AsyncWSGIServer(app, **options).serve_forever())
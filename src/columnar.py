@@ -0,0 +1,271 @@
+"""Columnar NumPy view of the company universe for vectorized analytics.
+
+``CompanyColumns`` joins ``corporate_structure.json`` (sector -> companies)
+with the financials in ``corporate_data.json`` (symbol -> market cap and
+revenue) into parallel arrays with one row per company:
+
+* ``market_cap`` and ``revenue`` are float64, NaN where unknown;
+* ``sector_codes`` index into ``sectors`` (``UNCLASSIFIED`` for symbols
+  that have financials but are not in the structure);
+* ``tickers`` and ``names`` are interned string tables.
+
+Filters return boolean masks, group-bys run ``np.bincount`` over the
+sector codes and top-N partitions with ``np.partition``, so aggregates over
+hundreds of thousands of companies never loop in Python. The arrays are
+built once per data version and must not be modified.
+"""
+
+from __future__ import annotations
+
+import math
+import sys
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from src.indexes import normalize_ticker
+
+UNCLASSIFIED = -1
+NUMERIC_COLUMNS = ("market_cap", "revenue")
+
+
+def to_float(value: Any) -> float:
+    """A numeric field as float; NaN for missing or non-numeric values."""
+    if value is None:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def column_values(values: Sequence[Any]) -> np.ndarray:
+    """Raw field values as float64, NaN for missing or non-numeric ones."""
+    try:
+        return np.array(values, dtype=np.float64)  # None converts to NaN
+    except (TypeError, ValueError):
+        return np.array([to_float(value) for value in values], dtype=np.float64)
+
+
+class SectorAggregates(NamedTuple):
+    """Per-sector statistics, indexed by sector code."""
+
+    companies: np.ndarray
+    known: np.ndarray
+    total: np.ndarray
+    mean: np.ndarray
+
+
+class CompanyColumns:
+    """Company universe as parallel column arrays (see the module docstring).
+
+    Rows ``[0, structure_rows)`` are the structure's companies in file
+    order, one per entry; the remaining rows are symbols that only appear in
+    the corporate data. ``asset_rows`` maps every object-valued entry of the
+    corporate data, in file order, to the row holding its financials.
+    """
+
+    def __init__(
+        self,
+        structure: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        corporate_data: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        structure = structure or {}
+        self.sectors: List[str] = list(structure)
+        tickers = [
+            str(company.get("ticker") or "")
+            for companies in structure.values()
+            for company in companies
+        ]
+        names = [
+            str(company.get("name", "Unknown"))
+            for companies in structure.values()
+            for company in companies
+        ]
+        codes = np.repeat(
+            np.arange(len(self.sectors), dtype=np.int32),
+            [len(companies) for companies in structure.values()],
+        )
+        self.structure_rows = len(tickers)
+        keys = [ticker.strip().lower() for ticker in tickers]
+        # First structure row of each ticker (a ticker may repeat).
+        first_row = dict(zip(reversed(keys), range(len(keys) - 1, -1, -1)))
+
+        assets = [
+            (symbol, info)
+            for symbol, info in (corporate_data or {}).items()
+            if isinstance(info, dict)
+        ]
+        asset_rows: List[int] = []
+        claimed = set()
+        for symbol, _ in assets:
+            # The first symbol for a ticker supplies the structure's rows;
+            # any other gets an unclassified row of its own.
+            key = symbol.strip().lower()
+            row = None if key in claimed else first_row.get(key)
+            claimed.add(key)
+            if row is None:
+                row = len(tickers)
+                tickers.append(symbol)
+                names.append(symbol)
+            asset_rows.append(row)
+
+        self.tickers = list(map(sys.intern, tickers))
+        self.names = list(map(sys.intern, names))
+        self._rows = dict(first_row)
+        for row in range(self.structure_rows, len(tickers)):
+            self._rows.setdefault(tickers[row].strip().lower(), row)
+        self.sector_codes = _frozen(
+            np.concatenate(
+                [codes, np.full(len(tickers) - len(codes), UNCLASSIFIED, np.int32)]
+            )
+        )
+        self.asset_rows = _frozen(np.array(asset_rows, dtype=np.intp))
+        repeated = len(first_row) < self.structure_rows
+        self.columns: Dict[str, np.ndarray] = {}
+        for column in NUMERIC_COLUMNS:
+            values = np.full(len(tickers), np.nan)
+            values[self.asset_rows] = column_values(
+                [info.get(column) for _, info in assets]
+            )
+            if repeated:
+                for row, key in enumerate(keys):
+                    values[row] = values[first_row[key]]
+            self.columns[column] = _frozen(values)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    @property
+    def market_cap(self) -> np.ndarray:
+        return self.columns["market_cap"]
+
+    @property
+    def revenue(self) -> np.ndarray:
+        return self.columns["revenue"]
+
+    def row(self, ticker: str) -> Optional[int]:
+        """Row of a ticker (case-insensitive), or None."""
+        return self._rows.get(normalize_ticker(ticker))
+
+    def sector_code(self, sector: str) -> Optional[int]:
+        try:
+            return self.sectors.index(sector)
+        except ValueError:
+            return None
+
+    # -- filters ----------------------------------------------------------
+
+    def classified(self) -> np.ndarray:
+        """Mask of the rows that belong to a sector."""
+        return self.sector_codes != UNCLASSIFIED
+
+    def between(
+        self, column: str, low: Optional[float] = None, high: Optional[float] = None
+    ) -> np.ndarray:
+        """Mask of rows with ``low <= column <= high``; unknown values never match."""
+        values = self.columns[column]
+        mask = ~np.isnan(values)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return mask
+
+    def in_sectors(self, sectors: Iterable[str]) -> np.ndarray:
+        """Mask of rows in any of ``sectors``; unknown names are ignored."""
+        codes = [self.sectors.index(name) for name in sectors if name in self.sectors]
+        return np.isin(self.sector_codes, np.array(codes, dtype=np.int32))
+
+    def select(
+        self,
+        sectors: Optional[Iterable[str]] = None,
+        min_market_cap: Optional[float] = None,
+        max_market_cap: Optional[float] = None,
+        min_revenue: Optional[float] = None,
+        max_revenue: Optional[float] = None,
+    ) -> np.ndarray:
+        """Combined mask of the given filters (all rows when none are given)."""
+        mask = np.ones(len(self), dtype=bool)
+        if sectors is not None:
+            mask &= self.in_sectors(sectors)
+        if min_market_cap is not None or max_market_cap is not None:
+            mask &= self.between("market_cap", min_market_cap, max_market_cap)
+        if min_revenue is not None or max_revenue is not None:
+            mask &= self.between("revenue", min_revenue, max_revenue)
+        return mask
+
+    # -- group-by and top-N -----------------------------------------------
+
+    def group_by_sector(
+        self, column: Optional[str] = None, mask: Optional[np.ndarray] = None
+    ) -> SectorAggregates:
+        """Per-sector company count and the count, sum and mean of ``column``.
+
+        Only rows in ``mask`` (default: all) that belong to a sector count.
+        The mean is NaN for sectors without a known value.
+        """
+        selected = self.classified() if mask is None else mask & self.classified()
+        codes = self.sector_codes[selected]
+        size = len(self.sectors)
+        companies = np.bincount(codes, minlength=size)
+        if column is None:
+            return SectorAggregates(
+                companies, companies, np.zeros(size), np.full(size, np.nan)
+            )
+        values = self.columns[column][selected]
+        known = ~np.isnan(values)
+        counts = np.bincount(codes[known], minlength=size)
+        total = np.bincount(codes[known], weights=values[known], minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(counts > 0, total / np.maximum(counts, 1), np.nan)
+        return SectorAggregates(companies, counts, total, mean)
+
+    def sector_counts(self) -> Dict[str, int]:
+        """Companies per sector, in structure order."""
+        counts = self.group_by_sector().companies
+        return {sector: int(count) for sector, count in zip(self.sectors, counts)}
+
+    def top_n(
+        self,
+        column: str,
+        n: int,
+        mask: Optional[np.ndarray] = None,
+        descending: bool = True,
+    ) -> np.ndarray:
+        """Rows of the ``n`` largest (or smallest) known values of ``column``.
+
+        Ties are broken by row order, so the result is deterministic.
+        """
+        values = self.columns[column]
+        candidates = ~np.isnan(values)
+        if mask is not None:
+            candidates &= mask
+        rows = np.flatnonzero(candidates)
+        return top_rows(values[rows], rows, n, descending)
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+def top_rows(
+    values: np.ndarray, rows: np.ndarray, n: int, descending: bool = True
+) -> np.ndarray:
+    """The ``rows`` of the ``n`` best ``values``, best first, ties by row."""
+    if n <= 0 or not len(rows):
+        return np.empty(0, dtype=np.intp)
+    keys = -values if descending else values
+    if n < len(rows):
+        # Keep everything tied with the n-th value, then order exactly.
+        threshold = np.partition(keys, n - 1)[n - 1]
+        keep = keys <= threshold
+        keys, rows = keys[keep], rows[keep]
+    return rows[np.lexsort((rows, keys))][:n]
+
+
+def top_counts(counts: Sequence[int], labels: Sequence[str], n: int) -> List[tuple]:
+    """The ``n`` largest ``(label, count)`` pairs, ties in label order."""
+    ranked = top_rows(np.asarray(counts, dtype=np.float64), np.arange(len(labels)), n)
+    return [(labels[index], int(counts[index])) for index in ranked]
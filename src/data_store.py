@@ -0,0 +1,329 @@
+"""Process-wide, hot-reloading snapshot of the JSON data files."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[str], Optional[Any]]
+Listener = Callable[["DataSnapshot"], None]
+Builder = Callable[["DataSnapshot"], Any]
+FileSignature = Tuple[Tuple[str, int, int], ...]
+
+DEFAULT_CHECK_INTERVAL = 1.0
+FILE_CONTENT = "content"
+
+
+def file_signature(paths: Dict[str, str]) -> FileSignature:
+    """Return the (name, mtime_ns, size) signature of every watched file."""
+    entries = []
+    for name, path in sorted(paths.items()):
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            entries.append((name, -1, -1))
+            continue
+        entries.append((name, stat_result.st_mtime_ns, stat_result.st_size))
+    return tuple(entries)
+
+
+def signature_version(signature: Any) -> str:
+    """Derive a short, process-independent version string from a signature."""
+    return hashlib.sha1(repr(signature).encode("utf-8")).hexdigest()[:16]
+
+
+class DataSnapshot:
+    """Immutable view of every data file as parsed at one point in time.
+
+    Snapshots are never mutated after they are published, so request handlers
+    can hold a reference for the whole request without locking. Structures
+    derived from the files (indexes and the like) are memoized per snapshot
+    and therefore rebuilt exactly once per data version. Structures named in
+    ``lazy`` are left to their first access unless explicitly requested.
+    """
+
+    __slots__ = (
+        "version",
+        "loaded_at",
+        "_files",
+        "_builders",
+        "_lazy",
+        "_derived",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        version: str,
+        files: Dict[str, Any],
+        loaded_at: Optional[float] = None,
+        builders: Optional[Dict[str, Builder]] = None,
+        lazy: Optional[Set[str]] = None,
+    ) -> None:
+        self.version = version
+        self.loaded_at = time.time() if loaded_at is None else loaded_at
+        self._files = files
+        self._builders = builders if builders is not None else {}
+        self._lazy = lazy if lazy is not None else set()
+        self._derived: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def get(self, name: str) -> Optional[Any]:
+        """Return the parsed content of a data file, or None if it failed to load."""
+        return self._files.get(name)
+
+    def derived(self, name: str) -> Any:
+        """Return a registered derived structure, building it on first use."""
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = self._builders[name](self)
+            return self._derived[name]
+
+    def build_derived(self, include_lazy: bool = False) -> None:
+        """Eagerly build the registered derived structures.
+
+        Lazy ones are skipped unless ``include_lazy`` is set, for example in
+        a master process whose forked workers should inherit them.
+        """
+        for name in list(self._builders):
+            if include_lazy or name not in self._lazy:
+                self.derived(name)
+
+    @property
+    def names(self) -> List[str]:
+        """Names of the data files held by the snapshot."""
+        return list(self._files)
+
+    @property
+    def age(self) -> float:
+        """Seconds since the snapshot was built."""
+        return max(0.0, time.time() - self.loaded_at)
+
+
+class DataStore:
+    """Parse each data file once and swap in a new snapshot when files change.
+
+    Readers call :meth:`snapshot`, which never blocks on I/O once the first
+    snapshot exists. At most once per ``check_interval`` a reader stats the
+    watched files; when their signature changes a background thread parses
+    them and atomically replaces the published snapshot. A file that fails to
+    parse (for example because it is still being written) keeps the previous
+    snapshot in place until the file changes again.
+    """
+
+    def __init__(
+        self,
+        paths: Dict[str, str],
+        loader: Loader,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
+    ) -> None:
+        self.paths = dict(paths)
+        self.loader = loader
+        self.check_interval = check_interval
+        self._snapshot: Optional[DataSnapshot] = None
+        self._signature: Optional[FileSignature] = None
+        self._rejected_signature: Optional[FileSignature] = None
+        self._last_check = 0.0
+        self._load_lock = threading.Lock()
+        self._check_lock = threading.Lock()
+        self._building = False
+        self._listeners: List[Listener] = []
+        self._builders: Dict[str, Builder] = {}
+        self._lazy: Set[str] = set()
+        self._watcher: Optional[threading.Thread] = None
+        self._watcher_stop = threading.Event()
+
+    @property
+    def version(self) -> str:
+        """Version of the currently published snapshot."""
+        return self.snapshot().version
+
+    def snapshot(self) -> DataSnapshot:
+        """Return the current snapshot, scheduling a reload if files changed."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self._load_initial()
+
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._check_for_changes(now)
+        return snapshot
+
+    def subscribe(self, listener: Listener) -> None:
+        """Call ``listener`` with every newly published snapshot."""
+        self._listeners.append(listener)
+
+    def register_derived(self, name: str, builder: Builder, lazy: bool = False) -> None:
+        """Register a structure that is built from each new snapshot.
+
+        Builders run on the reload thread before the snapshot is published,
+        so request handlers find them ready. With ``lazy``, or for snapshots
+        published before the registration, the structure is built on first
+        access instead; use it for views few requests need.
+        """
+        self._builders[name] = builder
+        if lazy:
+            self._lazy.add(name)
+        else:
+            self._lazy.discard(name)
+
+    def refresh(self, wait: bool = True) -> DataSnapshot:
+        """Check the files immediately, optionally waiting for the rebuild."""
+        if self._snapshot is None:
+            return self._load_initial()
+        if wait:
+            with self._load_lock:
+                self._rebuild(file_signature(self.paths))
+            return self._snapshot
+        self._check_for_changes(time.monotonic())
+        return self._snapshot
+
+    def start_watcher(self) -> None:
+        """Poll the files from a daemon thread instead of on the request path."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._watcher_stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch,
+            name="data-store-watcher",
+            daemon=True,
+        )
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        """Stop the background polling thread."""
+        self._watcher_stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.check_interval * 2)
+        self._watcher = None
+
+    def _watch(self) -> None:
+        while not self._watcher_stop.wait(self.check_interval):
+            self._check_for_changes(time.monotonic(), background=False)
+
+    def _load_initial(self) -> DataSnapshot:
+        with self._load_lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                signature = file_signature(self.paths)
+                files = {name: self.loader(path) for name, path in self.paths.items()}
+                self._signature = signature
+                snapshot = self._new_snapshot(signature_version(signature), files)
+                self._publish(snapshot)
+                self._last_check = time.monotonic()
+        return snapshot
+
+    def _check_for_changes(self, now: float, background: bool = True) -> None:
+        if not self._check_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_check = now
+            if self._building:
+                return
+            signature = file_signature(self.paths)
+            if signature in (self._signature, self._rejected_signature):
+                return
+            self._building = True
+        finally:
+            self._check_lock.release()
+
+        if background:
+            threading.Thread(
+                target=self._rebuild_in_background,
+                args=(signature,),
+                name="data-store-reload",
+                daemon=True,
+            ).start()
+        else:
+            self._rebuild_in_background(signature)
+
+    def _rebuild_in_background(self, signature: FileSignature) -> None:
+        try:
+            with self._load_lock:
+                self._rebuild(signature)
+        except Exception:  # pragma: no cover - keep serving the old snapshot
+            logger.exception("Data snapshot reload failed")
+        finally:
+            self._building = False
+
+    def _rebuild(self, signature: FileSignature) -> None:
+        if signature == self._signature:
+            return
+
+        previous = self._snapshot
+        files: Dict[str, Any] = {}
+        for name, path in self.paths.items():
+            content = self.loader(path)
+            if (
+                content is None
+                and previous is not None
+                and previous.get(name) is not None
+            ):
+                logger.warning("Keeping previous snapshot: %s did not parse", path)
+                self._rejected_signature = signature
+                return
+            files[name] = content
+
+        if file_signature(self.paths) != signature:
+            logger.info("Data files changed while reloading; retrying later")
+            return
+
+        self._signature = signature
+        self._rejected_signature = None
+        snapshot = self._new_snapshot(signature_version(signature), files)
+        self._publish(snapshot)
+        logger.info("Loaded data snapshot %s", snapshot.version)
+
+    def _new_snapshot(self, version: str, files: Dict[str, Any]) -> DataSnapshot:
+        snapshot = DataSnapshot(
+            version, files, builders=self._builders, lazy=self._lazy
+        )
+        snapshot.build_derived()
+        return snapshot
+
+    def _publish(self, snapshot: DataSnapshot) -> None:
+        self._snapshot = snapshot
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception:  # pragma: no cover - listeners must not break reloads
+                logger.exception("Data snapshot listener failed")
+
+
+_file_stores: Dict[str, DataStore] = {}
+_file_stores_lock = threading.Lock()
+
+
+def load_json(path: str) -> Any:
+    """Parse a JSON file with the standard library."""
+    with open(path, encoding="utf-8") as file_handle:
+        return json.load(file_handle)
+
+
+def file_store(path: str) -> DataStore:
+    """The process-wide store for one JSON file, keyed by absolute path.
+
+    Nothing is read until the first ``snapshot()``; the parsed content is
+    then shared by every caller (under ``FILE_CONTENT``) and reloaded when
+    the file changes.
+    """
+    path = os.path.abspath(path)
+    store = _file_stores.get(path)
+    if store is None:
+        with _file_stores_lock:
+            store = _file_stores.get(path)
+            if store is None:
+                store = DataStore({FILE_CONTENT: path}, loader=load_json)
+                _file_stores[path] = store
+    return store
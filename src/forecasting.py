@@ -0,0 +1,218 @@
+"""Batched per-ticker linear trend forecasts.
+
+A financial history file holds, for a shared list of periods (oldest
+first), each ticker's series of values per field::
+
+    {
+        "periods": ["2021-Q1", "2021-Q2", ...],
+        "tickers": {
+            "MSFT": {"revenue": [41.7e9, 46.2e9, ...], "market_cap": [...]},
+            ...
+        }
+    }
+
+Series may be shorter than ``periods`` (they then cover the oldest
+periods) and may contain nulls for missing values.
+
+``TrendForecaster`` stacks every ticker's series into one ``(tickers,
+periods)`` matrix per field and fits an ordinary least-squares line
+``value = a + b * period`` to every row at once, with the closed-form
+solution over the known values of each row: the slope is
+``sum(dt * dy) / sum(dt ** 2)`` with ``dt`` and ``dy`` the deviations from
+the row's mean period and mean value. This gives the same lines as one
+``LinearRegression`` per ticker without a Python-level loop. A row with a
+single known value forecasts that value; a row without any forecasts
+nothing.
+
+Horizons count periods after each series' last known value.
+
+``record_period`` produces the file: it appends the financials of a
+``corporate_data.json`` as one more period (``record_financial_history.py``
+runs it on the data directory).
+"""
+
+from __future__ import annotations
+
+import numbers
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from src.aggregates import to_number
+from src.columnar import column_values
+from src.indexes import normalize_ticker
+
+FIELDS = ("revenue", "market_cap")
+
+
+class TrendFit(NamedTuple):
+    """Per-row trend lines: ``mean + slope * (period - mean_period)``."""
+
+    mean: np.ndarray
+    slope: np.ndarray
+    mean_period: np.ndarray
+    last_period: np.ndarray
+
+
+def fit_trends(values: np.ndarray) -> TrendFit:
+    """Fit a least-squares line to every row of ``values`` (NaN = missing)."""
+    known = ~np.isnan(values)
+    count = known.sum(axis=1)
+    periods = np.arange(values.shape[1], dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_period = np.where(known, periods, 0.0).sum(axis=1) / count
+        mean = np.where(known, values, 0.0).sum(axis=1) / count
+        dt = np.where(known, periods - mean_period[:, None], 0.0)
+        dy = np.where(known, values - mean[:, None], 0.0)
+        spread = (dt * dt).sum(axis=1)
+        slope = np.where(spread > 0, (dt * dy).sum(axis=1) / spread, 0.0)
+    last_period = np.zeros(len(values), dtype=np.intp)
+    if values.shape[1]:
+        last_period = values.shape[1] - 1 - np.argmax(known[:, ::-1], axis=1)
+    slope[count == 0] = np.nan
+    return TrendFit(mean, slope, mean_period, last_period.astype(np.float64))
+
+
+def forecast(fit: TrendFit, rows: np.ndarray, horizons: np.ndarray) -> np.ndarray:
+    """Values ``horizons`` periods after each row's last known value.
+
+    Returns an array of shape ``(len(rows), len(horizons))``.
+    """
+    at = fit.last_period[rows, None] + horizons[None, :]
+    return fit.mean[rows, None] + fit.slope[rows, None] * (
+        at - fit.mean_period[rows, None]
+    )
+
+
+def history_matrix(series: Sequence[Any], width: int) -> np.ndarray:
+    """Stack ragged value lists into a ``(len(series), width)`` NaN-padded matrix."""
+    matrix = np.full((len(series), width), np.nan)
+    lengths = np.array([len(values) for values in series], dtype=np.intp)
+    if len(series) and width:
+        flat = column_values([value for values in series for value in values[:width]])
+        lengths = np.minimum(lengths, width)
+        rows = np.repeat(np.arange(len(series)), lengths)
+        columns = np.arange(len(flat)) - np.repeat(
+            np.cumsum(lengths) - lengths, lengths
+        )
+        matrix[rows, columns] = flat
+    return matrix
+
+
+class TrendForecaster:
+    """Trend lines for every ticker of a history file (see the module docstring)."""
+
+    def __init__(self, history: Optional[Dict[str, Any]] = None) -> None:
+        history = history or {}
+        self.periods: List[str] = [str(period) for period in history.get("periods", [])]
+        companies = history.get("tickers") or {}
+        self.tickers: List[str] = list(companies)
+        # The first spelling of a ticker wins, as in the other indexes.
+        self._rows: Dict[str, int] = {}
+        for row, ticker in enumerate(self.tickers):
+            self._rows.setdefault(normalize_ticker(ticker), row)
+        width = max(
+            [len(self.periods)]
+            + [
+                len(series.get(field) or [])
+                for series in companies.values()
+                for field in FIELDS
+            ]
+        )
+        self.values: Dict[str, np.ndarray] = {}
+        self.fits: Dict[str, TrendFit] = {}
+        for field in FIELDS:
+            series = [companies[ticker].get(field) or [] for ticker in self.tickers]
+            self.values[field] = history_matrix(series, width)
+            self.fits[field] = fit_trends(self.values[field])
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def row(self, ticker: str) -> Optional[int]:
+        return self._rows.get(normalize_ticker(ticker))
+
+    def predict_rows(
+        self, field: str, rows: Iterable[int], horizons: Iterable[int]
+    ) -> np.ndarray:
+        """Forecasts of ``field``, shape ``(len(rows), len(horizons))``."""
+        return forecast(
+            self.fits[field],
+            np.asarray(list(rows), dtype=np.intp),
+            np.asarray(list(horizons), dtype=np.float64),
+        )
+
+    def predict_many(
+        self,
+        tickers: Iterable[str],
+        horizons: Union[int, Iterable[int]] = 1,
+        fields: Sequence[str] = FIELDS,
+    ) -> Dict[str, Optional[Dict[str, List[Optional[float]]]]]:
+        """Forecast every ticker at every horizon in one vectorized step.
+
+        Maps each requested ticker to ``{field: [value per horizon]}``, with
+        None for values that cannot be forecast, or to None when the ticker
+        has no history.
+        """
+        tickers = list(tickers)
+        # Integral also covers NumPy integers; int is listed for the type checker.
+        if isinstance(horizons, (int, numbers.Integral)):
+            horizons = [int(horizons)]
+        else:
+            horizons = list(horizons)
+        rows = [self.row(ticker) for ticker in tickers]
+        found = [row for row in rows if row is not None]
+        forecasts = {
+            field: self.predict_rows(field, found, horizons).tolist()
+            for field in fields
+        }
+        results: Dict[str, Optional[Dict[str, List[Optional[float]]]]] = {}
+        position = 0
+        for ticker, row in zip(tickers, rows):
+            if row is None:
+                results[ticker] = None
+                continue
+            results[ticker] = {
+                field: [None if value != value else value for value in values[position]]
+                for field, values in forecasts.items()
+            }
+            position += 1
+        return results
+
+
+def record_period(
+    history: Optional[Dict[str, Any]], period: str, corporate_data: Dict[str, Any]
+) -> Dict[str, Any]:
+    """A copy of ``history`` with ``corporate_data``'s financials as ``period``.
+
+    Object-valued entries of ``corporate_data`` are tickers, as in
+    ``corporate_data.json``; tickers it lacks get no value for the period.
+    Labels must sort as strings in time order (``2025-Q1``, ``2025-Q2``).
+    Recording the latest period again replaces its values, while a label
+    that sorts before it raises ValueError.
+    """
+    history = history or {}
+    periods = [str(label) for label in history.get("periods", [])]
+    tickers = {
+        ticker: {field: list(values or []) for field, values in series.items()}
+        for ticker, series in (history.get("tickers") or {}).items()
+    }
+    if periods and periods[-1] == period:
+        index = len(periods) - 1
+        for series in tickers.values():
+            for values in series.values():
+                del values[index:]
+    elif periods and period < periods[-1]:
+        raise ValueError(f"Period {period!r} is older than {periods[-1]!r}")
+    else:
+        index = len(periods)
+        periods.append(period)
+    for ticker, info in corporate_data.items():
+        if not isinstance(info, dict):
+            continue
+        series = tickers.setdefault(ticker, {})
+        for field in FIELDS:
+            values = series.setdefault(field, [])
+            values.extend([None] * (index - len(values)))
+            values.append(to_number(info.get(field)))
+    return {"periods": periods, "tickers": tickers}
@@ -0,0 +1,439 @@
+"""In-memory lookup indexes over the corporate data files."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+Company = Dict[str, Any]
+TickerEntry = Tuple[str, Company]
+CursorKey = Tuple[Any, str, Optional[int]]
+
+
+def normalize_ticker(ticker: str) -> str:
+    """Normalize a ticker symbol for case-insensitive lookups."""
+    return ticker.strip().lower()
+
+
+def _tie(record: Dict[str, Any], tie_field: str) -> str:
+    value = record.get(tie_field)
+    return "" if value is None else str(value)
+
+
+class TickerIndex:
+    """Case-insensitive ticker -> (sector, company) hash index.
+
+    Built once from a corporate structure mapping of sector -> companies.
+    Company dicts are stored by reference, so in-place updates to a company
+    are visible through the index. When a ticker appears more than once the
+    first occurrence wins, matching the previous linear scans.
+    """
+
+    def __init__(self, structure: Optional[Dict[str, List[Company]]] = None) -> None:
+        self._entries: Dict[str, TickerEntry] = {}
+        self._sorted_keys: Optional[List[str]] = None
+        for sector, companies in (structure or {}).items():
+            for company in companies:
+                ticker = company.get("ticker")
+                if not ticker:
+                    continue
+                self._entries.setdefault(normalize_ticker(ticker), (sector, company))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, ticker: str) -> bool:
+        return normalize_ticker(ticker) in self._entries
+
+    def get(self, ticker: str) -> Optional[TickerEntry]:
+        """Return the (sector, company) pair for a ticker, or None."""
+        return self._entries.get(normalize_ticker(ticker))
+
+    def prefix(self, prefix: str, limit: int = 10) -> List[TickerEntry]:
+        """Return up to ``limit`` entries whose ticker starts with ``prefix``.
+
+        The sorted key list backing prefix search is built on first use, so
+        callers that only do exact lookups never pay for it.
+        """
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted(self._entries)
+
+        keys = self._sorted_keys
+        needle = normalize_ticker(prefix)
+        results: List[TickerEntry] = []
+        position = bisect_left(keys, needle)
+        while position < len(keys) and len(results) < limit:
+            key = keys[position]
+            if not key.startswith(needle):
+                break
+            results.append(self._entries[key])
+            position += 1
+        return results
+
+
+class SortedFieldIndex:
+    """Record positions ordered by one field, with missing values last.
+
+    ``order`` lists record positions in ascending (value, tie, position)
+    order, where the tie-break is a field such as the symbol, ``rank`` is its
+    inverse and ``keys`` holds the sorted non-null values so range filters
+    resolve with two binary searches. The (value, tie, position) triple of a
+    record is a stable keyset cursor: it can be located again in an index
+    built from a later version of the data, and the position keeps records
+    with a missing or repeated tie apart. An index without a field keeps
+    record order and cannot be seeked.
+    """
+
+    def __init__(
+        self,
+        records: Sequence[Dict[str, Any]],
+        field: Optional[str],
+        tie_field: Optional[str] = None,
+        values: Any = None,
+    ) -> None:
+        self.field = field
+        self.tie_field = tie_field
+        if values is not None and field is not None:
+            self._build_from_column(records, field, tie_field, values)
+            return
+        if field is None:
+            ranked = list(range(len(records)))
+            missing: List[int] = []
+        else:
+            # Bind narrowed copies: the type checker does not carry the None
+            # checks into the key functions.
+            sort_field = field
+            present = [
+                pos
+                for pos, record in enumerate(records)
+                if record.get(sort_field) is not None
+            ]
+            missing = [
+                pos
+                for pos, record in enumerate(records)
+                if record.get(sort_field) is None
+            ]
+            if tie_field is not None:
+                tie = tie_field
+                present.sort(key=lambda pos: _tie(records[pos], tie))
+                missing.sort(key=lambda pos: _tie(records[pos], tie))
+            ranked = sorted(present, key=lambda pos: records[pos][sort_field])
+        self.keys = [records[pos][field] for pos in ranked] if field is not None else []
+        self.ties = (
+            [_tie(records[pos], tie_field) for pos in ranked + missing]
+            if tie_field
+            else []
+        )
+        self.order = ranked + missing
+        self.rank = [0] * len(records)
+        for rank, pos in enumerate(self.order):
+            self.rank[pos] = rank
+
+    def _build_from_column(
+        self,
+        records: Sequence[Dict[str, Any]],
+        field: str,
+        tie_field: Optional[str],
+        values: Any,
+    ) -> None:
+        """Sort with NumPy, given ``field`` as a float array (NaN if missing).
+
+        Produces the same order as the generic path for numeric fields.
+        """
+        import numpy as np
+
+        if tie_field is not None:
+            ties = [_tie(record, tie_field) for record in records]
+            tie_rank = np.empty(len(records), dtype=np.intp)
+            tie_rank[np.argsort(np.array(ties, dtype=str), kind="stable")] = np.arange(
+                len(records)
+            )
+            order = np.lexsort((tie_rank, values))
+        else:
+            ties = []
+            order = np.argsort(values, kind="stable")
+        present = int(np.count_nonzero(~np.isnan(values)))
+        self.order = order.tolist()
+        self.keys = [records[pos][field] for pos in self.order[:present]]
+        self.ties = [ties[pos] for pos in self.order] if tie_field else []
+        rank = np.empty(len(records), dtype=np.intp)
+        rank[order] = np.arange(len(records))
+        self.rank = rank.tolist()
+
+    def range(
+        self, low: Optional[float] = None, high: Optional[float] = None
+    ) -> Tuple[int, int]:
+        """Return the [start, stop) slice of ``order`` with low <= value <= high."""
+        start = 0 if low is None else bisect_left(self.keys, low)
+        stop = len(self.keys) if high is None else bisect_right(self.keys, high)
+        return start, max(start, stop)
+
+    def key_of(
+        self, record: Dict[str, Any], records: Sequence[Dict[str, Any]]
+    ) -> CursorKey:
+        """Return the (value, tie, position) keyset position of a record.
+
+        ``records`` is the sequence the index was built from; the position is
+        found among the records sharing the value and tie, so the lookup
+        costs no more than the number of such duplicates.
+        """
+        value = record.get(self.field or "")
+        tie = _tie(record, self.tie_field or "")
+        if self.field is None or self.tie_field is None:
+            return value, tie, None
+        low, high = self._run(value, tie)
+        for pos in self.order[low:high]:
+            if records[pos] is record:
+                return value, tie, pos
+        return value, tie, None
+
+    def seek(self, key: CursorKey, after: bool = True) -> int:
+        """Return the rank where records strictly after (or before) ``key`` begin.
+
+        With ``after`` the result is the first rank greater than ``key``;
+        otherwise it is one past the last rank smaller than ``key``. The key
+        does not need to exist in this index. A key without a position sorts
+        after (or before) every record sharing its value and tie.
+        """
+        if self.field is None or self.tie_field is None:
+            raise ValueError("Index does not support keyset seeking")
+
+        value, tie, position = key
+        low, high = self._run(value, tie)
+        if position is None:
+            return high if after else low
+        search = bisect_right if after else bisect_left
+        return search(self.order, position, low, high)
+
+    def _run(self, value: Any, tie: str) -> Tuple[int, int]:
+        """Return the [start, stop) ranks of records equal to (value, tie).
+
+        Within the run ``order`` is ascending by position, as both sorts are
+        stable.
+        """
+        if value is None:
+            low, high = len(self.keys), len(self.order)
+        else:
+            low, high = bisect_left(self.keys, value), bisect_right(self.keys, value)
+        start = bisect_left(self.ties, tie, low, high)
+        return start, bisect_right(self.ties, tie, start, high)
+
+
+class RecordSelection:
+    """Lazily materialized, ordered subset of records.
+
+    Supports ``len()`` and slicing, so it can be handed straight to
+    ``paginate_results``; only the requested page is ever built.
+    """
+
+    def __init__(
+        self,
+        records: Sequence[Dict[str, Any]],
+        order: SortedFieldIndex,
+        descending: bool = False,
+        filter_index: Optional[SortedFieldIndex] = None,
+        bounds: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        self._records = records
+        self._order = order
+        self._descending = descending
+        self._filter = filter_index
+        self._bounds = bounds if bounds is not None else (0, len(records))
+
+    def __len__(self) -> int:
+        start, stop = self._bounds
+        return stop - start
+
+    def __getitem__(self, item: slice) -> List[Dict[str, Any]]:
+        if not isinstance(item, slice):
+            raise TypeError("RecordSelection only supports slicing")
+        start, stop, _ = item.indices(len(self))
+        return [self._records[pos] for pos in self._slice_positions(start, stop)]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Yield every selected record in order without building a list."""
+        low, high = self._bounds
+        order = self._order
+        if self._filter is None or self._filter is order:
+            ranks = (
+                range(high - 1, low - 1, -1) if self._descending else range(low, high)
+            )
+            for rank in ranks:
+                yield self._records[order.order[rank]]
+            return
+
+        filter_rank = self._filter.rank
+        walk = reversed(order.order) if self._descending else iter(order.order)
+        for pos in walk:
+            if low <= filter_rank[pos] < high:
+                yield self._records[pos]
+
+    def key_of(self, record: Dict[str, Any]) -> CursorKey:
+        """Return the keyset cursor position of a record in this selection."""
+        return self._order.key_of(record, self._records)
+
+    def page_after(self, key: Optional[CursorKey], limit: int) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` records that follow ``key`` in selection order.
+
+        ``key`` comes from :meth:`key_of` on the last record of the previous
+        page, possibly against an older data version. The cost depends on
+        the page size, not on how deep into the selection the key is.
+        """
+        order = self._order
+        size = len(order.order)
+        if key is None:
+            rank = size if self._descending else 0
+        else:
+            rank = order.seek(key, after=not self._descending)
+
+        low, high = self._bounds
+        if self._filter is None or self._filter is order:
+            if self._descending:
+                ranks: Iterable[int] = range(min(rank, high) - 1, low - 1, -1)
+            else:
+                ranks = range(max(rank, low), high)
+            return [self._records[order.order[r]] for r in islice(ranks, limit)]
+
+        filter_index = self._filter
+        matched = high - low
+        if matched * max(1, matched.bit_length()) < len(self._records):
+            matched_ranks = sorted(
+                order.rank[pos] for pos in filter_index.order[low:high]
+            )
+            split = bisect_left(matched_ranks, rank)
+            if self._descending:
+                picks = matched_ranks[max(0, split - limit) : split][::-1]
+            else:
+                picks = matched_ranks[split : split + limit]
+            return [self._records[order.order[r]] for r in picks]
+
+        filter_rank = filter_index.rank
+        ranks = range(rank - 1, -1, -1) if self._descending else range(rank, size)
+        positions = (order.order[r] for r in ranks)
+        matches = (pos for pos in positions if low <= filter_rank[pos] < high)
+        return [self._records[pos] for pos in islice(matches, limit)]
+
+    def _slice_positions(self, start: int, stop: int) -> List[int]:
+        if start >= stop:
+            return []
+
+        low, high = self._bounds
+        if self._filter is None or self._filter is self._order:
+            # The page is a contiguous run of the pre-sorted order.
+            if self._descending:
+                order = self._order.order
+                return [order[high - 1 - offset] for offset in range(start, stop)]
+            return self._order.order[low + start : low + stop]
+
+        filter_index = self._filter
+        sort_index = self._order
+        matched = high - low
+        if matched * max(1, matched.bit_length()) < len(self._records):
+            # Few matches: order them by their rank in the sort field.
+            positions = sorted(
+                filter_index.order[low:high], key=sort_index.rank.__getitem__
+            )
+            if self._descending:
+                positions.reverse()
+            return positions[start:stop]
+
+        # Many matches: walk the sort order and stop once the page is full.
+        filter_rank = filter_index.rank
+        walk = (
+            reversed(sort_index.order) if self._descending else iter(sort_index.order)
+        )
+        matches = (pos for pos in walk if low <= filter_rank[pos] < high)
+        return list(islice(matches, start, stop))
+
+
+class AssetIndex:
+    """Real-asset universe discovered from the corporate data file.
+
+    Every top-level entry whose value is an object is treated as a position
+    keyed by its symbol; narrative string fields are skipped. Pre-sorted
+    indexes are kept for each sortable field.
+    """
+
+    SORT_FIELDS = ("symbol", "market_cap", "revenue")
+
+    def __init__(
+        self,
+        corporate_data: Optional[Dict[str, Any]] = None,
+        columns: Any = None,
+    ) -> None:
+        self.records: List[Dict[str, Any]] = [
+            {
+                "symbol": symbol,
+                "market_cap": asset_info.get("market_cap"),
+                "revenue": asset_info.get("revenue"),
+                "last_updated": asset_info.get("last_updated"),
+            }
+            for symbol, asset_info in (corporate_data or {}).items()
+            if isinstance(asset_info, dict)
+        ]
+        self.natural = SortedFieldIndex(self.records, None)
+        # With the columnar store (src.columnar) of the same data, numeric
+        # fields are sorted by NumPy instead of per-record Python keys.
+        self.by_field = {
+            field: SortedFieldIndex(
+                self.records,
+                field,
+                tie_field="symbol",
+                values=(
+                    columns.columns[field][columns.asset_rows]
+                    if columns is not None and field in columns.columns
+                    else None
+                ),
+            )
+            for field in self.SORT_FIELDS
+        }
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def select(
+        self,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+        min_market_cap: Optional[float] = None,
+        max_market_cap: Optional[float] = None,
+    ) -> RecordSelection:
+        """Return the filtered records in the requested order.
+
+        Unknown ``sort_by`` values keep the file order. Records without a
+        market cap are excluded whenever a market-cap bound is given.
+        """
+        order = self.by_field.get(sort_by or "")
+        if order is None:
+            order, descending = self.natural, False
+        if min_market_cap is None and max_market_cap is None:
+            return RecordSelection(self.records, order, descending)
+
+        filter_index = self.by_field["market_cap"]
+        bounds = filter_index.range(min_market_cap, max_market_cap)
+        return RecordSelection(self.records, order, descending, filter_index, bounds)
+
+
+class SectorIndex:
+    """Per-sector company orders keyed by ticker for keyset pagination.
+
+    Companies sharing a ticker, or without one, keep their file order.
+    """
+
+    def __init__(self, structure: Optional[Dict[str, List[Company]]] = None) -> None:
+        self._orders = {
+            sector: (
+                companies,
+                SortedFieldIndex(companies, "ticker", tie_field="ticker"),
+            )
+            for sector, companies in (structure or {}).items()
+        }
+
+    def select(self, sector: str) -> Optional[RecordSelection]:
+        """Return a sector's companies ordered by ticker, or None if unknown."""
+        entry = self._orders.get(sector)
+        if entry is None:
+            return None
+        companies, order = entry
+        return RecordSelection(companies, order)
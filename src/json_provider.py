@@ -0,0 +1,154 @@
+"""Pluggable JSON encoding backed by orjson, with a stdlib fallback."""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Callable, Optional
+
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+
+try:  # orjson is optional; everything works with the stdlib json module.
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None  # type: ignore[assignment]
+
+BACKEND_ORJSON = "orjson"
+BACKEND_STDLIB = "stdlib"
+COMPACT_SEPARATORS = (",", ":")
+
+
+def resolve_backend(name: Optional[str] = None) -> str:
+    """Return the backend to use, honouring the JSON_BACKEND variable.
+
+    Asking for orjson when it is not installed falls back to the stdlib.
+    """
+    requested = (name or os.getenv("JSON_BACKEND") or BACKEND_ORJSON).lower()
+    if requested == BACKEND_ORJSON and orjson is not None:
+        return BACKEND_ORJSON
+    return BACKEND_STDLIB
+
+
+def _orjson_options(sort_keys: bool, indent: Any) -> Optional[int]:
+    """Translate stdlib-style arguments to orjson options, or None if unsupported."""
+    if indent not in (None, 2):
+        return None
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if sort_keys:
+        options |= orjson.OPT_SORT_KEYS
+    if indent == 2:
+        options |= orjson.OPT_INDENT_2
+    return options
+
+
+def dumps_bytes(
+    obj: Any,
+    sort_keys: bool = False,
+    indent: Optional[int] = None,
+    default: Optional[Callable[[Any], Any]] = None,
+    backend: Optional[str] = None,
+) -> bytes:
+    """Serialize ``obj`` to UTF-8 JSON bytes.
+
+    orjson output is always compact unless ``indent=2``; values it cannot
+    encode (such as integers beyond 64 bits) fall back to the stdlib.
+    """
+    if resolve_backend(backend) == BACKEND_ORJSON:
+        options = _orjson_options(sort_keys, indent)
+        if options is not None:
+            try:
+                return orjson.dumps(obj, default=default, option=options)
+            except TypeError:
+                pass
+
+    separators = None if indent is not None else COMPACT_SEPARATORS
+    return json.dumps(
+        obj,
+        sort_keys=sort_keys,
+        indent=indent,
+        default=default,
+        separators=separators,
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+
+def loads(data: Any, backend: Optional[str] = None) -> Any:
+    """Deserialize JSON from ``str`` or ``bytes``.
+
+    Both backends raise ``json.JSONDecodeError`` on invalid input.
+    """
+    if resolve_backend(backend) == BACKEND_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_file(file_path: str, backend: Optional[str] = None) -> Any:
+    """Read and parse a JSON file."""
+    with open(file_path, "rb") as file_handle:
+        return loads(file_handle.read(), backend)
+
+
+def dumps(obj: Any, sort_keys: bool = False, indent: Optional[int] = None) -> str:
+    """Serialize ``obj`` to a JSON string with the configured backend."""
+    return dumps_bytes(obj, sort_keys=sort_keys, indent=indent).decode("utf-8")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes and decodes with orjson when available.
+
+    Behaves like Flask's default provider (``sort_keys``, ``compact`` and the
+    ``default`` hook are honoured) and defers to it for arguments orjson has
+    no equivalent for.
+    """
+
+    def __init__(self, app: Flask, backend: Optional[str] = None) -> None:
+        super().__init__(app)
+        self.backend = resolve_backend(backend)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize data as JSON to a string."""
+        if self._can_use_orjson(kwargs):
+            return self.dumps_bytes(obj, indent=kwargs.get("indent")).decode("utf-8")
+        return super().dumps(obj, **kwargs)
+
+    def dumps_bytes(self, obj: Any, indent: Optional[int] = None) -> bytes:
+        """Serialize data as compact (or 2-space indented) JSON bytes."""
+        return dumps_bytes(
+            obj,
+            sort_keys=self.sort_keys,
+            indent=indent,
+            default=self.default,
+            backend=self.backend,
+        )
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        """Deserialize data as JSON from a string or bytes."""
+        if self.backend == BACKEND_ORJSON and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        """Serialize the arguments as JSON and return a response object."""
+        if self.backend != BACKEND_ORJSON:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        body = self.dumps_bytes(obj, indent=2 if pretty else None)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+    def _can_use_orjson(self, kwargs: Any) -> bool:
+        if self.backend != BACKEND_ORJSON:
+            return False
+        unsupported = set(kwargs) - {
+            "indent",
+            "separators",
+            "sort_keys",
+            "ensure_ascii",
+        }
+        if unsupported or kwargs.get("indent") not in (None, 2):
+            return False
+        if kwargs.get("separators", COMPACT_SEPARATORS) != COMPACT_SEPARATORS:
+            return False
+        return kwargs.get("sort_keys", self.sort_keys) == self.sort_keys
@@ -0,0 +1,260 @@
+"""Logging setup: plain text for development, queued JSON for production.
+
+In production mode the request thread only copies the record onto a queue;
+JSON formatting and file I/O, including rotation, happen on the listener
+thread, so a slow disk or a rollover never blocks a request. DEBUG and INFO
+records are also sampled per logger and level to a fixed rate.
+
+Only the process that configured logging rotates ``LOG_FILE``. Forked
+children append to it and reopen it once it has been renamed, so
+pre-forked workers never race each other to roll it over.
+"""
+
+from __future__ import annotations
+
+import atexit
+import copy
+import datetime
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
+    WatchedFileHandler,
+)
+from typing import Any, Dict, List, Optional, Tuple
+
+from src import json_provider
+
+MODE_DEVELOPMENT = "development"
+MODE_PRODUCTION = "production"
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+DEFAULT_SAMPLE_RATE = 10.0
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 10
+
+# Attributes every LogRecord has; anything else was passed through ``extra``.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+logger = logging.getLogger(__name__)
+
+_listener: Optional[QueueListener] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as one JSON object per line.
+
+    Values passed through ``extra`` become top-level fields; anything the
+    encoder cannot represent is rendered with ``str``.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "timestamp": datetime.datetime.fromtimestamp(
+                record.created, datetime.timezone.utc
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in payload:
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exception"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+        return json_provider.dumps_bytes(payload, default=str).decode("utf-8")
+
+
+class RateSampler(logging.Filter):
+    """Let through at most ``rate`` records per second per logger and level.
+
+    Records at ``WARNING`` and above always pass. The next record that passes
+    after a drop carries ``sampled_out``, the number of records skipped.
+    """
+
+    def __init__(self, rate: float = DEFAULT_SAMPLE_RATE) -> None:
+        super().__init__()
+        self.rate = rate
+        self._buckets: Dict[Tuple[str, int], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            # [tokens, last refill, dropped since last emitted record]
+            bucket = self._buckets.setdefault(
+                (record.name, record.levelno), [self.rate, now, 0]
+            )
+            bucket[0] = min(self.rate, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            dropped, bucket[2] = bucket[2], 0
+        if dropped:
+            record.sampled_out = dropped
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stdlib handler formats the whole record before enqueueing it. Here
+    the request thread only merges ``args`` into the message, so later
+    mutation of those objects cannot change what gets logged.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _log_level() -> int:
+    return logging.getLevelName(os.getenv("LOG_LEVEL", "INFO").upper())
+
+
+def configure_logging(mode: Optional[str] = None) -> Optional[QueueListener]:
+    """Configure the root logger for ``mode`` (defaults to ``LOG_MODE``).
+
+    Production mode writes JSON to stderr and, when ``LOG_FILE`` is set, to a
+    rotating file, both through a background listener. It returns the
+    running listener, which is also stopped at exit. Calling this again
+    replaces the previous configuration.
+    """
+    global _listener
+
+    mode = (mode or os.getenv("LOG_MODE") or MODE_DEVELOPMENT).lower()
+    root = logging.getLogger()
+    shutdown_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(_log_level())
+
+    if mode != MODE_PRODUCTION:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        root.addHandler(handler)
+        return None
+
+    formatter = JSONFormatter()
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    log_file = os.getenv("LOG_FILE")
+    if log_file:
+        log_dir = os.path.dirname(log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        handlers.append(
+            RotatingFileHandler(
+                log_file,
+                maxBytes=int(os.getenv("LOG_MAX_SIZE", str(DEFAULT_MAX_BYTES))),
+                backupCount=int(
+                    os.getenv("LOG_BACKUP_COUNT", str(DEFAULT_BACKUP_COUNT))
+                ),
+            )
+        )
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(
+        RateSampler(float(os.getenv("LOG_SAMPLE_RATE", str(DEFAULT_SAMPLE_RATE))))
+    )
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the production listener, if running."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def rotate_log_files() -> None:
+    """Roll over the rotating log file if it has reached its size limit.
+
+    A rollover is otherwise only checked when this process writes a record,
+    and forked children never roll the file over, so a parent whose children
+    do most of the logging calls this periodically.
+    """
+    if _listener is None:
+        return
+    for handler in _listener.handlers:
+        if not isinstance(handler, RotatingFileHandler):
+            continue
+        # int(): the typeshed stubs declare maxBytes as a str.
+        max_bytes = int(handler.maxBytes)
+        if max_bytes <= 0:
+            continue
+        handler.acquire()
+        try:
+            try:
+                size = os.path.getsize(handler.baseFilename)
+            except FileNotFoundError:
+                continue  # removed by hand; nothing to roll over
+            if size >= max_bytes:
+                handler.doRollover()
+        except OSError:
+            logger.exception("Log rotation failed")
+        finally:
+            handler.release()
+
+
+def _append_only(handler: logging.Handler) -> logging.Handler:
+    """Return a handler that appends to ``handler``'s file without rotating it."""
+    if not isinstance(handler, RotatingFileHandler):
+        return handler
+    watched = WatchedFileHandler(handler.baseFilename, encoding=handler.encoding)
+    watched.setFormatter(handler.formatter)
+    watched.setLevel(handler.level)
+    return watched
+
+
+def _restart_listener_after_fork() -> None:
+    """Give a forked child its own queue and listener thread.
+
+    The child inherits the queue handler but not the listener thread, and
+    the inherited queue may hold records the parent is about to write. The
+    child's copy of the rotating file handler is swapped for one that only
+    appends and follows the parent's rollovers.
+    """
+    global _listener
+
+    if _listener is None:
+        return
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, DeferredQueueHandler):
+            handler.queue = log_queue
+    _listener = QueueListener(
+        log_queue,
+        *(_append_only(handler) for handler in _listener.handlers),
+        respect_handler_level=True,
+    )
+    _listener.start()
+
+
+atexit.register(shutdown_logging)
+os.register_at_fork(after_in_child=_restart_listener_after_fork)
@@ -0,0 +1,200 @@
+"""tracemalloc-based allocation tracking for the admin API."""
+
+from __future__ import annotations
+
+import linecache
+import os
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+GROUPINGS = ("lineno", "filename", "traceback")
+MAX_SNAPSHOTS = 10
+MAX_FRAMES = 25
+# Allocations made by the inspection machinery itself are noise.
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class UnknownSnapshotError(KeyError):
+    """Raised when a snapshot id is not (or no longer) stored."""
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, where the OS exposes it."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _location(stat: Any, group_by: str) -> str:
+    frames = stat.traceback if group_by == "traceback" else stat.traceback[:1]
+    if group_by == "filename":
+        return frames[0].filename
+    return " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in frames)
+
+
+class MemoryTracker:
+    """Starts and stops tracemalloc, keeps snapshots and per-route totals.
+
+    Per-route numbers come from the traced total and peak around each
+    request: ``net`` is what the request left allocated and ``peak`` the
+    most it had allocated at once. tracemalloc counts the whole process, so
+    with concurrent requests each figure also includes its neighbours'
+    allocations; run a single-threaded server for exact attribution.
+    """
+
+    def __init__(self) -> None:
+        self._snapshots: "OrderedDict[int, tuple]" = OrderedDict()
+        self._next_id = 1
+        self._routes: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        """Whether tracemalloc is running."""
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> None:
+        """Start tracing with ``frames`` frames per traceback and reset totals."""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        tracemalloc.start(max(1, min(frames, MAX_FRAMES)))
+        with self._lock:
+            self._snapshots.clear()
+            self._routes.clear()
+
+    def stop(self) -> None:
+        """Stop tracing and free its memory; snapshots are dropped too."""
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+
+    def status(self) -> Dict[str, Any]:
+        """Traced and resident memory of the process."""
+        traced, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            snapshot_ids = list(self._snapshots)
+        return {
+            "tracing": self.tracing,
+            "frames": tracemalloc.get_traceback_limit() if self.tracing else 0,
+            "traced_bytes": traced,
+            "traced_peak_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+            "rss_bytes": current_rss(),
+            "snapshots": snapshot_ids,
+        }
+
+    def take_snapshot(self) -> int:
+        """Store a snapshot and return its id; the oldest is evicted past 10."""
+        if not self.tracing:
+            raise RuntimeError("tracemalloc is not tracing")
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        with self._lock:
+            snapshot_id = self._next_id
+            self._next_id += 1
+            self._snapshots[snapshot_id] = (snapshot, time.time())
+            while len(self._snapshots) > MAX_SNAPSHOTS:
+                self._snapshots.popitem(last=False)
+        return snapshot_id
+
+    def top(
+        self,
+        snapshot_id: int,
+        group_by: str = "lineno",
+        limit: int = 20,
+        include: Sequence[str] = (),
+    ) -> List[Dict[str, Any]]:
+        """Largest live allocations in a snapshot."""
+        stats = self._get(snapshot_id, include).statistics(group_by)
+        return [
+            {
+                "location": _location(stat, group_by),
+                "size": stat.size,
+                "count": stat.count,
+            }
+            for stat in stats[:limit]
+        ]
+
+    def diff(
+        self,
+        first_id: int,
+        second_id: int,
+        group_by: str = "lineno",
+        limit: int = 20,
+        include: Sequence[str] = (),
+    ) -> List[Dict[str, Any]]:
+        """Allocation growth from ``first_id`` to ``second_id``, largest first."""
+        first = self._get(first_id, include)
+        second = self._get(second_id, include)
+        stats = second.compare_to(first, group_by)
+        return [
+            {
+                "location": _location(stat, group_by),
+                "size_diff": stat.size_diff,
+                "size": stat.size,
+                "count_diff": stat.count_diff,
+                "count": stat.count,
+            }
+            for stat in stats[:limit]
+        ]
+
+    def request_started(self) -> Optional[int]:
+        """Traced bytes at the start of a request, or None when not tracing."""
+        if not tracemalloc.is_tracing():
+            return None
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def request_finished(self, route: str, started_bytes: Optional[int]) -> None:
+        """Add one request's net and peak allocation to its route's totals."""
+        if started_bytes is None or not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        net = current - started_bytes
+        peak = max(0, peak - started_bytes)
+        with self._lock:
+            totals = self._routes.setdefault(
+                route,
+                {"requests": 0, "net_bytes": 0, "peak_bytes": 0, "max_peak_bytes": 0},
+            )
+            totals["requests"] += 1
+            totals["net_bytes"] += net
+            totals["peak_bytes"] += peak
+            totals["max_peak_bytes"] = max(totals["max_peak_bytes"], peak)
+
+    def routes(self) -> List[Dict[str, Any]]:
+        """Per-route allocation per request, most allocation-heavy first."""
+        with self._lock:
+            rows = [
+                {
+                    "route": route,
+                    **totals,
+                    "net_bytes_per_request": totals["net_bytes"] / totals["requests"],
+                    "peak_bytes_per_request": totals["peak_bytes"] / totals["requests"],
+                }
+                for route, totals in self._routes.items()
+            ]
+        return sorted(rows, key=lambda row: row["peak_bytes_per_request"], reverse=True)
+
+    def _get(self, snapshot_id: int, include: Sequence[str]) -> tracemalloc.Snapshot:
+        with self._lock:
+            try:
+                snapshot = self._snapshots[snapshot_id][0]
+            except KeyError:
+                raise UnknownSnapshotError(snapshot_id) from None
+        if include:
+            snapshot = snapshot.filter_traces(
+                [tracemalloc.Filter(True, pattern) for pattern in include]
+            )
+        return snapshot
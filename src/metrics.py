@@ -0,0 +1,445 @@
+"""Lock-light request metrics rendered in the Prometheus text format.
+
+Every thread increments its own shard, so the hot path never takes a lock;
+shards are only merged when ``/metrics`` is scraped. With ``directory`` set,
+each process also flushes its totals to ``<directory>/metrics-<pid>.json``
+in the background, and a scrape of any worker sums every process's file.
+When a process exits, its parent folds the file into ``metrics-retired.json``
+with :meth:`MetricsRegistry.retire`, so the directory holds one file per
+live process. The directory must be emptied when the server is restarted.
+"""
+
+from __future__ import annotations
+
+import bisect
+import atexit
+import json
+import logging
+import math
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+DEFAULT_FLUSH_INTERVAL = 1.0
+FILE_PREFIX = "metrics-"
+RETIRED_FILE = f"{FILE_PREFIX}retired.json"
+
+Labels = Tuple[Tuple[str, str], ...]
+SeriesKey = Tuple[str, Labels]
+# Histogram state: one count per bucket (non-cumulative), then +Inf, sum.
+HistogramState = List[float]
+
+
+class _Shard:
+    """Metric values written by a single thread."""
+
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self) -> None:
+        self.counters: Dict[SeriesKey, float] = {}
+        self.histograms: Dict[SeriesKey, HistogramState] = {}
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _decode_labels(pairs: List[List[str]]) -> Labels:
+    """Labels as read back from a process's JSON file."""
+    return tuple((name, value) for name, value in pairs)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Counters, histograms and callback gauges for one process."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ) -> None:
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._meta: Dict[str, Tuple[str, str]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._gauges: Dict[str, Callable[[Dict[SeriesKey, float]], Any]] = {}
+        self._shards: List[_Shard] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_pid: Optional[int] = None
+        _registries.add(self)
+
+    def counter(self, name: str, documentation: str) -> None:
+        """Declare a counter."""
+        self._meta[name] = (COUNTER, documentation)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Declare a histogram with the given upper bounds."""
+        self._meta[name] = (HISTOGRAM, documentation)
+        self._buckets[name] = tuple(sorted(buckets))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[Dict[SeriesKey, float]], Any],
+    ) -> None:
+        """Declare a gauge computed at scrape time.
+
+        ``callback`` receives the aggregated counters, so it can derive
+        ratios, and returns either a number or a mapping of label tuples
+        (sorted ``(name, value)`` pairs) to numbers.
+        """
+        self._meta[name] = (GAUGE, documentation)
+        self._gauges[name] = callback
+
+    def inc(self, name: str, amount: float = 1, **labels: Any) -> None:
+        """Add ``amount`` to a counter series."""
+        counters = self._shard().counters
+        key = (name, _labels(labels))
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record one observation in a histogram series."""
+        histograms = self._shard().histograms
+        key = (name, _labels(labels))
+        state = histograms.get(key)
+        buckets = self._buckets[name]
+        if state is None:
+            state = histograms[key] = [0.0] * (len(buckets) + 2)
+        state[bisect.bisect_left(buckets, value)] += 1
+        state[-1] += value
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        """Observe the duration of the ``with`` block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def collect(self) -> Tuple[Dict[SeriesKey, float], Dict[SeriesKey, HistogramState]]:
+        """Merge this process's shards into counter and histogram totals."""
+        with self._lock:
+            shards = list(self._shards)
+        counters: Dict[SeriesKey, float] = {}
+        histograms: Dict[SeriesKey, HistogramState] = {}
+        for shard in shards:
+            # dict() copies atomically under the GIL while the owner writes.
+            for key, value in dict(shard.counters).items():
+                counters[key] = counters.get(key, 0) + value
+            for key, state in dict(shard.histograms).items():
+                _add_histogram(histograms, key, list(state))
+        return counters, histograms
+
+    def aggregate(
+        self,
+    ) -> Tuple[Dict[SeriesKey, float], Dict[SeriesKey, HistogramState]]:
+        """Totals across every process sharing ``directory`` (or just this one)."""
+        counters, histograms = self.collect()
+        if not self.directory:
+            return counters, histograms
+
+        self.flush(counters, histograms)
+        files = {}
+        for filename in os.listdir(self.directory):
+            if filename == RETIRED_FILE:
+                continue
+            if filename.startswith(FILE_PREFIX) and filename.endswith(".json"):
+                data = _read_file(os.path.join(self.directory, filename))
+                if data is not None:
+                    files[filename] = data
+        # Read last: a process file read above that has been folded into it
+        # since is listed under "folded" and skipped, so no total is counted
+        # twice or missed while retire() runs.
+        retired = _read_file(os.path.join(self.directory, RETIRED_FILE))
+        if retired is not None:
+            for pid in retired.get("folded", []):
+                files.pop(f"{FILE_PREFIX}{pid}.json", None)
+            files[RETIRED_FILE] = retired
+
+        counters, histograms = {}, {}
+        for data in files.values():
+            _add_file(counters, histograms, data)
+        return counters, histograms
+
+    def flush(
+        self,
+        counters: Optional[Dict[SeriesKey, float]] = None,
+        histograms: Optional[Dict[SeriesKey, HistogramState]] = None,
+    ) -> None:
+        """Write this process's totals to its file in ``directory``."""
+        if not self.directory:
+            return
+        if counters is None or histograms is None:
+            counters, histograms = self.collect()
+        _write_file(self._path(os.getpid()), counters, histograms)
+
+    def retire(self, pid: int) -> None:
+        """Fold the file of exited process ``pid`` into the retired totals.
+
+        Call from the parent once the process has been reaped. Afterwards the
+        pid's file is gone, so a later process reusing the pid starts from
+        zero instead of overwriting totals that have already been reported.
+        """
+        if not self.directory:
+            return
+        path = self._path(pid)
+        data = _read_file(path)
+        if data is None:  # never flushed
+            _remove_file(path)
+            return
+
+        retired_path = os.path.join(self.directory, RETIRED_FILE)
+        counters: Dict[SeriesKey, float] = {}
+        histograms: Dict[SeriesKey, HistogramState] = {}
+        retired = _read_file(retired_path)
+        if retired is not None:
+            _add_file(counters, histograms, retired)
+        _add_file(counters, histograms, data)
+        # While "folded" names the pid, scrapes skip its file, so its totals
+        # are counted exactly once whichever of the two files they see.
+        _write_file(retired_path, counters, histograms, folded=[pid])
+        _remove_file(path)
+        _write_file(retired_path, counters, histograms)
+
+    def start_flusher(self) -> None:
+        """Flush to ``directory`` every ``flush_interval`` from a daemon thread.
+
+        Safe to call in every request: it starts at most one thread per
+        process, including after a fork.
+        """
+        if not self.directory or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._flusher_pid = os.getpid()
+            self._flusher = threading.Thread(
+                target=self._flush_forever, name="metrics-flusher", daemon=True
+            )
+            self._flusher.start()
+            atexit.register(self._flush_at_exit)
+
+    def remove_files(self) -> None:
+        """Delete every process's file in ``directory``; call once at startup."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        for filename in os.listdir(self.directory):
+            if filename.startswith(FILE_PREFIX):
+                os.remove(os.path.join(self.directory, filename))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        counters, histograms = self.aggregate()
+        by_name: Dict[str, List[str]] = {name: [] for name in self._meta}
+
+        for (name, labels), value in sorted(counters.items()):
+            by_name.setdefault(name, []).append(
+                f"{name}{_format_labels(labels)} {_format_value(value)}"
+            )
+        for (name, labels), state in sorted(histograms.items()):
+            lines = by_name.setdefault(name, [])
+            cumulative = 0.0
+            for bound, count in zip(self._buckets[name] + (math.inf,), state):
+                cumulative += count
+                le = (("le", _format_value(bound)),)
+                lines.append(
+                    f"{name}_bucket{_format_labels(labels, le)} "
+                    f"{_format_value(cumulative)}"
+                )
+            lines.append(
+                f"{name}_sum{_format_labels(labels)} {_format_value(state[-1])}"
+            )
+            lines.append(
+                f"{name}_count{_format_labels(labels)} {_format_value(cumulative)}"
+            )
+        for name, callback in self._gauges.items():
+            try:
+                values = callback(counters)
+            except Exception:
+                logger.exception("Metrics gauge %s failed", name)
+                continue
+            if not isinstance(values, dict):
+                values = {(): values}
+            for labels, value in sorted(values.items()):
+                by_name[name].append(
+                    f"{name}{_format_labels(tuple(labels))} {_format_value(value)}"
+                )
+
+        output = []
+        for name, lines in by_name.items():
+            kind, documentation = self._meta.get(name, ("untyped", ""))
+            output.append(f"# HELP {name} {documentation}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(lines)
+        return "\n".join(output) + "\n"
+
+    def reset(self) -> None:
+        """Drop every recorded value in this process."""
+        with self._lock:
+            for shard in self._shards:
+                shard.counters.clear()
+                shard.histograms.clear()
+
+    def _after_fork(self) -> None:
+        """Start a forked child from empty shards.
+
+        The child inherits the parent's shards, whose values the parent
+        still reports; keeping them would count them twice.
+        """
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = []
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory or "", f"{FILE_PREFIX}{pid}.json")
+
+    def _flush_at_exit(self) -> None:
+        """Write the final totals, which the parent folds in after reaping."""
+        if self._flusher_pid != os.getpid():
+            return
+        try:
+            self.flush()
+        except OSError:
+            logger.exception("Failed to flush metrics to %s", self.directory)
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _flush_forever(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("Failed to flush metrics to %s", self.directory)
+
+
+_registries: "weakref.WeakSet[MetricsRegistry]" = weakref.WeakSet()
+
+
+def _reset_after_fork() -> None:
+    for registry in list(_registries):
+        registry._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _read_file(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None  # missing, or being replaced by a dying worker
+
+
+def _write_file(
+    path: str,
+    counters: Dict[SeriesKey, float],
+    histograms: Dict[SeriesKey, HistogramState],
+    folded: Optional[List[int]] = None,
+) -> None:
+    data: Dict[str, Any] = {
+        "counters": [
+            [name, labels, value] for (name, labels), value in counters.items()
+        ],
+        "histograms": [
+            [name, labels, state] for (name, labels), state in histograms.items()
+        ],
+    }
+    if folded:
+        data["folded"] = folded
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def _remove_file(path: str) -> None:
+    for stale in (path, f"{path}.tmp"):
+        try:
+            os.remove(stale)
+        except FileNotFoundError:
+            pass
+
+
+def _add_file(
+    counters: Dict[SeriesKey, float],
+    histograms: Dict[SeriesKey, HistogramState],
+    data: Dict[str, Any],
+) -> None:
+    for name, labels, value in data["counters"]:
+        key = (name, _decode_labels(labels))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, state in data["histograms"]:
+        _add_histogram(histograms, (name, _decode_labels(labels)), state)
+
+
+def _add_histogram(
+    histograms: Dict[SeriesKey, HistogramState], key: SeriesKey, state: HistogramState
+) -> None:
+    total = histograms.get(key)
+    if total is None:
+        histograms[key] = list(state)
+        return
+    for position, value in enumerate(state):
+        total[position] += value
+
+
+REGISTRY = MetricsRegistry(directory=os.getenv("METRICS_DIR") or None)
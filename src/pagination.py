@@ -0,0 +1,71 @@
+"""Opaque keyset cursors for paginated endpoints."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Tuple, TypeGuard
+
+from src.indexes import CursorKey
+
+CURSOR_FORMAT = 1
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor token is malformed or belongs to another query."""
+
+
+def encode_cursor(version: str, query: Dict[str, Any], key: CursorKey) -> str:
+    """Encode the position after ``key`` for ``query`` as an opaque token."""
+    payload = {"f": CURSOR_FORMAT, "v": version, "q": query, "k": list(key)}
+    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(token: str, query: Dict[str, Any]) -> Tuple[str, CursorKey]:
+    """Decode a cursor token issued for ``query``.
+
+    Returns the data version the cursor was issued against and the keyset
+    position to resume after. Raises InvalidCursorError if the token is not
+    one of ours or was issued for a different query.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise InvalidCursorError("Malformed cursor") from exc
+
+    if not isinstance(payload, dict) or payload.get("f") != CURSOR_FORMAT:
+        raise InvalidCursorError("Malformed cursor")
+    if payload.get("q") != _normalize(query):
+        raise InvalidCursorError("Cursor does not match the query parameters")
+
+    version = payload.get("v")
+    key = payload.get("k")
+    if not isinstance(version, str) or not _valid_key(key):
+        raise InvalidCursorError("Malformed cursor")
+    # Cursors issued before the position was added carry (value, tie) only.
+    return version, (key[0], key[1], key[2] if len(key) == 3 else None)
+
+
+def _normalize(query: Dict[str, Any]) -> Dict[str, Any]:
+    # Round-trip through JSON so tuples, ints and floats compare as decoded.
+    return json.loads(json.dumps(query, sort_keys=True))
+
+
+def _valid_key(key: Optional[Any]) -> TypeGuard[List[Any]]:
+    return (
+        isinstance(key, list)
+        and len(key) in (2, 3)
+        and isinstance(key[1], str)
+        and (len(key) == 2 or _valid_position(key[2]))
+        and (key[0] is None or isinstance(key[0], (str, int, float)))
+        and not isinstance(key[0], bool)
+    )
+
+
+def _valid_position(position: Any) -> bool:
+    return position is None or (
+        isinstance(position, int) and not isinstance(position, bool)
+    )
@@ -0,0 +1,346 @@
+"""Pre-forking server: one master process and N waitress worker processes.
+
+The master loads the data snapshot and builds its derived indexes once,
+then freezes the garbage collector's view of them (``gc.freeze``) and
+forks the workers. The workers therefore share those pages copy-on-write
+instead of each parsing the files. Every worker runs its own waitress
+thread pool on the master's listening socket (or, with ``reuse_port``, on
+its own ``SO_REUSEPORT`` socket), so CPU-bound work is spread over as many
+interpreters as there are workers.
+
+Workers do not watch the data files. The master polls them, and when the
+data version changes it loads and warms the new snapshot and then replaces
+the workers one at a time. SIGHUP triggers the same rolling restart. A
+replaced worker stops accepting, finishes the requests it has already read
+and exits. SIGTERM or SIGINT shut everything down the same way. Workers
+that die unexpectedly are respawned. Workers only append to the log file;
+the master checks its size on every loop and rolls it over.
+"""
+
+from __future__ import annotations
+
+import atexit
+import gc
+import logging
+import math
+import os
+import select
+import signal
+import socket
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from waitress.channel import HTTPChannel
+from waitress.server import create_server
+
+from src.logging_config import rotate_log_files
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRACEFUL_TIMEOUT = 30.0
+DEFAULT_RELOAD_INTERVAL = 1.0
+DEFAULT_BACKLOG = 1024
+READY_TIMEOUT = 60.0
+LOOP_TIMEOUT = 0.5
+# A worker that dies sooner than this after starting is respawned after a
+# pause, so a crash on startup does not turn into a fork loop.
+MIN_WORKER_LIFETIME = 1.0
+
+
+def default_worker_count() -> int:
+    """One worker per CPU available to this process."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - not available on macOS
+        return os.cpu_count() or 1
+
+
+class Worker:
+    """The master's record of one worker process."""
+
+    def __init__(self, pid: int) -> None:
+        self.pid = pid
+        self.started_at = time.monotonic()
+        self.retiring = False
+
+
+class PreforkServer:
+    """Serve a WSGI app from ``workers`` forked waitress processes.
+
+    ``data_store`` is optional. When given, the master preloads it and
+    watches it for new versions, and the workers stop checking the files
+    themselves. ``warm`` runs in the master before every round of forking,
+    after the data is loaded. ``on_exit`` is called in the master with the
+    pid of every worker once it has been reaped. ``server_options`` are
+    passed to waitress's ``create_server``, for example ``url_scheme`` or
+    ``connection_limit``.
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        host: str = "0.0.0.0",
+        port: int = 5001,
+        workers: int = 2,
+        threads: int = 4,
+        data_store: Any = None,
+        warm: Optional[Callable[[], None]] = None,
+        on_exit: Optional[Callable[[int], None]] = None,
+        reload_interval: float = DEFAULT_RELOAD_INTERVAL,
+        graceful_timeout: float = DEFAULT_GRACEFUL_TIMEOUT,
+        reuse_port: bool = False,
+        server_options: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.app = app
+        self.host = host
+        self.port = port
+        self.worker_count = max(1, workers)
+        self.threads = threads
+        self.data_store = data_store
+        self.warm = warm
+        self.on_exit = on_exit
+        self.reload_interval = reload_interval
+        self.graceful_timeout = graceful_timeout
+        self.reuse_port = reuse_port
+        self.server_options = dict(server_options or {})
+        self.socket: Optional[socket.socket] = None
+        self.workers: Dict[int, Worker] = {}
+        self.data_version: Optional[str] = None
+        self._stopping = False
+        self._restart_requested = False
+
+    # -- master ---------------------------------------------------------
+
+    def run(self) -> None:
+        """Start the workers and supervise them until SIGTERM or SIGINT."""
+        if not self.reuse_port:
+            self.socket = self._bind()
+            self.port = self.socket.getsockname()[1]
+        self._prepare()
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_restart)
+        logger.info(
+            "Serving on %s:%s with %d workers x %d threads",
+            self.host,
+            self.port,
+            self.worker_count,
+            self.threads,
+        )
+        try:
+            for _ in range(self.worker_count):
+                self._spawn()
+            next_data_check = time.monotonic() + self.reload_interval
+            while not self._stopping:
+                self._reap()
+                self._replace_missing_workers()
+                if self._restart_requested:
+                    self._restart_requested = False
+                    self.rolling_restart()
+                if self.data_store is not None and time.monotonic() >= next_data_check:
+                    next_data_check = time.monotonic() + self.reload_interval
+                    if self._data_changed():
+                        self.rolling_restart()
+                rotate_log_files()
+                time.sleep(LOOP_TIMEOUT)
+        finally:
+            self._stop_workers(list(self.workers.values()))
+            if self.socket is not None:
+                self.socket.close()
+            logger.info("Server stopped")
+
+    def rolling_restart(self) -> None:
+        """Replace every worker, one at a time, without dropping capacity."""
+        self._prepare()
+        for old in [worker for worker in self.workers.values() if not worker.retiring]:
+            if self._stopping:
+                return
+            new = self._spawn()
+            if new is None:
+                logger.error("Replacement worker failed to start; restart aborted")
+                return
+            self._stop_workers([old])
+        logger.info("Rolling restart complete")
+
+    def _prepare(self) -> None:
+        """Load and warm everything the workers should inherit."""
+        if self.data_store is not None:
+            snapshot = self.data_store.snapshot()
+            snapshot.build_derived(include_lazy=True)
+            self.data_version = snapshot.version
+        if self.warm is not None:
+            self.warm()
+        # Frozen objects are skipped by the collector, which would otherwise
+        # write to their headers and unshare the pages in every worker.
+        gc.unfreeze()
+        gc.collect()
+        gc.freeze()
+
+    def _data_changed(self) -> bool:
+        try:
+            version = self.data_store.refresh(wait=True).version
+        except Exception:  # keep serving the data the workers already have
+            logger.exception("Data reload check failed")
+            return False
+        if version == self.data_version:
+            return False
+        logger.info("Data version %s -> %s", self.data_version, version)
+        return True
+
+    def _bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        return socket.create_server(
+            (self.host, self.port),
+            family=family,
+            backlog=self.server_options.get("backlog", DEFAULT_BACKLOG),
+            reuse_port=self.reuse_port,
+        )
+
+    def _spawn(self) -> Optional[Worker]:
+        """Fork a worker and wait until it is accepting connections."""
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - runs in the child
+            os.close(ready_read)
+            code = 1
+            try:
+                self._serve_worker(ready_write)
+                code = 0
+            except BaseException:
+                logger.exception("Worker %d failed", os.getpid())
+            finally:
+                atexit._run_exitfuncs()
+                os._exit(code)
+
+        os.close(ready_write)
+        worker = Worker(pid)
+        self.workers[pid] = worker
+        readable, _, _ = select.select([ready_read], [], [], READY_TIMEOUT)
+        ready = bool(readable) and os.read(ready_read, 1) == b"r"
+        os.close(ready_read)
+        if not ready:
+            self._stop_workers([worker])
+            return None
+        logger.info("Worker %d started", pid)
+        return worker
+
+    def _reap(self) -> List[int]:
+        """Collect exited workers; return their pids."""
+        exited = []
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            worker = self.workers.pop(pid, None)
+            exited.append(pid)
+            self._exited(pid)
+            if worker is not None and not worker.retiring:
+                code = os.waitstatus_to_exitcode(status)
+                logger.warning("Worker %d exited unexpectedly (%d)", pid, code)
+                if time.monotonic() - worker.started_at < MIN_WORKER_LIFETIME:
+                    time.sleep(MIN_WORKER_LIFETIME)
+        return exited
+
+    def _replace_missing_workers(self) -> None:
+        active = [worker for worker in self.workers.values() if not worker.retiring]
+        for _ in range(self.worker_count - len(active)):
+            if self._stopping:
+                return
+            self._spawn()
+
+    def _stop_workers(self, workers: List[Worker]) -> None:
+        """SIGTERM ``workers``, then SIGKILL any still running after the timeout."""
+        for worker in workers:
+            worker.retiring = True
+            self._signal(worker.pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        pending = {worker.pid for worker in workers}
+        while pending and time.monotonic() < deadline:
+            pending.difference_update(self._reap())
+            pending.intersection_update(self.workers)
+            if pending:
+                time.sleep(0.05)
+        for pid in pending:
+            logger.warning("Worker %d did not stop in time; killing it", pid)
+            self._signal(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.workers.pop(pid, None)
+            self._exited(pid)
+
+    def _exited(self, pid: int) -> None:
+        if self.on_exit is None:
+            return
+        try:
+            self.on_exit(pid)
+        except Exception:
+            logger.exception("Exit handler for worker %d failed", pid)
+
+    @staticmethod
+    def _signal(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _handle_stop(self, signum: int, frame: Any) -> None:
+        self._stopping = True
+
+    def _handle_restart(self, signum: int, frame: Any) -> None:
+        self._restart_requested = True
+
+    # -- worker ---------------------------------------------------------
+
+    def _serve_worker(self, ready_fd: int) -> None:  # pragma: no cover - child
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+        # The terminal sends SIGINT to the whole group; the master decides.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        if self.data_store is not None:
+            self.data_store.check_interval = math.inf
+
+        sock = self.socket if self.socket is not None else self._bind()
+        socket_map: Dict[int, Any] = {}
+        server = create_server(
+            self.app,
+            map=socket_map,
+            sockets=[sock],
+            threads=self.threads,
+            **{
+                name: value
+                for name, value in self.server_options.items()
+                if name != "backlog"
+            },
+        )
+        os.write(ready_fd, b"r")
+        os.close(ready_fd)
+
+        master_pid = os.getppid()
+        while not stopping:
+            server.asyncore.loop(timeout=LOOP_TIMEOUT, map=socket_map, count=1)
+            if os.getppid() != master_pid:
+                logger.warning("Master exited; worker %d stopping", os.getpid())
+                break
+
+        # Stop accepting, then finish the requests already received.
+        server.accepting = False
+        server.close()
+        deadline = time.monotonic() + self.graceful_timeout
+        while _busy_channels(socket_map) and time.monotonic() < deadline:
+            server.asyncore.loop(timeout=0.05, map=socket_map, count=1)
+        server.task_dispatcher.shutdown()
+
+
+def _busy_channels(socket_map: Dict[int, Any]) -> List[HTTPChannel]:
+    """Connections with a request in progress or a response still to send."""
+    return [
+        channel
+        for channel in list(socket_map.values())
+        if isinstance(channel, HTTPChannel)
+        and (
+            channel.requests or channel.request is not None or channel.total_outbufs_len
+        )
+    ]
@@ -0,0 +1,186 @@
+"""On-demand request profiling and a low-rate sampling profiler."""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Any, Dict, List, Optional
+
+DEFAULT_SAMPLE_INTERVAL = 0.01
+DEFAULT_SAMPLE_DURATION = 30.0
+MAX_SAMPLE_DURATION = 600.0
+MAX_STACK_DEPTH = 64
+SORT_KEYS = ("cumulative", "tottime", "calls", "ncalls")
+
+# cProfile hooks the interpreter, so only one request is profiled at a time.
+_request_lock = threading.Lock()
+
+
+def start_request_profile() -> Optional[cProfile.Profile]:
+    """Start profiling the current thread, or return None if one is running."""
+    if not _request_lock.acquire(blocking=False):
+        return None
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except BaseException:
+        _request_lock.release()
+        raise
+    return profile
+
+
+def stop_request_profile(profile: cProfile.Profile) -> None:
+    """Stop a profile started by start_request_profile and free the slot."""
+    try:
+        profile.disable()
+    finally:
+        _request_lock.release()
+
+
+def format_profile(
+    profile: cProfile.Profile, sort: str = "cumulative", limit: int = 50
+) -> str:
+    """Render the ``limit`` most expensive functions as a pstats report."""
+    import pstats  # only needed for reports, not for collecting
+
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stats.strip_dirs().sort_stats(sort if sort in SORT_KEYS else "cumulative")
+    stats.print_stats(limit)
+    return stream.getvalue()
+
+
+def dump_profile(profile: cProfile.Profile, directory: str, label: str) -> str:
+    """Write a ``.prof`` file (for pstats, snakeviz or flameprof); return its path."""
+    os.makedirs(directory, exist_ok=True)
+    safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_") or "request"
+    filename = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{safe_label}.prof"
+    path = os.path.join(directory, filename)
+    profile.dump_stats(path)
+    return path
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+class SamplingProfiler:
+    """Wall-clock sampler that aggregates the stacks of every thread.
+
+    A daemon thread reads ``sys._current_frames()`` every ``interval``
+    seconds until stopped or until ``duration`` elapses. Stacks are counted
+    in the collapsed ``thread;outer;...;inner count`` format understood by
+    flamegraph.pl and speedscope. Because it samples instead of tracing,
+    the served threads run at full speed.
+    """
+
+    def __init__(self) -> None:
+        self.interval = DEFAULT_SAMPLE_INTERVAL
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._stacks: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the sampler thread is active."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(
+        self,
+        interval: float = DEFAULT_SAMPLE_INTERVAL,
+        duration: float = DEFAULT_SAMPLE_DURATION,
+    ) -> bool:
+        """Start a new sampling window; return False if one is running."""
+        with self._lock:
+            if self.running:
+                return False
+            self.interval = interval
+            self.samples = 0
+            self.started_at = time.time()
+            self.stopped_at = None
+            self._stacks = Counter()
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(min(duration, MAX_SAMPLE_DURATION),),
+                name="sampling-profiler",
+                daemon=True,
+            )
+            self._thread.start()
+            return True
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop sampling (if running) and return the summary."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+        return self.summary()
+
+    def summary(self) -> Dict[str, Any]:
+        """Describe the current or last sampling window."""
+        with self._lock:
+            return {
+                "running": self.running,
+                "interval": self.interval,
+                "samples": self.samples,
+                "distinct_stacks": len(self._stacks),
+                "started_at": self.started_at,
+                "stopped_at": self.stopped_at,
+            }
+
+    def collapsed(self) -> str:
+        """Return the aggregated stacks, most frequent first."""
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def top_functions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Functions by the share of samples they appear in (inclusive)."""
+        inclusive: Counter = Counter()
+        with self._lock:
+            for stack, count in self._stacks.items():
+                for frame in set(stack.split(";")[1:]):
+                    inclusive[frame] += count
+            total = sum(self._stacks.values()) or 1
+        return [
+            {"function": frame, "samples": count, "share": count / total}
+            for frame, count in inclusive.most_common(limit)
+        ]
+
+    def _run(self, duration: float) -> None:
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + duration
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            sampled = []
+            for thread_id, top in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels: List[str] = []
+                frame: Optional[FrameType] = top
+                while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                thread_name = names.get(thread_id, str(thread_id))
+                sampled.append(";".join([thread_name] + labels[::-1]))
+            with self._lock:
+                self._stacks.update(sampled)
+                self.samples += 1
+            self._stop.wait(self.interval)
+        with self._lock:
+            self.stopped_at = time.time()
@@ -0,0 +1,267 @@
+"""Per-API-key token-bucket rate limiting shared by every worker on a host."""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional, Tuple
+
+BACKEND_MEMORY = "memory"
+BACKEND_SQLITE = "sqlite"
+DEFAULT_SQLITE_PATH = os.path.join(
+    tempfile.gettempdir(), "equity_shield_ratelimit.sqlite3"
+)
+DEFAULT_TIER = "standard"
+DEFAULT_TIERS_SPEC = "free=60/minute,standard=600/minute,premium=6000/minute"
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+class Tier(NamedTuple):
+    """A quota: ``capacity`` tokens, refilled at ``refill_rate`` per second."""
+
+    name: str
+    capacity: float
+    refill_rate: float
+
+
+class Decision(NamedTuple):
+    """Outcome of one ``TokenBucketLimiter.hit``."""
+
+    allowed: bool
+    tier: str
+    limit: int
+    remaining: int
+    retry_after: float
+
+
+def parse_tiers(spec: str) -> Dict[str, Tier]:
+    """Parse ``name=amount/period[:burst]`` entries separated by commas.
+
+    ``standard=600/minute:100`` refills 10 tokens a second and allows bursts
+    of up to 100 requests; without ``:burst`` the burst equals ``amount``.
+    """
+    tiers = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            name, quota = item.split("=", 1)
+            rate, _, burst = quota.partition(":")
+            amount, period = rate.split("/", 1)
+            seconds = PERIODS[period.strip().lower().rstrip("s")]
+            capacity = float(burst) if burst else float(amount)
+            refill_rate = float(amount) / seconds
+        except (KeyError, ValueError) as exc:
+            raise ValueError(f"Invalid rate limit tier: {item!r}") from exc
+        if capacity <= 0 or refill_rate <= 0:
+            raise ValueError(f"Invalid rate limit tier: {item!r}")
+        tiers[name.strip()] = Tier(name.strip(), capacity, refill_rate)
+    return tiers
+
+
+def parse_key_tiers(spec: str) -> Dict[str, str]:
+    """Parse ``api_key=tier`` entries separated by commas."""
+    mapping = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, separator, tier = item.rpartition("=")
+        if not separator or not key:
+            raise ValueError("Invalid API key tier entry")
+        mapping[key] = tier.strip()
+    return mapping
+
+
+def bucket_id(api_key: str) -> str:
+    """Return the storage id for a key so raw API keys are never persisted."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:32]
+
+
+def _take(
+    tokens: float, updated_at: float, now: float, tier: Tier, cost: float
+) -> Tuple[bool, float]:
+    """Refill a bucket up to ``now`` and try to take ``cost`` tokens."""
+    elapsed = max(0.0, now - updated_at)
+    tokens = min(tier.capacity, tokens + elapsed * tier.refill_rate)
+    if tokens >= cost:
+        return True, tokens - cost
+    return False, tokens
+
+
+class MemoryBucketStore:
+    """Per-process bucket state; only correct with a single worker."""
+
+    name = BACKEND_MEMORY
+
+    def __init__(self) -> None:
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(
+        self, bucket: str, tier: Tier, cost: float, now: float
+    ) -> Tuple[bool, float]:
+        """Atomically refill and debit a bucket; return (allowed, tokens left)."""
+        with self._lock:
+            tokens, updated_at = self._buckets.get(bucket, (tier.capacity, now))
+            allowed, tokens = _take(tokens, updated_at, now, tier, cost)
+            self._buckets[bucket] = (tokens, now)
+            return allowed, tokens
+
+    def clear(self) -> None:
+        """Refill every bucket."""
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteBucketStore:
+    """Bucket state in a local SQLite file shared by every worker process.
+
+    Each debit is one short ``BEGIN IMMEDIATE`` transaction, so concurrent
+    workers serialize on the database write lock and never double-spend.
+    """
+
+    name = BACKEND_SQLITE
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH) -> None:
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "bucket TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def take(
+        self, bucket: str, tier: Tier, cost: float, now: float
+    ) -> Tuple[bool, float]:
+        """Atomically refill and debit a bucket; return (allowed, tokens left)."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM buckets WHERE bucket = ?", (bucket,)
+            ).fetchone()
+            tokens, updated_at = row if row is not None else (tier.capacity, now)
+            allowed, tokens = _take(tokens, updated_at, now, tier, cost)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (bucket, tokens, updated_at) "
+                "VALUES (?, ?, ?)",
+                (bucket, tokens, now),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return allowed, tokens
+
+    def clear(self) -> None:
+        """Refill every bucket."""
+        self._connect().execute("DELETE FROM buckets")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; take() manages its own transaction.
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+BucketStore = Any  # MemoryBucketStore or SQLiteBucketStore
+
+
+def configured_workers(environ: Optional[Mapping[str, str]] = None) -> int:
+    """Worker processes this deployment runs.
+
+    Reads ``WORKERS`` (production_server.py; ``auto`` is one per CPU), then
+    gunicorn's ``WEB_CONCURRENCY``.
+    """
+    environ = os.environ if environ is None else environ
+    setting = environ.get("WORKERS") or environ.get("WEB_CONCURRENCY") or "1"
+    if setting.strip().lower() == "auto":
+        from src.prefork import default_worker_count
+
+        return default_worker_count()
+    try:
+        return max(1, int(setting))
+    except ValueError:
+        return 1
+
+
+def create_store(
+    name: Optional[str] = None, path: Optional[str] = None, workers: int = 1
+) -> BucketStore:
+    """Create the bucket store named by ``name`` (memory or sqlite).
+
+    Without a name the store is in memory for a single worker and SQLite
+    when ``workers`` processes must share the quotas. Asking for the memory
+    store with several workers raises ValueError, because every worker would
+    then grant the full quota.
+    """
+    if not name:
+        name = BACKEND_SQLITE if workers > 1 else BACKEND_MEMORY
+    name = name.lower()
+    if name == BACKEND_SQLITE:
+        return SQLiteBucketStore(path or DEFAULT_SQLITE_PATH)
+    if name != BACKEND_MEMORY:
+        raise ValueError(f"Unknown rate limit backend: {name}")
+    if workers > 1:
+        raise ValueError(
+            f"RATE_LIMIT_BACKEND=memory gives each of the {workers} workers its "
+            "own quota; use sqlite"
+        )
+    return MemoryBucketStore()
+
+
+class TokenBucketLimiter:
+    """Charges requests against a token bucket per API key.
+
+    Every key gets the quota of its tier (``key_tiers``, falling back to
+    ``default_tier``). Buckets start full and refill continuously, so a key
+    can burst up to its capacity and then sustain its refill rate.
+    """
+
+    def __init__(
+        self,
+        store: BucketStore,
+        tiers: Dict[str, Tier],
+        key_tiers: Optional[Dict[str, str]] = None,
+        default_tier: str = DEFAULT_TIER,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if default_tier not in tiers:
+            raise ValueError(f"Unknown default rate limit tier: {default_tier}")
+        unknown = set((key_tiers or {}).values()) - set(tiers)
+        if unknown:
+            raise ValueError(f"Unknown rate limit tiers: {sorted(unknown)}")
+        self.store = store
+        self.tiers = tiers
+        self.key_tiers = key_tiers or {}
+        self.default_tier = default_tier
+        self.clock = clock
+
+    def tier_for(self, api_key: str) -> Tier:
+        """Return the tier an API key is billed under."""
+        return self.tiers[self.key_tiers.get(api_key, self.default_tier)]
+
+    def hit(self, api_key: str, cost: float = 1) -> Decision:
+        """Charge ``cost`` tokens to ``api_key`` and report whether it may proceed."""
+        tier = self.tier_for(api_key)
+        allowed, tokens = self.store.take(
+            f"{tier.name}:{bucket_id(api_key)}", tier, cost, self.clock()
+        )
+        retry_after = 0.0
+        if not allowed:
+            # A cost above capacity can never succeed; report a full refill.
+            missing = min(cost, tier.capacity) - tokens
+            retry_after = max(missing, 0.0) / tier.refill_rate
+        return Decision(
+            allowed=allowed,
+            tier=tier.name,
+            limit=int(tier.capacity),
+            remaining=int(math.floor(tokens)),
+            retry_after=retry_after,
+        )
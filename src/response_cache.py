@@ -0,0 +1,481 @@
+"""Query-aware response cache with bounded, optionally cross-worker storage."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import stat
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import Response, make_response, request
+
+logger = logging.getLogger(__name__)
+
+BACKEND_MEMORY = "memory"
+BACKEND_SQLITE = "sqlite"
+DEFAULT_TIMEOUT = 300
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 10_000
+# Seconds between LRU "last used" updates of one SQLite entry; saves a write
+# on most hits while keeping eviction order accurate enough.
+SQLITE_TOUCH_INTERVAL = 1.0
+# Seconds between writes of one worker's buffered hit/miss counters, so
+# cache hits do not take the database write lock.
+SQLITE_STATS_FLUSH_INTERVAL = 1.0
+CACHE_STATUS_HEADER = "X-Cache"
+# Headers that describe one transfer rather than the cached representation.
+_UNCACHED_HEADERS = {"content-length", "set-cookie", CACHE_STATUS_HEADER.lower()}
+
+Headers = List[Tuple[str, str]]
+CachedEntry = Tuple[int, Headers, bytes]
+Stats = Dict[str, Dict[str, int]]
+COUNTERS = ("hits", "misses", "evictions")
+
+
+def make_cache_key(endpoint: str, path: str, args: Any, version: str) -> str:
+    """Build a normalized key from the path, sorted query args and data version.
+
+    ``args`` is a werkzeug ``MultiDict``; repeated parameters are kept, so
+    ``?a=1&b=2`` and ``?b=2&a=1`` share an entry but ``?a=1&a=2`` does not
+    collide with ``?a=1``.
+    """
+    items = sorted(args.items(multi=True))
+    raw = json.dumps([path, items, version], separators=(",", ":"))
+    return f"{endpoint}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+def _entry_size(entry: CachedEntry) -> int:
+    _, headers, body = entry
+    return len(body) + sum(len(name) + len(value) for name, value in headers)
+
+
+class MemoryBackend:
+    """Per-process LRU store bounded by entry count and total body bytes."""
+
+    name = BACKEND_MEMORY
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        # key -> (expires_at, endpoint, size, entry), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, str, int, CachedEntry]]" = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self._stats: Stats = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedEntry]:
+        """Return a live entry and mark it most recently used."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return item[3]
+
+    def set(self, key: str, endpoint: str, entry: CachedEntry, timeout: int) -> None:
+        """Store an entry, evicting least recently used ones past the bounds."""
+        size = _entry_size(entry)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + timeout, endpoint, size, entry)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._count(self._entries[oldest][1], "evictions")
+                self._remove(oldest)
+
+    def record(self, endpoint: str, counter: str) -> None:
+        """Increment a per-endpoint counter."""
+        with self._lock:
+            self._count(endpoint, counter)
+
+    def stats(self) -> Stats:
+        """Return a copy of the per-endpoint counters."""
+        with self._lock:
+            return {endpoint: dict(values) for endpoint, values in self._stats.items()}
+
+    def usage(self) -> Dict[str, int]:
+        """Return the number of stored entries and their total size."""
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._stats.clear()
+
+    def _remove(self, key: str) -> None:
+        self._bytes -= self._entries.pop(key)[2]
+
+    def _count(self, endpoint: str, counter: str) -> None:
+        values = self._stats.setdefault(endpoint, dict.fromkeys(COUNTERS, 0))
+        values[counter] += 1
+
+
+class SQLiteBackend:
+    """LRU store in a local SQLite file shared by every worker on the host.
+
+    Entries and counters live in the database, so gunicorn or waitress
+    workers reuse each other's responses and report combined statistics.
+    Hit and miss counters are buffered in the process and written at most
+    once per ``stats_flush_interval``, so other workers' statistics can lag
+    by that long. Expiry uses wall-clock time because it is compared across
+    processes.
+
+    The database holds response bodies, so it is created readable by its
+    owner only, and a file another user created is refused rather than
+    trusted.
+    """
+
+    name = BACKEND_SQLITE
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        touch_interval: float = SQLITE_TOUCH_INTERVAL,
+        stats_flush_interval: float = SQLITE_STATS_FLUSH_INTERVAL,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.stats_flush_interval = stats_flush_interval
+        self._local = threading.local()
+        self._pending: Dict[Tuple[str, str], int] = {}
+        self._pending_lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+        _create_private_file(path)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    endpoint TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    used_at REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    status INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    body BLOB NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS entries_used_at ON entries (used_at);
+                CREATE TABLE IF NOT EXISTS stats (
+                    endpoint TEXT PRIMARY KEY,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    misses INTEGER NOT NULL DEFAULT 0,
+                    evictions INTEGER NOT NULL DEFAULT 0
+                );
+                """
+            )
+
+    def get(self, key: str) -> Optional[CachedEntry]:
+        """Return a live entry and refresh its last-used time."""
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT expires_at, used_at, status, headers, body FROM entries "
+            "WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        expires_at, used_at, status, headers, body = row
+        if expires_at <= now:
+            with conn:
+                conn.execute(
+                    "DELETE FROM entries WHERE key = ? AND expires_at <= ?", (key, now)
+                )
+            return None
+        if now - used_at >= self.touch_interval:
+            with conn:
+                conn.execute("UPDATE entries SET used_at = ? WHERE key = ?", (now, key))
+        return (
+            status,
+            [(name, value) for name, value in json.loads(headers)],
+            bytes(body),
+        )
+
+    def set(self, key: str, endpoint: str, entry: CachedEntry, timeout: int) -> None:
+        """Store an entry, evicting least recently used ones past the bounds."""
+        size = _entry_size(entry)
+        if size > self.max_bytes:
+            return
+        status, headers, body = entry
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, endpoint, expires_at, used_at, size, status, headers, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    endpoint,
+                    now + timeout,
+                    now,
+                    size,
+                    status,
+                    json.dumps(headers),
+                    sqlite3.Binary(body),
+                ),
+            )
+            conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            self._evict(conn)
+
+    def record(self, endpoint: str, counter: str) -> None:
+        """Increment a per-endpoint counter (buffered, see the class docstring)."""
+        if counter not in COUNTERS:
+            raise ValueError(f"Unknown counter: {counter}")
+        with self._pending_lock:
+            key = (endpoint, counter)
+            self._pending[key] = self._pending.get(key, 0) + 1
+            due = time.monotonic() - self._flushed_at >= self.stats_flush_interval
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self) -> None:
+        """Write this worker's buffered counters to the database."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+        try:
+            with self._connect() as conn:
+                for (endpoint, counter), amount in pending.items():
+                    self._increment(conn, endpoint, counter, amount)
+        except sqlite3.Error:
+            with self._pending_lock:
+                for key, amount in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + amount
+            raise
+
+    def stats(self) -> Stats:
+        """Return the per-endpoint counters of every worker."""
+        self.flush_stats()
+        rows = self._connect().execute(
+            "SELECT endpoint, hits, misses, evictions FROM stats"
+        )
+        return {row[0]: dict(zip(COUNTERS, row[1:])) for row in rows}
+
+    def usage(self) -> Dict[str, int]:
+        """Return the number of stored entries and their total size."""
+        count, total = (
+            self._connect()
+            .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries")
+            .fetchone()
+        )
+        return {"entries": count, "bytes": total}
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._pending_lock:
+            self._pending.clear()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM stats")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        evicted: Dict[str, int] = {}
+        doomed = []
+        rows = conn.execute("SELECT key, endpoint, size FROM entries ORDER BY used_at")
+        for key, endpoint, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            evicted[endpoint] = evicted.get(endpoint, 0) + 1
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        for endpoint, amount in evicted.items():
+            self._increment(conn, endpoint, "evictions", amount)
+
+    @staticmethod
+    def _increment(
+        conn: sqlite3.Connection, endpoint: str, counter: str, amount: int
+    ) -> None:
+        conn.execute(
+            f"INSERT INTO stats (endpoint, {counter}) VALUES (?, ?) "
+            f"ON CONFLICT(endpoint) DO UPDATE SET {counter} = {counter} + ?",
+            (endpoint, amount, amount),
+        )
+
+
+def _create_private_file(path: str) -> None:
+    """Create ``path`` as mode 0600 (its directory as 0700) if it is missing.
+
+    Raises PermissionError if the file exists but belongs to another user,
+    and OSError if it is a symlink.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0)
+    fd = os.open(path, flags, 0o600)
+    try:
+        info = os.fstat(fd)
+        if hasattr(os, "getuid") and info.st_uid != os.getuid():
+            raise PermissionError(f"Cache file {path} is owned by another user")
+        if stat.S_IMODE(info.st_mode) & 0o077:
+            os.chmod(path, 0o600)
+    finally:
+        os.close(fd)
+
+
+Backend = Any  # MemoryBackend or SQLiteBackend
+
+
+def create_backend(
+    name: Optional[str] = None,
+    path: Optional[str] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    max_entries: int = DEFAULT_MAX_ENTRIES,
+) -> Backend:
+    """Create the storage backend named by ``name`` (memory or sqlite).
+
+    The sqlite backend needs an explicit ``path``; there is no shared default
+    location other local users could read or pre-create.
+    """
+    name = (name or BACKEND_MEMORY).lower()
+    if name == BACKEND_SQLITE:
+        if not path:
+            raise ValueError("The sqlite cache backend requires a database path")
+        return SQLiteBackend(path, max_bytes, max_entries)
+    if name != BACKEND_MEMORY:
+        raise ValueError(f"Unknown cache backend: {name}")
+    return MemoryBackend(max_bytes, max_entries)
+
+
+class ResponseCache:
+    """Caches successful view responses keyed on the full query and data version.
+
+    Only ``200`` responses with a materialized body are stored, so errors and
+    streamed exports are always produced fresh. Keys include the version
+    returned by ``version``, which makes a data reload invalidate every
+    response at once, in every worker, without coordination. Views cached
+    with ``shared=False`` are only stored by the per-process memory backend.
+    """
+
+    def __init__(
+        self,
+        backend: Backend,
+        version: Callable[[], str] = lambda: "",
+        default_timeout: int = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.backend = backend
+        self.version = version
+        self.default_timeout = default_timeout
+
+    def cached(self, timeout: Optional[int] = None, shared: bool = True) -> Callable:
+        """Decorate a view so its responses are served from the cache.
+
+        Pass ``shared=False`` for sensitive responses that must not be written
+        to storage outside the process; with a shared backend such views are
+        always produced fresh.
+        """
+        ttl = self.default_timeout if timeout is None else timeout
+
+        def decorator(view: Callable) -> Callable:
+            if not shared and self.backend.name != BACKEND_MEMORY:
+                return view
+
+            @wraps(view)
+            def decorated_view(*args: Any, **kwargs: Any) -> Response:
+                endpoint = request.endpoint or view.__name__
+                try:
+                    key = make_cache_key(
+                        endpoint, request.path, request.args, self.version()
+                    )
+                    entry = self.backend.get(key)
+                except Exception:
+                    logger.exception("Response cache lookup failed")
+                    return make_response(view(*args, **kwargs))
+
+                if entry is not None:
+                    self._record(endpoint, "hits")
+                    return self._restore(entry)
+
+                self._record(endpoint, "misses")
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    try:
+                        self.backend.set(key, endpoint, self._capture(response), ttl)
+                    except Exception:
+                        logger.exception("Response cache store failed")
+                response.headers[CACHE_STATUS_HEADER] = "MISS"
+                return response
+
+            return decorated_view
+
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-endpoint counters plus current usage."""
+        return {
+            "backend": self.backend.name,
+            "endpoints": self.backend.stats(),
+            **self.backend.usage(),
+        }
+
+    def clear(self) -> None:
+        """Drop every cached response and reset the counters."""
+        self.backend.clear()
+
+    def _record(self, endpoint: str, counter: str) -> None:
+        try:
+            self.backend.record(endpoint, counter)
+        except Exception:
+            logger.exception("Response cache accounting failed")
+
+    @staticmethod
+    def _capture(response: Response) -> CachedEntry:
+        headers = [
+            (name, value)
+            for name, value in response.headers.items()
+            if name.lower() not in _UNCACHED_HEADERS
+        ]
+        return response.status_code, headers, response.get_data()
+
+    @staticmethod
+    def _restore(entry: CachedEntry) -> Response:
+        status, headers, body = entry
+        response = Response(body, status=status, headers=headers)
+        response.headers[CACHE_STATUS_HEADER] = "HIT"
+        return response
@@ -0,0 +1,129 @@
+"""Pre-serialized, pre-compressed JSON response bodies with ETag support."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from flask import Request, Response
+
+from src import json_provider
+
+try:  # Brotli is optional; gzip is always available.
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+NDJSON_CHUNK_BYTES = 64 * 1024
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+REVALIDATE = "no-cache"
+
+
+class PreparedResponse:
+    """A JSON body serialized and compressed once, served many times.
+
+    Each encoding is a separate representation with its own strong ETag
+    (``"<digest>"``, ``"<digest>-gzip"``, ``"<digest>-br"``); all of them
+    validate an ``If-None-Match`` for the same content. Compression uses a
+    fixed mtime so every worker produces identical bytes and tags.
+    """
+
+    __slots__ = ("digest", "bodies")
+
+    def __init__(self, body: bytes) -> None:
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self.bodies: Dict[str, bytes] = {"identity": body}
+
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        if len(compressed) < len(body):
+            self.bodies["gzip"] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+            if len(compressed) < len(body):
+                self.bodies["br"] = compressed
+
+    @classmethod
+    def from_payload(
+        cls, payload: object, dumps: Callable[[object], str]
+    ) -> "PreparedResponse":
+        """Serialize ``payload`` with ``dumps`` the way ``jsonify`` would."""
+        return cls(f"{dumps(payload)}\n".encode("utf-8"))
+
+    def etag(self, encoding: str = "identity") -> str:
+        """Return the quoted strong ETag for one encoding."""
+        if encoding == "identity":
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header validates any representation."""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return True
+            # If-None-Match uses weak comparison (RFC 9110, 13.1.2).
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            tag = tag.strip('"')
+            if tag == self.digest or tag.startswith(f"{self.digest}-"):
+                return True
+        return False
+
+    def negotiate(self, request: Request) -> str:
+        """Pick the best available encoding the client accepts."""
+        accepted = request.accept_encodings
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and accepted[encoding]:
+                return encoding
+        return "identity"
+
+    def to_response(self, request: Request) -> Response:
+        """Build a 200 or bodiless 304 response for ``request``."""
+        encoding = self.negotiate(request)
+        if self.matches(request.headers.get("If-None-Match")):
+            response = Response(status=304)
+        else:
+            response = Response(self.bodies[encoding], mimetype="application/json")
+            if encoding != "identity":
+                response.headers["Content-Encoding"] = encoding
+
+        response.headers["ETag"] = self.etag(encoding)
+        response.headers["Cache-Control"] = REVALIDATE
+        response.vary.add("Accept-Encoding")
+        return response
+
+
+def iter_ndjson(
+    records: Iterable[Any],
+    chunk_bytes: int = NDJSON_CHUNK_BYTES,
+) -> Iterator[bytes]:
+    """Encode records as newline-delimited JSON, yielding ~chunk_bytes at a time.
+
+    Lines are batched so the server writes a few large chunks instead of one
+    tiny chunk per record, while memory stays bounded by ``chunk_bytes``.
+    """
+    buffer = []
+    size = 0
+    for record in records:
+        line = json_provider.dumps_bytes(record) + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def ndjson_response(records: Iterable[Any], version: str) -> Response:
+    """Stream records as an NDJSON response with chunked transfer encoding."""
+    response = Response(iter_ndjson(records), mimetype=NDJSON_MIMETYPE)
+    response.headers["X-Data-Version"] = version
+    response.headers["Cache-Control"] = "no-store"
+    return response
@@ -0,0 +1,31 @@
+"""Test fixtures for publishing in-memory data through a DataStore."""
+
+import itertools
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from src.data_store import DataSnapshot, signature_version
+
+_overrides = itertools.count(1)
+
+
+@contextmanager
+def override_data(store, **files):
+    """Publish in-memory content for some files, restoring on exit.
+
+    Files that are not overridden keep the content of the current snapshot.
+    Change checks are suspended while the override is active, so the watched
+    files cannot replace it mid-test.
+    """
+    base = store.snapshot()
+    merged = {name: base.get(name) for name in base.names}
+    merged.update(files)
+    version = signature_version(("override", next(_overrides), base.version))
+    snapshot = DataSnapshot(version, merged, builders=store._builders, lazy=store._lazy)
+    snapshot.build_derived()
+    with patch.object(store, "_check_for_changes"), patch.object(store, "_rebuild"):
+        store._publish(snapshot)
+        try:
+            yield snapshot
+        finally:
+            store._publish(base)
@@ -0,0 +1,118 @@
+"""Tests for the background access-log writer."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.access_log import REDACTED, AccessLog, from_env
+
+
+class AccessLogTestCase(unittest.TestCase):
+    """Test cases for AccessLog."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.path = os.path.join(self.tmp_dir, "logs", "access.jsonl")
+
+    def read_records(self):
+        with open(self.path, encoding="utf-8") as file_handle:
+            return [json.loads(line) for line in file_handle]
+
+    def test_close_writes_every_queued_record_in_order(self):
+        access_log = AccessLog(self.path, flush_interval=60)
+        for number in range(2500):
+            access_log.record({"ts": number, "path": f"/api/company/{number}"})
+        access_log.close()
+
+        records = self.read_records()
+        self.assertEqual([record["ts"] for record in records], list(range(2500)))
+        self.assertEqual(records[0]["path"], "/api/company/0")
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        access_log = AccessLog(self.path, max_pending=2)
+        with patch.object(access_log, "_start_writer"):
+            for number in range(5):
+                access_log.record({"ts": number})
+        self.assertEqual(access_log.dropped, 3)
+
+    def test_appends_to_existing_file(self):
+        for number in range(2):
+            access_log = AccessLog(self.path)
+            access_log.record({"ts": number})
+            access_log.close()
+        self.assertEqual([record["ts"] for record in self.read_records()], [0, 1])
+
+    def test_from_env(self):
+        with patch.dict(os.environ, {"ACCESS_LOG_FILE": ""}):
+            self.assertIsNone(from_env())
+        with patch.dict(
+            os.environ, {"ACCESS_LOG_FILE": self.path, "ACCESS_LOG_MAX_BODY": "10"}
+        ):
+            access_log = from_env()
+        self.assertEqual(access_log.path, self.path)
+        self.assertEqual(access_log.max_body, 10)
+        self.assertFalse(access_log.records_body("/api/v1/companies:batch"))
+        self.assertIn("routing_number", access_log.redact_fields)
+
+        with patch.dict(
+            os.environ,
+            {
+                "ACCESS_LOG_FILE": self.path,
+                "ACCESS_LOG_BODY_ROUTES": "/api/v1/companies:batch, *",
+                "ACCESS_LOG_REDACT_FIELDS": "Tickers",
+            },
+        ):
+            access_log = from_env()
+        self.assertTrue(access_log.records_body("/api/v1/companies:batch"))
+        self.assertIn("tickers", access_log.redact_fields)
+        self.assertIn("routing_number", access_log.redact_fields)
+
+
+class RedactionTestCase(unittest.TestCase):
+    """Test cases for body capture and redaction."""
+
+    def setUp(self):
+        self.access_log = AccessLog("unused.jsonl")
+
+    def test_bodies_are_opt_in_per_route(self):
+        self.assertFalse(self.access_log.records_body("/api/v1/companies:batch"))
+        access_log = AccessLog("unused.jsonl", body_routes=["*"])
+        self.assertTrue(access_log.records_body("/api/v1/companies:batch"))
+        self.assertFalse(access_log.records_body("/api/banks/transfer"))
+        access_log = AccessLog("unused.jsonl", body_routes=["/api/banks/transfer"])
+        self.assertTrue(access_log.records_body("/api/banks/transfer"))
+        self.assertFalse(access_log.records_body("/api/v1/companies:batch"))
+
+    def test_sensitive_fields_are_redacted_at_any_depth(self):
+        body = self.access_log.redact_body(
+            '{"from_bank": "citi", "Amount": 10, "currency": "USD",'
+            ' "legs": [{"account_number": "123", "memo": "rent"}]}'
+        )
+        self.assertEqual(
+            json.loads(body),
+            {
+                "from_bank": REDACTED,
+                "Amount": REDACTED,
+                "currency": "USD",
+                "legs": [{"account_number": REDACTED, "memo": "rent"}],
+            },
+        )
+        self.assertIsNone(self.access_log.redact_body("account_number=123"))
+
+    def test_sensitive_query_parameters_are_redacted(self):
+        self.assertEqual(
+            self.access_log.redact_path("/api/v1/tickers?q=ms%20ft&per_page=5"),
+            "/api/v1/tickers?q=ms%20ft&per_page=5",
+        )
+        self.assertEqual(
+            self.access_log.redact_path("/api/x?routing_number=021000021&page=2"),
+            "/api/x?routing_number=%5Bredacted%5D&page=2",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
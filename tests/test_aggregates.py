@@ -0,0 +1,136 @@
+"""Tests for the incrementally maintained sector aggregates."""
+
+import json
+import unittest
+
+from benchmarks.synthetic import generate_universe, make_ticker
+from src.aggregates import SectorAggregator
+
+STRUCTURE = {
+    "Technology": [
+        {"ticker": "MSFT", "name": "Microsoft"},
+        {"ticker": "GOOG", "name": "Alphabet"},
+    ],
+    "Financial": [
+        {"ticker": "JPM", "name": "JPMorgan"},
+        {"ticker": "msft", "name": "Listed twice"},
+    ],
+    "Empty": [],
+}
+CORPORATE_DATA = {
+    "AUM": "$5.2B",
+    "MSFT": {"market_cap": 2000, "revenue": 200},
+    "GOOG": {"market_cap": 1500, "revenue": "n/a"},
+    "JPM": {"market_cap": 500, "revenue": 100},
+}
+
+
+def copy(data):
+    return json.loads(json.dumps(data))
+
+
+def snapshot(aggregator):
+    return aggregator.counts(), aggregator.stats()
+
+
+class SectorAggregatorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.aggregator = SectorAggregator()
+        self.aggregator.sync(STRUCTURE, CORPORATE_DATA)
+
+    def fresh(self, structure, corporate_data):
+        aggregator = SectorAggregator()
+        aggregator.sync(structure, corporate_data)
+        return aggregator
+
+    def test_initial_totals(self):
+        aggregator = self.aggregator
+        self.assertEqual(
+            aggregator.counts(), {"Technology": 2, "Financial": 2, "Empty": 0}
+        )
+        self.assertEqual(
+            aggregator.stats("Technology"),
+            {
+                "companies": 2,
+                "market_cap": {"known": 2, "total": 3500.0, "mean": 1750.0},
+                "revenue": {"known": 1, "total": 200.0, "mean": 200.0},
+            },
+        )
+        self.assertEqual(aggregator.stats("Empty")["market_cap"]["mean"], None)
+        self.assertEqual(aggregator.stats("Unknown"), {})
+
+    def test_top_is_ordered_with_stable_ties(self):
+        aggregator = self.aggregator
+        self.assertEqual(aggregator.top(2), [("Technology", 2), ("Financial", 2)])
+        self.assertEqual(aggregator.top(1, "market_cap"), [("Technology", 3500.0)])
+        self.assertEqual(
+            aggregator.top(5, "revenue_mean"),
+            [("Technology", 200.0), ("Financial", 150.0)],
+        )
+        with self.assertRaises(ValueError):
+            aggregator.top(1, "employees")
+
+    def test_explicit_updates(self):
+        aggregator = self.aggregator
+        aggregator.set_financials("msft", market_cap=3000, revenue=300)
+        self.assertEqual(aggregator.totals("Technology").total["market_cap"], 4500)
+        self.assertEqual(aggregator.totals("Financial").total["revenue"], 400)
+        self.assertTrue(aggregator.remove_company("Financial", "MSFT"))
+        self.assertFalse(aggregator.remove_company("Financial", "MSFT"))
+        aggregator.add_company("Energy", "JPM")
+        aggregator.remove_financials("GOOG")
+        self.assertEqual(
+            aggregator.counts(),
+            {"Technology": 2, "Financial": 1, "Empty": 0, "Energy": 1},
+        )
+        self.assertEqual(aggregator.stats("Technology")["market_cap"]["known"], 1)
+        self.assertEqual(aggregator.stats("Energy")["market_cap"]["mean"], 500)
+
+    def test_sync_applies_only_the_changes(self):
+        structure, corporate_data = copy(STRUCTURE), copy(CORPORATE_DATA)
+        structure["Financial"].append({"ticker": "BAC", "name": "Bank of America"})
+        del structure["Empty"]
+        structure["Energy"] = [{"ticker": "XOM", "name": "Exxon"}]
+        corporate_data["GOOG"]["revenue"] = 300
+        corporate_data["bac"] = {"market_cap": 250}
+        corporate_data["BAC"] = {"market_cap": 999}
+        del corporate_data["JPM"]
+
+        names = self.aggregator.names("Technology")
+        self.aggregator.sync(structure, corporate_data)
+        self.assertEqual(
+            snapshot(self.aggregator), snapshot(self.fresh(structure, corporate_data))
+        )
+        self.assertEqual(self.aggregator.sectors, ["Technology", "Financial", "Energy"])
+        self.assertEqual(
+            self.aggregator.stats("Financial")["market_cap"]["total"], 2250
+        )
+        # Unchanged sectors keep their name lists.
+        self.assertIs(self.aggregator.names("Technology"), names)
+        self.assertEqual(
+            self.aggregator.names("Financial"),
+            ["JPMorgan", "Listed twice", "Bank of America"],
+        )
+
+    def test_resync_of_a_large_universe_matches_a_fresh_build(self):
+        structure, corporate_data = generate_universe(2000)
+        aggregator = self.fresh(structure, corporate_data)
+        structure, corporate_data = copy(structure), copy(corporate_data)
+        for number in range(0, 2000, 97):
+            corporate_data[make_ticker(number)]["market_cap"] = number
+        sector = next(iter(structure))
+        structure[sector] = structure[sector][1:]
+        aggregator.sync(structure, corporate_data)
+        expected = self.fresh(structure, corporate_data)
+        self.assertEqual(aggregator.counts(), expected.counts())
+        for sector in expected.sectors:
+            actual, wanted = aggregator.totals(sector), expected.totals(sector)
+            self.assertEqual(actual.known, wanted.known)
+            for field, total in wanted.total.items():
+                self.assertAlmostEqual(
+                    actual.total[field], total, delta=abs(total) * 1e-9
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
 import unittest
 import sys
 import os
+import threading
+import time
+from unittest.mock import patch
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from ai_analysis import CorporateAnalysis
 
@@ -29,5 +32,59 @@ class TestCorporateAnalysis(unittest.TestCase):
             for company in companies:
                 self.assertIsInstance(company, str)
 
+    def test_market_cap_filter_and_top_companies(self):
+        companies = self.analysis.filter_companies(min_market_cap=1.6e12)
+        tickers = [c['ticker'] for c in companies]
+        self.assertEqual(tickers, ['MSFT'])
+        top = self.analysis.top_companies(top_n=2)
+        self.assertEqual([c['ticker'] for c in top], ['MSFT', 'GOOG'])
+        self.assertEqual(top[0]['sector'], 'Technology')
+        self.assertEqual(self.analysis.top_companies(sector='Financial'), [])
+
+    def test_sector_stats(self):
+        stats = self.analysis.sector_stats('Technology')
+        self.assertEqual(
+            stats['companies'], self.analysis.sector_summary()['Technology']
+        )
+        self.assertGreater(stats['market_cap']['mean'], 0)
+        top_sectors = self.analysis.top_sectors(top_n=1, by='market_cap')
+        self.assertEqual(top_sectors[0][0], 'Technology')
+
+    def test_sector_analytics(self):
+        analytics = self.analysis.sector_analytics()
+        self.assertEqual(set(analytics['sectors']), set(self.analysis.sector_summary()))
+        technology = analytics['sectors']['Technology']
+        self.assertAlmostEqual(technology['revenue_share'] + sum(
+            stats['revenue_share'] or 0
+            for sector, stats in analytics['sectors'].items() if sector != 'Technology'
+        ), 1.0)
+        self.assertIs(self.analysis.sector_analytics(), analytics)
+
+    def test_concurrent_readers_build_views_once(self):
+        from src.columnar import CompanyColumns
+
+        built = []
+
+        def slow_columns(*args):
+            built.append(args)
+            time.sleep(0.05)
+            return CompanyColumns(*args)
+
+        results = []
+        with patch('src.columnar.CompanyColumns', side_effect=slow_columns):
+            threads = [
+                threading.Thread(
+                    target=lambda: results.append(self.analysis.sector_analytics())
+                )
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(built), 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result is results[0] for result in results))
+
 if __name__ == '__main__':
     unittest.main()
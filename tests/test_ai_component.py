@@ -1,6 +1,9 @@
 import unittest
+import json
+import shutil
 import sys
 import os
+import tempfile
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from ai_component import CorporateStructureAI
 
@@ -38,5 +41,29 @@ class TestCorporateStructureAI(unittest.TestCase):
         # The AI returns an empty list if sector not found, so adjust test accordingly
         self.assertEqual(result, [])
 
+    def test_get_company_by_ticker(self):
+        company = self.ai.get_company_by_ticker("msft")
+        self.assertEqual(company["ticker"], "MSFT")
+        self.assertEqual(self.ai.get_company_by_ticker("INVALID"), "Company not found.")
+
+    def test_search_tickers(self):
+        companies = self.ai.search_tickers("M")
+        self.assertTrue(all(c["ticker"].startswith("M") for c in companies))
+
+    def test_update_revenue_publishes_new_data(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, 'structure.json')
+        shutil.copy(self.ai.json_path, path)
+        ai = CorporateStructureAI(path)
+        other = CorporateStructureAI(path)
+        before = ai.data
+        self.assertTrue(ai.update_revenue("msft", "$1"))
+        self.assertEqual(other.get_company_by_ticker("MSFT")["revenue"], "$1")
+        self.assertNotEqual(before, ai.data)
+        with open(path) as f:
+            self.assertEqual(json.load(f), ai.data)
+        self.assertFalse(ai.update_revenue("INVALID", "$1"))
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,10 @@
+import json
+import os
+import shutil
+import tempfile
 import unittest
 from ai_predictive import CorporatePredictiveModel
+from record_financial_history import record
 
 class TestCorporatePredictiveModel(unittest.TestCase):
     def setUp(self):
@@ -14,5 +19,44 @@ class TestCorporatePredictiveModel(unittest.TestCase):
         # Ensure model coefficients are set after training
         self.assertIsNotNone(self.model.model.coef_)
 
+class TestPredictMany(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.structure_path = os.path.join(self.directory, 'corporate_structure.json')
+        with open(self.structure_path, 'w') as f:
+            json.dump({'Technology': [{'ticker': 'MSFT'}]}, f)
+
+    def test_forecasts_from_history_file(self):
+        history = {
+            'periods': ['2024', '2025'],
+            'tickers': {'MSFT': {'revenue': [100, 110]}},
+        }
+        with open(os.path.join(self.directory, 'financial_history.json'), 'w') as f:
+            json.dump(history, f)
+        model = CorporatePredictiveModel(self.structure_path)
+        forecasts = model.predict_many(['MSFT', 'JPM'], [1, 2])
+        self.assertEqual(forecasts['MSFT']['revenue'], [120.0, 130.0])
+        self.assertIsNone(forecasts['JPM'])
+
+    def test_no_history_file(self):
+        model = CorporatePredictiveModel(self.structure_path)
+        self.assertEqual(model.predict_many(['MSFT']), {'MSFT': None})
+
+    def test_history_recorded_after_start(self):
+        model = CorporatePredictiveModel(self.structure_path)
+        self.assertEqual(model.predict_many(['MSFT']), {'MSFT': None})
+        data_path = os.path.join(self.directory, 'corporate_data.json')
+        history_path = os.path.join(self.directory, 'financial_history.json')
+        for period, revenue in [('2024', 100), ('2025', 110)]:
+            with open(data_path, 'w') as f:
+                json.dump(
+                    {'AUM': '1B', 'MSFT': {'market_cap': 1000, 'revenue': revenue}}, f
+                )
+            record(period, data_path, history_path)
+        forecasts = model.predict_many(['MSFT'], 1)
+        self.assertEqual(forecasts['MSFT']['revenue'], [120.0])
+        self.assertEqual(forecasts['MSFT']['market_cap'], [1000.0])
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,7 +1,29 @@
+import csv
+import json
 import unittest
 import os
+import shutil
+import tempfile
+from unittest.mock import patch
 from ai_report import ReportGenerator
 
+STRUCTURE = {
+    "Technology": [
+        {"ticker": "MSFT", "name": "Microsoft"},
+        {"ticker": "NEW", "name": "Newco"},
+    ],
+    "Financial": [{"ticker": "JPM", "name": "JPMorgan"}],
+}
+CORPORATE_DATA = {
+    "MSFT": {"market_cap": 3000, "revenue": 200},
+    "JPM": {"market_cap": 500, "revenue": 100},
+}
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
 class TestReportGenerator(unittest.TestCase):
     def setUp(self):
         self.report = ReportGenerator()
@@ -35,5 +57,126 @@ class TestReportGenerator(unittest.TestCase):
             content = f.read()
         self.assertTrue(content.startswith("{"))
 
+class TestReportPipeline(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        structure_path = self.path('corporate_structure.json')
+        files = [
+            (structure_path, STRUCTURE),
+            (self.path('corporate_data.json'), CORPORATE_DATA),
+        ]
+        for name, data in files:
+            with open(name, 'w') as f:
+                json.dump(data, f)
+        self.report = ReportGenerator(structure_path)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def all_formats(self):
+        return {
+            'text': self.path('r.txt'),
+            'csv': self.path('r.csv'),
+            'json': self.path('r.json'),
+        }
+
+    def assertOnlyInputsRemain(self):
+        self.assertCountEqual(
+            os.listdir(self.directory),
+            ['corporate_structure.json', 'corporate_data.json'],
+        )
+
+    def test_all_formats_in_one_pass(self):
+        outputs = self.all_formats()
+        self.report.generate(outputs, chunk_size=2)
+
+        with open(outputs['json']) as f:
+            report = json.load(f)
+        self.assertEqual(report['sector_summary'], {'Technology': 2, 'Financial': 1})
+        technology = report['sector_analytics']['sectors']['Technology']
+        self.assertEqual(technology['market_cap']['total'], 3000)
+        self.assertEqual(report['companies'], [
+            {'ticker': 'MSFT', 'name': 'Microsoft', 'sector': 'Technology',
+             'market_cap': 3000.0, 'revenue': 200.0},
+            {'ticker': 'NEW', 'name': 'Newco', 'sector': 'Technology',
+             'market_cap': None, 'revenue': None},
+            {'ticker': 'JPM', 'name': 'JPMorgan', 'sector': 'Financial',
+             'market_cap': 500.0, 'revenue': 100.0},
+        ])
+
+        with open(outputs['csv'], newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[:3], [
+            ['Sector', 'Number of Companies'], ['Technology', '2'], ['Financial', '1']
+        ])
+        self.assertEqual(
+            rows[4], ['Ticker', 'Name', 'Sector', 'Market Cap', 'Revenue']
+        )
+        self.assertEqual(rows[6], ['NEW', 'Newco', 'Technology', '', ''])
+
+        with open(outputs['text']) as f:
+            content = f.read()
+        self.assertIn("Sector Analytics:", content)
+        self.assertIn(
+            "Financial:\n- JPM JPMorgan: market cap 500, revenue 100\n", content
+        )
+
+    def test_unknown_market_cap_total_is_not_zero(self):
+        with open(self.path('corporate_structure.json'), 'w') as f:
+            json.dump({**STRUCTURE, "Energy": [{"ticker": "OIL", "name": "Oilco"}]}, f)
+        self.report.generate({'text': self.path('r.txt')}, include_companies=False)
+        with open(self.path('r.txt')) as f:
+            content = f.read()
+        self.assertIn("- Energy: market cap total n/a, median n/a;", content)
+        self.assertIn("- Financial: market cap total 500, median 500;", content)
+
+    def test_failed_summary_opens_no_files(self):
+        with open(self.path('r.csv'), 'w') as f:
+            f.write('previous report')
+        outputs = {'csv': self.path('r.csv'), 'json': self.path('r.json')}
+        with patch.object(
+            ReportGenerator, 'build_summary', side_effect=RuntimeError('boom')
+        ):
+            with self.assertRaises(RuntimeError):
+                self.report.generate(outputs)
+        with open(self.path('r.csv')) as f:
+            self.assertEqual(f.read(), 'previous report')
+        self.assertFalse(os.path.exists(self.path('r.json')))
+
+    def test_failed_write_removes_partial_files(self):
+        def chunks(chunk_size):
+            yield [{'ticker': 'MSFT', 'name': 'Microsoft', 'sector': 'Technology',
+                    'market_cap': 3000.0, 'revenue': 200.0}]
+            raise RuntimeError('boom')
+
+        with patch.object(self.report, 'iter_company_chunks', side_effect=chunks):
+            with self.assertRaises(RuntimeError):
+                self.report.generate(self.all_formats())
+        self.assertOnlyInputsRemain()
+
+    def test_failed_close_removes_partial_files(self):
+        # The JSON writer finishes its document on close; a full disk fails there.
+        with patch('ai_report.JsonReportWriter.close', side_effect=OSError('full')):
+            with self.assertRaises(OSError):
+                self.report.generate(self.all_formats())
+        self.assertOnlyInputsRemain()
+
+    def test_summary_only_json_is_valid(self):
+        self.report.generate({'json': self.path('r.json')}, include_companies=False)
+        with open(self.path('r.json')) as f:
+            self.assertEqual(json.load(f)['companies'], [])
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.report.generate({'pdf': self.path('r.pdf')})
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_report(self):
+        self.report.generate_parquet_report(self.path('r.parquet'))
+        table = pyarrow.parquet.read_table(self.path('r.parquet'))
+        self.assertEqual(table.column('ticker').to_pylist(), ['MSFT', 'NEW', 'JPM'])
+        self.assertIn(b'report', table.schema.metadata)
+
 if __name__ == '__main__':
     unittest.main()
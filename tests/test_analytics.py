@@ -0,0 +1,89 @@
+"""Tests for the vectorized sector analytics."""
+
+import unittest
+
+import numpy as np
+
+from benchmarks.synthetic import generate_universe
+from src.analytics import PERCENTILES, SectorAnalytics, group_percentiles
+from src.columnar import CompanyColumns
+
+STRUCTURE = {
+    "Technology": [{"ticker": "MSFT"}, {"ticker": "GOOG"}, {"ticker": "NEW"}],
+    "Financial": [{"ticker": "JPM"}],
+    "Empty": [],
+}
+CORPORATE_DATA = {
+    "MSFT": {"market_cap": 3000, "revenue": 200},
+    "GOOG": {"market_cap": 1000, "revenue": 0},
+    "JPM": {"market_cap": 500, "revenue": 100},
+    "XOM": {"market_cap": 400, "revenue": 100},
+}
+
+
+class GroupPercentilesTestCase(unittest.TestCase):
+    def test_matches_numpy_percentile(self):
+        rng = np.random.default_rng(7)
+        values = rng.random(500)
+        groups = rng.integers(0, 4, 500)
+        percentiles = (0, 10, 50, 99, 100)
+        result = group_percentiles(values, groups, 6, percentiles)
+        for group in range(4):
+            np.testing.assert_allclose(
+                result[group], np.percentile(values[groups == group], percentiles)
+            )
+        self.assertTrue(np.isnan(result[4:]).all())
+
+
+class SectorAnalyticsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.analytics = SectorAnalytics(CompanyColumns(STRUCTURE, CORPORATE_DATA))
+
+    def test_sector_statistics(self):
+        technology = self.analytics.sector("Technology")
+        self.assertEqual(technology["companies"], 3)
+        market_cap = technology["market_cap"]
+        self.assertEqual(market_cap["known"], 2)
+        self.assertEqual(market_cap["total"], 4000)
+        self.assertEqual(market_cap["median"], 2000)
+        self.assertEqual((market_cap["min"], market_cap["max"]), (1000, 3000))
+        self.assertEqual(market_cap["p25"], 1500)
+        self.assertAlmostEqual(market_cap["herfindahl"], 0.75**2 + 0.25**2)
+        self.assertAlmostEqual(technology["revenue_share"], 200 / 300)
+        # GOOG has no sales, so only MSFT has a price-to-sales ratio.
+        self.assertEqual(
+            technology["price_to_sales"],
+            {"companies": 1, "aggregate": 15.0, "median": 15.0},
+        )
+
+    def test_empty_groups_and_overall(self):
+        empty = self.analytics.sector("Empty")
+        self.assertEqual(empty["companies"], 0)
+        self.assertIsNone(empty["market_cap"]["median"])
+        self.assertIsNone(empty["market_cap"]["herfindahl"])
+        self.assertEqual(empty["revenue_share"], 0.0)
+        self.assertIsNone(self.analytics.sector("Unknown"))
+
+        # Unclassified symbols (XOM) are not part of the universe.
+        overall = self.analytics.overall
+        self.assertEqual(overall["companies"], 4)
+        self.assertEqual(overall["market_cap"]["total"], 4500)
+        self.assertEqual(overall["revenue_share"], 1.0)
+        self.assertEqual(overall["price_to_sales"]["companies"], 2)
+
+    def test_large_universe_matches_numpy(self):
+        structure, corporate_data = generate_universe(5000)
+        columns = CompanyColumns(structure, corporate_data)
+        analytics = SectorAnalytics(columns)
+        for code, sector in enumerate(columns.sectors):
+            revenue = columns.revenue[columns.sector_codes == code]
+            revenue = revenue[~np.isnan(revenue)]
+            stats = analytics.sectors[sector]["revenue"]
+            names = ["total", "median"] + [f"p{p}" for p in PERCENTILES]
+            expected = [revenue.sum(), np.median(revenue)]
+            expected += list(np.percentile(revenue, PERCENTILES))
+            np.testing.assert_allclose([stats[name] for name in names], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,25 @@
 """Tests for the API server endpoints."""
 
+import gzip
 import json
 import unittest
+
+import os
+import shutil
+import tempfile
 from unittest.mock import patch
 
-from src.api_server import app, cache
+from data_fixtures import override_data
+from src.access_log import REDACTED, AccessLog
+from src.api_server import (
+    app,
+    cache,
+    data_store,
+    memory_tracker,
+    rate_limit_key,
+    token_buckets,
+)
+from src.rate_limit import MemoryBucketStore, Tier, TokenBucketLimiter
 
 
 class ApiServerTestCase(unittest.TestCase):
@@ -15,6 +30,7 @@ class ApiServerTestCase(unittest.TestCase):
         self.app.testing = True
         self.headers = {"X-API-KEY": "equity-shield-2024-secure-key"}
         cache.clear()
+        token_buckets.store.clear()
         self.mock_data = {
             "MSFT": {
                 "market_cap": 1000.0,
@@ -88,6 +104,40 @@ class ApiServerTestCase(unittest.TestCase):
         data = json.loads(response.data)
         self.assertIsInstance(data, dict)
 
+    def test_corporate_structure_conditional_requests(self):
+        """Test ETag revalidation and compressed variants."""
+        response = self.app.get("/api/v1/corporate-structure", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+
+        response = self.app.get(
+            "/api/v1/corporate-structure",
+            headers={**self.headers, "If-None-Match": etag},
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+
+        response = self.app.get(
+            "/api/v1/corporate-structure",
+            headers={**self.headers, "Accept-Encoding": "gzip"},
+        )
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(
+            json.loads(gzip.decompress(response.data))["status"],
+            "success",
+        )
+
+        with override_data(data_store, corporate_structure={"Energy": []}):
+            response = self.app.get(
+                "/api/v1/corporate-structure",
+                headers={**self.headers, "If-None-Match": etag},
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(response.data)["data"], {"Energy": []})
+
     def test_get_companies_by_sector(self):
         """Test getting companies by sector."""
         response = self.app.get("/api/companies/Technology", headers=self.headers)
@@ -108,62 +158,473 @@ class ApiServerTestCase(unittest.TestCase):
         response = self.app.get("/api/company/INVALID", headers=self.headers)
         self.assertEqual(response.status_code, 404)
 
-    @patch("src.api_server.load_json_file")
-    def test_get_real_assets(self, mock_load):
-        """Test real assets endpoint with pagination and filtering."""
-        mock_load.return_value = self.mock_data
-
+    def test_search_tickers(self):
+        """Test ticker autocomplete by prefix."""
         response = self.app.get(
-            "/api/real-assets",
+            "/api/v1/tickers",
             headers=self.headers,
-            query_string={"page": "1", "per_page": "10"},
+            query_string={"prefix": "ms"},
         )
-        if response.status_code != 200:
-            print(f"Response data: {response.data.decode('utf-8')}")
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
-        self.assertIsInstance(data, dict)
-        self.assertIn("data", data)
-        self.assertIn("page", data)
-        self.assertIn("per_page", data)
-        self.assertIn("total", data)
+        self.assertEqual(data["data"][0]["ticker"], "MSFT")
+        self.assertEqual(data["data"][0]["sector"], "Technology")
 
         response = self.app.get(
-            "/api/real-assets",
+            "/api/v1/tickers",
             headers=self.headers,
-            query_string={
-                "page": "1",
-                "per_page": "10",
-                "min_market_cap": "1000",
-                "max_market_cap": "5000",
-            },
+            query_string={"prefix": "ms", "limit": "0"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_companies_batch(self):
+        """Test resolving many tickers in one request."""
+        response = self.app.post(
+            "/api/v1/companies:batch",
+            headers=self.headers,
+            json={"tickers": ["MSFT", "jpm", "INVALID", "msft"]},
         )
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
-        self.assertIsInstance(data, dict)
+        self.assertEqual(data["requested"], 3)
+        self.assertEqual([item["ticker"] for item in data["data"]], ["MSFT", "jpm"])
+        self.assertEqual(data["data"][1]["sector"], "Financial")
+        self.assertEqual(data["missing"], ["INVALID"])
+
+        for body in ({}, {"tickers": "MSFT"}, {"tickers": [1, 2]}):
+            response = self.app.post(
+                "/api/v1/companies:batch", headers=self.headers, json=body
+            )
+            self.assertEqual(response.status_code, 400)
+
+        response = self.app.post(
+            "/api/v1/companies:batch",
+            headers=self.headers,
+            json={"tickers": ["T"] * 5001},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_token_bucket_rate_limit(self):
+        """Requests past the key's quota get 429 with Retry-After."""
+        limiter = TokenBucketLimiter(
+            MemoryBucketStore(),
+            {"tiny": Tier("tiny", capacity=2, refill_rate=0.5)},
+            default_tier="tiny",
+        )
+        with patch("src.api_server.token_buckets", limiter):
+            first = self.app.get("/api/banking-info", headers=self.headers)
+            second = self.app.get("/api/banking-info", headers=self.headers)
+            third = self.app.get("/api/banking-info", headers=self.headers)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers["X-RateLimit-Limit"], "2")
+        self.assertEqual(first.headers["X-RateLimit-Remaining"], "1")
+        # The second request is a cache hit and is still charged.
+        self.assertEqual(second.headers["X-Cache"], "HIT")
+        self.assertEqual(second.headers["X-RateLimit-Remaining"], "0")
+        self.assertEqual(third.status_code, 429)
+        self.assertEqual(third.headers["Retry-After"], "2")
+        self.assertEqual(json.loads(third.data)["error"], "Rate limit exceeded")
+
+    def test_route_limits_key_on_verified_api_keys(self):
+        """Unverified keys share the per-route limit of their address."""
+        with app.test_request_context(headers=self.headers):
+            verified = rate_limit_key()
+        with app.test_request_context(
+            headers={"X-API-KEY": "made-up"}, environ_base={"REMOTE_ADDR": "10.0.0.9"}
+        ):
+            unverified = rate_limit_key()
+        self.assertTrue(verified.startswith("key:"))
+        self.assertNotIn(self.headers["X-API-KEY"], verified)
+        self.assertEqual(unverified, "10.0.0.9")
+
+    def test_metrics_endpoint(self):
+        """Metrics report per-route requests, stages, cache and data age."""
+        self.app.get("/api/banking-info", headers=self.headers)
+        self.app.get("/api/banking-info", headers=self.headers)
+        response = self.app.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain; version=0.0.4"))
+        text = response.data.decode("utf-8")
+        self.assertIn(
+            'http_requests_total{method="GET",route="/api/banking-info",status="200"}',
+            text,
+        )
+        self.assertIn(
+            "http_request_duration_seconds_count"
+            '{method="GET",route="/api/banking-info"}',
+            text,
+        )
+        self.assertIn('api_stage_duration_seconds_count{stage="auth"}', text)
+        self.assertIn('api_stage_duration_seconds_count{stage="rate_limit"}', text)
+        self.assertIn(
+            'response_cache_hit_ratio{route="/api/banking-info"}',
+            text,
+        )
+        self.assertIn("data_snapshot_age_seconds ", text)
+
+    def test_access_log_records_requests(self):
+        """Each request is queued as a replayable access record."""
+        access_log = AccessLog("unused.jsonl", body_routes=["*"])
+        with patch("src.api_server.access_log", access_log), patch.object(
+            access_log, "record"
+        ) as record:
+            self.app.get("/api/v1/real-assets?per_page=1", headers=self.headers)
+            self.app.post(
+                "/api/v1/companies:batch",
+                json={"tickers": ["MSFT"], "api_key": "secret"},
+                headers=self.headers,
+            )
+            self.app.post(
+                "/api/banks/transfer",
+                json={"from_bank": "citi", "to_bank": "jpm", "amount": 5},
+                headers=self.headers,
+            )
+
+        get_record, post_record, transfer_record = [
+            call.args[0] for call in record.call_args_list
+        ]
+        self.assertEqual(get_record["method"], "GET")
+        self.assertEqual(get_record["path"], "/api/v1/real-assets?per_page=1")
+        self.assertEqual(get_record["route"], "/api/v1/real-assets")
+        self.assertEqual(get_record["status"], 200)
+        self.assertNotIn("body", get_record)
+        self.assertGreaterEqual(get_record["ms"], 0)
+        self.assertEqual(post_record["path"], "/api/v1/companies:batch")
+        self.assertEqual(
+            json.loads(post_record["body"]),
+            {"tickers": ["MSFT"], "api_key": REDACTED},
+        )
+        # Bank routes keep their bodies out of the log unless named.
+        self.assertEqual(transfer_record["route"], "/api/banks/transfer")
+        self.assertNotIn("body", transfer_record)
+
+    def test_request_profiling_requires_admin_key(self):
+        """X-Profile is ignored without the admin key and disabled without one set."""
+        with patch.dict(os.environ, {"ADMIN_API_KEY": "admin-key"}):
+            response = self.app.get(
+                "/api/banking-info",
+                headers={**self.headers, "X-Profile": "text", "X-ADMIN-KEY": "wrong"},
+            )
+            self.assertEqual(response.mimetype, "application/json")
+            response = self.app.get(
+                "/api/v1/admin/profiler/sampling", headers={"X-ADMIN-KEY": "wrong"}
+            )
+            self.assertEqual(response.status_code, 403)
 
         response = self.app.get(
-            "/api/real-assets",
+            "/api/v1/admin/profiler/sampling", headers={"X-ADMIN-KEY": "admin-key"}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_request_profiling(self):
+        """Admins get a pstats report or a stored .prof file for one request."""
+        admin = {**self.headers, "X-ADMIN-KEY": "admin-key"}
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir)
+        with patch.dict(os.environ, {"ADMIN_API_KEY": "admin-key"}), patch(
+            "src.api_server.PROFILE_DIR", profile_dir
+        ):
+            response = self.app.get(
+                "/api/banking-info", headers={**admin, "X-Profile": "text"}
+            )
+            self.assertEqual(response.mimetype, "text/plain")
+            self.assertEqual(response.headers["X-Profiled-Status"], "200")
+            self.assertIn("function calls", response.data.decode("utf-8"))
+
+            response = self.app.get(
+                "/api/banking-info", headers={**admin, "X-Profile": "store"}
+            )
+            self.assertEqual(response.mimetype, "application/json")
+            self.assertIn(response.headers["X-Profile-File"], os.listdir(profile_dir))
+
+    def test_sampling_profiler_endpoints(self):
+        """Admins can start, inspect and stop a sampling window."""
+        admin = {"X-ADMIN-KEY": "admin-key"}
+        url = "/api/v1/admin/profiler/sampling"
+        with patch.dict(os.environ, {"ADMIN_API_KEY": "admin-key"}):
+            response = self.app.post(url, headers=admin, json={"interval": 5})
+            self.assertEqual(response.status_code, 400)
+
+            response = self.app.post(
+                url, headers=admin, json={"interval": 0.005, "duration": 5}
+            )
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(self.app.post(url, headers=admin).status_code, 409)
+
+            response = self.app.delete(url, headers=admin)
+            self.assertFalse(json.loads(response.data)["data"]["running"])
+            data = json.loads(self.app.get(url, headers=admin).data)["data"]
+            self.assertIn("top_functions", data)
+            response = self.app.get(f"{url}?format=collapsed", headers=admin)
+            self.assertEqual(response.mimetype, "text/plain")
+
+    def test_memory_inspection_endpoints(self):
+        """Admins can trace allocations, diff snapshots and see per-route bytes."""
+        admin = {"X-ADMIN-KEY": "admin-key"}
+        base = "/api/v1/admin/memory"
+        with patch.dict(os.environ, {"ADMIN_API_KEY": "admin-key"}):
+            self.assertEqual(
+                self.app.post(f"{base}/snapshots", headers=admin).status_code, 409
+            )
+            response = self.app.post(
+                f"{base}/tracing", headers=admin, json={"frames": 2}
+            )
+            self.addCleanup(memory_tracker.stop)
+            self.assertTrue(json.loads(response.data)["data"]["tracing"])
+
+            first = json.loads(self.app.post(f"{base}/snapshots", headers=admin).data)
+            self.app.get("/api/banking-info", headers=self.headers)
+            second = json.loads(self.app.post(f"{base}/snapshots", headers=admin).data)
+
+            response = self.app.get(
+                f"{base}/snapshots/{first['data']['id']}/diff/"
+                f"{second['data']['id']}?group_by=filename&limit=5",
+                headers=admin,
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(json.loads(response.data)["data"]), 5)
+            response = self.app.get(
+                f"{base}/snapshots/{first['data']['id']}?group_by=bogus",
+                headers=admin,
+            )
+            self.assertEqual(response.status_code, 400)
+            response = self.app.get(f"{base}/snapshots/999", headers=admin)
+            self.assertEqual(response.status_code, 404)
+
+            routes = json.loads(self.app.get(f"{base}/routes", headers=admin).data)
+            self.assertIn("/api/banking-info", [row["route"] for row in routes["data"]])
+
+            response = self.app.delete(f"{base}/tracing", headers=admin)
+            self.assertFalse(json.loads(response.data)["data"]["tracing"])
+
+    def test_get_real_assets(self):
+        """Test real assets endpoint with pagination and filtering."""
+        with override_data(data_store, corporate_data=self.mock_data):
+            response = self.app.get(
+                "/api/real-assets",
+                headers=self.headers,
+                query_string={"page": "1", "per_page": "10"},
+            )
+            if response.status_code != 200:
+                print(f"Response data: {response.data.decode('utf-8')}")
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.data)
+            self.assertIsInstance(data, dict)
+            self.assertIn("data", data)
+            self.assertIn("page", data)
+            self.assertIn("per_page", data)
+            self.assertIn("total", data)
+
+            response = self.app.get(
+                "/api/real-assets",
+                headers=self.headers,
+                query_string={
+                    "page": "1",
+                    "per_page": "10",
+                    "min_market_cap": "1000",
+                    "max_market_cap": "5000",
+                },
+            )
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.data)
+            self.assertIsInstance(data, dict)
+
+            response = self.app.get(
+                "/api/real-assets",
+                headers=self.headers,
+                query_string={
+                    "page": "1",
+                    "per_page": "10",
+                    "sort_by": "market_cap",
+                    "sort_order": "desc",
+                },
+            )
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.data)
+            self.assertIsInstance(data, dict)
+
+            response = self.app.get(
+                "/api/real-assets",
+                headers=self.headers,
+                query_string={"page": "1", "per_page": "5"},
+            )
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.data)
+            self.assertIsInstance(data, dict)
+
+    def test_real_assets_cache_is_query_aware(self):
+        """Different queries get their own entries; reordered ones share one."""
+        with override_data(data_store, corporate_data=self.mock_data):
+            first = self.app.get(
+                "/api/v1/real-assets?sort_by=market_cap&sort_order=desc",
+                headers=self.headers,
+            )
+            reordered = self.app.get(
+                "/api/v1/real-assets?sort_order=desc&sort_by=market_cap",
+                headers=self.headers,
+            )
+            other = self.app.get(
+                "/api/v1/real-assets?sort_by=market_cap&sort_order=asc",
+                headers=self.headers,
+            )
+
+        self.assertEqual(first.headers["X-Cache"], "MISS")
+        self.assertEqual(reordered.headers["X-Cache"], "HIT")
+        self.assertEqual(reordered.data, first.data)
+        self.assertEqual(other.headers["X-Cache"], "MISS")
+        self.assertEqual(json.loads(first.data)["data"][0]["symbol"], "JPM")
+        self.assertEqual(json.loads(other.data)["data"][0]["symbol"], "MSFT")
+
+        response = self.app.get("/api/v1/cache/stats", headers=self.headers)
+        stats = json.loads(response.data)["data"]["endpoints"]["get_real_assets"]
+        self.assertEqual(stats, {"hits": 1, "misses": 2, "evictions": 0})
+
+    def test_cache_follows_data_version(self):
+        """A data reload is never answered from the previous version's entry."""
+        with override_data(data_store, corporate_data=self.mock_data):
+            self.app.get("/api/v1/real-assets", headers=self.headers)
+        with override_data(data_store, corporate_data={"ZZZ": {"market_cap": 1.0}}):
+            response = self.app.get("/api/v1/real-assets", headers=self.headers)
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        self.assertEqual(json.loads(response.data)["total"], 1)
+
+    def test_real_assets_cursor_pagination(self):
+        """Test keyset pagination over real assets."""
+        with override_data(data_store, corporate_data=self.mock_data):
+            symbols = []
+            query = {"per_page": "3", "sort_by": "market_cap", "cursor": ""}
+            while True:
+                response = self.app.get(
+                    "/api/v1/real-assets", headers=self.headers, query_string=query
+                )
+                self.assertEqual(response.status_code, 200)
+                data = json.loads(response.data)
+                self.assertEqual(data["total"], 8)
+                symbols.extend(item["symbol"] for item in data["data"])
+                if data["next_cursor"] is None:
+                    break
+                query["cursor"] = data["next_cursor"]
+
+            self.assertEqual(symbols[0], "MSFT")
+            self.assertEqual(symbols[-1], "JPM")
+            self.assertEqual(len(symbols), 8)
+
+            response = self.app.get(
+                "/api/v1/real-assets",
+                headers=self.headers,
+                query_string={"cursor": "", "include_total": "false"},
+            )
+            self.assertNotIn("total", json.loads(response.data))
+
+            response = self.app.get(
+                "/api/v1/real-assets",
+                headers=self.headers,
+                query_string={"cursor": "garbage"},
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_companies_cursor_pagination(self):
+        """Test keyset pagination within a sector."""
+        response = self.app.get(
+            "/api/companies/Technology",
             headers=self.headers,
-            query_string={
-                "page": "1",
-                "per_page": "10",
-                "sort_by": "market_cap",
-                "sort_order": "desc",
-            },
+            query_string={"per_page": "1", "cursor": ""},
         )
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
-        self.assertIsInstance(data, dict)
+        first = json.loads(response.data)
+        self.assertEqual(first["data"][0]["ticker"], "GOOG")
 
         response = self.app.get(
-            "/api/real-assets",
+            "/api/companies/Technology",
             headers=self.headers,
-            query_string={"page": "1", "per_page": "5"},
+            query_string={"per_page": "1", "cursor": first["next_cursor"]},
         )
+        second = json.loads(response.data)
+        self.assertEqual(second["data"][0]["ticker"], "MSFT")
+        self.assertIsNone(second["next_cursor"])
+
+    def test_sector_analytics(self):
+        """Test per-sector, single-sector and overall analytics."""
+        structure = {
+            "Technology": [{"ticker": "MSFT"}, {"ticker": "GOOG"}],
+            "Financial": [{"ticker": "JPM"}, {"ticker": "BAC"}, {"ticker": "C"}],
+        }
+        with override_data(
+            data_store, corporate_structure=structure, corporate_data=self.mock_data
+        ):
+            response = self.app.get("/api/v1/analytics/sectors", headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("ETag", response.headers)
+            data = json.loads(response.data)
+            technology = data["sectors"]["Technology"]
+            self.assertEqual(technology["companies"], 2)
+            self.assertEqual(technology["market_cap"]["total"], 3000.0)
+            self.assertEqual(technology["market_cap"]["median"], 1500.0)
+            self.assertAlmostEqual(technology["market_cap"]["herfindahl"], 5 / 9)
+            self.assertAlmostEqual(technology["revenue_share"], 1300 / 4400)
+            self.assertAlmostEqual(
+                technology["price_to_sales"]["aggregate"], 3000 / 1300
+            )
+            self.assertEqual(data["overall"]["companies"], 5)
+            self.assertEqual(data["overall"]["market_cap"]["median"], 2000.0)
+
+            response = self.app.get(
+                "/api/v1/analytics/sectors/Financial", headers=self.headers
+            )
+            self.assertEqual(
+                json.loads(response.data)["data"]["revenue"]["max"], 1200.0
+            )
+            response = self.app.get(
+                "/api/v1/analytics/sectors/Unknown", headers=self.headers
+            )
+            self.assertEqual(response.status_code, 404)
+
+            response = self.app.get("/api/v1/analytics/overview", headers=self.headers)
+            self.assertEqual(json.loads(response.data)["data"], data["overall"])
+
+    def test_export_real_assets_ndjson(self):
+        """Test streaming real-assets export with filters."""
+        with override_data(data_store, corporate_data=self.mock_data):
+            response = self.app.get(
+                "/api/v1/export/real-assets.ndjson",
+                headers=self.headers,
+                query_string={"min_market_cap": "1700", "sort_by": "market_cap"},
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, "application/x-ndjson")
+            self.assertTrue(response.is_streamed)
+            lines = response.get_data(as_text=True).splitlines()
+            symbols = [json.loads(line)["symbol"] for line in lines]
+            self.assertEqual(symbols, ["AMT", "C", "GOOG", "BAC", "JPM"])
+
+    def test_export_companies_ndjson(self):
+        """Test streaming company export for all sectors and one sector."""
+        response = self.app.get("/api/v1/export/companies.ndjson", headers=self.headers)
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
-        self.assertIsInstance(data, dict)
+        records = [
+            json.loads(line) for line in response.get_data(as_text=True).splitlines()
+        ]
+        self.assertIn("MSFT", [record["ticker"] for record in records])
+        self.assertTrue(all("sector" in record for record in records))
+
+        response = self.app.get(
+            "/api/v1/export/companies.ndjson",
+            headers=self.headers,
+            query_string={"sector": "Technology"},
+        )
+        records = [
+            json.loads(line) for line in response.get_data(as_text=True).splitlines()
+        ]
+        self.assertEqual({record["sector"] for record in records}, {"Technology"})
+
+        response = self.app.get(
+            "/api/v1/export/companies.ndjson",
+            headers=self.headers,
+            query_string={"sector": "Unknown"},
+        )
+        self.assertEqual(response.status_code, 404)
 
     def test_error_handling(self):
         """Test error handling."""
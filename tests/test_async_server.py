@@ -0,0 +1,237 @@
+"""Tests for the asyncio HTTP front end."""
+
+import asyncio
+import http.client
+import json
+import socket
+import threading
+import unittest
+
+from src.async_server import AsyncWSGIServer
+
+
+def echo_app(environ, start_response):
+    body = environ["wsgi.input"].read()
+    payload = {
+        "method": environ["REQUEST_METHOD"],
+        "path": environ["PATH_INFO"],
+        "query": environ["QUERY_STRING"],
+        "body": body.decode("utf-8"),
+        "content_length": environ.get("CONTENT_LENGTH"),
+        "header": environ.get("HTTP_X_TEST"),
+    }
+    start_response("200 OK", [("Content-Type", "application/json")])
+    return [json.dumps(payload).encode("utf-8")]
+
+
+def stream_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return (f"line {number}\n".encode("ascii") for number in range(3))
+
+
+def failing_app(environ, start_response):
+    raise RuntimeError("boom")
+
+
+class AsyncServerTestCase(unittest.TestCase):
+    """Run a server on its own event loop thread."""
+
+    app = staticmethod(echo_app)
+
+    def setUp(self):
+        self.server = AsyncWSGIServer(
+            self.app, host="127.0.0.1", port=0, threads=2, graceful_timeout=5
+        )
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.server.start())
+            started.set()
+            self.loop.run_until_complete(self.server._stopping.wait())
+            self.loop.run_until_complete(self.server.shutdown())
+            self.loop.close()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        self.assertTrue(started.wait(5))
+        self.addCleanup(self._stop)
+
+    def _stop(self):
+        self.loop.call_soon_threadsafe(self.server.stop)
+        self.thread.join(10)
+
+    def connect(self):
+        connection = http.client.HTTPConnection(
+            "127.0.0.1", self.server.port, timeout=5
+        )
+        self.addCleanup(connection.close)
+        return connection
+
+    def get_json(self, connection, method, path, **kwargs):
+        connection.request(method, path, **kwargs)
+        response = connection.getresponse()
+        return response, json.loads(response.read())
+
+
+class KeepAliveTestCase(AsyncServerTestCase):
+    def test_requests_share_a_connection(self):
+        connection = self.connect()
+        response, payload = self.get_json(connection, "GET", "/a%20b?x=1")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Connection"), "keep-alive")
+        self.assertEqual(payload["path"], "/a b")
+        self.assertEqual(payload["query"], "x=1")
+        local_port = connection.sock.getsockname()[1]
+
+        response, payload = self.get_json(
+            connection, "POST", "/post", body=b'{"a": 1}', headers={"X-Test": "yes"}
+        )
+        self.assertEqual(connection.sock.getsockname()[1], local_port)
+        self.assertEqual(payload["body"], '{"a": 1}')
+        self.assertEqual(payload["content_length"], "8")
+        self.assertEqual(payload["header"], "yes")
+
+    def test_chunked_request_body(self):
+        connection = self.connect()
+        connection.request(
+            "POST", "/upload", body=iter([b"hello ", b"world"]), encode_chunked=True
+        )
+        payload = json.loads(connection.getresponse().read())
+        self.assertEqual(payload["body"], "hello world")
+        self.assertEqual(payload["content_length"], "11")
+
+    def test_connection_close_is_honoured(self):
+        connection = self.connect()
+        connection.request("GET", "/", headers={"Connection": "close"})
+        response = connection.getresponse()
+        response.read()
+        self.assertEqual(response.getheader("Connection"), "close")
+
+    def test_many_idle_connections_are_held(self):
+        sockets = []
+        self.addCleanup(lambda: [sock.close() for sock in sockets])
+        for _ in range(200):
+            sock = socket.create_connection(("127.0.0.1", self.server.port), timeout=5)
+            sock.sendall(b"GET /held HTTP/1.1\r\nHost: test\r\n\r\n")
+            sockets.append(sock)
+        for sock in sockets:
+            self.assertTrue(sock.recv(65536).startswith(b"HTTP/1.1 200 OK"))
+        self.assertEqual(self.server.connections, 200)
+
+        response, _ = self.get_json(self.connect(), "GET", "/")
+        self.assertEqual(response.status, 200)
+
+    def test_malformed_request_is_rejected(self):
+        with socket.create_connection(
+            ("127.0.0.1", self.server.port), timeout=5
+        ) as sock:
+            sock.sendall(b"NONSENSE\r\n\r\n")
+            self.assertTrue(sock.recv(65536).startswith(b"HTTP/1.1 400"))
+
+    def send_raw(self, data):
+        with socket.create_connection(
+            ("127.0.0.1", self.server.port), timeout=5
+        ) as sock:
+            sock.sendall(data)
+            response = b""
+            while chunk := sock.recv(65536):
+                response += chunk
+        return response
+
+    def test_chunked_request_with_content_length_is_rejected(self):
+        response = self.send_raw(
+            b"POST /smuggle HTTP/1.1\r\nHost: test\r\nContent-Length: 4\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n0\r\n\r\nGET /next HTTP/1.1\r\n"
+            b"Host: test\r\n\r\n"
+        )
+        self.assertTrue(response.startswith(b"HTTP/1.1 400"))
+        self.assertIn(b"Connection: close", response)
+        self.assertEqual(response.count(b"HTTP/1.1 "), 1)
+
+    def test_ambiguous_framing_is_rejected(self):
+        """Requests a proxy could frame differently get 400 and no app call."""
+        next_request = b"GET /next HTTP/1.1\r\nHost: test\r\n\r\n"
+        heads = [
+            b"Content-Length: 5\r\nContent-Length: 5\r\n\r\nhello",
+            b"Content-Length: 5\r\nContent-Length: 0\r\n\r\nhello",
+            b"Content-Length: +5\r\n\r\nhello",
+            b"Content-Length: 0_5\r\n\r\nhello",
+            b"Content-Length: 5, 5\r\n\r\nhello",
+            b"Content-Length: -0\r\n\r\n",
+            b"Content-Length:\r\n\r\n",
+            b"Transfer-Encoding: chunked\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"0\r\n\r\n",
+            b"Transfer-Encoding: chunked\r\n\r\n0x5\r\nhello\r\n0\r\n\r\n",
+            b"Transfer-Encoding: chunked\r\n\r\n+5\r\nhello\r\n0\r\n\r\n",
+            b"Transfer-Encoding: chunked\r\n\r\n 5\r\nhello\r\n0\r\n\r\n",
+            b"Transfer-Encoding: chunked\r\n\r\n5\r\nhelloXX0\r\n\r\n",
+        ]
+        for head in heads:
+            with self.subTest(head=head):
+                response = self.send_raw(
+                    b"POST /smuggle HTTP/1.1\r\nHost: test\r\n" + head + next_request
+                )
+                self.assertTrue(response.startswith(b"HTTP/1.1 400"), response)
+                self.assertEqual(response.count(b"HTTP/1.1 "), 1)
+
+    def test_chunk_extensions_and_hex_sizes_are_accepted(self):
+        response = self.send_raw(
+            b"POST /upload HTTP/1.1\r\nHost: test\r\nConnection: close\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+            b"A;name=value\r\nhello worl\r\n1\r\nd\r\n0\r\n\r\n"
+        )
+        self.assertTrue(response.startswith(b"HTTP/1.1 200"))
+        payload = json.loads(response.split(b"\r\n\r\n", 1)[1])
+        self.assertEqual(payload["body"], "hello world")
+        self.assertEqual(payload["content_length"], "11")
+
+
+class StreamingTestCase(AsyncServerTestCase):
+    app = staticmethod(stream_app)
+
+    def test_generator_is_sent_chunked(self):
+        connection = self.connect()
+        connection.request("GET", "/stream")
+        response = connection.getresponse()
+        self.assertEqual(response.getheader("Transfer-Encoding"), "chunked")
+        self.assertEqual(response.read(), b"line 0\nline 1\nline 2\n")
+
+        connection.request("GET", "/stream")
+        self.assertEqual(connection.getresponse().read(), b"line 0\nline 1\nline 2\n")
+
+
+class ErrorTestCase(AsyncServerTestCase):
+    app = staticmethod(failing_app)
+
+    def test_app_exception_returns_500(self):
+        connection = self.connect()
+        with self.assertLogs("src.async_server", level="ERROR"):
+            connection.request("GET", "/")
+            response = connection.getresponse()
+            response.read()
+        self.assertEqual(response.status, 500)
+
+
+class ApiServerTestCase(AsyncServerTestCase):
+    """The Flask app behaves the same behind the asyncio front end."""
+
+    @staticmethod
+    def app(environ, start_response):
+        from src.api_server import app
+
+        return app(environ, start_response)
+
+    def test_health_and_auth(self):
+        connection = self.connect()
+        response, payload = self.get_json(connection, "GET", "/health")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(payload["status"], "healthy")
+
+        response, _ = self.get_json(connection, "GET", "/api/v1/corporate-data")
+        self.assertEqual(response.status, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""Tests for the API benchmark's baseline comparison."""
+
+import unittest
+
+from benchmarks.bench_api import calibrate, compare
+
+
+def row(p95_ms=10.0, throughput=100.0, errors=0):
+    return {"p95_ms": p95_ms, "throughput": throughput, "errors": errors}
+
+
+class CompareTestCase(unittest.TestCase):
+    """Test cases for regression detection against a baseline."""
+
+    def setUp(self):
+        self.baseline = {"1000": {"health": row(), "export": row(40.0, 25.0)}}
+
+    def test_equal_results_pass(self):
+        self.assertEqual(compare(self.baseline, self.baseline, 0.5), [])
+
+    def test_latency_and_throughput_regressions(self):
+        results = {"1000": {"health": row(p95_ms=20.0, throughput=50.0)}}
+        regressions = compare(results, self.baseline, 0.5)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn("health @ 1000: p95 20.00ms", regressions[0])
+        self.assertIn("50 req/s", regressions[1])
+
+    def test_small_absolute_slowdowns_are_noise(self):
+        baseline = {"10": {"health": row(p95_ms=0.2, throughput=5000.0)}}
+        results = {"10": {"health": row(p95_ms=0.6, throughput=2000.0)}}
+        self.assertEqual(compare(results, baseline, 0.5, min_delta_ms=1.0), [])
+
+    def test_new_errors_fail(self):
+        results = {"1000": {"health": row(errors=3)}}
+        self.assertEqual(
+            compare(results, self.baseline, 0.5),
+            ["health @ 1000: 3 errors vs baseline 0"],
+        )
+
+    def test_routes_missing_from_the_baseline_are_skipped(self):
+        results = {"1000": {"new-route": row(p95_ms=500.0)}, "5": {"health": row()}}
+        self.assertEqual(compare(results, self.baseline, 0.5), [])
+
+    def test_slower_host_is_scaled(self):
+        """Everything twice as slow on a host calibrated twice as slow passes."""
+        results = {"1000": {"health": row(20.0, 50.0), "export": row(80.0, 12.5)}}
+        self.assertEqual(len(compare(results, self.baseline, 0.5)), 4)
+        self.assertEqual(compare(results, self.baseline, 0.5, scale=2.0), [])
+        # A faster host must still meet the baseline's relative cost.
+        self.assertEqual(len(compare(self.baseline, self.baseline, 0.5, scale=0.4)), 4)
+
+    def test_calibrate(self):
+        self.assertGreater(calibrate(rounds=1), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""Tests for the columnar company universe."""
+
+import math
+import unittest
+
+from benchmarks.synthetic import generate_universe, make_ticker
+from src.columnar import UNCLASSIFIED, CompanyColumns, top_counts
+from src.indexes import AssetIndex
+
+STRUCTURE = {
+    "Technology": [
+        {"ticker": "MSFT", "name": "Microsoft"},
+        {"ticker": "GOOG", "name": "Alphabet"},
+        {"ticker": "NEW", "name": "No financials"},
+    ],
+    "Financial": [
+        {"ticker": "JPM", "name": "JPMorgan"},
+        {"ticker": "msft", "name": "Listed twice"},
+    ],
+    "Empty": [],
+}
+CORPORATE_DATA = {
+    "AUM": "$5.2B",
+    "MSFT": {"market_cap": 2000, "revenue": 200},
+    "GOOG": {"market_cap": 1500, "revenue": "n/a"},
+    "JPM": {"market_cap": 500, "revenue": 100},
+    "XOM": {"market_cap": 400, "revenue": None},
+}
+
+
+class CompanyColumnsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.columns = CompanyColumns(STRUCTURE, CORPORATE_DATA)
+
+    def test_rows_join_structure_and_financials(self):
+        columns = self.columns
+        self.assertEqual(columns.tickers, ["MSFT", "GOOG", "NEW", "JPM", "msft", "XOM"])
+        self.assertEqual(columns.structure_rows, 5)
+        self.assertEqual(columns.sector_codes.tolist(), [0, 0, 0, 1, 1, UNCLASSIFIED])
+        self.assertEqual(
+            columns.market_cap[[0, 1, 3, 4, 5]].tolist(), [2000, 1500, 500, 2000, 400]
+        )
+        self.assertTrue(math.isnan(columns.market_cap[2]))
+        self.assertTrue(math.isnan(columns.revenue[1]))
+        self.assertEqual(columns.asset_rows.tolist(), [0, 1, 3, 5])
+        self.assertEqual(columns.row("xom"), 5)
+        self.assertFalse(columns.market_cap.flags.writeable)
+
+    def test_group_by_sector(self):
+        self.assertEqual(
+            self.columns.sector_counts(), {"Technology": 3, "Financial": 2, "Empty": 0}
+        )
+        aggregates = self.columns.group_by_sector("market_cap")
+        self.assertEqual(aggregates.known.tolist(), [2, 2, 0])
+        self.assertEqual(aggregates.total.tolist(), [3500, 2500, 0])
+        self.assertEqual(aggregates.mean[:2].tolist(), [1750, 1250])
+        self.assertTrue(math.isnan(aggregates.mean[2]))
+
+    def test_filters(self):
+        mask = self.columns.select(min_market_cap=500, max_market_cap=1500)
+        self.assertEqual(mask.nonzero()[0].tolist(), [1, 3])
+        mask = self.columns.select(sectors=["Financial", "Unknown"])
+        self.assertEqual(mask.nonzero()[0].tolist(), [3, 4])
+
+    def test_top_n_breaks_ties_by_row(self):
+        self.assertEqual(self.columns.top_n("market_cap", 3).tolist(), [0, 4, 1])
+        self.assertEqual(
+            self.columns.top_n("market_cap", 2, descending=False).tolist(), [5, 3]
+        )
+        self.assertEqual(self.columns.top_n("revenue", 10).tolist(), [0, 4, 3])
+        self.assertEqual(
+            top_counts([1, 3, 3, 2], ["a", "b", "c", "d"], 3),
+            [("b", 3), ("c", 3), ("d", 2)],
+        )
+
+
+class AssetIndexColumnsTestCase(unittest.TestCase):
+    def test_columnar_sort_matches_generic(self):
+        structure, corporate_data = generate_universe(2000)
+        corporate_data["ZZZZ"] = {"market_cap": None, "revenue": 1}
+        corporate_data["AAAA"] = {
+            "market_cap": corporate_data[make_ticker(0)]["market_cap"],
+        }
+        generic = AssetIndex(corporate_data)
+        columnar = AssetIndex(
+            corporate_data, columns=CompanyColumns(structure, corporate_data)
+        )
+        for field in AssetIndex.SORT_FIELDS:
+            expected, actual = generic.by_field[field], columnar.by_field[field]
+            self.assertEqual(actual.order, expected.order, field)
+            self.assertEqual(actual.keys, expected.keys, field)
+            self.assertEqual(actual.ties, expected.ties, field)
+            self.assertEqual(actual.rank, expected.rank, field)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""Tests for the hot-reloading data snapshot store."""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from src.api_server import load_json_file
+from src.data_store import FILE_CONTENT, DataStore, file_store
+from data_fixtures import override_data
+
+
+class DataStoreTestCase(unittest.TestCase):
+    """Test cases for DataStore snapshots and reloads."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "structure.json")
+        self._write({"Technology": [{"ticker": "MSFT"}]})
+        self.store = DataStore(
+            {"corporate_structure": self.path},
+            loader=load_json_file,
+            check_interval=0.0,
+        )
+
+    def tearDown(self):
+        self.store.stop_watcher()
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, content, raw=None):
+        with open(self.path, "w", encoding="utf-8") as file_handle:
+            file_handle.write(raw if raw is not None else json.dumps(content))
+        # Make sure the mtime moves even on coarse-grained filesystems.
+        stamp = time.time() + getattr(self, "_bump", 0)
+        self._bump = getattr(self, "_bump", 0) + 1
+        os.utime(self.path, (stamp, stamp))
+
+    def test_snapshot_is_parsed_once(self):
+        """Repeated reads return the same snapshot object."""
+        first = self.store.snapshot()
+        second = self.store.snapshot()
+        self.assertIs(first, second)
+        self.assertEqual(
+            first.get("corporate_structure")["Technology"][0]["ticker"], "MSFT"
+        )
+
+    def test_reload_on_change_bumps_version(self):
+        """A modified file produces a new snapshot and version."""
+        first = self.store.snapshot()
+        seen = []
+        self.store.subscribe(seen.append)
+
+        self._write({"Financial": [{"ticker": "JPM"}]})
+        second = self.store.refresh(wait=True)
+
+        self.assertNotEqual(first.version, second.version)
+        self.assertIn("Financial", second.get("corporate_structure"))
+        self.assertEqual(seen, [second])
+        # Readers holding the old snapshot still see consistent data.
+        self.assertIn("Technology", first.get("corporate_structure"))
+
+    def test_lazy_derived_structures_wait_for_first_use(self):
+        """Lazy builders run on first access or when explicitly requested."""
+        built = []
+        self.store.register_derived("eager", lambda snapshot: built.append("eager"))
+        self.store.register_derived(
+            "lazy", lambda snapshot: built.append("lazy") or len(built), lazy=True
+        )
+        snapshot = self.store.snapshot()
+        self.assertEqual(built, ["eager"])
+        self.assertEqual(snapshot.derived("lazy"), 2)
+        self.assertEqual(snapshot.derived("lazy"), 2)
+
+        self._write({"Financial": [{"ticker": "JPM"}]})
+        self.store.refresh(wait=True).build_derived(include_lazy=True)
+        self.assertEqual(built, ["eager", "lazy", "eager", "lazy"])
+
+    def test_partial_write_keeps_previous_snapshot(self):
+        """A file that does not parse never replaces a good snapshot."""
+        first = self.store.snapshot()
+        self._write(None, raw='{"Technology": [')
+        self.assertIs(self.store.refresh(wait=True), first)
+
+        self._write({"Energy": []})
+        self.assertIn(
+            "Energy", self.store.refresh(wait=True).get("corporate_structure")
+        )
+
+    def test_background_reload(self):
+        """Readers get the old snapshot until the background swap completes."""
+        first = self.store.snapshot()
+        self._write({"Energy": []})
+
+        self.assertIs(self.store.snapshot(), first)
+        deadline = time.time() + 5
+        while self.store.snapshot() is first and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertIn("Energy", self.store.snapshot().get("corporate_structure"))
+
+    def test_version_is_process_independent(self):
+        """Two stores over the same files agree on the version."""
+        other = DataStore({"corporate_structure": self.path}, loader=load_json_file)
+        self.assertEqual(other.version, self.store.version)
+
+    def test_override_restores_file_snapshot(self):
+        """Overrides publish in-memory data and restore on exit."""
+        original = self.store.snapshot()
+        with override_data(self.store, corporate_structure={}) as snapshot:
+            self.assertEqual(self.store.snapshot().get("corporate_structure"), {})
+            self.assertNotEqual(snapshot.version, original.version)
+        self.assertIs(self.store.snapshot(), original)
+
+    def test_file_store_is_shared_and_lazy(self):
+        """One store per file, which reads nothing until first used."""
+        store = file_store(self.path)
+        same_file = os.path.join(self.tmp_dir, ".", "structure.json")
+        self.assertIs(file_store(same_file), store)
+        os.remove(self.path)
+        with self.assertRaises(FileNotFoundError):
+            store.snapshot()
+        self._write({"Energy": []})
+        self.assertEqual(store.snapshot().get(FILE_CONTENT), {"Energy": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
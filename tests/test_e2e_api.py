@@ -1,7 +1,7 @@
 import unittest
 import json
-from unittest.mock import patch
-from src.api_server import app
+from src.api_server import app, data_store
+from data_fixtures import override_data
 
 class EndToEndApiTestCase(unittest.TestCase):
     def setUp(self):
@@ -31,14 +31,13 @@ class EndToEndApiTestCase(unittest.TestCase):
                             company_detail = json.loads(response.data)
                             self.assertIsInstance(company_detail, dict)
 
-    @patch('src.api_server.load_json_file')
-    def test_real_assets_endpoint(self, mock_load):
+    def test_real_assets_endpoint(self):
         mock_data = {
             'MSFT': {'market_cap': 1000, 'revenue': 500, 'last_updated': '2023-01-01'},
             'GOOG': {'market_cap': 2000, 'revenue': 800, 'last_updated': '2023-01-01'}
         }
-        mock_load.return_value = mock_data
-        response = self.app.get('/api/real-assets', headers=self.headers)
+        with override_data(data_store, corporate_data=mock_data):
+            response = self.app.get('/api/real-assets', headers=self.headers)
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
         self.assertIsInstance(data, dict)
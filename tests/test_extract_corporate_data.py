@@ -1,8 +1,12 @@
 import unittest
 from unittest.mock import patch, mock_open
+import json
 import sys
 import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import subprocess
+import tempfile
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.insert(0, ROOT_DIR)
 import extract_corporate_data as ecd
 
 class TestExtractCorporateData(unittest.TestCase):
@@ -44,7 +48,24 @@ Risk details.
     def test_save_json(self, mock_file):
         data = {"key": "value"}
         ecd.save_json(data, "test.json")
-        mock_file.assert_called_with("test.json", "w")
+        mock_file.assert_called_with("test.json", "w", encoding="utf-8")
+
+    def test_save_json_writes_utf8(self):
+        data = {'Company': 'Nestlé Société Générale'}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'data.json')
+            # Save from an interpreter whose locale encoding is ASCII.
+            env = dict(os.environ, LC_ALL='C', LANG='C', PYTHONUTF8='0')
+            script = (
+                'import extract_corporate_data as e; '
+                f'e.save_json({ascii(data)}, {ascii(path)})'
+            )
+            subprocess.run(
+                [sys.executable, '-c', script],
+                cwd=ROOT_DIR, env=env, check=True, capture_output=True,
+            )
+            with open(path, 'rb') as f:
+                self.assertEqual(json.loads(f.read().decode('utf-8')), data)
 
     @patch('builtins.open', new_callable=mock_open)
     @patch('re.search')
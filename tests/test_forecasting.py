@@ -0,0 +1,90 @@
+"""Tests for the batched trend forecasts."""
+
+import unittest
+
+import numpy as np
+
+from benchmarks.bench_forecast import loop_forecasts, max_relative_difference
+from benchmarks.synthetic import generate_history
+from src.forecasting import TrendForecaster, history_matrix, record_period
+
+HISTORY = {
+    "periods": ["2024-Q1", "2024-Q2", "2024-Q3", "2024-Q4"],
+    "tickers": {
+        "MSFT": {"revenue": [10, 20, None, 40], "market_cap": [100, 100, 100]},
+        "JPM": {"revenue": [5], "market_cap": []},
+        "msft": {"revenue": [1, 1, 1, 1]},
+    },
+}
+
+
+class TrendForecasterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.forecaster = TrendForecaster(HISTORY)
+
+    def test_history_matrix_pads_ragged_series(self):
+        matrix = history_matrix([[1, None], [], [1, 2, 3]], 2)
+        np.testing.assert_array_equal(matrix, [[1, np.nan], [np.nan, np.nan], [1, 2]])
+
+    def test_predict_many(self):
+        forecasts = self.forecaster.predict_many(["msft", "JPM", "XOM"], [1, 2])
+        # Horizons count from the last known value of each series.
+        self.assertEqual(
+            forecasts["msft"], {"revenue": [50.0, 60.0], "market_cap": [100.0, 100.0]}
+        )
+        self.assertEqual(
+            forecasts["JPM"], {"revenue": [5.0, 5.0], "market_cap": [None, None]}
+        )
+        self.assertIsNone(forecasts["XOM"])
+        self.assertEqual(
+            self.forecaster.predict_many(["MSFT"])["MSFT"]["revenue"], [50.0]
+        )
+
+    def test_numpy_integer_horizon(self):
+        forecasts = self.forecaster.predict_many(["MSFT"], np.int64(2))
+        self.assertEqual(forecasts["MSFT"]["revenue"], [60.0])
+
+    def test_matches_one_regression_per_series(self):
+        history = generate_history(300, periods=12)
+        horizons = [1, 3]
+        expected = loop_forecasts(history, horizons)
+        actual = TrendForecaster(history).predict_many(history["tickers"], horizons)
+        self.assertLess(max_relative_difference(expected, actual), 1e-9)
+
+
+class RecordPeriodTestCase(unittest.TestCase):
+    def test_appends_and_pads_series(self):
+        history = record_period(
+            None, "2025-Q1", {"MSFT": {"revenue": 10, "market_cap": "100"}, "AUM": "x"}
+        )
+        history = record_period(history, "2025-Q2", {"JPM": {"revenue": 5}})
+        self.assertEqual(history["periods"], ["2025-Q1", "2025-Q2"])
+        self.assertEqual(
+            history["tickers"],
+            {
+                "MSFT": {"revenue": [10.0], "market_cap": [100.0]},
+                "JPM": {"revenue": [None, 5.0], "market_cap": [None, None]},
+            },
+        )
+        forecasts = TrendForecaster(history).predict_many(["JPM"])
+        self.assertEqual(forecasts["JPM"]["revenue"], [5.0])
+
+    def test_latest_period_is_replaced(self):
+        first = record_period(None, "2025-Q1", {"MSFT": {"revenue": 10}})
+        second = record_period(first, "2025-Q1", {"JPM": {"revenue": 5}})
+        self.assertEqual(first["tickers"]["MSFT"]["revenue"], [10.0])
+        self.assertEqual(second["periods"], ["2025-Q1"])
+        self.assertEqual(second["tickers"]["MSFT"], {"revenue": [], "market_cap": []})
+        self.assertEqual(second["tickers"]["JPM"]["revenue"], [5.0])
+
+    def test_older_period_is_rejected(self):
+        history = record_period(None, "2025-Q1", {})
+        history = record_period(history, "2025-Q2", {})
+        with self.assertRaises(ValueError):
+            record_period(history, "2025-Q1", {})
+        with self.assertRaises(ValueError):
+            record_period(history, "2024-Q4", {})
+
+
+if __name__ == "__main__":
+    unittest.main()
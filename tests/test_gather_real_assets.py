@@ -40,7 +40,7 @@ class TestGatherRealAssets(unittest.TestCase):
     def test_save_to_json(self, mock_file):
         data = [{"company": "Test"}]
         gra.save_to_json(data, "test.json")
-        mock_file.assert_called_with("test.json", "w")
+        mock_file.assert_called_with("test.json", "w", encoding="utf-8")
 
     @patch('builtins.open', new_callable=mock_open)
     def test_save_to_csv(self, mock_file):
@@ -0,0 +1,207 @@
+"""Tests for the in-memory lookup indexes."""
+
+import unittest
+
+from src.indexes import AssetIndex, SectorIndex, TickerIndex
+
+
+class TickerIndexTestCase(unittest.TestCase):
+    """Test cases for TickerIndex lookups."""
+
+    def setUp(self):
+        self.structure = {
+            "Technology": [
+                {"ticker": "MSFT", "name": "Microsoft Corporation"},
+                {"ticker": "MSTR", "name": "MicroStrategy"},
+                {"name": "No ticker"},
+            ],
+            "Financial": [
+                {"ticker": "JPM", "name": "JPMorgan Chase & Co."},
+                {"ticker": "msft", "name": "Duplicate"},
+            ],
+        }
+        self.index = TickerIndex(self.structure)
+
+    def test_exact_lookup_is_case_insensitive(self):
+        """Lookups ignore case and return the sector with the company."""
+        sector, company = self.index.get("msft")
+        self.assertEqual(sector, "Technology")
+        self.assertIs(company, self.structure["Technology"][0])
+        self.assertIn("Jpm", self.index)
+        self.assertIsNone(self.index.get("INVALID"))
+
+    def test_first_occurrence_wins(self):
+        """Duplicate tickers resolve to the first company seen."""
+        self.assertEqual(self.index.get("MSFT")[1]["name"], "Microsoft Corporation")
+        self.assertEqual(len(self.index), 3)
+
+    def test_prefix_search(self):
+        """Prefix search returns matches in ticker order up to the limit."""
+        tickers = [company["ticker"] for _, company in self.index.prefix("ms")]
+        self.assertEqual(tickers, ["MSFT", "MSTR"])
+        self.assertEqual(len(self.index.prefix("MS", limit=1)), 1)
+        self.assertEqual(self.index.prefix("ZZ"), [])
+
+    def test_empty_structure(self):
+        """A missing structure produces an empty index."""
+        index = TickerIndex(None)
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.prefix(""), [])
+
+
+class AssetIndexTestCase(unittest.TestCase):
+    """Test cases for AssetIndex filtering and ordering."""
+
+    def setUp(self):
+        self.data = {
+            "Executive Summary": "Narrative fields are not assets",
+            "MSFT": {"market_cap": 3000, "revenue": 200, "last_updated": "2025-01-01"},
+            "GOOG": {"market_cap": 2000, "revenue": 300},
+            "JPM": {"market_cap": 1000, "revenue": 100},
+            "BAC": {"market_cap": 2000, "revenue": None},
+            "NEW": {"revenue": 50},
+        }
+        self.index = AssetIndex(self.data)
+
+    @staticmethod
+    def symbols(selection):
+        return [record["symbol"] for record in selection[0 : len(selection)]]
+
+    def brute_force(self, sort_by, descending, low, high):
+        records = list(self.index.records)
+        if low is not None or high is not None:
+            records = [
+                r
+                for r in records
+                if r["market_cap"] is not None
+                and (low is None or r["market_cap"] >= low)
+                and (high is None or r["market_cap"] <= high)
+            ]
+        if sort_by in AssetIndex.SORT_FIELDS:
+            records.sort(key=lambda r: r["symbol"])
+            records.sort(key=lambda r: (r[sort_by] is None, r[sort_by]))
+            if descending:
+                records.reverse()
+        return [r["symbol"] for r in records]
+
+    def test_universe_discovered_from_data(self):
+        """Only object-valued entries become assets."""
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(
+            self.symbols(self.index.select(sort_by="unknown")),
+            ["MSFT", "GOOG", "JPM", "BAC", "NEW"],
+        )
+
+    def test_matches_filter_then_sort(self):
+        """Every sort/filter combination matches a filter-then-sort scan."""
+        for sort_by in ("symbol", "market_cap", "revenue", "unknown"):
+            for descending in (False, True):
+                for low, high in (
+                    (None, None),
+                    (1500, None),
+                    (None, 2000),
+                    (1000, 2000),
+                ):
+                    selection = self.index.select(sort_by, descending, low, high)
+                    expected = self.brute_force(sort_by, descending, low, high)
+                    self.assertEqual(self.symbols(selection), expected)
+                    self.assertEqual(len(selection), len(expected))
+
+    def test_page_slices(self):
+        """Slices return only the requested window."""
+        selection = self.index.select("market_cap", True)
+        self.assertEqual([r["symbol"] for r in selection[1:3]], ["MSFT", "GOOG"])
+        self.assertEqual(selection[10:20], [])
+
+    def test_large_universe_selective_filter(self):
+        """Selective and broad filters agree with a brute-force scan."""
+        data = {
+            f"T{i:05d}": {
+                "market_cap": (i * 7919) % 10007,
+                "revenue": (i * 104729) % 997,
+            }
+            for i in range(5000)
+        }
+        index = AssetIndex(data)
+        self.index = index
+        for low, high in ((10, 20), (100, 9000)):
+            selection = index.select("revenue", False, low, high)
+            self.assertEqual(
+                self.symbols(selection), self.brute_force("revenue", False, low, high)
+            )
+
+    def iterate(self, index, sort_by, descending, low=None, high=None, per_page=2):
+        symbols, key = [], None
+        while True:
+            selection = index.select(sort_by, descending, low, high)
+            page = selection.page_after(key, per_page)
+            if not page:
+                return symbols
+            symbols.extend(record["symbol"] for record in page)
+            key = selection.key_of(page[-1])
+
+    def test_keyset_pages_match_offset_order(self):
+        """Walking keyset pages yields the same order as offset slicing."""
+        for sort_by in AssetIndex.SORT_FIELDS:
+            for descending in (False, True):
+                for low, high in ((None, None), (1500, None), (1000, 2000)):
+                    self.assertEqual(
+                        self.iterate(self.index, sort_by, descending, low, high),
+                        self.brute_force(sort_by, descending, low, high),
+                    )
+
+    def test_keyset_resumes_across_refresh(self):
+        """A cursor from an old version resumes at the same sort position."""
+        selection = self.index.select("market_cap")
+        first_page = selection.page_after(None, 2)
+        self.assertEqual([r["symbol"] for r in first_page], ["JPM", "BAC"])
+        key = selection.key_of(first_page[-1])
+
+        refreshed = dict(self.data)
+        del refreshed["BAC"]
+        refreshed["AAA"] = {"market_cap": 500}
+        refreshed["ZZZ"] = {"market_cap": 2500}
+        page = AssetIndex(refreshed).select("market_cap").page_after(key, 3)
+        self.assertEqual([r["symbol"] for r in page], ["GOOG", "ZZZ", "MSFT"])
+
+
+class SectorIndexTestCase(unittest.TestCase):
+    """Test cases for per-sector keyset ordering."""
+
+    def test_sector_selection_is_ticker_ordered(self):
+        """Companies are ordered by ticker and unknown sectors return None."""
+        index = SectorIndex(
+            {"Technology": [{"ticker": "MSFT"}, {"ticker": "GOOG"}, {"ticker": "AAPL"}]}
+        )
+        selection = index.select("Technology")
+        page = selection.page_after(None, 2)
+        self.assertEqual([c["ticker"] for c in page], ["AAPL", "GOOG"])
+        rest = selection.page_after(selection.key_of(page[-1]), 2)
+        self.assertEqual([c["ticker"] for c in rest], ["MSFT"])
+        self.assertIsNone(index.select("Energy"))
+
+    def test_repeated_and_missing_tickers_are_not_skipped(self):
+        """Records sharing a key are told apart by their position."""
+        companies = [
+            {"ticker": "MSFT", "name": "a"},
+            {"name": "b"},
+            {"ticker": "AAPL", "name": "c"},
+            {"ticker": "MSFT", "name": "d"},
+            {"name": "e"},
+            {"ticker": "MSFT", "name": "f"},
+        ]
+        selection = SectorIndex({"Technology": companies}).select("Technology")
+        names, key = [], None
+        while True:
+            page = selection.page_after(key, 1)
+            if not page:
+                break
+            names.append(page[0]["name"])
+            key = selection.key_of(page[0])
+        self.assertEqual(names, ["c", "a", "d", "f", "b", "e"])
+        self.assertEqual(names, [c["name"] for c in selection[0 : len(selection)]])
+        self.assertEqual(selection.key_of(companies[3]), ("MSFT", "MSFT", 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
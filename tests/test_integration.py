@@ -1,10 +1,10 @@
 import unittest
 import json
-from unittest.mock import patch
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.api_server import app
+from src.api_server import app, data_store
+from data_fixtures import override_data
 
 
 class IntegrationTestCase(unittest.TestCase):
@@ -36,24 +36,22 @@ class IntegrationTestCase(unittest.TestCase):
                             company = json.loads(response.data)
                             self.assertIsInstance(company, dict)
 
-    @patch('src.api_server.load_json_file')
-    def test_real_assets_flow(self, mock_load):
+    def test_real_assets_flow(self):
         mock_data = {
             'MSFT': {'market_cap': 1000, 'revenue': 500, 'last_updated': '2023-01-01'},
             'GOOG': {'market_cap': 2000, 'revenue': 800, 'last_updated': '2023-01-01'}
         }
-        mock_load.return_value = mock_data
-        response = self.app.get('/api/real-assets', headers=self.headers)
+        with override_data(data_store, corporate_data=mock_data):
+            response = self.app.get('/api/real-assets', headers=self.headers)
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
         self.assertEqual(data['status'], 'success')
         self.assertIn('data', data)
         self.assertIsInstance(data['data'], list)
 
-    @patch('src.api_server.load_json_file')
-    def test_edge_case_empty_corporate_structure(self, mock_load):
-        mock_load.return_value = {}
-        response = self.app.get('/api/corporate-structure', headers=self.headers)
+    def test_edge_case_empty_corporate_structure(self):
+        with override_data(data_store, corporate_structure={}):
+            response = self.app.get('/api/corporate-structure', headers=self.headers)
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
         self.assertEqual(data['status'], 'success')
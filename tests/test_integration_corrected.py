@@ -1,10 +1,10 @@
 import unittest
 import json
-from unittest.mock import patch
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.api_server import app
+from src.api_server import app, data_store
+from data_fixtures import override_data
 
 
 class IntegrationTestCase(unittest.TestCase):
@@ -48,10 +48,9 @@ class IntegrationTestCase(unittest.TestCase):
         self.assertIn('total', data)
         self.assertIn('total_pages', data)
 
-    @patch('src.api_server.load_json_file')
-    def test_edge_case_empty_corporate_structure(self, mock_load):
-        mock_load.return_value = {}
-        response = self.app.get('/api/corporate-structure', headers=self.headers)
+    def test_edge_case_empty_corporate_structure(self):
+        with override_data(data_store, corporate_structure={}):
+            response = self.app.get('/api/corporate-structure', headers=self.headers)
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
         self.assertEqual(data['status'], 'success')
@@ -0,0 +1,64 @@
+"""Tests for the pluggable JSON provider."""
+
+import json
+import unittest
+
+from flask import Flask
+
+from src import json_provider
+
+
+class JsonProviderTestCase(unittest.TestCase):
+    """Test cases for backend selection and encoding parity."""
+
+    def setUp(self):
+        self.payload = {
+            "b": [1, 2.5, None, True],
+            "a": {"ticker": "MSFT", "name": "Société"},
+        }
+
+    def test_backends_agree(self):
+        """Both backends round-trip to the same data."""
+        for backend in (json_provider.BACKEND_STDLIB, json_provider.BACKEND_ORJSON):
+            encoded = json_provider.dumps_bytes(
+                self.payload, sort_keys=True, backend=backend
+            )
+            self.assertTrue(encoded.startswith(b'{"a":'))
+            self.assertEqual(
+                json_provider.loads(encoded, backend=backend), self.payload
+            )
+
+    def test_unknown_backend_falls_back_to_stdlib(self):
+        """Unknown backend names resolve to the stdlib."""
+        self.assertEqual(
+            json_provider.resolve_backend("simdjson"), json_provider.BACKEND_STDLIB
+        )
+
+    def test_oversized_integers_fall_back(self):
+        """Values orjson cannot encode are handled by the stdlib."""
+        encoded = json_provider.dumps_bytes({"value": 2**70})
+        self.assertEqual(json.loads(encoded)["value"], 2**70)
+
+    def test_decode_errors_are_json_decode_errors(self):
+        """Invalid input raises json.JSONDecodeError on every backend."""
+        for backend in (json_provider.BACKEND_STDLIB, json_provider.BACKEND_ORJSON):
+            with self.assertRaises(json.JSONDecodeError):
+                json_provider.loads(b'{"truncated": [', backend=backend)
+
+    def test_flask_provider(self):
+        """The provider serves compact, key-sorted jsonify responses."""
+        app = Flask(__name__)
+        app.json = json_provider.FastJSONProvider(app)
+        with app.app_context():
+            response = app.json.response(self.payload)
+        self.assertEqual(response.mimetype, "application/json")
+        self.assertTrue(response.data.endswith(b"}\n"))
+        self.assertEqual(json.loads(response.data), self.payload)
+        self.assertEqual(app.json.loads(app.json.dumps(self.payload)), self.payload)
+        self.assertEqual(
+            json.loads(app.json.dumps(self.payload, indent=4)), self.payload
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Tests for the load-test workload's helpers."""
+
+import random
+import unittest
+from unittest.mock import MagicMock, patch
+
+try:
+    import locustfile
+except ImportError:
+    locustfile = None  # type: ignore[assignment]
+
+
+def response(payload):
+    stub = MagicMock()
+    stub.json.return_value = payload
+    return stub
+
+
+@unittest.skipIf(locustfile is None, "locust is not installed")
+class UniverseTestCase(unittest.TestCase):
+    """Test cases for reading the workload universe from the API."""
+
+    def test_fetch_reads_the_response_envelope(self):
+        structure = {
+            "status": "success",
+            "data": {
+                "Technology": [{"ticker": "MSFT"}, {"ticker": "AAPL"}, {"name": "x"}],
+                "Energy": [],
+            },
+        }
+        assets = {"status": "success", "data": [], "total": 42}
+        with patch.object(
+            locustfile.requests,
+            "get",
+            side_effect=[response(structure), response(assets)],
+        ) as get:
+            universe = locustfile.Universe.fetch("http://api", "key")
+
+        self.assertEqual(
+            universe.sectors, {"Technology": ["MSFT", "AAPL"], "Energy": []}
+        )
+        self.assertEqual(universe.sector_names, ["Technology"])
+        self.assertEqual(universe.tickers, ["AAPL", "MSFT"])
+        self.assertEqual(universe.real_assets_total, 42)
+        self.assertEqual(
+            get.call_args_list[0].args, ("http://api/api/v1/corporate-structure",)
+        )
+        self.assertEqual(get.call_args.kwargs["headers"], {"X-API-KEY": "key"})
+
+
+@unittest.skipIf(locustfile is None, "locust is not installed")
+class WorkloadOptionsTestCase(unittest.TestCase):
+    """Test cases for task weights and page selection."""
+
+    def test_parse_weights_overrides_defaults(self):
+        weights = locustfile.parse_weights("health=5, export_companies=1,")
+        self.assertEqual(weights["health"], 5)
+        self.assertEqual(weights["export_companies"], 1)
+        self.assertEqual(weights["company_by_ticker"], 10)
+
+    def test_parse_weights_rejects_unknown_tasks(self):
+        with self.assertRaises(ValueError):
+            locustfile.parse_weights("nope=1")
+
+    def test_random_page_stays_in_range(self):
+        rng = random.Random(7)
+        pages = {locustfile.random_page(rng, 95, 10) for _ in range(1000)}
+        self.assertTrue(pages <= set(range(1, 11)))
+        self.assertEqual(locustfile.random_page(rng, 0, 10), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+"""Tests for the logging configuration."""
+
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.logging_config import (
+    DeferredQueueHandler,
+    JSONFormatter,
+    RateSampler,
+    configure_logging,
+    rotate_log_files,
+    shutdown_logging,
+)
+
+
+def make_record(message, *args, level=logging.INFO, name="test", **extra):
+    record = logging.LogRecord(name, level, __file__, 1, message, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class JSONFormatterTestCase(unittest.TestCase):
+    """Test cases for the JSON formatter."""
+
+    def test_special_characters_are_escaped(self):
+        record = make_record('quote " backslash \\ newline \n %s', "arg")
+        payload = json.loads(JSONFormatter().format(record))
+        self.assertEqual(payload["message"], 'quote " backslash \\ newline \n arg')
+        self.assertEqual(payload["level"], "INFO")
+        self.assertEqual(payload["logger"], "test")
+
+    def test_extra_fields_and_exceptions(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord(
+                "test", logging.ERROR, __file__, 1, "failed", None, sys.exc_info()
+            )
+        record.path = "/api"
+        record.payload = object()
+        payload = json.loads(JSONFormatter().format(record))
+        self.assertEqual(payload["path"], "/api")
+        self.assertIn("object object", payload["payload"])
+        self.assertIn("ValueError: boom", payload["exception"])
+
+
+class RateSamplerTestCase(unittest.TestCase):
+    """Test cases for rate-based sampling."""
+
+    def test_info_is_sampled_and_warnings_pass(self):
+        sampler = RateSampler(rate=3)
+        passed = [sampler.filter(make_record("hit")) for _ in range(10)]
+        self.assertEqual(passed.count(True), 3)
+        self.assertTrue(sampler.filter(make_record("bad", level=logging.WARNING)))
+        # Each logger and level has its own budget.
+        self.assertTrue(sampler.filter(make_record("hit", name="other")))
+
+    def test_dropped_count_is_reported(self):
+        sampler = RateSampler(rate=1)
+        sampler.filter(make_record("first"))
+        sampler.filter(make_record("dropped"))
+        with patch("src.logging_config.time.monotonic", return_value=1e12):
+            record = make_record("later")
+            self.assertTrue(sampler.filter(record))
+        self.assertEqual(record.sampled_out, 1)
+
+
+class DeferredQueueHandlerTestCase(unittest.TestCase):
+    """Test cases for the queue handler."""
+
+    def test_message_is_frozen_but_not_formatted(self):
+        handler = DeferredQueueHandler(None)
+        items = ["a"]
+        prepared = handler.prepare(make_record("items %s", items))
+        items.append("b")
+        self.assertEqual(prepared.msg, "items ['a']")
+        self.assertIsNone(prepared.args)
+
+
+class ConfigureLoggingTestCase(unittest.TestCase):
+    """Test cases for configure_logging."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.root = logging.getLogger()
+        self.saved = (self.root.level, list(self.root.handlers))
+
+    def tearDown(self):
+        shutdown_logging()
+        for handler in list(self.root.handlers):
+            self.root.removeHandler(handler)
+        self.root.setLevel(self.saved[0])
+        for handler in self.saved[1]:
+            self.root.addHandler(handler)
+        shutil.rmtree(self.tmp_dir)
+
+    def test_production_mode_writes_json_lines(self):
+        log_file = os.path.join(self.tmp_dir, "logs", "api.log")
+        env = {"LOG_FILE": log_file, "LOG_LEVEL": "INFO", "LOG_SAMPLE_RATE": "100"}
+        with patch.dict(os.environ, env):
+            listener = configure_logging("production")
+        self.assertIsNotNone(listener)
+        logging.getLogger("api").info("served %s", "/health", extra={"status": 200})
+        logging.getLogger("api").debug("below level")
+        shutdown_logging()
+
+        with open(log_file, encoding="utf-8") as file_handle:
+            lines = [json.loads(line) for line in file_handle]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["message"], "served /health")
+        self.assertEqual(lines[0]["status"], 200)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires fork")
+    def test_forked_child_gets_its_own_listener(self):
+        log_file = os.path.join(self.tmp_dir, "api.log")
+        with patch.dict(os.environ, {"LOG_FILE": log_file, "LOG_LEVEL": "INFO"}):
+            configure_logging("production")
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - runs in the child
+            logging.getLogger("worker").warning("from child")
+            shutdown_logging()
+            os._exit(0)
+        os.waitpid(pid, 0)
+        logging.getLogger("master").warning("from parent")
+        shutdown_logging()
+
+        with open(log_file, encoding="utf-8") as file_handle:
+            messages = sorted(json.loads(line)["message"] for line in file_handle)
+        self.assertEqual(messages, ["from child", "from parent"])
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires fork")
+    def test_only_the_parent_rotates_the_file(self):
+        log_file = os.path.join(self.tmp_dir, "api.log")
+        env = {"LOG_FILE": log_file, "LOG_MAX_SIZE": "1000", "LOG_SAMPLE_RATE": "1e6"}
+        with patch.dict(os.environ, env):
+            configure_logging("production")
+
+        def in_child(message, count):
+            sys.stderr.flush()
+            pid = os.fork()
+            if pid == 0:  # pragma: no cover - runs in the child
+                for _ in range(count):
+                    logging.getLogger("worker").warning(message)
+                shutdown_logging()
+                os._exit(0)
+            os.waitpid(pid, 0)
+
+        in_child("before", 50)
+        self.assertFalse(os.path.exists(log_file + ".1"))
+        self.assertGreater(os.path.getsize(log_file), 1000)
+
+        rotate_log_files()
+        in_child("after", 1)
+        shutdown_logging()
+
+        with open(log_file + ".1", encoding="utf-8") as file_handle:
+            self.assertEqual(len(file_handle.readlines()), 50)
+        with open(log_file, encoding="utf-8") as file_handle:
+            messages = [json.loads(line)["message"] for line in file_handle]
+        self.assertEqual(messages, ["after"])
+
+    def test_development_mode_is_synchronous_text(self):
+        with patch.dict(os.environ, {"LOG_LEVEL": "DEBUG"}):
+            self.assertIsNone(configure_logging("development"))
+        self.assertEqual(self.root.level, logging.DEBUG)
+        self.assertEqual(len(self.root.handlers), 1)
+        self.assertIsInstance(self.root.handlers[0], logging.StreamHandler)
+
+
+if __name__ == "__main__":
+    unittest.main()
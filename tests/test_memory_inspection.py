@@ -0,0 +1,80 @@
+"""Tests for tracemalloc-based allocation tracking."""
+
+import tracemalloc
+import unittest
+
+from src.memory_inspection import MemoryTracker, UnknownSnapshotError
+
+_retained = []
+
+
+def leak(kilobytes):
+    _retained.append(bytearray(kilobytes * 1024))
+
+
+class MemoryTrackerTestCase(unittest.TestCase):
+    """Test cases for MemoryTracker."""
+
+    def setUp(self):
+        self.tracker = MemoryTracker()
+
+    def tearDown(self):
+        if tracemalloc.is_tracing():
+            self.tracker.stop()
+        _retained.clear()
+
+    def test_snapshots_require_tracing(self):
+        with self.assertRaises(RuntimeError):
+            self.tracker.take_snapshot()
+
+    def test_diff_points_at_the_growing_line(self):
+        self.tracker.start(frames=3)
+        first = self.tracker.take_snapshot()
+        leak(512)
+        second = self.tracker.take_snapshot()
+
+        diff = self.tracker.diff(first, second, limit=1)
+        self.assertIn("test_memory_inspection.py", diff[0]["location"])
+        self.assertGreaterEqual(diff[0]["size_diff"], 512 * 1024)
+
+        by_file = self.tracker.diff(
+            first, second, group_by="filename", include=["*test_memory_inspection*"]
+        )
+        self.assertEqual(len(by_file), 1)
+        self.assertTrue(by_file[0]["location"].endswith("test_memory_inspection.py"))
+
+        top = self.tracker.top(second, group_by="traceback", limit=1)
+        self.assertIn(" <- ", top[0]["location"])
+
+    def test_unknown_and_evicted_snapshots(self):
+        self.tracker.start()
+        ids = [self.tracker.take_snapshot() for _ in range(11)]
+        with self.assertRaises(UnknownSnapshotError):
+            self.tracker.top(ids[0])
+        self.assertEqual(self.tracker.status()["snapshots"], ids[1:])
+
+    def test_per_route_totals(self):
+        self.tracker.start()
+        started = self.tracker.request_started()
+        leak(256)
+        self.tracker.request_finished("/leaky", started)
+
+        started = self.tracker.request_started()
+        scratch = bytearray(1024 * 1024)
+        del scratch
+        self.tracker.request_finished("/transient", started)
+
+        rows = {row["route"]: row for row in self.tracker.routes()}
+        self.assertGreaterEqual(rows["/leaky"]["net_bytes_per_request"], 256 * 1024)
+        self.assertLess(rows["/transient"]["net_bytes"], 64 * 1024)
+        self.assertGreaterEqual(rows["/transient"]["max_peak_bytes"], 1024 * 1024)
+
+    def test_not_tracing_is_a_no_op(self):
+        self.assertIsNone(self.tracker.request_started())
+        self.tracker.request_finished("/route", None)
+        self.assertEqual(self.tracker.routes(), [])
+        self.assertFalse(self.tracker.status()["tracing"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+"""Tests for the Prometheus metrics registry."""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from src.metrics import MetricsRegistry
+
+
+class MetricsRegistryTestCase(unittest.TestCase):
+    """Test cases for counters, histograms and gauges."""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.registry.counter("requests_total", "Requests.")
+        self.registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+
+    def test_counters_aggregate_across_threads(self):
+        def worker():
+            for _ in range(1000):
+                self.registry.inc("requests_total", route="/a")
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        counters, _ = self.registry.collect()
+        self.assertEqual(counters[("requests_total", (("route", "/a"),))], 4000)
+
+    def test_histogram_rendering(self):
+        for value in (0.05, 0.1, 0.5, 3.0):
+            self.registry.observe("latency_seconds", value, route="/a")
+        text = self.registry.render()
+        self.assertIn("# TYPE latency_seconds histogram", text)
+        self.assertIn('latency_seconds_bucket{route="/a",le="0.1"} 2', text)
+        self.assertIn('latency_seconds_bucket{route="/a",le="1"} 3', text)
+        self.assertIn('latency_seconds_bucket{route="/a",le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_sum{route="/a"} 3.65', text)
+        self.assertIn('latency_seconds_count{route="/a"} 4', text)
+
+    def test_label_values_are_escaped(self):
+        self.registry.inc("requests_total", route='a"b\\c\nd')
+        self.assertIn(
+            'requests_total{route="a\\"b\\\\c\\nd"} 1', self.registry.render()
+        )
+
+    def test_gauges_receive_counters(self):
+        self.registry.inc("requests_total", 3)
+        self.registry.gauge(
+            "doubled",
+            "Twice the requests.",
+            lambda counters: 2 * counters[("requests_total", ())],
+        )
+        self.registry.gauge("broken", "Fails.", lambda counters: 1 / 0)
+        text = self.registry.render()
+        self.assertIn("doubled 6", text)
+        self.assertIn("# TYPE broken gauge", text)
+
+    def test_timer(self):
+        with self.registry.timer("latency_seconds", stage="auth"):
+            pass
+        _, histograms = self.registry.collect()
+        self.assertEqual(
+            sum(histograms[("latency_seconds", (("stage", "auth"),))][:-1]), 1
+        )
+
+
+class MultiprocessTestCase(unittest.TestCase):
+    """Test cases for aggregation across worker processes."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_scrape_sums_every_worker(self):
+        worker = MetricsRegistry(directory=self.directory)
+        worker.inc("requests_total", 5, route="/a")
+        # Simulate another worker's flushed totals.
+        other_file = os.path.join(self.directory, "metrics-999999.json")
+        with open(other_file, "w", encoding="utf-8") as fh:
+            fh.write(
+                '{"counters": [["requests_total", [["route", "/a"]], 7]],'
+                ' "histograms": []}'
+            )
+        with open(os.path.join(self.directory, "metrics-1.json"), "w") as fh:
+            fh.write("{truncated")
+
+        counters, _ = worker.aggregate()
+        self.assertEqual(counters[("requests_total", (("route", "/a"),))], 12)
+        self.assertTrue(
+            os.path.exists(os.path.join(self.directory, f"metrics-{os.getpid()}.json"))
+        )
+
+    def write_worker(self, pid, value, **extra):
+        data = {
+            "counters": [["requests_total", [["route", "/a"]], value]],
+            "histograms": [["latency_seconds", [], [value, 0, 0, value / 10]]],
+            **extra,
+        }
+        with open(
+            os.path.join(self.directory, f"metrics-{pid}.json"), "w", encoding="utf-8"
+        ) as fh:
+            json.dump(data, fh)
+
+    def test_exited_workers_are_folded_into_one_file(self):
+        """Retiring keeps the totals, removes the file and survives pid reuse."""
+        scraper = MetricsRegistry(directory=self.directory)
+        key = ("requests_total", (("route", "/a"),))
+        self.write_worker(1001, 7)
+        self.write_worker(1002, 5)
+        scraper.retire(1001)
+        scraper.retire(1002)
+        scraper.retire(1003)  # never flushed
+
+        counters, histograms = scraper.aggregate()
+        self.assertEqual(counters[key], 12)
+        self.assertEqual(histograms[("latency_seconds", ())], [12, 0, 0, 1.2])
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            sorted(["metrics-retired.json", f"metrics-{os.getpid()}.json"]),
+        )
+
+        self.write_worker(1001, 1)
+        self.assertEqual(scraper.aggregate()[0][key], 13)
+
+    def test_file_being_folded_is_counted_once(self):
+        scraper = MetricsRegistry(directory=self.directory)
+        self.write_worker(1001, 7)
+        self.write_worker("retired", 7, folded=[1001])
+        counters, _ = scraper.aggregate()
+        self.assertEqual(counters[("requests_total", (("route", "/a"),))], 7)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires fork")
+    def test_forked_worker_starts_empty(self):
+        """A worker does not report the values its parent recorded before the fork."""
+        parent = MetricsRegistry(directory=self.directory)
+        parent.inc("requests_total", 5, route="/a")
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - runs in the child
+            try:
+                parent.inc("requests_total", 1, route="/a")
+                parent.flush()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+
+        counters, _ = parent.aggregate()
+        self.assertEqual(counters[("requests_total", (("route", "/a"),))], 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+"""Tests for keyset cursor tokens."""
+
+import unittest
+
+from src.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+class CursorTokenTestCase(unittest.TestCase):
+    """Test cases for cursor encoding and validation."""
+
+    def setUp(self):
+        self.query = {
+            "sort_by": "market_cap",
+            "descending": False,
+            "min_market_cap": 1.5,
+        }
+
+    def test_round_trip(self):
+        """A token decodes to the version and key it was issued with."""
+        token = encode_cursor("abc123", self.query, (2000, "GOOG", 3))
+        self.assertNotIn("=", token)
+        self.assertEqual(
+            decode_cursor(token, dict(self.query)), ("abc123", (2000, "GOOG", 3))
+        )
+
+    def test_key_without_position(self):
+        """Tokens issued before positions were added still decode."""
+        for key in ((2000, "GOOG"), (2000, "GOOG", None)):
+            token = encode_cursor("abc123", self.query, key)
+            self.assertEqual(
+                decode_cursor(token, self.query), ("abc123", (2000, "GOOG", None))
+            )
+
+    def test_query_mismatch(self):
+        """A token cannot be replayed against different query parameters."""
+        token = encode_cursor("abc123", self.query, (2000, "GOOG", 3))
+        with self.assertRaises(InvalidCursorError):
+            decode_cursor(token, {**self.query, "descending": True})
+
+    def test_malformed_tokens(self):
+        """Garbage and tampered tokens are rejected."""
+        for token in (
+            "not-a-cursor",
+            "e30",
+            encode_cursor("v", self.query, (True, "X", 0)),
+            encode_cursor("v", self.query, (1, "X", "0")),
+            encode_cursor("v", self.query, (1, "X", True)),
+        ):
+            with self.assertRaises(InvalidCursorError):
+                decode_cursor(token, self.query)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+"""Tests for the pre-forking server."""
+
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import unittest
+import urllib.request
+
+from src.prefork import PreforkServer
+
+
+def pid_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [str(os.getpid()).encode()]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeDataStore:
+    """A data store whose version changes when told to."""
+
+    class Snapshot:
+        def __init__(self, version):
+            self.version = version
+
+        def build_derived(self, include_lazy=False):
+            pass
+
+    def __init__(self, version_file):
+        self.version_file = version_file
+        self.check_interval = 1.0
+
+    def snapshot(self):
+        with open(self.version_file, encoding="utf-8") as file_handle:
+            return self.Snapshot(file_handle.read())
+
+    def refresh(self, wait=True):
+        return self.snapshot()
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "requires fork")
+class PreforkServerTestCase(unittest.TestCase):
+    """Run a master with two workers in a child process."""
+
+    def setUp(self):
+        self.port = free_port()
+        self.version_file = os.path.join(
+            os.environ.get("TMPDIR", "/tmp"), f"prefork-version-{self.port}"
+        )
+        with open(self.version_file, "w", encoding="utf-8") as file_handle:
+            file_handle.write("v1")
+        self.addCleanup(os.remove, self.version_file)
+        self.exit_file = f"{self.version_file}-exits"
+        open(self.exit_file, "w", encoding="utf-8").close()
+        self.addCleanup(os.remove, self.exit_file)
+        server = PreforkServer(
+            pid_app,
+            host="127.0.0.1",
+            port=self.port,
+            workers=2,
+            threads=2,
+            data_store=FakeDataStore(self.version_file),
+            on_exit=self.record_exit,
+            reload_interval=0.1,
+            graceful_timeout=5,
+        )
+        context = multiprocessing.get_context("fork")
+        self.master = context.Process(target=server.run, daemon=True)
+        self.master.start()
+        self.addCleanup(self.stop_master)
+
+    def record_exit(self, pid):
+        with open(self.exit_file, "a", encoding="utf-8") as file_handle:
+            file_handle.write(f"{pid}\n")
+
+    def exited_pids(self):
+        with open(self.exit_file, encoding="utf-8") as file_handle:
+            return {int(line) for line in file_handle}
+
+    def stop_master(self):
+        if self.master.is_alive():
+            os.kill(self.master.pid, signal.SIGKILL)
+        self.master.join(5)
+
+    def worker_pids(self, requests=40):
+        pids = set()
+        deadline = time.monotonic() + 10
+        while len(pids) < 2 and time.monotonic() < deadline:
+            for _ in range(requests):
+                try:
+                    url = f"http://127.0.0.1:{self.port}/"
+                    with urllib.request.urlopen(url, timeout=5) as response:
+                        pids.add(int(response.read()))
+                except OSError:
+                    time.sleep(0.05)
+        return pids
+
+    def wait_for_new_workers(self, old_pids):
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline:
+            pids = self.worker_pids()
+            if pids and not pids & old_pids:
+                return pids
+            time.sleep(0.1)
+        self.fail("workers were not replaced")
+
+    def test_workers_serve_and_restart(self):
+        pids = self.worker_pids()
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(self.master.pid, pids)
+
+        os.kill(self.master.pid, signal.SIGHUP)
+        after_hup = self.wait_for_new_workers(pids)
+
+        with open(self.version_file, "w", encoding="utf-8") as file_handle:
+            file_handle.write("v2")
+        self.wait_for_new_workers(after_hup)
+
+        os.kill(self.master.pid, signal.SIGTERM)
+        self.master.join(10)
+        self.assertEqual(self.master.exitcode, 0)
+
+    def test_dead_worker_is_replaced(self):
+        pids = self.worker_pids()
+        victim = pids.pop()
+        os.kill(victim, signal.SIGKILL)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            current = self.worker_pids()
+            if victim not in current and len(current) == 2:
+                self.assertIn(victim, self.exited_pids())
+                return
+            time.sleep(0.1)
+        self.fail("killed worker was not replaced")
+
+
+if __name__ == "__main__":
+    unittest.main()
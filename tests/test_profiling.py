@@ -0,0 +1,90 @@
+"""Tests for request profiling and the sampling profiler."""
+
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from src import profiling
+
+
+def busy_work():
+    return sum(i * i for i in range(20000))
+
+
+class RequestProfileTestCase(unittest.TestCase):
+    """Test cases for single-request cProfile capture."""
+
+    def test_only_one_profile_at_a_time(self):
+        profile = profiling.start_request_profile()
+        self.assertIsNotNone(profile)
+        try:
+            self.assertIsNone(profiling.start_request_profile())
+            busy_work()
+        finally:
+            profiling.stop_request_profile(profile)
+
+        report = profiling.format_profile(profile, sort="tottime", limit=5)
+        self.assertIn("busy_work", report)
+        second = profiling.start_request_profile()
+        self.assertIsNotNone(second)
+        profiling.stop_request_profile(second)
+
+    def test_dump_profile(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        profile = profiling.start_request_profile()
+        busy_work()
+        profiling.stop_request_profile(profile)
+
+        path = profiling.dump_profile(profile, tmp_dir, "../get real/assets")
+        self.assertEqual(os.path.dirname(path), tmp_dir)
+        self.assertTrue(path.endswith("get_real_assets.prof"))
+        self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+
+class SamplingProfilerTestCase(unittest.TestCase):
+    """Test cases for the background stack sampler."""
+
+    def test_samples_other_threads(self):
+        stop = threading.Event()
+
+        def spin():
+            while not stop.is_set():
+                busy_work()
+
+        worker = threading.Thread(target=spin, name="spinner")
+        worker.start()
+        sampler = profiling.SamplingProfiler()
+        try:
+            self.assertTrue(sampler.start(interval=0.001, duration=5))
+            self.assertFalse(sampler.start())
+            deadline = time.time() + 5
+            while sampler.summary()["samples"] < 20 and time.time() < deadline:
+                time.sleep(0.01)
+            summary = sampler.stop()
+        finally:
+            stop.set()
+            worker.join()
+
+        self.assertFalse(summary["running"])
+        self.assertGreaterEqual(summary["samples"], 20)
+        collapsed = sampler.collapsed()
+        self.assertIn("spinner;", collapsed)
+        self.assertNotIn("sampling-profiler", collapsed)
+        top = {item["function"] for item in sampler.top_functions(50)}
+        self.assertTrue(any(name.startswith("busy_work ") for name in top))
+
+    def test_window_ends_after_duration(self):
+        sampler = profiling.SamplingProfiler()
+        sampler.start(interval=0.001, duration=0.05)
+        sampler._thread.join(timeout=5)
+        self.assertFalse(sampler.summary()["running"])
+        self.assertIsNotNone(sampler.summary()["stopped_at"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+"""Tests for per-API-key token-bucket rate limiting."""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from src.rate_limit import (
+    MemoryBucketStore,
+    SQLiteBucketStore,
+    Tier,
+    TokenBucketLimiter,
+    bucket_id,
+    configured_workers,
+    create_store,
+    parse_key_tiers,
+    parse_tiers,
+)
+
+TIERS = {
+    "free": Tier("free", capacity=2, refill_rate=1.0),
+    "premium": Tier("premium", capacity=10, refill_rate=5.0),
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ParseTestCase(unittest.TestCase):
+    """Test cases for tier configuration parsing."""
+
+    def test_parse_tiers(self):
+        tiers = parse_tiers("free=60/minute, premium=36000/hour:50")
+        self.assertEqual(tiers["free"], Tier("free", 60.0, 1.0))
+        self.assertEqual(tiers["premium"], Tier("premium", 50.0, 10.0))
+
+    def test_parse_tiers_rejects_garbage(self):
+        for spec in ("free", "free=10/fortnight", "free=0/minute", "free=x/minute"):
+            with self.assertRaises(ValueError):
+                parse_tiers(spec)
+
+    def test_parse_key_tiers(self):
+        self.assertEqual(
+            parse_key_tiers("abc=premium,d=ef=free"),
+            {"abc": "premium", "d=ef": "free"},
+        )
+        with self.assertRaises(ValueError):
+            parse_key_tiers("no-tier")
+
+
+class StoreTestMixin:
+    """Behaviour shared by every bucket store."""
+
+    def make_store(self):
+        raise NotImplementedError
+
+    def make_limiter(self, store=None):
+        self.clock = FakeClock()
+        return TokenBucketLimiter(
+            store or self.make_store(),
+            TIERS,
+            key_tiers={"gold-key": "premium"},
+            default_tier="free",
+            clock=self.clock,
+        )
+
+    def test_burst_then_refill(self):
+        limiter = self.make_limiter()
+        self.assertEqual(
+            [limiter.hit("key").allowed for _ in range(3)], [True, True, False]
+        )
+        denied = limiter.hit("key")
+        self.assertEqual(denied.remaining, 0)
+        self.assertAlmostEqual(denied.retry_after, 1.0)
+
+        self.clock.now += 1.0
+        self.assertTrue(limiter.hit("key").allowed)
+        self.assertFalse(limiter.hit("key").allowed)
+
+    def test_tiers_and_keys_are_isolated(self):
+        limiter = self.make_limiter()
+        for _ in range(2):
+            limiter.hit("key")
+        self.assertTrue(limiter.hit("other").allowed)
+        decision = limiter.hit("gold-key")
+        self.assertEqual(
+            (decision.tier, decision.limit, decision.remaining), ("premium", 10, 9)
+        )
+
+    def test_weighted_cost(self):
+        limiter = self.make_limiter()
+        self.assertTrue(limiter.hit("gold-key", cost=8).allowed)
+        self.assertFalse(limiter.hit("gold-key", cost=3).allowed)
+        self.assertTrue(limiter.hit("gold-key", cost=2).allowed)
+
+    def test_clear_refills(self):
+        limiter = self.make_limiter()
+        for _ in range(3):
+            limiter.hit("key")
+        limiter.store.clear()
+        self.assertTrue(limiter.hit("key").allowed)
+
+
+class MemoryBucketStoreTestCase(StoreTestMixin, unittest.TestCase):
+    """Test cases for the per-process store."""
+
+    def make_store(self):
+        return MemoryBucketStore()
+
+
+class SQLiteBucketStoreTestCase(StoreTestMixin, unittest.TestCase):
+    """Test cases for the host-wide SQLite store."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "buckets.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def make_store(self):
+        return SQLiteBucketStore(self.path)
+
+    def test_buckets_are_shared_between_stores(self):
+        """Two stores on one file (one per worker) draw from the same bucket."""
+        first = self.make_limiter(SQLiteBucketStore(self.path))
+        second = TokenBucketLimiter(
+            SQLiteBucketStore(self.path), TIERS, default_tier="free", clock=self.clock
+        )
+        self.assertTrue(first.hit("key").allowed)
+        self.assertTrue(second.hit("key").allowed)
+        self.assertFalse(first.hit("key").allowed)
+
+    def test_concurrent_hits_never_overspend(self):
+        limiter = TokenBucketLimiter(
+            self.make_store(),
+            {"bulk": Tier("bulk", capacity=50, refill_rate=1e-9)},
+            default_tier="bulk",
+        )
+        allowed = []
+
+        def worker():
+            for _ in range(25):
+                allowed.append(limiter.hit("key").allowed)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(allowed.count(True), 50)
+
+
+class LimiterTestCase(unittest.TestCase):
+    """Test cases for limiter configuration."""
+
+    def test_unknown_tiers_are_rejected(self):
+        with self.assertRaises(ValueError):
+            TokenBucketLimiter(MemoryBucketStore(), TIERS, default_tier="gold")
+        with self.assertRaises(ValueError):
+            TokenBucketLimiter(
+                MemoryBucketStore(), TIERS, {"k": "gold"}, default_tier="free"
+            )
+        with self.assertRaises(ValueError):
+            create_store("redis")
+
+    def test_several_workers_share_one_store(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, "buckets.sqlite3")
+        self.assertIsInstance(create_store(), MemoryBucketStore)
+        self.assertIsInstance(create_store(path=path, workers=4), SQLiteBucketStore)
+        with self.assertRaises(ValueError):
+            create_store("memory", workers=4)
+
+    def test_configured_workers(self):
+        self.assertEqual(configured_workers({}), 1)
+        self.assertEqual(configured_workers({"WORKERS": "3"}), 3)
+        self.assertEqual(configured_workers({"WEB_CONCURRENCY": "5"}), 5)
+        self.assertGreaterEqual(configured_workers({"WORKERS": "auto"}), 1)
+
+    def test_raw_keys_are_not_stored(self):
+        self.assertNotIn("secret", bucket_id("secret"))
+        self.assertEqual(len(bucket_id("secret")), 32)
+
+
+if __name__ == "__main__":
+    unittest.main()
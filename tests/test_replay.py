@@ -0,0 +1,162 @@
+"""Tests for the access-log replay tool."""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.replay import (
+    Replayer,
+    Result,
+    change,
+    distribution,
+    percentile,
+    read_log,
+    schedule,
+    summarize,
+)
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.respond()
+
+    def do_POST(self):
+        self.respond()
+
+    def respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.server.seen.append(
+            (
+                self.command,
+                self.path,
+                self.rfile.read(length),
+                self.headers.get("X-API-KEY"),
+            )
+        )
+        status = 404 if self.path == "/missing" else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+class ReadLogTestCase(unittest.TestCase):
+    """Test cases for loading and scheduling access records."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def test_records_are_sorted_and_limited(self):
+        path = os.path.join(self.tmp_dir, "access.jsonl")
+        with open(path, "w", encoding="utf-8") as file_handle:
+            for ts in (3.0, 1.0, 2.0):
+                file_handle.write(json.dumps({"ts": ts, "path": f"/{ts}"}) + "\n")
+            file_handle.write("\n")
+        self.assertEqual([record["ts"] for record in read_log(path)], [1.0, 2.0, 3.0])
+        self.assertEqual([record["ts"] for record in read_log(path, 2)], [1.0, 2.0])
+
+    def test_schedule_compresses_inter_arrival_times(self):
+        records = [{"ts": 100.0}, {"ts": 101.0}, {"ts": 104.0}]
+        self.assertEqual(
+            [due for _, due in schedule(records, 2.0, 10.0)], [10.0, 10.5, 12.0]
+        )
+        self.assertEqual(
+            [due for _, due in schedule(records, 0, 10.0)], [10.0, 10.0, 10.0]
+        )
+
+
+class SummaryTestCase(unittest.TestCase):
+    """Test cases for the latency summaries."""
+
+    def test_percentiles_are_nearest_rank(self):
+        samples = [float(number) for number in range(1, 101)]
+        self.assertEqual(percentile(samples, 0.5), 50.0)
+        self.assertEqual(percentile(samples, 0.99), 99.0)
+        self.assertEqual(percentile([7.0], 0.99), 7.0)
+        self.assertEqual(
+            distribution([0.003, 0.001, 0.002]),
+            {"p50_ms": 2.0, "p90_ms": 3.0, "p95_ms": 3.0, "p99_ms": 3.0, "max_ms": 3.0},
+        )
+
+    def test_summarize_groups_results_by_route(self):
+        records = [{"ts": 10.0}, {"ts": 12.0}, {"ts": 14.0}]
+        results = [
+            Result("/a", 200, 0.001, 0.002),
+            Result("/a", 500, 0.003, 0.004),
+            Result("/b", 200, 0.002, 0.002),
+        ]
+        summary = summarize(records, results, Counter({"ConnectionError": 1}), 2.0)
+        self.assertEqual(summary["requests"], 3)
+        self.assertEqual(summary["completed"], 3)
+        self.assertEqual(summary["captured_span_s"], 4.0)
+        self.assertEqual(summary["throughput"], 1.5)
+        self.assertEqual(summary["transport_errors"], {"ConnectionError": 1})
+        self.assertEqual(summary["routes"]["/a"]["statuses"], {"200": 1, "500": 1})
+        self.assertEqual(summary["routes"]["/b"]["service"]["max_ms"], 2.0)
+        self.assertEqual(summary["overall"]["requests"], 3)
+
+    def test_change(self):
+        self.assertEqual(change(10.0, 15.0), "+50%")
+        self.assertEqual(change(10.0, 5.0), "-50%")
+        self.assertEqual(change(0.0, 5.0), "n/a")
+
+
+class ReplayerTestCase(unittest.TestCase):
+    """Test cases for replaying records against a server."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), RecordingHandler)
+        self.server.seen = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.host = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def test_replays_every_record_with_its_body(self):
+        records = [
+            {"ts": 1.0, "method": "GET", "path": "/a?x=1", "route": "/a"},
+            {"ts": 1.0, "method": "POST", "path": "/b", "body": '{"n": 1}'},
+            {"ts": 1.0, "method": "GET", "path": "/missing", "route": "/missing"},
+        ]
+        replayer = Replayer(self.host, concurrency=2, api_key="key")
+        elapsed = replayer.run(records, speed=0)
+
+        self.assertGreater(elapsed, 0)
+        self.assertEqual(replayer.errors, Counter())
+        self.assertCountEqual(
+            self.server.seen,
+            [
+                ("GET", "/a?x=1", b"", "key"),
+                ("POST", "/b", b'{"n": 1}', "key"),
+                ("GET", "/missing", b"", "key"),
+            ],
+        )
+        statuses = {result.route: result.status for result in replayer.results}
+        # Records without a route are reported under their path.
+        self.assertEqual(statuses, {"/a": 200, "/b": 200, "/missing": 404})
+        for result in replayer.results:
+            self.assertGreaterEqual(result.schedule, result.service)
+
+    def test_transport_errors_are_counted(self):
+        self.server.shutdown()
+        self.server.server_close()
+        replayer = Replayer(self.host, concurrency=1, api_key="")
+        replayer.run([{"ts": 1.0, "method": "GET", "path": "/a"}], speed=0)
+        self.assertEqual(replayer.results, [])
+        self.assertEqual(sum(replayer.errors.values()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,260 @@
+"""Tests for the query-aware response cache."""
+
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+from flask import Flask, jsonify, request
+from werkzeug.datastructures import MultiDict
+
+from src.response_cache import (
+    MemoryBackend,
+    ResponseCache,
+    SQLiteBackend,
+    create_backend,
+    make_cache_key,
+)
+
+
+def entry(body):
+    return 200, [("Content-Type", "application/json")], body
+
+
+class CacheKeyTestCase(unittest.TestCase):
+    """Test cases for cache key normalization."""
+
+    def test_query_order_does_not_matter(self):
+        first = make_cache_key("view", "/p", MultiDict([("a", "1"), ("b", "2")]), "v")
+        second = make_cache_key("view", "/p", MultiDict([("b", "2"), ("a", "1")]), "v")
+        self.assertEqual(first, second)
+
+    def test_query_values_path_and_version_matter(self):
+        base = make_cache_key("view", "/p", MultiDict([("a", "1")]), "v1")
+        self.assertNotEqual(
+            base, make_cache_key("view", "/p", MultiDict([("a", "2")]), "v1")
+        )
+        self.assertNotEqual(
+            base,
+            make_cache_key("view", "/p", MultiDict([("a", "1"), ("a", "2")]), "v1"),
+        )
+        self.assertNotEqual(
+            base, make_cache_key("view", "/q", MultiDict([("a", "1")]), "v1")
+        )
+        self.assertNotEqual(
+            base, make_cache_key("view", "/p", MultiDict([("a", "1")]), "v2")
+        )
+
+
+class BackendTestMixin:
+    """Behaviour shared by every storage backend."""
+
+    def make_backend(self, **bounds):
+        raise NotImplementedError
+
+    def test_round_trip(self):
+        backend = self.make_backend()
+        backend.set("view:1", "view", entry(b"body"), timeout=60)
+        self.assertEqual(backend.get("view:1"), entry(b"body"))
+        self.assertIsNone(backend.get("view:2"))
+
+    def test_expired_entries_are_not_served(self):
+        backend = self.make_backend()
+        backend.set("view:1", "view", entry(b"body"), timeout=-1)
+        self.assertIsNone(backend.get("view:1"))
+
+    def test_lru_eviction_by_entry_count(self):
+        backend = self.make_backend(max_entries=2)
+        backend.set("view:1", "view", entry(b"1"), timeout=60)
+        backend.set("other:2", "other", entry(b"2"), timeout=60)
+        backend.get("view:1")
+        backend.set("view:3", "view", entry(b"3"), timeout=60)
+
+        self.assertIsNotNone(backend.get("view:1"))
+        self.assertIsNone(backend.get("other:2"))
+        self.assertEqual(backend.usage()["entries"], 2)
+        self.assertEqual(backend.stats()["other"]["evictions"], 1)
+
+    def test_eviction_by_size(self):
+        backend = self.make_backend(max_bytes=200)
+        for number in range(5):
+            backend.set(f"view:{number}", "view", entry(b"x" * 60), timeout=60)
+        self.assertLessEqual(backend.usage()["bytes"], 200)
+        self.assertIsNotNone(backend.get("view:4"))
+        self.assertIsNone(backend.get("view:0"))
+
+    def test_oversized_entries_are_skipped(self):
+        backend = self.make_backend(max_bytes=10)
+        backend.set("view:1", "view", entry(b"x" * 100), timeout=60)
+        self.assertEqual(backend.usage()["entries"], 0)
+
+    def test_counters_and_clear(self):
+        backend = self.make_backend()
+        backend.record("view", "hits")
+        backend.record("view", "hits")
+        backend.record("view", "misses")
+        self.assertEqual(
+            backend.stats(), {"view": {"hits": 2, "misses": 1, "evictions": 0}}
+        )
+        backend.set("view:1", "view", entry(b"1"), timeout=60)
+        backend.clear()
+        self.assertEqual(backend.stats(), {})
+        self.assertIsNone(backend.get("view:1"))
+
+
+class MemoryBackendTestCase(BackendTestMixin, unittest.TestCase):
+    """Test cases for the per-process LRU backend."""
+
+    def make_backend(self, **bounds):
+        return MemoryBackend(**bounds)
+
+
+class SQLiteBackendTestCase(BackendTestMixin, unittest.TestCase):
+    """Test cases for the cross-worker SQLite backend."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "cache.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def make_backend(self, **bounds):
+        return SQLiteBackend(
+            self.path, touch_interval=0.0, stats_flush_interval=0.0, **bounds
+        )
+
+    def test_entries_are_shared_between_instances(self):
+        """Separate backends on one file (one per worker) share entries."""
+        writer = self.make_backend()
+        reader = self.make_backend()
+        writer.set("view:1", "view", entry(b"shared"), timeout=60)
+        reader.record("view", "hits")
+        self.assertEqual(reader.get("view:1"), entry(b"shared"))
+        self.assertEqual(writer.stats()["view"]["hits"], 1)
+
+    def test_counters_are_buffered_between_flushes(self):
+        """Hits and misses reach the shared table once per flush interval."""
+        worker = SQLiteBackend(self.path, stats_flush_interval=3600)
+        other = self.make_backend()
+        worker.record("view", "hits")
+        worker.record("view", "misses")
+        self.assertEqual(other.stats(), {})
+        worker.flush_stats()
+        self.assertEqual(
+            other.stats(), {"view": {"hits": 1, "misses": 1, "evictions": 0}}
+        )
+
+    @unittest.skipUnless(hasattr(os, "getuid"), "POSIX permissions only")
+    def test_database_is_private_to_its_owner(self):
+        """The file is created 0600 inside a 0700 directory."""
+        path = os.path.join(self.tmp_dir, "cache", "cache.sqlite3")
+        SQLiteBackend(path)
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+        self.assertEqual(stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode), 0o700)
+
+        self.make_backend()
+        os.chmod(self.path, 0o644)
+        self.make_backend()
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "symlinks unavailable")
+    def test_symlinked_database_is_refused(self):
+        target = os.path.join(self.tmp_dir, "elsewhere")
+        os.symlink(target, self.path)
+        with self.assertRaises(OSError):
+            self.make_backend()
+        self.assertFalse(os.path.exists(target))
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    """Test cases for the view decorator."""
+
+    def setUp(self):
+        self.calls = 0
+        self.version = "v1"
+        self.cache = ResponseCache(MemoryBackend(), version=lambda: self.version)
+        app = Flask(__name__)
+
+        @app.route("/items")
+        @self.cache.cached(timeout=60)
+        def items():
+            self.calls += 1
+            if request.args.get("fail"):
+                return jsonify({"status": "error"}), 400
+            return jsonify({"page": request.args.get("page"), "calls": self.calls})
+
+        self.client = app.test_client()
+
+    def test_hits_replay_the_stored_response(self):
+        first = self.client.get("/items?page=1")
+        second = self.client.get("/items?page=1")
+        self.assertEqual(first.headers["X-Cache"], "MISS")
+        self.assertEqual(second.headers["X-Cache"], "HIT")
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second.mimetype, "application/json")
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(
+            self.cache.stats()["endpoints"]["items"],
+            {"hits": 1, "misses": 1, "evictions": 0},
+        )
+
+    def test_errors_are_not_cached(self):
+        self.client.get("/items?fail=1")
+        response = self.client.get("/items?fail=1")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.calls, 2)
+
+    def test_version_change_misses(self):
+        self.client.get("/items")
+        self.version = "v2"
+        self.assertEqual(self.client.get("/items").headers["X-Cache"], "MISS")
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            create_backend("redis")
+
+    def test_sqlite_backend_requires_a_path(self):
+        with self.assertRaises(ValueError):
+            create_backend("sqlite")
+
+
+class PrivateViewTestCase(unittest.TestCase):
+    """Test cases for views kept out of shared storage."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.calls = 0
+
+    def make_client(self, backend):
+        cache = ResponseCache(backend)
+        app = Flask(__name__)
+
+        @app.route("/account")
+        @cache.cached(timeout=60, shared=False)
+        def account():
+            self.calls += 1
+            return jsonify({"calls": self.calls})
+
+        return cache, app.test_client()
+
+    def test_memory_backend_caches_private_views(self):
+        _, client = self.make_client(MemoryBackend())
+        client.get("/account")
+        self.assertEqual(client.get("/account").headers["X-Cache"], "HIT")
+        self.assertEqual(self.calls, 1)
+
+    def test_shared_backend_never_stores_private_views(self):
+        backend = SQLiteBackend(os.path.join(self.tmp_dir, "cache.sqlite3"))
+        cache, client = self.make_client(backend)
+        client.get("/account")
+        response = client.get("/account")
+        self.assertNotIn("X-Cache", response.headers)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
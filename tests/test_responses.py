@@ -0,0 +1,57 @@
+"""Tests for pre-serialized response bodies."""
+
+import json
+import unittest
+
+from src.responses import PreparedResponse, iter_ndjson
+
+
+class PreparedResponseTestCase(unittest.TestCase):
+    """Test cases for PreparedResponse variants and validators."""
+
+    def setUp(self):
+        payload = {
+            "status": "success",
+            "data": {"Technology": [{"ticker": "MSFT"}] * 50},
+        }
+        self.prepared = PreparedResponse.from_payload(payload, json.dumps)
+
+    def test_compression_is_deterministic(self):
+        """Identical bodies produce identical compressed bytes and tags."""
+        other = PreparedResponse(self.prepared.bodies["identity"])
+        self.assertEqual(other.bodies["gzip"], self.prepared.bodies["gzip"])
+        self.assertEqual(other.etag("gzip"), self.prepared.etag("gzip"))
+
+    def test_small_bodies_are_not_compressed(self):
+        """Compression is skipped when it would not shrink the body."""
+        self.assertEqual(list(PreparedResponse(b"{}\n").bodies), ["identity"])
+
+    def test_if_none_match(self):
+        """Any representation's tag, weak or strong, validates."""
+        digest = self.prepared.digest
+        self.assertTrue(self.prepared.matches(self.prepared.etag()))
+        self.assertTrue(self.prepared.matches(f'"other", W/"{digest}-gzip"'))
+        self.assertTrue(self.prepared.matches("*"))
+        self.assertFalse(self.prepared.matches('"other"'))
+        self.assertFalse(self.prepared.matches(None))
+
+
+class NdjsonTestCase(unittest.TestCase):
+    """Test cases for NDJSON streaming."""
+
+    def test_lines_are_batched_into_chunks(self):
+        """Records become one JSON line each, grouped into bounded chunks."""
+        records = ({"id": index} for index in range(1000))
+        chunks = list(iter_ndjson(records, chunk_bytes=1024))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(chunk.endswith(b"\n") for chunk in chunks))
+        lines = b"".join(chunks).splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], list(range(1000)))
+
+    def test_empty_stream(self):
+        """No records produce no chunks."""
+        self.assertEqual(list(iter_ndjson([])), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""Start-up must not import the analytics stack or read data eagerly."""
+
+import subprocess
+import sys
+import unittest
+
+from benchmarks.bench_startup import ROOT, forbidden_imports, parse_importtime
+
+
+def imported_modules(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+class StartupImportsTestCase(unittest.TestCase):
+    def test_wsgi_does_not_import_analytics(self):
+        modules = imported_modules("import wsgi")
+        self.assertIn("src.api_server", modules)
+        self.assertEqual(forbidden_imports(modules), [])
+
+    def test_analytics_modules_import_numpy_on_first_use(self):
+        modules = imported_modules(
+            "import ai_predictive, ai_nl_query, ai_report\n"
+            "ai_predictive.CorporatePredictiveModel()\n"
+            "ai_nl_query.NaturalLanguageQuery()\n"
+            "ai_report.ReportGenerator()\n"
+        )
+        self.assertNotIn("numpy", modules)
+        self.assertNotIn("sklearn", modules)
+
+    def test_bank_module_has_no_import_side_effects(self):
+        code = (
+            "import sys\n"
+            "before = list(sys.path)\n"
+            "import src.bank_communication\n"
+            "assert sys.path == before, sys.path\n"
+        )
+        modules = imported_modules(code)
+        self.assertNotIn("dotenv", modules)
+
+
+if __name__ == "__main__":
+    unittest.main()
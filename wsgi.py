@@ -1,4 +1,18 @@
+import os
+
+# Settings are read from the environment as the src modules are imported, so
+# a project .env file, if there is one, is loaded first.
+if os.path.exists(
+    env_file := os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+):
+    from dotenv import load_dotenv
+
+    load_dotenv(env_file)
+
 from src.api_server import app
+from src.logging_config import configure_logging
+
+configure_logging()
 
 if __name__ == "__main__":
     app.run()